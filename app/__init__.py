@@ -1,27 +1,22 @@
 import os
-import logging
+from logging import ERROR, INFO
+import threading
+from functools import lru_cache
 
 import sentry_sdk
-from sentry_sdk.integrations.flask import FlaskIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
-from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
-from apispec import APISpec
-from apispec.ext.marshmallow import MarshmallowPlugin
-from flask import Flask, g
-from flask_apispec.extension import FlaskApiSpec
-from flask_compress import Compress
-from flask_cors import CORS
+from flask import Flask, g, jsonify
 from flask_migrate import Migrate
 from hashids import Hashids
 from werkzeug.exceptions import HTTPException
+from werkzeug.local import LocalProxy
 
 import config
 from app.helpers.db import SQLAlchemyWithStrongRefSession
 from app.helpers.errors import MobilicError
 from app.helpers.request_parser import CustomRequestParser
-from app.helpers.siren import SirenAPIClient
 from app.templates.filters import JINJA_CUSTOM_FILTERS
-from config import MOBILIC_ENV
+from config import MOBILIC_BOOT_MODE, MOBILIC_ENV
 
 
 def _sentry_traces_sampler(sampling_context):
@@ -49,46 +44,62 @@ def _sentry_before_send(event, hint):
     return event
 
 
-sentry_sdk.init(
-    dsn=os.environ.get("SENTRY_DSN"),
-    before_send=_sentry_before_send,
-    traces_sampler=_sentry_traces_sampler,
-    integrations=[
-        LoggingIntegration(level=logging.INFO, event_level=logging.ERROR),
-        FlaskIntegration(),
-        SqlalchemyIntegration(),
-    ],
-    environment=os.environ.get("SENTRY_ENVIRONMENT"),
-    send_default_pii=False,
-)
-app = Flask(__name__)
+def init_sentry(with_web_integrations):
+    """
+    The Flask and SQLAlchemy integrations, as well as the ones sentry enables
+    automatically, only serve the HTTP requests and take most of the init time :
+    the "light" boot mode starts with the logging integration only, which is
+    still needed to report the errors of the CLI commands and workers.
+    """
+    integrations = [LoggingIntegration(level=INFO, event_level=ERROR)]
+    if with_web_integrations:
+        from sentry_sdk.integrations.flask import FlaskIntegration
+        from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+
+        integrations += [FlaskIntegration(), SqlalchemyIntegration()]
+    sentry_sdk.init(
+        dsn=os.environ.get("SENTRY_DSN"),
+        before_send=_sentry_before_send,
+        traces_sampler=_sentry_traces_sampler,
+        integrations=integrations,
+        auto_enabling_integrations=with_web_integrations,
+        environment=os.environ.get("SENTRY_ENVIRONMENT"),
+        send_default_pii=False,
+    )
 
-Compress(app)
-# See list of possible settings at https://pypi.org/project/Flask-Compress/1.13/
-app.config.update({"COMPRESS_MIN_SIZE": 100})
-app.config.update(
-    {
-        "APISPEC_SPEC": APISpec(
-            title="Mobilic",
-            version="v1",
-            openapi_version="3.0.0",
-            plugins=[MarshmallowPlugin()],
-        ),
-        "APISPEC_WEBARGS_PARSER": CustomRequestParser(),
-    }
-)
 
-docs = FlaskApiSpec(app)
+init_sentry(with_web_integrations=MOBILIC_BOOT_MODE != "light")
+app = Flask(__name__)
 
 app.config.from_object(getattr(config, f"{MOBILIC_ENV.capitalize()}Config"))
 
-siren_api_client = SirenAPIClient(app.config["SIREN_API_KEY"])
+
+@lru_cache(maxsize=None)
+def _get_siren_api_client():
+    from app.helpers.siren import SirenAPIClient
+
+    return SirenAPIClient(
+        app.config["SIREN_API_KEY"],
+        endpoint=app.config["SIREN_API_URL"],
+        max_requests_per_minute=app.config[
+            "SIREN_API_MAX_REQUESTS_PER_MINUTE"
+        ],
+    )
+
+
+def _get_mailer():
+    from app.helpers.mail import mailer
+
+    return mailer
+
+
+# Both are only built when first used, as most CLI commands and workers never do
+siren_api_client = LocalProxy(_get_siren_api_client)
+mailer = LocalProxy(_get_mailer)
 
 for name, filter in JINJA_CUSTOM_FILTERS.items():
     app.template_filter(name)(filter)
 
-from app.helpers.mail import mailer
-
 hashids = Hashids(salt=app.config["HASH_ID_SECRET"], min_length=8)
 
 db = SQLAlchemyWithStrongRefSession(
@@ -100,16 +111,9 @@ if app.config["ECHO_DB_QUERIES"]:
 
 Migrate(app, db)
 
-CORS(app)
-
-from app.helpers.graphql import CustomGraphQLView, SafeGraphQLBackend
-from app.controllers import (
-    graphql_schema,
-    private_graphql_schema,
-    protected_graphql_schema,
-)
 from app.helpers import logging
 from app.helpers import impersonate_listener
+from app.domain import work_day_stats, work_day_summaries
 
 # Uncomment here to display all queries generated by SQLAlchemy
 # from app.helpers import debug_queries
@@ -137,51 +141,115 @@ graphql_protected_api_path = "/protected"
 # Disable GraphiQL in production (Sonarqube security requirement)
 enable_graphiql = MOBILIC_ENV != "prod"
 
-_safe_backend = SafeGraphQLBackend()
-
-app.add_url_rule(
-    graphql_api_path,
-    view_func=CustomGraphQLView.as_view(
-        "graphql",
-        schema=graphql_schema,
-        graphiql=enable_graphiql,
-        batch=True,
-        backend=_safe_backend,
-    ),
-)
-
-app.add_url_rule(
-    graphql_private_api_path,
-    view_func=CustomGraphQLView.as_view(
-        "unexposed",
-        schema=private_graphql_schema,
-        graphiql=False,
-        backend=_safe_backend,
-    ),
-)
-
-app.add_url_rule(
-    graphql_protected_api_path,
-    view_func=CustomGraphQLView.as_view(
-        "protected",
-        schema=protected_graphql_schema,
-        graphiql=enable_graphiql,
-        backend=_safe_backend,
-    ),
-)
-
-
-from app.helpers.oauth import oauth_blueprint
 
-app.register_blueprint(oauth_blueprint, url_prefix="/oauth")
-
-from app.controllers.control import control_blueprint
-
-app.register_blueprint(control_blueprint, url_prefix="/control")
-
-
-from app.controllers.misc import *
-from app.controllers.certificate import *
+_web_subsystems_lock = threading.Lock()
+_web_subsystems_registered = False
+
+
+def register_web_subsystems():
+    """
+    Register what only serves HTTP requests : the GraphQL schemas and views, the REST
+    controllers and blueprints, the API docs, response compression and CORS.
+    In the "web" boot mode this is done at import. In the "light" boot mode of the CLI
+    commands and workers it is done on demand, before the first request.
+    """
+    global _web_subsystems_registered
+    with _web_subsystems_lock:
+        if _web_subsystems_registered:
+            return
+        _web_subsystems_registered = True
+
+        if MOBILIC_BOOT_MODE == "light":
+            init_sentry(with_web_integrations=True)
+
+        from apispec import APISpec
+        from apispec.ext.marshmallow import MarshmallowPlugin
+        from flask_apispec.extension import FlaskApiSpec
+        from flask_compress import Compress
+        from flask_cors import CORS
+
+        from app.controllers import (
+            graphql_schema,
+            private_graphql_schema,
+            protected_graphql_schema,
+        )
+        from app.helpers.graphql import CustomGraphQLView, SafeGraphQLBackend
+        from app.helpers.graphql_perf import graphql_perf_middleware
+        from app.helpers.oauth import oauth_blueprint
+        from app.controllers.control import control_blueprint
+        from app.controllers import misc, certificate
+
+        Compress(app)
+        # See list of possible settings at https://pypi.org/project/Flask-Compress/1.13/
+        app.config.update({"COMPRESS_MIN_SIZE": 100})
+        app.config.update(
+            {
+                "APISPEC_SPEC": APISpec(
+                    title="Mobilic",
+                    version="v1",
+                    openapi_version="3.0.0",
+                    plugins=[MarshmallowPlugin()],
+                ),
+                "APISPEC_WEBARGS_PARSER": CustomRequestParser(),
+            }
+        )
+        FlaskApiSpec(app)
+
+        CORS(app)
+
+        safe_backend = SafeGraphQLBackend()
+        graphql_middleware = graphql_perf_middleware()
+
+        app.add_url_rule(
+            graphql_api_path,
+            view_func=CustomGraphQLView.as_view(
+                "graphql",
+                schema=graphql_schema,
+                graphiql=enable_graphiql,
+                batch=True,
+                backend=safe_backend,
+                middleware=graphql_middleware,
+            ),
+        )
+
+        app.add_url_rule(
+            graphql_private_api_path,
+            view_func=CustomGraphQLView.as_view(
+                "unexposed",
+                schema=private_graphql_schema,
+                graphiql=False,
+                backend=safe_backend,
+                middleware=graphql_middleware,
+            ),
+        )
+
+        app.add_url_rule(
+            graphql_protected_api_path,
+            view_func=CustomGraphQLView.as_view(
+                "protected",
+                schema=protected_graphql_schema,
+                graphiql=enable_graphiql,
+                backend=safe_backend,
+                middleware=graphql_middleware,
+            ),
+        )
+
+        app.register_blueprint(oauth_blueprint, url_prefix="/oauth")
+        app.register_blueprint(control_blueprint, url_prefix="/control")
+
+
+def _register_web_subsystems_before_requests(wsgi_app):
+    def wrapped_wsgi_app(environ, start_response):
+        register_web_subsystems()
+        return wsgi_app(environ, start_response)
+
+    return wrapped_wsgi_app
+
+
+if MOBILIC_BOOT_MODE == "light":
+    app.wsgi_app = _register_web_subsystems_before_requests(app.wsgi_app)
+else:
+    register_web_subsystems()
 
 
 @app.errorhandler(MobilicError)
@@ -208,34 +276,12 @@ def handle_error(error):
     )
 
 
-from .helpers.dataloaders import (
-    EmailsInEmploymentLoader,
-    UserLoader,
-    CommentsInMissionLoader,
-    ValidationsInMissionLoader,
-    ExpendituresInMissionLoader,
-    VehicleLoader,
-    VehiclesInCompanyLoader,
-    LocationEntriesInMissionLoader,
-    ActivitiesInMissionLoader,
-    ActivityVersionsInActivityLoader,
-)
+from .helpers.dataloaders import RequestDataLoaders
 
 
 @app.before_request
 def load_loaders():
-    g.dataloaders = {
-        "emails_in_employments": EmailsInEmploymentLoader(),
-        "vehicles_in_company": VehiclesInCompanyLoader(),
-        "users": UserLoader(),
-        "vehicles": VehicleLoader(),
-        "comments_in_missions": CommentsInMissionLoader(),
-        "validations_in_missions": ValidationsInMissionLoader(),
-        "expenditures_in_missions": ExpendituresInMissionLoader(),
-        "location_entries_in_missions": LocationEntriesInMissionLoader(),
-        "activities_in_missions": ActivitiesInMissionLoader(),
-        "activity_versions_in_activities": ActivityVersionsInActivityLoader(),
-    }
+    g.dataloaders = RequestDataLoaders()
 
 
 @app.after_request
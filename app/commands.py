@@ -16,6 +16,16 @@ from app.controllers.misc import (
 from app.controllers.utils import atomic_transaction
 from app.domain.certificate_criteria import compute_company_certifications
 from app.domain.company import job_update_ceased_activity_status
+from app.domain.regulation_checks_registry import (
+    get_regulation_checks_registry,
+)
+from app.domain.regulation_backfill import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_MAX_ATTEMPTS,
+    enqueue_regulation_backfill,
+    get_regulation_backfill_progress,
+    run_regulation_backfill_worker,
+)
 from app.domain.regulations import compute_regulation_for_user
 from app.domain.vehicle import find_vehicle
 from app.helpers.oauth.models import ThirdPartyApiKey
@@ -24,8 +34,6 @@ from app.jobs.auto_validations import job_process_auto_validations
 from app.models.company import Company
 from app.models.controller_control import ControllerControl
 from app.models.user import User
-from app.seed import clean as seed_clean, exit_if_prod
-from app.seed import seed as seed_seed
 from app.jobs.emails.certificate import (
     send_about_to_lose_certificate_emails,
 )
@@ -66,12 +74,16 @@ def test(test_names):
 @app.cli.command(with_appcontext=True)
 def clean():
     """Remove all data from database."""
+    from app.seed import clean as seed_clean
+
     seed_clean()
 
 
 @app.cli.command(with_appcontext=True)
 def seed():
     """Inject tests data in database."""
+    from app.seed import seed as seed_seed
+
     seed_seed()
 
 
@@ -97,10 +109,11 @@ def seed_review_app():
 @click.argument("nb_employees", type=click.INT, required=True)
 @click.argument("nb_days", type=click.INT, required=True)
 def load_missions(company_id, nb_employees, nb_days):
-    exit_if_prod()
-
+    from app.seed import exit_if_prod
     from app.seed.scenarios import load_missions
 
+    exit_if_prod()
+
     company = Company.query.get(company_id)
     admins = company.get_admins(date.today(), None)
 
@@ -219,6 +232,8 @@ def init_regulation_alerts(part, nb_parts, nb_fork):
     nb_parts is a number between 1 and 24
     It is used to split all users in [NB_PARTS] parts using modulo on user_id.
     nb_fork is the number of parallel thread can be run.
+
+    For a resumable backfill over several nodes, see enqueue_regulation_alerts_backfill.
     """
 
     if nb_parts < 1 or nb_parts > 24:
@@ -236,6 +251,9 @@ def init_regulation_alerts(part, nb_parts, nb_fork):
     max_value = len(users_ids) if users_ids else 0
     print(f"{max_value} users to process")
 
+    # Loaded once here and inherited by the forked workers
+    get_regulation_checks_registry()
+
     db.session.close()
     db.engine.dispose()
 
@@ -249,6 +267,106 @@ def run_batch_user_id(user_id):
         compute_regulation_for_user(user_to_process)
 
 
+@app.cli.command("enqueue_regulation_alerts_backfill", with_appcontext=True)
+@click.option(
+    "--last-months",
+    type=click.INT,
+    default=None,
+    help="Only recompute the alerts of the last N months",
+)
+@click.option(
+    "--from-date",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Only recompute the alerts from this day",
+)
+def enqueue_regulation_alerts_backfill(last_months, from_date):
+    """
+    Create a backfill task for every user, to be run by run_regulation_alerts_backfill workers
+
+    Without option the whole history of the users is recomputed.
+
+    Example: flask enqueue_regulation_alerts_backfill --last-months 3
+    """
+    from dateutil.relativedelta import relativedelta
+
+    if last_months and from_date:
+        click.echo("ERROR: use either --last-months or --from-date")
+        sys.exit(1)
+    if last_months:
+        from_date = date.today() - relativedelta(months=last_months)
+    elif from_date:
+        from_date = from_date.date()
+
+    nb_tasks = enqueue_regulation_backfill(from_date=from_date)
+    print(
+        f"{nb_tasks} users to process"
+        + (f" from {from_date.isoformat()}" if from_date else "")
+    )
+
+
+def _run_regulation_alerts_backfill_worker(options):
+    return run_regulation_backfill_worker(**options)
+
+
+@app.cli.command("run_regulation_alerts_backfill", with_appcontext=True)
+@click.option(
+    "--nb-processes",
+    default=1,
+    help="Number of worker processes to run on this node",
+)
+@click.option(
+    "--batch-size",
+    default=BACKFILL_BATCH_SIZE,
+    help="Number of users claimed at once by a worker",
+)
+@click.option(
+    "--max-attempts",
+    default=BACKFILL_MAX_ATTEMPTS,
+    help="Number of attempts before a user is left in failure",
+)
+def run_regulation_alerts_backfill(nb_processes, batch_size, max_attempts):
+    """
+    Run backfill workers until all the tasks created by enqueue_regulation_alerts_backfill are processed
+
+    The command can be run on any number of nodes at the same time, and run again to resume
+    after a crash: tasks left running by a stopped worker are claimed again after an hour.
+
+    Example: flask run_regulation_alerts_backfill --nb-processes 4
+    """
+    options = dict(batch_size=batch_size, max_attempts=max_attempts)
+    if nb_processes > 1:
+        # Loaded once here and inherited by the forked workers
+        get_regulation_checks_registry()
+        db.session.close()
+        db.engine.dispose()
+        with Pool(nb_processes) as p:
+            all_stats = p.map(
+                _run_regulation_alerts_backfill_worker,
+                [options] * nb_processes,
+            )
+    else:
+        all_stats = [_run_regulation_alerts_backfill_worker(options)]
+
+    nb_done = sum(stats["done"] for stats in all_stats)
+    duration = max(stats["duration"] for stats in all_stats)
+    print(
+        f"{nb_done} users processed, {sum(stats['failed'] for stats in all_stats)} failures "
+        f"in {duration:.0f}s ({nb_done / duration if duration else 0:.2f} users/s)"
+    )
+    print(get_regulation_backfill_progress())
+
+
+@app.cli.command("regulation_alerts_backfill_status", with_appcontext=True)
+def regulation_alerts_backfill_status():
+    """
+    Show the progress of the regulation alerts backfill
+    """
+    progress = get_regulation_backfill_progress()
+    for key, value in progress.items():
+        print(f"{key}: {value}")
+
+
 @app.cli.command("create_api_key", with_appcontext=True)
 @click.argument("client_id", type=click.INT)
 def create_api_key(client_id):
@@ -306,6 +424,298 @@ def run_certificate(as_of_date=None, computation_only=False):
         send_certificate_compute_end_notification()
 
 
+@app.cli.command("reconcile_work_day_stats", with_appcontext=True)
+@click.argument("start_date", required=False)
+@click.argument("end_date", required=False)
+def reconcile_work_day_stats_command(start_date=None, end_date=None):
+    """
+    Compute again the stored work day stats between two dates (included)
+
+    Default period is the last 7 days. Use an old start date to fill the stats.
+
+    Example: flask reconcile_work_day_stats 2024-01-01 2024-12-31
+    """
+    from app.domain.work_day_stats import reconcile_work_day_stats
+
+    end_date = (
+        datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
+        if end_date is not None
+        else date.today()
+    )
+    start_date = (
+        datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+        if start_date is not None
+        else end_date - datetime.timedelta(days=7)
+    )
+    reconcile_work_day_stats(start_date, end_date)
+
+
+@app.cli.command("graphql_perf_report", with_appcontext=True)
+@click.argument("file_path", type=click.Path(exists=True))
+@click.option(
+    "--top",
+    default=20,
+    help="Number of operations and resolvers to display",
+)
+def graphql_perf_report(file_path, top):
+    """
+    Display the slowest GraphQL operations and resolvers from a sampled log file
+
+    The file is written by the API when GRAPHQL_PERF_LOG_FILE is set.
+
+    Example: flask graphql_perf_report /tmp/graphql_perf.jsonl --top 10
+    """
+    from app.helpers.graphql_perf import build_graphql_perf_report
+
+    with open(file_path) as f:
+        operations, resolvers = build_graphql_perf_report(f, top=top)
+
+    print("Slowest operations (total request time over the samples)")
+    for op in operations:
+        print(
+            f"{op['name']:<50} requests={int(op['requests'])} "
+            f"avg={op['request_time_ms'] / op['requests']:.0f}ms "
+            f"sql_count={op['sql_count'] / op['requests']:.1f} "
+            f"sql_time={op['sql_time_ms'] / op['requests']:.0f}ms"
+        )
+    print()
+    print("Slowest resolvers (total time over the samples)")
+    for resolver in resolvers:
+        operation_name, field = resolver["name"]
+        print(
+            f"{operation_name + ' > ' + field:<70} "
+            f"requests={int(resolver['requests'])} "
+            f"calls={int(resolver['calls'])} "
+            f"time={resolver['time_ms']:.0f}ms "
+            f"sql_count={int(resolver['sql_count'])} "
+            f"sql_time={resolver['sql_time_ms']:.0f}ms"
+        )
+
+
+@app.cli.command("benchmark_c1b_signing", with_appcontext=True)
+@click.option(
+    "--nb-signatures",
+    default=2000,
+    help="Number of file signatures to compute",
+)
+def benchmark_c1b_signing(nb_signatures):
+    """
+    Compare the C1B file signing with the full private exponent and with the CRT parameters
+
+    A throwaway key of the size of the C1B keys is used, no key is stored.
+
+    Example: flask benchmark_c1b_signing --nb-signatures 5000
+    """
+    from time import perf_counter
+
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    from app.helpers.tachograph.rsa_keys import RSAKey
+
+    modulus_length = 128
+    numbers = rsa.generate_private_key(
+        public_exponent=65537, key_size=modulus_length * 8
+    ).private_numbers()
+    key = RSAKey(
+        modulus=numbers.public_numbers.n,
+        modulus_length=modulus_length,
+        public_exponent=numbers.public_numbers.e,
+        private_exponent=numbers.d,
+    )
+    messages = [
+        b"\x00\x01" + secrets.token_bytes(modulus_length - 2)
+        for _ in range(nb_signatures)
+    ]
+
+    start_time = perf_counter()
+    expected = [
+        key._transform_message(m, key.private_exponent) for m in messages
+    ]
+    plain_duration = perf_counter() - start_time
+
+    start_time = perf_counter()
+    signatures = key.sign_many(messages)
+    crt_duration = perf_counter() - start_time
+
+    if signatures != expected:
+        print("Signatures differ between the two methods")
+        sys.exit(1)
+    print(
+        f"{nb_signatures} signatures : full exponent {plain_duration * 1000:.0f}ms, "
+        f"CRT {crt_duration * 1000:.0f}ms (x{plain_duration / crt_duration:.1f})"
+    )
+
+
+@app.cli.command("benchmark_weekly_grouping", with_appcontext=True)
+@click.option(
+    "--nb-years",
+    default=8,
+    help="Maximum number of years of synthetic work days",
+)
+def benchmark_weekly_grouping(nb_years):
+    """
+    Time the grouping of work days by week on synthetic data, for 1, 2, 4, ... years
+
+    The work days are built in memory, nothing is read from or written to the database.
+    The linear scan over the weeks used before the calendar buckets is timed alongside.
+
+    Example: flask benchmark_weekly_grouping --nb-years 16
+    """
+    from datetime import date, timedelta
+    from time import perf_counter
+    from types import SimpleNamespace
+
+    from app.domain.regulations import group_user_events_by_week
+    from app.helpers.time import (
+        FR_TIMEZONE,
+        get_dates_range,
+        get_first_day_of_week,
+        get_week_buckets,
+        to_datetime,
+    )
+
+    years = 1
+    while years <= nb_years:
+        start_date = date(2000, 1, 1)
+        end_date = start_date + timedelta(days=365 * years - 1)
+        work_days = []
+        for day in get_dates_range(start_date, end_date):
+            if day.weekday() >= 5:
+                continue
+            day_start = to_datetime(day, tz_for_date=FR_TIMEZONE)
+            work_days.append(
+                SimpleNamespace(
+                    day=day,
+                    start_time=day_start + timedelta(hours=8),
+                    end_time=day_start + timedelta(hours=17),
+                    end_of_day=day_start + timedelta(days=1),
+                    is_first_mission_overlapping_with_previous_day=False,
+                    is_last_mission_overlapping_with_next_day=False,
+                    total_work_duration=8 * 3600,
+                )
+            )
+
+        start_time = perf_counter()
+        weeks = [
+            {"start": week_start, "days": []}
+            for week_start in get_week_buckets(
+                start_date, end_date, lambda _: None
+            )
+        ]
+        for wd in work_days:
+            week = next(
+                w for w in weeks if w["start"] == get_first_day_of_week(wd.day)
+            )
+            week["days"].append(wd)
+        scan_duration = perf_counter() - start_time
+
+        start_time = perf_counter()
+        weeks = group_user_events_by_week(
+            work_days, start_date, end_date, tz=FR_TIMEZONE
+        )
+        grouping_duration = perf_counter() - start_time
+
+        if sum(w["worked_days"] for w in weeks) != len(work_days):
+            print("Some work days were not grouped")
+            sys.exit(1)
+        print(
+            f"{years} year(s), {len(work_days)} work days : linear scan {scan_duration * 1000:.0f}ms, "
+            f"group_user_events_by_week {grouping_duration * 1000:.0f}ms"
+        )
+        years *= 2
+
+
+@app.cli.command("benchmark_hot_paths", with_appcontext=True)
+@click.option("--nb-companies", default=2, help="Number of companies")
+@click.option("--nb-drivers", default=10, help="Number of drivers by company")
+@click.option("--nb-days", default=30, help="Number of days of missions")
+@click.option("--output", default=None, help="Path of the JSON report")
+@click.option(
+    "--baseline",
+    default=None,
+    type=click.Path(exists=True),
+    help="JSON report to compare with",
+)
+@click.option(
+    "--tolerance",
+    default=0.2,
+    help="Relative increase of duration or memory reported as a regression",
+)
+def benchmark_hot_paths(
+    nb_companies, nb_drivers, nb_days, output, baseline, tolerance
+):
+    """
+    Time the work days, regulations, stats and export hot paths on a synthetic fleet
+
+    The fleet (companies x drivers x days of validated missions, with revised and
+    dismissed activities) is written to the database : use a local database only.
+    Exits with an error when a regression is found against the baseline report.
+
+    Example: flask benchmark_hot_paths --nb-drivers 20 --nb-days 90 --output report.json --baseline baseline.json
+    """
+    import json
+
+    from app.helpers.benchmark import (
+        build_benchmark_report,
+        compare_benchmark_reports,
+        run_hot_path_benchmarks,
+    )
+    from app.seed import exit_if_prod
+    from app.seed.scenarios.synthetic_fleet import generate_fleet
+
+    exit_if_prod()
+
+    fleet = generate_fleet(nb_companies, nb_drivers, nb_days)
+    hot_paths = run_hot_path_benchmarks(fleet, nb_days)
+    report = build_benchmark_report(
+        hot_paths, nb_companies, nb_drivers, nb_days
+    )
+
+    for name, stats in hot_paths.items():
+        print(
+            f"{name:<30} calls={stats['calls']} "
+            f"avg={stats['duration_ms'] / stats['calls']:.1f}ms "
+            f"sql_count={stats['sql_count'] / stats['calls']:.1f} "
+            f"peak_memory={stats['peak_memory_kb']:.0f}kB"
+        )
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare_benchmark_reports(
+                report, json.load(f), tolerance=tolerance
+            )
+        for regression in regressions:
+            print(f"Regression : {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+@app.cli.command("benchmark_import_time", with_appcontext=False)
+@click.option(
+    "--boot-mode",
+    type=click.Choice(["web", "light"]),
+    default="light",
+    help="Boot mode of the imported app",
+)
+@click.option("--top", default=20, help="Number of modules to print")
+def benchmark_import_time(boot_mode, top):
+    """
+    Print the modules slowest to import when the app boots, from a python -X importtime report
+
+    Example: MOBILIC_BOOT_MODE=light flask benchmark_import_time --boot-mode web --top 30
+    """
+    from app.helpers.benchmark import measure_import_time
+
+    import_times = measure_import_time(boot_mode)
+    for module, cumulative_us in sorted(
+        import_times.items(), key=lambda item: item[1], reverse=True
+    )[:top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {module}")
+
+
 @app.cli.command("send_daily_emails", with_appcontext=True)
 def send_daily_emails():
     from datetime import date
@@ -389,8 +799,19 @@ def temp_command_generate_xm_control(id):
     is_flag=True,
     help="Delete the content of IdMapping table",
 )
+@click.option(
+    "--batch-size",
+    type=int,
+    default=None,
+    help="Move missions with set-based queries, by committed batches of this size",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Resume a batched run from the content of IdMapping table, which is done by default when mappings are marked for deletion",
+)
 def anonymize_standalone_data_command(
-    verbose, no_dry_run, delete_only, test, force_clean
+    verbose, no_dry_run, delete_only, test, force_clean, batch_size, resume
 ):
     """
     Migrate data older than threshold to anonymized tables.
@@ -404,6 +825,9 @@ def anonymize_standalone_data_command(
     - Delete-only mode (--delete-only): Delete original data that has already been anonymized
 
     In test mode, all database changes are rolled back at the end.
+
+    With --batch-size, each batch of missions is committed on its own : if the run
+    is interrupted, running it again resumes it from the mappings marked for deletion.
     """
     from app.services.anonymization import anonymize_expired_data
 
@@ -421,6 +845,8 @@ def anonymize_standalone_data_command(
         delete_only=delete_only,
         test_mode=test,
         force_clean=force_clean,
+        batch_size=batch_size,
+        resume=resume,
     )
 
 
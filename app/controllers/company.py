@@ -11,12 +11,13 @@ from webargs import fields
 
 from app import db, app
 from app import siren_api_client, mailer
-from app.controllers.user import TachographBaseOptionsSchema
+from app.controllers.user import PDFExportSchema, TachographBaseOptionsSchema
 from app.controllers.utils import atomic_transaction, Void
 from app.data_access.company import CompanyOutput
 from app.data_access.employment import EmploymentOutput
 from app.domain.company import (
     SirenRegistrationStatus,
+    get_siren_info,
     get_siren_registration_status,
     link_company_to_software,
     apply_business_type_to_company_employees,
@@ -69,7 +70,13 @@ from app.helpers.brevo import (
 )
 import sentry_sdk
 
-from app.services.exports import export_activity_report, prepare_export_chunks
+from app.services.exports import (
+    export_activity_report,
+    export_raw_data,
+    export_tachograph_files,
+    export_work_days_pdf,
+    prepare_export_chunks,
+)
 from app.helpers.export_chunking import get_strategy_message
 
 from app.models.user import User
@@ -398,7 +405,7 @@ def store_company(
         )
     siren_api_info = None
     try:
-        siren_api_info = siren_api_client.get_siren_info(siren)
+        siren_api_info = get_siren_info(siren)
         (
             legal_unit,
             open_facilities,
@@ -457,7 +464,7 @@ class NonPublicQuery(graphene.ObjectType):
     )
 
     def resolve_siren_info(self, info, siren):
-        all_siren_info = siren_api_client.get_siren_info(siren)
+        all_siren_info = get_siren_info(siren)
         (
             legal_unit,
             open_facilities,
@@ -994,11 +1001,12 @@ class TachographGenerationScopeSchema(TachographBaseOptionsSchema):
         fields.Int(), required=True, validate=lambda l: len(l) > 0
     )
     user_ids = fields.List(fields.Int(), required=False)
+    async_export = fields.Boolean(required=False)
 
 
 @app.route("/companies/generate_tachograph_files", methods=["POST"])
 @doc(
-    description="Génération de fichiers C1B contenant les données d'activité des salariés"
+    description="Génération de fichiers C1B contenant les données d'activité des salariés. Avec async_export, l'archive est générée en arrière-plan et son lien de téléchargement est disponible via /exports/checkout"
 )
 @use_kwargs(TachographGenerationScopeSchema(), apply=True)
 def download_tachograph_files(
@@ -1008,10 +1016,23 @@ def download_tachograph_files(
     employee_version=False,
     with_digital_signatures=False,
     user_ids=None,
+    async_export=False,
 ):
     users = check_auth_and_get_users_list(
         company_ids, user_ids, min_date, max_date
     )
+    if async_export:
+        export_tachograph_files(
+            exporter=current_user,
+            company_ids=company_ids,
+            users=users,
+            min_date=min_date,
+            max_date=max_date,
+            with_signatures=with_digital_signatures,
+            employee_version=employee_version,
+        )
+        return jsonify({"result": "ok"}), 202
+
     scope = ConsultationScope(company_ids=company_ids)
 
     archive = get_tachograph_archive_company(
@@ -1028,3 +1049,68 @@ def download_tachograph_files(
         as_attachment=True,
         download_name="fichiers_C1B.zip",
     )
+
+
+class CompanyPDFExportSchema(PDFExportSchema):
+    company_ids = fields.List(
+        fields.Int(), required=True, validate=lambda l: len(l) > 0
+    )
+    user_ids = fields.List(fields.Int(), required=False)
+
+
+@app.route("/companies/generate_pdf_export", methods=["POST"])
+@doc(
+    description="Demande de génération des relevés d'heures PDF des salariés, dans une archive. Le lien de téléchargement est disponible via /exports/checkout"
+)
+@use_kwargs(CompanyPDFExportSchema(), apply=True)
+def generate_company_pdf_export(
+    company_ids,
+    min_date,
+    max_date,
+    user_ids=None,
+):
+    users = check_auth_and_get_users_list(
+        company_ids, user_ids, min_date, max_date
+    )
+    export_work_days_pdf(
+        exporter=current_user,
+        company_ids=company_ids,
+        users=users,
+        min_date=min_date,
+        max_date=max_date,
+    )
+    return jsonify({"result": "ok"}), 202
+
+
+@app.route("/companies/generate_raw_data_export", methods=["POST"])
+@doc(
+    description="Demande d'export des activités et des frais des salariés, une ligne par activité ou frais, au format CSV. Le lien de téléchargement est disponible via /exports/checkout"
+)
+@use_kwargs(
+    {
+        "company_ids": fields.List(
+            fields.Int(), required=True, validate=lambda l: len(l) > 0
+        ),
+        "user_ids": fields.List(fields.Int(), required=False),
+        "min_date": fields.Date(required=True),
+        "max_date": fields.Date(required=True),
+    },
+    apply=True,
+)
+def generate_company_raw_data_export(
+    company_ids,
+    min_date,
+    max_date,
+    user_ids=None,
+):
+    users = check_auth_and_get_users_list(
+        company_ids, user_ids, min_date, max_date
+    )
+    export_raw_data(
+        exporter=current_user,
+        company_ids=company_ids,
+        users=users,
+        min_date=min_date,
+        max_date=max_date,
+    )
+    return jsonify({"result": "ok"}), 202
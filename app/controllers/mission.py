@@ -28,7 +28,7 @@ from app.domain.permissions import (
     company_admin,
     check_actor_can_write_on_mission_for_user,
 )
-from app.domain.regulations import compute_regulations
+from app.domain.regulations import compute_regulations_incrementally
 from app.domain.user import get_current_employment_in_company
 from app.domain.validation import (
     validate_mission,
@@ -524,7 +524,7 @@ class CancelMission(AuthenticatedMutation):
                     ) = get_mission_start_and_end_from_activities(
                         activities=activities_to_update, user=user
                     )
-                    compute_regulations(
+                    compute_regulations_incrementally(
                         user=user,
                         period_start=mission_start,
                         period_end=(
@@ -534,6 +534,7 @@ class CancelMission(AuthenticatedMutation):
                         ),
                         submitter_type=SubmitterType.ADMIN,
                         business=business,
+                        activities=activities_to_update,
                     )
                 except Exception as e:
                     print("Caught exception:", e)
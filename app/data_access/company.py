@@ -39,6 +39,7 @@ from app.helpers.authorization import (
     with_authorization_policy,
     controller_only,
 )
+from app.helpers.dataloaders import load_relationship
 from app.helpers.errors import AuthorizationError
 from app.helpers.graphene_types import (
     BaseSQLAlchemyObjectType,
@@ -60,7 +61,10 @@ from app.models.employment import (
     EmploymentRequestValidationStatus,
 )
 from app.models.expenditure import ExpenditureType
-from app.models.queries import query_company_missions, query_work_day_stats
+from app.models.queries import (
+    query_company_missions,
+    query_stored_work_day_stats,
+)
 from app.models.vehicle import VehicleOutput
 
 
@@ -284,7 +288,7 @@ class CompanyOutput(BaseSQLAlchemyObjectType):
         return self.number_workers
 
     def resolve_teams(self, info):
-        return self.teams
+        return load_relationship(self, "teams")
 
     @with_authorization_policy(
         is_employed_by_company_over_period,
@@ -450,8 +454,8 @@ class CompanyOutput(BaseSQLAlchemyObjectType):
         #     )
         #     return work_days[-limit:] if limit else work_days
 
-        # Efficient approach
-        work_day_stats, has_next_page = query_work_day_stats(
+        # Efficient approach : stats are pre-aggregated by day on write
+        work_day_stats, has_next_page = query_stored_work_day_stats(
             self.id,
             start_date=from_date,
             end_date=until_date,
@@ -459,32 +463,32 @@ class CompanyOutput(BaseSQLAlchemyObjectType):
             after=after,
             user_ids=user_ids,
         )
-        user_ids = set([row.user_id for row in work_day_stats])
+        user_ids = set([stats["user_id"] for stats in work_day_stats])
 
         users = User.query.filter(User.id.in_(user_ids))
         users = {user.id: user for user in users}
         wds = [
             WorkDayStatsOnly(
-                day=row.day,
-                user=users[row.user_id],
-                start_time=row.start_time,
-                last_activity_start_time=row.last_activity_start_time,
-                end_time=row.end_time,
-                is_running=row.is_running,
-                service_duration=row.service_duration,
-                total_work_duration=row.total_work_duration,
+                day=to_datetime(stats["day"]),
+                user=users[stats["user_id"]],
+                start_time=stats["start_time"],
+                last_activity_start_time=stats["last_activity_start_time"],
+                end_time=stats["end_time"],
+                is_running=stats["is_running"],
+                service_duration=stats["service_duration"],
+                total_work_duration=stats["total_work_duration"],
                 activity_timers={
-                    a_type: getattr(row, f"{a_type.value}_duration")
+                    a_type: stats["activity_durations"][a_type.value]
                     for a_type in ActivityType
                 },
                 expenditures={
-                    e_type: getattr(row, f"n_{e_type.value}_expenditures")
+                    e_type: stats["expenditures"][e_type.value]
                     for e_type in ExpenditureType
                 },
-                mission_names={mn[0]: mn[1] for mn in row.mission_names},
+                mission_names=stats["mission_names"],
             )
-            for index, row in enumerate(work_day_stats)
-            if row.service_duration > 0
+            for stats in work_day_stats
+            if stats["service_duration"] > 0
         ]
 
         return to_connection(
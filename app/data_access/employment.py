@@ -6,6 +6,7 @@ from app.data_access.business import BusinessOutput
 from app.domain.permissions import only_self_employment
 from app.domain.user import get_user_with_hidden_email, HIDDEN_EMAIL
 from app.helpers.authorization import with_authorization_policy
+from app.helpers.dataloaders import load_relationship
 from app.helpers.graphene_types import BaseSQLAlchemyObjectType, TimeStamp
 from app.models.employment import Employment
 
@@ -154,6 +155,12 @@ class EmploymentOutput(BaseSQLAlchemyObjectType):
         description="Données de demande de détachement par le salarié.",
     )
 
+    def resolve_team(self, info):
+        return load_relationship(self, "team")
+
+    def resolve_business(self, info):
+        return load_relationship(self, "business")
+
     def resolve_detachment_request(self, info):
         if not self.detachment_request:
             return None
@@ -15,6 +15,7 @@ from app.helpers.frozen_version_utils import (
     freeze_activities,
     filter_out_future_events,
 )
+from app.helpers.dataloaders import load_relationship
 from app.helpers.graphene_types import BaseSQLAlchemyObjectType, TimeStamp
 from app.helpers.time import max_or_none
 from app.models import Mission
@@ -248,7 +249,11 @@ class MissionOutput(BaseSQLAlchemyObjectType):
         return g.dataloaders["vehicles"].load(self.vehicle_id)
 
     def resolve_ended_user_ids(self, info):
-        return sorted({e.user_id for e in self.ends if e.user_id is not None})
+        return load_relationship(self, "ends").then(
+            lambda ends: sorted(
+                {e.user_id for e in ends if e.user_id is not None}
+            )
+        )
 
 
 class MissionConnection(graphene.Connection):
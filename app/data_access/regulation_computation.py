@@ -1,5 +1,6 @@
 import graphene
 from flask import g
+from sqlalchemy.orm import joinedload
 
 from app.data_access.regulation_check import RegulationCheckOutput
 from app.helpers.graphene_types import (
@@ -80,17 +81,21 @@ class RegulationComputationOutput(BaseSQLAlchemyObjectType):
         if not regulation_checks:
             return None
 
-        regulatory_alerts = RegulatoryAlert.query.filter(
-            RegulatoryAlert.user_id == self.user.id,
-            RegulatoryAlert.day == self.day,
-            RegulatoryAlert.submitter_type == self.submitter_type,
-        )
+        # All the alerts of the computation in one query, with their business
+        regulatory_alerts = {
+            alert.regulation_check_id: alert
+            for alert in RegulatoryAlert.query.options(
+                joinedload(RegulatoryAlert.business)
+            ).filter(
+                RegulatoryAlert.user_id == self.user_id,
+                RegulatoryAlert.day == self.day,
+                RegulatoryAlert.submitter_type == self.submitter_type,
+            )
+        }
         regulation_checks_extended = []
 
         for regulation_check in regulation_checks:
-            regulatory_alert = regulatory_alerts.filter(
-                RegulatoryAlert.regulation_check_id == regulation_check.id
-            ).one_or_none()
+            regulatory_alert = regulatory_alerts.get(regulation_check.id)
             setattr(regulation_check, "alert", regulatory_alert)
             if regulatory_alert:
                 setattr(
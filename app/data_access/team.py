@@ -1,6 +1,7 @@
 import graphene
 from flask import g
 
+from app.helpers.dataloaders import load_relationship
 from app.helpers.graphene_types import BaseSQLAlchemyObjectType, TimeStamp
 from app.models.company_known_address import CompanyKnownAddressOutput
 from app.models.team import Team
@@ -45,11 +46,11 @@ class TeamOutput(BaseSQLAlchemyObjectType):
         return [a for a in self.known_addresses if not a.is_dismissed]
 
     def resolve_users(self, info):
-        user_ids = [
-            e.user_id for e in self.employments if e.user_id is not None
-        ]
-        users = g.dataloaders["users"].load_many(user_ids)
-        return users
+        return load_relationship(self, "employments").then(
+            lambda employments: g.dataloaders["users"].load_many(
+                [e.user_id for e in employments if e.user_id is not None]
+            )
+        )
 
 
 from app.data_access.user import UserOutput
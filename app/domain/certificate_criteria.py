@@ -1,13 +1,9 @@
-import functools
 import math
-import multiprocessing
-from multiprocessing import Pool
 
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import func, distinct
+from sqlalchemy import and_, desc, func, distinct
 
 from app import db, app
-from app.controllers.utils import atomic_transaction
 from app.domain.regulations_per_day import (
     EXTRA_NOT_ENOUGH_BREAK,
     EXTRA_TOO_MUCH_UNINTERRUPTED_WORK_TIME,
@@ -16,12 +12,13 @@ from app.helpers.time import end_of_month, previous_month_period, to_datetime
 from app.models import (
     RegulatoryAlert,
     Mission,
-    Company,
     Activity,
     ActivityVersion,
+    Employment,
 )
 from app.models.activity import ActivityType
 from app.models.company_certification import CompanyCertification
+from app.models.employment import EmploymentRequestValidationStatus
 from app.models.queries import query_activities
 from app.models.regulation_check import RegulationCheckType, RegulationCheck
 
@@ -29,6 +26,17 @@ REAL_TIME_LOG_TOLERANCE_MINUTES = 60
 COMPLIANCE_MAX_ALERTS_ALLOWED_RATIO = 0.005
 CERTIFICATE_LIFETIME_MONTH = 2
 MIN_NB_MISSIONS_IN_MONTH = 12
+CERTIFICATION_BATCH_SIZE = 500
+
+# Alert counts checked for compliancy: (regulation check type, extra field)
+COMPLIANCY_ALERT_KEYS = [
+    (RegulationCheckType.MINIMUM_DAILY_REST, None),
+    (RegulationCheckType.MAXIMUM_WORK_DAY_TIME, None),
+    (RegulationCheckType.MAXIMUM_WORK_IN_CALENDAR_WEEK, None),
+    (RegulationCheckType.MAXIMUM_WORKED_DAY_IN_WEEK, None),
+    (RegulationCheckType.ENOUGH_BREAK, EXTRA_NOT_ENOUGH_BREAK),
+    (RegulationCheckType.ENOUGH_BREAK, EXTRA_TOO_MUCH_UNINTERRUPTED_WORK_TIME),
+]
 
 
 def compute_compliancy(company, start, end, nb_activities):
@@ -38,116 +46,196 @@ def compute_compliancy(company, start, end, nb_activities):
     A number of alerts is allowed, based on the total number of activities on the period (we allow 0.5% of it)
     :return: (score, info), score is an integer from 0 to 6, info is a dict
     """
-    users = company.users_between(start, end)
+    alert_counts = count_alerts_by_company([company.id], start, end)
+    return get_compliancy(alert_counts.get(company.id, {}), nb_activities)
+
+
+def get_compliancy(alert_counts, nb_activities):
+    """
+    Same as compute_compliancy, from the alert counts of a company
+    :param alert_counts: dict (type, extra field) -> number of alerts
+    """
     nb_alert_types_ok = 0
     limit_nb_alerts = math.ceil(
         COMPLIANCE_MAX_ALERTS_ALLOWED_RATIO * nb_activities
     )
     info_alerts = []
 
-    def _get_alerts(users, start, end, type, extra_field=None):
-        query = RegulatoryAlert.query.filter(
-            RegulatoryAlert.user_id.in_([user.id for user in users]),
-            RegulatoryAlert.day >= start,
-            RegulatoryAlert.day <= end,
-            RegulatoryAlert.regulation_check.has(RegulationCheck.type == type),
-        )
-        if extra_field:
-            query = query.filter(
-                RegulatoryAlert.extra[extra_field].as_boolean() == True
-            )
-        return query.all()
-
-    for type in [
-        RegulationCheckType.MINIMUM_DAILY_REST,
-        RegulationCheckType.MAXIMUM_WORK_DAY_TIME,
-        RegulationCheckType.MAXIMUM_WORK_IN_CALENDAR_WEEK,
-        RegulationCheckType.MAXIMUM_WORKED_DAY_IN_WEEK,
-    ]:
-        regulatory_alerts = _get_alerts(
-            users=users, start=start, end=end, type=type
-        )
-        if len(regulatory_alerts) < limit_nb_alerts:
+    for type, extra_field in COMPLIANCY_ALERT_KEYS:
+        if alert_counts.get((type, extra_field), 0) < limit_nb_alerts:
             nb_alert_types_ok += 1
+        elif extra_field:
+            info_alerts.append({"type": type, "extra_field": extra_field})
         else:
             info_alerts.append({"type": type})
 
-    for extra_field in [
-        EXTRA_NOT_ENOUGH_BREAK,
-        EXTRA_TOO_MUCH_UNINTERRUPTED_WORK_TIME,
-    ]:
-        _alerts = _get_alerts(
-            users=users,
-            start=start,
-            end=end,
-            type=RegulationCheckType.ENOUGH_BREAK,
-            extra_field=extra_field,
-        )
-        if len(_alerts) < limit_nb_alerts:
-            nb_alert_types_ok += 1
-        else:
-            info_alerts.append(
-                {
-                    "type": RegulationCheckType.ENOUGH_BREAK,
-                    "extra_field": extra_field,
-                }
-            )
-
     return nb_alert_types_ok, info_alerts
 
 
-def compute_admin_changes(company, start, end, activity_ids):
-    """
-    Returns a float (percentage, between 0.0 and 1.0).
-    Number of activities modified by an admin / total number of activities
-    A low result is needed to have a good certification
-    :return: float
-    """
-    if len(activity_ids) == 0:
-        return 0.0
+def _company_users_subquery(company_ids, start, end):
+    # Same rules as Company.users_between
+    return (
+        db.session.query(Employment.company_id, Employment.user_id)
+        .filter(
+            Employment.company_id.in_(company_ids),
+            Employment.validation_status
+            == EmploymentRequestValidationStatus.APPROVED,
+            ~Employment.is_dismissed,
+            Employment.start_date <= end,
+            func.coalesce(Employment.end_date, end) >= start,
+        )
+        .distinct()
+        .subquery()
+    )
 
-    company_admin_ids = [admin.id for admin in company.get_admins(start, end)]
 
-    modified_count = (
-        db.session.query(func.count(distinct(Activity.id)))
-        .join(ActivityVersion, ActivityVersion.activity_id == Activity.id)
+def _company_admins_subquery(company_ids, start, end):
+    # Same rules as Company.get_admins
+    latest_employments = (
+        db.session.query(
+            Employment.company_id,
+            Employment.user_id,
+            Employment.has_admin_rights,
+        )
         .filter(
-            Activity.id.in_(activity_ids),
-            ActivityVersion.submitter_id.in_(company_admin_ids),
-            ActivityVersion.submitter_id != Activity.user_id,
+            Employment.company_id.in_(company_ids),
+            Employment.start_date <= end,
+            ~Employment.is_dismissed,
+            Employment.validation_status
+            != EmploymentRequestValidationStatus.REJECTED,
+            func.coalesce(Employment.end_date, end) >= start,
+        )
+        .distinct(Employment.company_id, Employment.user_id)
+        .order_by(
+            Employment.company_id,
+            Employment.user_id,
+            desc(Employment.start_date),
         )
-        .scalar()
+        .subquery()
+    )
+    return (
+        db.session.query(
+            latest_employments.c.company_id, latest_employments.c.user_id
+        )
+        .filter(latest_employments.c.has_admin_rights)
+        .subquery()
     )
-    return modified_count / len(activity_ids)
 
 
-def compute_log_in_real_time(activity_ids):
+def count_alerts_by_company(company_ids, start, end):
     """
-    Returns a float (percentage, between 0.0 and 1.0).
-    Number of activities logged in real time.
-    We consider an activity 'real time' if reception time is less than an hour after the start time of the activity.
-    A high result is needed to have a good certification
-    :return: float
+    Number of regulatory alerts of the users of each company on the period
+    :return: dict company id -> dict (type, extra field) -> number of alerts
     """
-    if len(activity_ids) == 0:
-        return 1.0
+    users = _company_users_subquery(company_ids, start, end)
+    extra_fields = sorted(
+        set(extra for _, extra in COMPLIANCY_ALERT_KEYS if extra)
+    )
+    rows = (
+        db.session.query(
+            users.c.company_id,
+            RegulationCheck.type,
+            func.count(RegulatoryAlert.id),
+            *[
+                func.count(RegulatoryAlert.id).filter(
+                    RegulatoryAlert.extra[extra_field].as_boolean() == True
+                )
+                for extra_field in extra_fields
+            ],
+        )
+        .join(RegulatoryAlert, RegulatoryAlert.user_id == users.c.user_id)
+        .join(
+            RegulationCheck,
+            RegulationCheck.id == RegulatoryAlert.regulation_check_id,
+        )
+        .filter(RegulatoryAlert.day >= start, RegulatoryAlert.day <= end)
+        .group_by(users.c.company_id, RegulationCheck.type)
+        .all()
+    )
+
+    alert_counts = {}
+    for company_id, type, nb_alerts, *nb_alerts_by_extra in rows:
+        company_alert_counts = alert_counts.setdefault(company_id, {})
+        company_alert_counts[(type, None)] = nb_alerts
+        for extra_field, nb in zip(extra_fields, nb_alerts_by_extra):
+            company_alert_counts[(type, extra_field)] = nb
+    return alert_counts
 
+
+def compute_certification_criteria(company_ids, start, end):
+    """
+    Certification criteria of several companies, computed with grouped queries
+    :return: dict company id -> dict of log_in_real_time, admin_changes, compliancy and info
+    """
     tolerance_in_seconds = REAL_TIME_LOG_TOLERANCE_MINUTES * 60
 
-    nb_in_real_time = (
-        db.session.query(func.count(Activity.id))
-        .filter(
-            Activity.id.in_(activity_ids),
-            (
-                func.extract(
-                    "epoch", Activity.reception_time - Activity.start_time
-                )
+    def _company_activities():
+        return query_activities(
+            include_dismissed_activities=False,
+            start_time=start,
+            end_time=end,
+            company_ids=company_ids,
+        ).filter(Activity.type != ActivityType.OFF)
+
+    activity_counts = {
+        company_id: (nb_activities, nb_in_real_time)
+        for company_id, nb_activities, nb_in_real_time in (
+            _company_activities()
+            .with_entities(
+                Mission.company_id,
+                func.count(Activity.id),
+                func.count(Activity.id).filter(
+                    func.extract(
+                        "epoch", Activity.reception_time - Activity.start_time
+                    )
+                    < tolerance_in_seconds
+                ),
             )
-            < tolerance_in_seconds,
+            .group_by(Mission.company_id)
+            .all()
+        )
+    }
+
+    admins = _company_admins_subquery(company_ids, start, end)
+    admin_change_counts = dict(
+        _company_activities()
+        .join(ActivityVersion, ActivityVersion.activity_id == Activity.id)
+        .join(
+            admins,
+            and_(
+                admins.c.company_id == Mission.company_id,
+                admins.c.user_id == ActivityVersion.submitter_id,
+            ),
         )
-        .scalar()
+        .filter(ActivityVersion.submitter_id != Activity.user_id)
+        .with_entities(Mission.company_id, func.count(distinct(Activity.id)))
+        .group_by(Mission.company_id)
+        .all()
     )
-    return nb_in_real_time / len(activity_ids)
+
+    alert_counts = count_alerts_by_company(company_ids, start, end)
+
+    criteria = {}
+    for company_id in company_ids:
+        nb_activities, nb_in_real_time = activity_counts.get(
+            company_id, (0, 0)
+        )
+        compliancy, info_alerts = get_compliancy(
+            alert_counts.get(company_id, {}), nb_activities
+        )
+        criteria[company_id] = dict(
+            log_in_real_time=(
+                nb_in_real_time / nb_activities if nb_activities else 1.0
+            ),
+            admin_changes=(
+                admin_change_counts.get(company_id, 0) / nb_activities
+                if nb_activities
+                else 0.0
+            ),
+            compliancy=compliancy,
+            info={"alerts": info_alerts},
+        )
+    return criteria
 
 
 def certificate_expiration(today):
@@ -158,47 +246,36 @@ def certificate_expiration(today):
 
 
 def compute_company_certification(company_id, today, start, end):
-    query = (
-        query_activities(
-            include_dismissed_activities=False,
-            start_time=start,
-            end_time=end,
-            company_ids=[company_id],
-        )
-        .filter(Activity.type != ActivityType.OFF)
-        .with_entities(Activity.id)
-    )
-    activity_ids = [a[0] for a in query.all()]
-
-    company = Company.query.filter(Company.id == company_id).one()
-
-    log_in_real_time = compute_log_in_real_time(activity_ids)
-    admin_changes = compute_admin_changes(company, start, end, activity_ids)
-    compliancy, info_alerts = compute_compliancy(
-        company, start, end, len(activity_ids)
+    criteria = compute_certification_criteria([company_id], start, end)
+    db.session.add(
+        _build_company_certification(company_id, today, criteria[company_id])
     )
 
-    expiration_date = certificate_expiration(today)
 
+def _build_company_certification(company_id, today, company_criteria):
     company_certification = CompanyCertification(
-        company=company,
+        company_id=company_id,
         attribution_date=today,
-        expiration_date=expiration_date,
-        compliancy=compliancy,
-        admin_changes=admin_changes,
-        log_in_real_time=log_in_real_time,
-        info={"alerts": info_alerts},
+        expiration_date=certificate_expiration(today),
+        **company_criteria,
     )
-    db.session.add(company_certification)
+    # Bulk inserts do not go through the before_insert listener
+    company_certification.certification_level = (
+        company_certification.get_certification_level()
+    )
+    return company_certification
 
 
-def get_eligible_companies(start, end):
+def get_eligible_company_ids(start, end):
     """
     a company is eligible if it has at least MIN_NB_MISSIONS_IN_MONTH (12) missions on the period
-    :return: eligible companies
+    :return: ids of the eligible companies
     """
-    subquery = (
-        Mission.query.join(Activity, Activity.mission_id == Mission.id)
+    return [
+        company_id
+        for (company_id,) in Mission.query.join(
+            Activity, Activity.mission_id == Mission.id
+        )
         .filter(
             Mission.creation_time >= to_datetime(start),
             Mission.creation_time <= to_datetime(end, date_as_end_of_day=True),
@@ -209,10 +286,9 @@ def get_eligible_companies(start, end):
         .having(
             func.count(func.distinct(Mission.id)) >= MIN_NB_MISSIONS_IN_MONTH
         )
-        .subquery()
-    )
-
-    return Company.query.filter(Company.id.in_(subquery)).all()
+        .order_by(Mission.company_id)
+        .all()
+    ]
 
 
 def compute_company_certifications(today):
@@ -224,32 +300,60 @@ def compute_company_certifications(today):
 
     start, end = previous_month_period(today)
 
-    companies = get_eligible_companies(start, end)
-    company_ids = [c.id for c in companies]
+    company_ids = get_eligible_company_ids(start, end)
     nb_eligible_companies = len(company_ids)
     app.logger.info(f"{nb_eligible_companies} eligible companies found")
 
-    if nb_eligible_companies == 0:
-        return
+    for i in range(0, nb_eligible_companies, CERTIFICATION_BATCH_SIZE):
+        batch_company_ids = company_ids[i : i + CERTIFICATION_BATCH_SIZE]
+        try:
+            criteria = compute_certification_criteria(
+                batch_company_ids, start, end
+            )
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(
+                f"Error with companies {batch_company_ids}", exc_info=e
+            )
+            continue
+
+        company_certifications = []
+        for company_id in batch_company_ids:
+            try:
+                company_certifications.append(
+                    _build_company_certification(
+                        company_id, today, criteria[company_id]
+                    )
+                )
+            except Exception as e:
+                app.logger.error(
+                    f"Error with company {company_id}", exc_info=e
+                )
+        _save_company_certifications(company_certifications)
+        db.session.commit()
 
-    db.session.close()
-    db.engine.dispose()
 
-    nb_forks = multiprocessing.cpu_count()
-    with Pool(nb_forks) as p:
-        func = functools.partial(
-            run_compute_company_certification, today, start, end
+def _save_company_certifications(company_certifications):
+    """
+    Insert the certifications of a batch at once, or one by one if the batch fails,
+    so that a failing company does not prevent the others from being certified.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.bulk_save_objects(company_certifications)
+        return
+    except Exception as e:
+        app.logger.warning(
+            "Error when saving a batch of certifications, saving them one by one",
+            exc_info=e,
         )
-        p.map(func, company_ids)
-
 
-def run_compute_company_certification(today, start, end, company_id):
-    with atomic_transaction(commit_at_end=True):
+    for company_certification in company_certifications:
         try:
-            compute_company_certification(
-                company_id=company_id, today=today, start=start, end=end
-            )
+            with db.session.begin_nested():
+                db.session.bulk_save_objects([company_certification])
         except Exception as e:
-            app.logger.error(f"Error with company {company_id}", exc_info=e)
-    db.session.close()
-    db.engine.dispose()
+            app.logger.error(
+                f"Error with company {company_certification.company_id}",
+                exc_info=e,
+            )
@@ -1,6 +1,8 @@
 import datetime
 from enum import Enum
+from threading import Lock
 
+from cachetools import TTLCache
 from sqlalchemy import desc, asc, nullsfirst
 from sqlalchemy import exists, and_
 from sqlalchemy import func, or_
@@ -9,6 +11,10 @@ from sqlalchemy.orm import joinedload
 
 from app import db, siren_api_client, app
 from app.helpers.mail_type import EmailType
+from app.helpers.siren import (
+    InaccessibleSirenError,
+    has_ceased_activity_from_siren_info,
+)
 from app.jobs import log_execution
 from app.models import Company, CompanyCertification, UserAgreement
 from app.models import (
@@ -21,6 +27,52 @@ from app.models.employment import EmploymentRequestValidationStatus
 from app.models.user_agreement import UserAgreementStatus
 
 
+CEASED_ACTIVITY_REFRESH_BATCH_SIZE = 200
+
+# SIRENs looked up by this process, e.g. by the siren info query right before a signup
+_recent_sirens_info = TTLCache(
+    maxsize=app.config["SIREN_INFO_CACHE_MAX_SIZE"],
+    ttl=app.config["SIREN_INFO_CACHE_TTL_SECONDS"],
+)
+_recent_sirens_info_lock = Lock()
+
+
+def get_siren_info(siren):
+    """
+    Info of a SIREN from the SIREN API, unless it was looked up recently : by this
+    process, or for a company of the SIREN whose siren_api_info is recent enough.
+    """
+    with _recent_sirens_info_lock:
+        siren_info = _recent_sirens_info.get(siren)
+    if siren_info is not None:
+        return siren_info
+
+    company = (
+        Company.query.filter(
+            Company.siren == siren,
+            Company.siren_api_info.isnot(None),
+            Company.siren_api_info_last_update
+            >= datetime.date.today()
+            - datetime.timedelta(days=app.config["SIREN_INFO_MAX_AGE_DAYS"]),
+        )
+        .order_by(desc(Company.siren_api_info_last_update))
+        .first()
+    )
+    if company:
+        siren_info = company.siren_api_info
+    else:
+        siren_info = siren_api_client.get_siren_info(siren)
+
+    with _recent_sirens_info_lock:
+        _recent_sirens_info[siren] = siren_info
+    return siren_info
+
+
+def clear_siren_info_cache():
+    with _recent_sirens_info_lock:
+        _recent_sirens_info.clear()
+
+
 class SirenRegistrationStatus(str, Enum):
     UNREGISTERED = "unregistered"
     FULLY_REGISTERED = "fully_registered"
@@ -311,7 +363,8 @@ def find_admins_of_companies_still_without_activity_for_reminder(
         exists().where(
             and_(
                 Email.employment_id == Employment.id,
-                Email.type == EmailType.COMPANY_WITH_EMPLOYEE_BUT_WITHOUT_ACTIVITY,
+                Email.type
+                == EmailType.COMPANY_WITH_EMPLOYEE_BUT_WITHOUT_ACTIVITY,
                 Email.creation_time
                 <= datetime.datetime.combine(
                     received_first_email_before_date,
@@ -497,56 +550,86 @@ def find_admins_with_pending_invitation(
     return base_query.all()
 
 
-@log_execution
-def job_update_ceased_activity_status():
+def terminate_employments_of_ceased_company(company):
+    employments = Employment.query.filter(
+        Employment.company_id == company.id,
+        ~Employment.is_dismissed,
+        Employment.end_date.is_(None),
+        Employment.validation_status.in_(
+            [
+                EmploymentRequestValidationStatus.PENDING,
+                EmploymentRequestValidationStatus.APPROVED,
+            ]
+        ),
+    ).all()
 
-    companies = (
-        Company.query.filter(
-            Company.has_ceased_activity == False, Company.siren.isnot(None)
-        )
-        .order_by(nullsfirst(asc(Company.siren_api_info_last_update)))
-        .limit(100)
+    app.logger.info(
+        f"#{len(employments)} employments will be terminated or dismissed"
     )
 
-    for company in companies:
-        (
-            has_ceased_activity,
-            siren_info,
-        ) = siren_api_client.has_company_ceased_activity(company.siren)
-        if has_ceased_activity:
-            app.logger.info(f"{company} has ceased activity...")
-
-            employments = Employment.query.filter(
-                Employment.company_id == company.id,
-                ~Employment.is_dismissed,
-                Employment.end_date.is_(None),
-                Employment.validation_status.in_(
-                    [
-                        EmploymentRequestValidationStatus.PENDING,
-                        EmploymentRequestValidationStatus.APPROVED,
-                    ]
-                ),
-            ).all()
-
-            app.logger.info(
-                f"#{len(employments)} employments will be terminated or dismissed"
+    for employment in employments:
+        if (
+            employment.validation_status
+            == EmploymentRequestValidationStatus.APPROVED
+        ):
+            employment.end_date = datetime.date.today() - datetime.timedelta(
+                days=1
             )
+        elif (
+            employment.validation_status
+            == EmploymentRequestValidationStatus.PENDING
+        ):
+            db.session.delete(employment)
+
+    company.has_ceased_activity = True
+
+
+@log_execution
+def job_update_ceased_activity_status(
+    batch_size=CEASED_ACTIVITY_REFRESH_BATCH_SIZE,
+):
+    """
+    Refresh the SIREN info of all the companies which have not ceased activity and
+    were not refreshed today, least recently refreshed first.
+
+    The SIRENs of each batch of companies are requested concurrently, within the
+    rate limit of the SIREN API, and each batch is committed on its own : an
+    interrupted run is resumed by the next one.
+    """
+    company_ids = [
+        company_id
+        for (company_id,) in Company.query.filter(
+            Company.has_ceased_activity == False,
+            Company.siren.isnot(None),
+            Company.siren_api_info_last_update < datetime.date.today(),
+        )
+        .order_by(nullsfirst(asc(Company.siren_api_info_last_update)))
+        .with_entities(Company.id)
+    ]
+
+    for start in range(0, len(company_ids), batch_size):
+        companies = Company.query.filter(
+            Company.id.in_(company_ids[start : start + batch_size])
+        ).all()
+        sirens_info = siren_api_client.get_sirens_info(
+            [company.siren for company in companies],
+            max_workers=app.config["SIREN_API_MAX_WORKERS"],
+        )
 
-            for employment in employments:
-                if (
-                    employment.validation_status
-                    == EmploymentRequestValidationStatus.APPROVED
-                ):
-                    employment.end_date = (
-                        datetime.date.today() - datetime.timedelta(days=1)
-                    )
-                elif (
-                    employment.validation_status
-                    == EmploymentRequestValidationStatus.PENDING
-                ):
-                    db.session.delete(employment)
-
-            company.has_ceased_activity = True
-
-        company.siren_api_info = siren_info
+        for company in companies:
+            siren_info = sirens_info[company.siren]
+            if isinstance(siren_info, InaccessibleSirenError):
+                app.logger.error(f"Inaccessible siren {company.siren}")
+                siren_info = None
+            elif isinstance(siren_info, Exception):
+                # Left as is, to be refreshed first by the next run
+                app.logger.warning(
+                    f"Could not refresh SIREN info of {company} : {siren_info}"
+                )
+                continue
+            elif has_ceased_activity_from_siren_info(siren_info):
+                app.logger.info(f"{company} has ceased activity...")
+                terminate_employments_of_ceased_company(company)
+
+            company.siren_api_info = siren_info
         db.session.commit()
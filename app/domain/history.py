@@ -10,7 +10,7 @@ from app.models import (
     LocationEntry,
     Expenditure,
 )
-from app.models.activity import ActivityType
+from app.models.activity import ActivityType, FrozenActivity
 from app.models.event import Dismissable
 from app.models.location_entry import LocationEntryType
 from app.templates.filters import (
@@ -160,7 +160,7 @@ class UserChange(HistoryItem):
             return Picto.LOCATION
         elif type(self.resource) is Expenditure:
             return Picto.EXPENDITURE
-        elif type(self.resource) is Activity:
+        elif isinstance(self.resource, (Activity, FrozenActivity)):
             if self.resource.type == ActivityType.WORK:
                 return Picto.ACTIVITY_WORK
             elif self.resource.type == ActivityType.DRIVE:
@@ -289,7 +289,7 @@ class UserChange(HistoryItem):
             if self.holiday_mission_name != ""
             else format_activity_type(self.resource.type)
         )
-        if type(self.resource) is Activity:
+        if isinstance(self.resource, (Activity, FrozenActivity)):
             if self.type == LogActionType.CREATE:
                 if _is_split(self.version):
                     original_start_ts = self.version.context.get("originalStartTime") if self.version.context else None
@@ -425,7 +425,7 @@ def actions_history(
         if resource is not None:
             first_version = (
                 resource.version_at(resource.reception_time)
-                if type(resource) is Activity
+                if isinstance(resource, (Activity, FrozenActivity))
                 else None
             )
             user_changes.append(
@@ -451,7 +451,10 @@ def actions_history(
                 )
             )
 
-            if isinstance(resource, Dismissable) and resource.dismissed_at:
+            if (
+                isinstance(resource, (Dismissable, FrozenActivity))
+                and resource.dismissed_at
+            ):
                 user_changes.append(
                     UserChange(
                         time=resource.dismissed_at,
@@ -472,7 +475,7 @@ def actions_history(
                     )
                 )
 
-            if isinstance(resource, Activity):
+            if isinstance(resource, (Activity, FrozenActivity)):
                 revisions = [
                     v
                     for v in resource.retrieve_all_versions(
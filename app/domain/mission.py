@@ -124,7 +124,6 @@ def get_start_end_time_at_employee_validation(mission, users_ids):
         if not employee_validation or not employee_validation.reception_time:
             continue
 
-        # Use versions; activities_for(max_reception_time=...) mutates the rows and the surrounding transaction commits it.
         versions_at_validation = activity_versions_at(
             mission.activities_for(user=employee),
             employee_validation.reception_time,
@@ -0,0 +1,227 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import Date, and_, func, literal, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from app import app, db
+from app.domain.regulation_checks_registry import (
+    get_regulation_checks_registry,
+)
+from app.domain.regulations import compute_regulation_for_user
+from app.helpers.db import DateTimeStoredAsUTC
+from app.models import RegulationBackfillTask, User
+from app.models.regulation_backfill_task import RegulationBackfillTaskStatus
+
+BACKFILL_BATCH_SIZE = 20
+BACKFILL_MAX_ATTEMPTS = 3
+# A running task whose worker did not report for this long is claimed again
+BACKFILL_STALE_AFTER = timedelta(hours=1)
+
+
+def enqueue_regulation_backfill(from_date=None, nb_parts=1, part=1):
+    """
+    Create or reset the backfill task of every user, in one statement.
+    Tasks already done or running are reset too: enqueuing starts a new backfill.
+    """
+    users = db.session.query(
+        User.id,
+        literal(datetime.now(), DateTimeStoredAsUTC),
+        literal(RegulationBackfillTaskStatus.PENDING.value),
+        literal(from_date, Date),
+        literal(0),
+    )
+    if nb_parts > 1:
+        users = users.filter(User.id % nb_parts == part - 1)
+
+    stmt = insert(RegulationBackfillTask).from_select(
+        ["user_id", "creation_time", "status", "from_date", "attempts"],
+        users,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_=dict(
+            status=RegulationBackfillTaskStatus.PENDING.value,
+            from_date=stmt.excluded.from_date,
+            attempts=0,
+            worker=None,
+            start_time=None,
+            end_time=None,
+            duration=None,
+            error=None,
+        ),
+    )
+    result = db.session.execute(stmt)
+    db.session.commit()
+    return result.rowcount
+
+
+def claim_regulation_backfill_tasks(
+    worker,
+    batch_size=BACKFILL_BATCH_SIZE,
+    max_attempts=BACKFILL_MAX_ATTEMPTS,
+    stale_after=BACKFILL_STALE_AFTER,
+):
+    """
+    Mark up to batch_size tasks as running for the worker and return them.
+    The rows are locked with SKIP LOCKED so concurrent workers never claim the same tasks.
+    Failed tasks are retried until max_attempts, and running tasks of a crashed worker after stale_after.
+    Stale running tasks without attempts left are marked as failed.
+    """
+    now = datetime.now()
+    RegulationBackfillTask.query.filter(
+        RegulationBackfillTask.status == RegulationBackfillTaskStatus.RUNNING,
+        RegulationBackfillTask.start_time < now - stale_after,
+        RegulationBackfillTask.attempts >= max_attempts,
+    ).update(
+        dict(
+            status=RegulationBackfillTaskStatus.FAILED,
+            end_time=now,
+            error=f"Worker did not report for {stale_after}",
+        ),
+        synchronize_session=False,
+    )
+    tasks = (
+        RegulationBackfillTask.query.filter(
+            or_(
+                RegulationBackfillTask.status
+                == RegulationBackfillTaskStatus.PENDING,
+                and_(
+                    RegulationBackfillTask.status
+                    == RegulationBackfillTaskStatus.FAILED,
+                    RegulationBackfillTask.attempts < max_attempts,
+                ),
+                and_(
+                    RegulationBackfillTask.status
+                    == RegulationBackfillTaskStatus.RUNNING,
+                    RegulationBackfillTask.start_time < now - stale_after,
+                    RegulationBackfillTask.attempts < max_attempts,
+                ),
+            )
+        )
+        .order_by(RegulationBackfillTask.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for task in tasks:
+        task.status = RegulationBackfillTaskStatus.RUNNING
+        task.attempts += 1
+        task.worker = worker
+        task.start_time = now
+        task.end_time = None
+    db.session.commit()
+    return tasks
+
+
+def _run_regulation_backfill_task(task_id, regulation_checks):
+    task = RegulationBackfillTask.query.get(task_id)
+    start_time = perf_counter()
+    try:
+        compute_regulation_for_user(
+            User.query.get(task.user_id),
+            regulation_checks=regulation_checks,
+            from_date=task.from_date,
+        )
+        task.status = RegulationBackfillTaskStatus.DONE
+        task.error = None
+        success = True
+    except Exception as e:
+        db.session.rollback()
+        app.logger.exception(
+            f"Regulation backfill failed for user {task.user_id}"
+        )
+        task = RegulationBackfillTask.query.get(task_id)
+        task.status = RegulationBackfillTaskStatus.FAILED
+        task.error = f"{type(e).__name__}: {e}"[:1000]
+        success = False
+    task.end_time = datetime.now()
+    task.duration = perf_counter() - start_time
+    db.session.commit()
+    return success
+
+
+def get_regulation_backfill_progress():
+    counts = dict(
+        db.session.query(
+            RegulationBackfillTask.status,
+            func.count(RegulationBackfillTask.id),
+        )
+        .group_by(RegulationBackfillTask.status)
+        .all()
+    )
+    average_duration = (
+        db.session.query(func.avg(RegulationBackfillTask.duration))
+        .filter(
+            RegulationBackfillTask.status == RegulationBackfillTaskStatus.DONE
+        )
+        .scalar()
+    )
+    return dict(
+        **{
+            status.value: counts.get(status, 0)
+            for status in RegulationBackfillTaskStatus
+        },
+        total=sum(counts.values()),
+        average_duration=average_duration or 0,
+    )
+
+
+def get_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_regulation_backfill_worker(
+    worker=None,
+    batch_size=BACKFILL_BATCH_SIZE,
+    max_attempts=BACKFILL_MAX_ATTEMPTS,
+    stale_after=BACKFILL_STALE_AFTER,
+    max_tasks=None,
+):
+    """
+    Claim and run backfill tasks until none is left (or max_tasks were run).
+    Any number of workers can run at the same time, on any number of nodes.
+    """
+    worker = worker or get_worker_name()
+    regulation_checks = get_regulation_checks_registry()
+    stats = dict(done=0, failed=0)
+    start_time = perf_counter()
+    while max_tasks is None or stats["done"] + stats["failed"] < max_tasks:
+        tasks = claim_regulation_backfill_tasks(
+            worker,
+            batch_size=(
+                batch_size
+                if max_tasks is None
+                else min(
+                    batch_size, max_tasks - stats["done"] - stats["failed"]
+                )
+            ),
+            max_attempts=max_attempts,
+            stale_after=stale_after,
+        )
+        if not tasks:
+            break
+        for task_id in [task.id for task in tasks]:
+            if _run_regulation_backfill_task(task_id, regulation_checks):
+                stats["done"] += 1
+            else:
+                stats["failed"] += 1
+
+        elapsed = perf_counter() - start_time
+        progress = get_regulation_backfill_progress()
+        remaining = (
+            progress[RegulationBackfillTaskStatus.PENDING.value]
+            + progress[RegulationBackfillTaskStatus.RUNNING.value]
+        )
+        throughput = (stats["done"] + stats["failed"]) / elapsed
+        app.logger.info(
+            f"Regulation backfill [{worker}] : {stats['done']} done, {stats['failed']} failed "
+            f"in {elapsed:.0f}s ({throughput:.2f} users/s) - "
+            f"overall {progress[RegulationBackfillTaskStatus.DONE.value]}/{progress['total']} done, "
+            f"{progress[RegulationBackfillTaskStatus.FAILED.value]} failed, {remaining} remaining"
+        )
+
+    stats["duration"] = perf_counter() - start_time
+    return stats
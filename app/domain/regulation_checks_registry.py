@@ -0,0 +1,136 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from types import MappingProxyType
+
+from sqlalchemy import text
+
+from app import db
+from app.domain.regulations_helper import resolve_variables
+from app.models.regulation_check import RegulationCheck
+
+VERSION_QUERY = text(
+    """
+    SELECT md5(
+      coalesce(
+        string_agg(
+          concat_ws(
+            '|',
+            id,
+            type,
+            label,
+            date_application_start,
+            date_application_end,
+            regulation_rule,
+            unit,
+            variables::text
+          ),
+          ',' ORDER BY id
+        ),
+        ''
+      )
+    )
+    FROM regulation_check
+    """
+)
+
+
+@dataclass(frozen=True)
+class RegulationCheckSnapshot:
+    """Read-only copy of a RegulationCheck row, shareable between
+    computations and processes."""
+
+    id: int
+    type: str
+    label: str
+    regulation_rule: str
+    variables: dict
+    unit: str
+    date_application_start: date
+    date_application_end: date = None
+    _resolved_variables: dict = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    @classmethod
+    def from_model(cls, regulation_check):
+        return cls(
+            id=regulation_check.id,
+            type=regulation_check.type,
+            label=regulation_check.label,
+            regulation_rule=regulation_check.regulation_rule,
+            variables=regulation_check.variables,
+            unit=regulation_check.unit,
+            date_application_start=regulation_check.date_application_start,
+            date_application_end=regulation_check.date_application_end,
+        )
+
+    def is_valid_on(self, day):
+        return self.date_application_start <= day and (
+            self.date_application_end is None
+            or self.date_application_end > day
+        )
+
+    def resolve_variables(self, business):
+        # Variables only depend on the transport and business types
+        key = (business.transport_type.name, business.business_type.name)
+        resolved = self._resolved_variables.get(key)
+        if resolved is None:
+            resolved = MappingProxyType(
+                resolve_variables(self.variables, business)
+            )
+            self._resolved_variables[key] = resolved
+        return resolved
+
+
+class RegulationChecksRegistry:
+    def __init__(self, version, regulation_checks):
+        self.version = version
+        self._checks_by_type = defaultdict(list)
+        # Latest application start first; on a tie the first inserted wins
+        for regulation_check in sorted(
+            regulation_checks,
+            key=lambda rc: (-rc.date_application_start.toordinal(), rc.id),
+        ):
+            self._checks_by_type[regulation_check.type].append(
+                regulation_check
+            )
+
+    def get_latest(self, type):
+        checks = self._checks_by_type.get(type)
+        return checks[0] if checks else None
+
+    def get(self, type, day):
+        """Check of the given type applicable on the given day, or the latest
+        one if none was applicable on that day."""
+        checks = self._checks_by_type.get(type)
+        if not checks:
+            return None
+        return next((rc for rc in checks if rc.is_valid_on(day)), checks[0])
+
+
+_registry = None
+
+
+def get_regulation_checks_version():
+    return db.session.execute(VERSION_QUERY).scalar()
+
+
+def get_regulation_checks_registry():
+    """Process-wide registry of the regulation checks.
+
+    It is reloaded only when the content of the regulation_check table
+    changed since it was built, which costs one small query per call:
+    callers should fetch it once per computation and pass it along.
+    """
+    global _registry
+    version = get_regulation_checks_version()
+    if _registry is None or _registry.version != version:
+        _registry = RegulationChecksRegistry(
+            version,
+            [
+                RegulationCheckSnapshot.from_model(rc)
+                for rc in RegulationCheck.query.all()
+            ],
+        )
+    return _registry
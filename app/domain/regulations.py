@@ -3,11 +3,21 @@ from datetime import timedelta
 from sqlalchemy import or_, and_
 
 from app import db
+from app.domain.regulation_checks_registry import (
+    get_regulation_checks_registry,
+)
 from app.domain.regulations_per_day import (
     compute_regulations_per_day,
     filter_work_days_to_current_day,
 )
 from app.domain.regulations_per_week import compute_regulations_per_week
+from app.domain.work_day_summaries import (
+    delete_work_day_summaries,
+    get_days_around,
+    get_days_touched_by_activities,
+    get_work_day_summaries,
+    save_work_day_summaries,
+)
 from app.domain.work_days import (
     group_user_events_by_day_with_limit,
     group_user_events_by_day_with_limit_both_submitter,
@@ -18,6 +28,7 @@ from app.helpers.time import (
     get_dates_range,
     get_first_day_of_week,
     get_last_day_of_week,
+    get_week_buckets,
     to_datetime,
     get_uninterrupted_datetime_ranges,
 )
@@ -48,6 +59,7 @@ def compute_regulations(
     submitter_type,
     business=None,
     employee_version=None,
+    regulation_checks=None,
 ):
     period_start = period_start - timedelta(days=1)
     week_period_start = get_first_day_of_week(period_start)
@@ -66,27 +78,18 @@ def compute_regulations(
 
     # Next day is needed for some computation rules
     day_after_period_end = period_end + timedelta(days=1)
-    (
-        work_days_over_current_past_and_next_days,
-        _,
-    ) = group_user_events_by_day_with_limit(
+    work_days_over_current_past_and_next_days = _get_work_days_for_regulations(
         user,
-        from_date=week_period_start,
-        until_date=max(week_period_end, day_after_period_end),
-        tz=user_timezone,
-        only_missions_validated_by_admin=submitter_type == SubmitterType.ADMIN,
-        only_missions_validated_by_user=submitter_type
-        == SubmitterType.EMPLOYEE,
-        include_holidays=False,
-        employee_version=(
-            employee_version
-            if employee_version is not None
-            else submitter_type == SubmitterType.EMPLOYEE
-        ),
+        week_period_start,
+        max(week_period_end, day_after_period_end),
+        submitter_type,
+        employee_version,
     )
 
     if business is None:
         business = get_default_business()
+    if regulation_checks is None:
+        regulation_checks = get_regulation_checks_registry()
 
     # Compute daily rules for each day
     for index, day in enumerate(get_dates_range(period_start, period_end)):
@@ -97,6 +100,7 @@ def compute_regulations(
             submitter_type,
             work_days_over_current_past_and_next_days,
             tz=user_timezone,
+            regulation_checks=regulation_checks,
         )
         # Do not mark empty previous day as computed
         if index != 0 or activity_to_compute_in_day(
@@ -112,10 +116,230 @@ def compute_regulations(
         tz=user_timezone,
     )
     for week in weeks:
-        compute_regulations_per_week(user, business, week, submitter_type)
+        compute_regulations_per_week(
+            user,
+            business,
+            week,
+            submitter_type,
+            regulation_checks=regulation_checks,
+        )
         mark_day_as_computed(user, week.get("start"), submitter_type)
 
 
+def compute_regulations_incrementally(
+    user,
+    period_start,
+    period_end,
+    submitter_type,
+    business=None,
+    employee_version=None,
+    activities=None,
+    regulation_checks=None,
+    days=None,
+):
+    """Same result as compute_regulations, restricted to what a change touches.
+
+    Daily rules are computed for the days of the period, the given days and
+    the days covered by the given activities (past versions included), plus
+    the day before each of them. Weekly rules are computed for the weeks
+    containing these days. Only the work days of the computed days and of the
+    day after them are loaded: the other days of the weeks come from the
+    cached work day summaries, and a whole week is loaded when one of its
+    summaries is missing. Existing alerts are then reconciled with the
+    computed ones, so that unchanged alerts are left untouched.
+    """
+    user_timezone = user.timezone
+    if employee_version is None:
+        employee_version = submitter_type == SubmitterType.EMPLOYEE
+
+    changed_days = set(get_dates_range(period_start, period_end))
+    if days:
+        changed_days |= set(days)
+    if activities:
+        changed_days |= get_days_touched_by_activities(
+            activities, user_timezone
+        )
+    # The first day of each range is the previous day of a changed day
+    daily_ranges = get_uninterrupted_datetime_ranges(
+        list(get_days_around(changed_days, nb_days_before=1, nb_days_after=0))
+    )
+    daily_days = set(
+        day
+        for range_start, range_end in daily_ranges
+        for day in get_dates_range(range_start, range_end)
+    )
+    week_starts = sorted(set(get_first_day_of_week(d) for d in daily_days))
+
+    # Next day is needed for some computation rules
+    days_to_load = get_days_around(
+        daily_days, nb_days_before=0, nb_days_after=1
+    )
+    week_days = set(
+        day
+        for week_start in week_starts
+        for day in get_dates_range(
+            week_start, get_last_day_of_week(week_start)
+        )
+    )
+    summaries = get_work_day_summaries(
+        user.id, submitter_type, employee_version, week_days - days_to_load
+    )
+    for week_start in week_starts:
+        days_of_week = set(
+            get_dates_range(week_start, get_last_day_of_week(week_start))
+        )
+        if any(
+            d not in days_to_load and d not in summaries for d in days_of_week
+        ):
+            days_to_load |= days_of_week
+
+    work_days = []
+    for load_start, load_end in get_uninterrupted_datetime_ranges(
+        list(days_to_load)
+    ):
+        loaded_work_days = _get_work_days_for_regulations(
+            user, load_start, load_end, submitter_type, employee_version
+        )
+        save_work_day_summaries(
+            user.id,
+            submitter_type,
+            employee_version,
+            loaded_work_days,
+            load_start,
+            load_end,
+        )
+        work_days.extend(loaded_work_days)
+
+    if business is None:
+        business = get_default_business()
+    if regulation_checks is None:
+        regulation_checks = get_regulation_checks_registry()
+
+    alerts = []
+    for range_start, range_end in daily_ranges:
+        for index, day in enumerate(get_dates_range(range_start, range_end)):
+            compute_regulations_per_day(
+                user,
+                business,
+                day,
+                submitter_type,
+                work_days,
+                tz=user_timezone,
+                alerts=alerts,
+                regulation_checks=regulation_checks,
+            )
+            # Do not mark empty previous day as computed
+            if index != 0 or activity_to_compute_in_day(
+                day, work_days, user_timezone
+            ):
+                mark_day_as_computed(user, day, submitter_type)
+
+    week_work_days = {
+        day: summary
+        for day, summary in summaries.items()
+        if summary and day not in days_to_load
+    }
+    week_work_days.update(
+        {wd.day: wd for wd in work_days if wd.day in week_days}
+    )
+    work_days_by_week = get_week_buckets(
+        min(week_starts), max(week_starts), lambda week_start: []
+    )
+    for day in sorted(week_work_days):
+        work_days_by_week[get_first_day_of_week(day)].append(
+            week_work_days[day]
+        )
+    for week_start in week_starts:
+        week = group_user_events_by_week(
+            work_days_by_week[week_start],
+            week_start,
+            week_start,
+            tz=user_timezone,
+        )[0]
+        compute_regulations_per_week(
+            user,
+            business,
+            week,
+            submitter_type,
+            alerts=alerts,
+            regulation_checks=regulation_checks,
+        )
+        mark_day_as_computed(user, week_start, submitter_type)
+
+    _reconcile_regulatory_alerts(
+        user, submitter_type, daily_days, week_starts, alerts
+    )
+
+
+def _get_work_days_for_regulations(
+    user, from_date, until_date, submitter_type, employee_version=None
+):
+    work_days, _ = group_user_events_by_day_with_limit(
+        user,
+        from_date=from_date,
+        until_date=until_date,
+        tz=user.timezone,
+        only_missions_validated_by_admin=submitter_type == SubmitterType.ADMIN,
+        only_missions_validated_by_user=submitter_type
+        == SubmitterType.EMPLOYEE,
+        include_holidays=False,
+        employee_version=(
+            employee_version
+            if employee_version is not None
+            else submitter_type == SubmitterType.EMPLOYEE
+        ),
+    )
+    return work_days
+
+
+def _reconcile_regulatory_alerts(
+    user, submitter_type, days, week_starts, computed_alerts
+):
+    existing_alerts = RegulatoryAlert.query.filter(
+        RegulatoryAlert.user_id == user.id,
+        RegulatoryAlert.submitter_type == submitter_type,
+        or_(
+            and_(
+                RegulatoryAlert.regulation_check.has(
+                    RegulationCheck.unit == UnitType.DAY
+                ),
+                RegulatoryAlert.day.in_(list(days)),
+            ),
+            and_(
+                RegulatoryAlert.regulation_check.has(
+                    RegulationCheck.unit == UnitType.WEEK
+                ),
+                RegulatoryAlert.day.in_(week_starts),
+            ),
+        ),
+    ).all()
+    existing_alerts_by_key = {
+        (alert.day, alert.regulation_check_id): alert
+        for alert in existing_alerts
+    }
+
+    for alert in computed_alerts:
+        existing_alert = existing_alerts_by_key.pop(
+            (alert.day, alert.regulation_check_id), None
+        )
+        if existing_alert is None:
+            db.session.add(alert)
+            continue
+        if (
+            existing_alert.extra != alert.extra
+            or existing_alert.business_id != alert.business_id
+        ):
+            existing_alert.extra = alert.extra
+            existing_alert.business_id = alert.business_id
+
+    if existing_alerts_by_key:
+        db.session.query(RegulatoryAlert).filter(
+            RegulatoryAlert.id.in_(
+                [alert.id for alert in existing_alerts_by_key.values()]
+            )
+        ).delete(synchronize_session=False)
+
+
 def activity_to_compute_in_day(
     day, work_days_over_current_past_and_next_days, user_timezone
 ):
@@ -179,30 +403,22 @@ def group_user_events_by_week(
     tz,
 ):
     # build weeks
-    weeks = []
-    current_week = get_first_day_of_week(start_date)
-    last_week = get_first_day_of_week(end_date)
-    while current_week <= last_week:
-        weeks.append(
-            {
-                "start": current_week,
-                "end": current_week + timedelta(days=6),
-                "worked_days": 0,
-                "days": [],
-                "work_duration_s": 0,
-            }
-        )
-        current_week += timedelta(days=7)
+    weeks_by_start = get_week_buckets(
+        start_date,
+        end_date,
+        lambda week_start: {
+            "start": week_start,
+            "end": week_start + timedelta(days=6),
+            "worked_days": 0,
+            "days": [],
+            "work_duration_s": 0,
+        },
+    )
+    weeks = list(weeks_by_start.values())
 
     # add work days by week
     for wd in work_days:
-        week = next(
-            filter(
-                lambda w, wd=wd: w["start"] == get_first_day_of_week(wd.day),
-                weeks,
-            ),
-            None,
-        )
+        week = weeks_by_start.get(get_first_day_of_week(wd.day))
         if week is None:
             continue
         week["worked_days"] += 1
@@ -226,14 +442,15 @@ def group_user_events_by_week(
 
 
 def compute_weekly_rest_duration(week, tz):
+    days_by_date = {}
+    for day in week["days"]:
+        days_by_date.setdefault(day["date"], day)
+
     current_outer_break = 0
     max_outer_break = 0
     current_day = week["start"]
     while current_day <= week["end"]:
-        day = next(
-            filter(lambda d, cd=current_day: d["date"] == cd, week["days"]),
-            None,
-        )
+        day = days_by_date.get(current_day)
 
         if day is None:
             current_outer_break += DAY
@@ -264,19 +481,35 @@ def compute_weekly_rest_duration(week, tz):
     return max_outer_break
 
 
-def compute_regulation_for_user(user):
+def compute_regulation_for_user(user, regulation_checks=None, from_date=None):
+    """
+    Recompute all the alerts of the user, or only the ones from the week of from_date when given.
+    """
+    if from_date:
+        from_date = get_first_day_of_week(from_date)
+
     #####
     # CLEAN previous data
     # This is mainly done to remove wrongly computed data
     ####
 
-    db.session.query(RegulationComputation).filter(
+    computations_to_delete = db.session.query(RegulationComputation).filter(
         RegulationComputation.user == user,
-    ).delete(synchronize_session=False)
-
-    db.session.query(RegulatoryAlert).filter(
+    )
+    alerts_to_delete = db.session.query(RegulatoryAlert).filter(
         RegulatoryAlert.user == user,
-    ).delete(synchronize_session=False)
+    )
+    if from_date:
+        computations_to_delete = computations_to_delete.filter(
+            RegulationComputation.day >= from_date
+        )
+        alerts_to_delete = alerts_to_delete.filter(
+            RegulatoryAlert.day >= from_date
+        )
+    computations_to_delete.delete(synchronize_session=False)
+    alerts_to_delete.delete(synchronize_session=False)
+
+    delete_work_day_summaries(user.id, from_date=from_date)
     ######
 
     #####
@@ -286,8 +519,12 @@ def compute_regulation_for_user(user):
         work_days_admin,
         work_days_user,
     ) = group_user_events_by_day_with_limit_both_submitter(
-        user=user, include_dismissed_or_empty_days=False
+        user=user,
+        from_date=from_date,
+        include_dismissed_or_empty_days=False,
     )
+    if regulation_checks is None:
+        regulation_checks = get_regulation_checks_registry()
     for submitter_type in [SubmitterType.ADMIN, SubmitterType.EMPLOYEE]:
         work_days = (
             work_days_admin
@@ -299,7 +536,11 @@ def compute_regulation_for_user(user):
         )
         for time_range in time_ranges:
             compute_regulations(
-                user, time_range[0], time_range[1], submitter_type
+                user,
+                time_range[0],
+                time_range[1],
+                submitter_type,
+                regulation_checks=regulation_checks,
             )
     ######
 
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta, date
 
-from sqlalchemy import desc
-
 from app import db
-from app.domain.regulations_helper import resolve_variables
+from app.domain.regulation_checks_registry import (
+    get_regulation_checks_registry,
+)
 from app.domain.work_days import NOT_WORK_ACTIVITIES
 from app.helpers.errors import InvalidResourceError
 from app.helpers.regulations_utils import (
@@ -14,7 +14,7 @@ from app.helpers.regulations_utils import (
 )
 from app.helpers.time import to_datetime
 from app.models.activity import ActivityType
-from app.models.regulation_check import RegulationCheck, RegulationCheckType
+from app.models.regulation_check import RegulationCheckType
 from app.models.regulatory_alert import RegulatoryAlert
 
 NATINF_11292 = "NATINF 11292"
@@ -58,38 +58,30 @@ def compute_regulations_per_day(
     submitter_type,
     work_days_over_current_past_and_next_days,
     tz,
+    alerts=None,
+    regulation_checks=None,
 ):
+    if regulation_checks is None:
+        regulation_checks = get_regulation_checks_registry()
     day_start_time = to_datetime(day, tz_for_date=tz)
     day_end_time = day_start_time + timedelta(days=1)
+    today = date.today()
     for type, regulation_functions in DAILY_REGULATION_CHECKS.items():
         work_days_filter = regulation_functions[1]
         computation = regulation_functions[0]
-        # IMPROVE: instead of using the latest, use the one valid for the day target
-        regulation_check = (
-            RegulationCheck.query.filter(RegulationCheck.type == type)
-            .order_by(desc(RegulationCheck.date_application_start))
-            .first()
-        )
-
-        check_start = regulation_check.date_application_start
-        check_end = regulation_check.date_application_end
-
-        if check_start > date.today():
-            continue
-
-        if check_end is not None and check_end <= date.today():
-            continue
+        latest_regulation_check = regulation_checks.get_latest(type)
 
-        # To be used locally on init regulation alerts only!
-        # regulation_check = next(
-        #     (x for x in get_regulation_checks() if x.type == type), None
-        # )
-
-        if not regulation_check:
+        if not latest_regulation_check:
             raise InvalidResourceError(
                 f"Missing regulation check of type {type}"
             )
 
+        # Rules which are not in application anymore (or not yet) are skipped
+        if not latest_regulation_check.is_valid_on(today):
+            continue
+
+        regulation_check = regulation_checks.get(type, day)
+
         activity_groups_to_take_into_account = work_days_filter(
             work_days_over_current_past_and_next_days,
             day_start_time,
@@ -104,21 +96,35 @@ def compute_regulations_per_day(
         )
 
         if not success:
-            regulatory_alert = RegulatoryAlert(
-                day=day,
-                extra=extra,
-                submitter_type=submitter_type,
-                user=user,
-                regulation_check_id=regulation_check.id,
-                business=business,
-            )
-            db.session.add(regulatory_alert)
+            if alerts is not None:
+                # Collected by the caller, which decides what to persist
+                alerts.append(
+                    RegulatoryAlert(
+                        day=day,
+                        extra=extra,
+                        submitter_type=submitter_type,
+                        user_id=user.id,
+                        regulation_check_id=regulation_check.id,
+                        business_id=business.id,
+                    )
+                )
+            else:
+                db.session.add(
+                    RegulatoryAlert(
+                        day=day,
+                        extra=extra,
+                        submitter_type=submitter_type,
+                        user=user,
+                        regulation_check_id=regulation_check.id,
+                        business=business,
+                    )
+                )
 
 
 def check_min_daily_rest(
     activity_groups, regulation_check, day_to_check_start_time, business
 ):
-    dict_variables = resolve_variables(regulation_check.variables, business)
+    dict_variables = regulation_check.resolve_variables(business)
     LONG_BREAK_DURATION_IN_HOURS = dict_variables[
         "LONG_BREAK_DURATION_IN_HOURS"
     ]
@@ -384,7 +390,7 @@ def _walk_activities_for_max_work_day_time(
 
 
 def check_max_work_day_time(activity_groups, regulation_check, business):
-    dict_variables = resolve_variables(regulation_check.variables, business)
+    dict_variables = regulation_check.resolve_variables(business)
     max_thresholds = {
         "max_night": dict_variables["MAXIMUM_DURATION_OF_NIGHT_WORK_IN_HOURS"],
         "max_day": dict_variables["MAXIMUM_DURATION_OF_DAY_WORK_IN_HOURS"],
@@ -450,7 +456,7 @@ def check_max_work_day_time(activity_groups, regulation_check, business):
 
 def check_min_work_day_break(activity_groups, regulation_check, business):
 
-    dict_variables = resolve_variables(regulation_check.variables, business)
+    dict_variables = regulation_check.resolve_variables(business)
     MINIMUM_DURATION_INDIVIDUAL_BREAK_IN_MIN = dict_variables[
         "MINIMUM_DURATION_INDIVIDUAL_BREAK_IN_MIN"
     ]
@@ -524,7 +530,7 @@ def check_max_uninterrupted_work_time(
     activity_groups, regulation_check, business
 ):
 
-    dict_variables = resolve_variables(regulation_check.variables, business)
+    dict_variables = regulation_check.resolve_variables(business)
     MAXIMUM_DURATION_OF_UNINTERRUPTED_WORK_IN_HOURS = dict_variables[
         "MAXIMUM_DURATION_OF_UNINTERRUPTED_WORK_IN_HOURS"
     ]
@@ -1,29 +1,23 @@
-from sqlalchemy import desc
-
 from app import db
-from app.domain.regulations_helper import resolve_variables
+from app.domain.regulation_checks_registry import (
+    get_regulation_checks_registry,
+)
 from app.helpers.errors import InvalidResourceError
 from app.helpers.regulations_utils import HOUR, ComputationResult
-from app.models.regulation_check import RegulationCheck, RegulationCheckType
+from app.models.regulation_check import RegulationCheckType
 from app.models.regulatory_alert import RegulatoryAlert
 
 NATINF_13152 = "NATINF 13152"
 NATINF_11289 = "NATINF 11289"
 
 
-def compute_regulations_per_week(user, business, week, submitter_type):
+def compute_regulations_per_week(
+    user, business, week, submitter_type, alerts=None, regulation_checks=None
+):
+    if regulation_checks is None:
+        regulation_checks = get_regulation_checks_registry()
     for type, computation in WEEKLY_REGULATION_CHECKS.items():
-        # IMPROVE: instead of using the latest, use the one valid for the day target
-        regulation_check = (
-            RegulationCheck.query.filter(RegulationCheck.type == type)
-            .order_by(desc(RegulationCheck.date_application_start))
-            .first()
-        )
-
-        # To be used locally on init regulation alerts only!
-        # regulation_check = next(
-        #     (x for x in get_regulation_checks() if x.type == type), None
-        # )
+        regulation_check = regulation_checks.get(type, week["start"])
 
         if not regulation_check:
             raise InvalidResourceError(
@@ -33,19 +27,33 @@ def compute_regulations_per_week(user, business, week, submitter_type):
         success, extra = computation(week, regulation_check, business)
 
         if not success:
-            regulatory_alert = RegulatoryAlert(
-                day=week["start"],
-                extra=extra,
-                submitter_type=submitter_type,
-                user=user,
-                regulation_check_id=regulation_check.id,
-                business=business,
-            )
-            db.session.add(regulatory_alert)
+            if alerts is not None:
+                # Collected by the caller, which decides what to persist
+                alerts.append(
+                    RegulatoryAlert(
+                        day=week["start"],
+                        extra=extra,
+                        submitter_type=submitter_type,
+                        user_id=user.id,
+                        regulation_check_id=regulation_check.id,
+                        business_id=business.id,
+                    )
+                )
+            else:
+                db.session.add(
+                    RegulatoryAlert(
+                        day=week["start"],
+                        extra=extra,
+                        submitter_type=submitter_type,
+                        user=user,
+                        regulation_check_id=regulation_check.id,
+                        business=business,
+                    )
+                )
 
 
 def check_max_worked_day_in_week(week, regulation_check, business):
-    dict_variables = resolve_variables(regulation_check.variables, business)
+    dict_variables = regulation_check.resolve_variables(business)
     MAXIMUM_DAY_WORKED_BY_WEEK = dict_variables["MAXIMUM_DAY_WORKED_BY_WEEK"]
     MINIMUM_WEEKLY_BREAK_IN_HOURS = dict_variables[
         "MINIMUM_WEEKLY_BREAK_IN_HOURS"
@@ -68,7 +76,7 @@ def check_max_worked_day_in_week(week, regulation_check, business):
 
 
 def check_max_work_in_calendar_week(week, regulation_check, business):
-    dict_variables = resolve_variables(regulation_check.variables, business)
+    dict_variables = regulation_check.resolve_variables(business)
     MAXIMUM_WEEKLY_WORK_IN_HOURS = dict_variables[
         "MAXIMUM_WEEKLY_WORK_IN_HOURS"
     ]
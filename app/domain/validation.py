@@ -6,7 +6,7 @@ from app.domain.mission import (
     end_mission_for_user,
 )
 from app.domain.permissions import company_admin
-from app.domain.regulations import compute_regulations
+from app.domain.regulations import compute_regulations_incrementally
 from app.domain.user import get_current_employment_in_company
 from app.helpers.authorization import AuthorizationError
 from app.helpers.errors import (
@@ -19,7 +19,7 @@ from app.helpers.impersonate_listener import sanitize_support_context
 from app.helpers.submitter_type import SubmitterType
 from app.models import MissionValidation, MissionEnd, MissionAutoValidation
 from app.helpers.notification_type import NotificationType
-from app.helpers.time import to_tz
+from app.helpers.time import get_dates_range, to_tz
 from app.models.notification import create_notification
 
 MIN_MISSION_LIFETIME_FOR_ADMIN_FORCE_VALIDATION = timedelta(days=10)
@@ -74,7 +74,12 @@ def validate_mission(
     is_auto_validation=False,
     is_admin_validation=None,
     justification=None,
+    with_regulations_computation=True,
 ):
+    """
+    :param with_regulations_computation: when False, the caller is responsible for computing the regulations
+    of the validated activities, see compute_regulations_after_validations
+    """
     validation_time = datetime.now()
 
     is_admin_validation = (
@@ -153,17 +158,15 @@ def validate_mission(
             )
             db.session.add(admin_auto_validation)
 
-        employment = get_current_employment_in_company(
-            user=for_user, company=mission.company
-        )
-        _compute_regulations_after_validation(
-            activities=activities_to_validate,
-            is_admin_validation=is_admin_validation,
-            user=for_user,
-            business=employment.business if employment else None,
-            employee_version_start_time=employee_version_start_time,
-            employee_version_end_time=employee_version_end_time,
-        )
+        if with_regulations_computation:
+            _compute_regulations_after_validation(
+                activities=activities_to_validate,
+                is_admin_validation=is_admin_validation,
+                user=for_user,
+                business=get_validation_business(mission, for_user),
+                employee_version_start_time=employee_version_start_time,
+                employee_version_end_time=employee_version_end_time,
+            )
 
     if not is_admin_validation and is_auto_validation:
         user_timezone = for_user.timezone
@@ -226,11 +229,16 @@ def _get_or_create_validation(
         return validation
 
 
-def _compute_regulations_after_validation(
+def get_validation_business(mission, user):
+    employment = get_current_employment_in_company(
+        user=user, company=mission.company
+    )
+    return employment.business if employment else None
+
+
+def _get_regulations_period_after_validation(
     activities,
-    is_admin_validation,
     user,
-    business=None,
     employee_version_start_time=None,
     employee_version_end_time=None,
 ):
@@ -252,14 +260,68 @@ def _compute_regulations_after_validation(
     else:
         period_end = mission_end or datetime.now().date()
 
+    return period_start, period_end
+
+
+def _compute_regulations_after_validation(
+    activities,
+    is_admin_validation,
+    user,
+    business=None,
+    employee_version_start_time=None,
+    employee_version_end_time=None,
+):
+    period_start, period_end = _get_regulations_period_after_validation(
+        activities,
+        user,
+        employee_version_start_time=employee_version_start_time,
+        employee_version_end_time=employee_version_end_time,
+    )
+
     submitter_type = (
         SubmitterType.ADMIN if is_admin_validation else SubmitterType.EMPLOYEE
     )
-    compute_regulations(
+    compute_regulations_incrementally(
         user=user,
         period_start=period_start,
         period_end=period_end,
         submitter_type=submitter_type,
         business=business,
         employee_version=False,
+        activities=activities,
+    )
+
+
+def compute_regulations_after_validations(
+    activities_by_mission, is_admin_validation, user, business=None
+):
+    """
+    Compute the regulations once for several missions validated for the user with
+    with_regulations_computation=False, over the union of the days each validation would have computed.
+    """
+    days = set()
+    activities = []
+    for mission_activities in activities_by_mission:
+        period_start, period_end = _get_regulations_period_after_validation(
+            mission_activities, user
+        )
+        days.update(get_dates_range(period_start, period_end))
+        activities.extend(mission_activities)
+    if not days:
+        return
+
+    first_day = min(days)
+    compute_regulations_incrementally(
+        user=user,
+        period_start=first_day,
+        period_end=first_day,
+        submitter_type=(
+            SubmitterType.ADMIN
+            if is_admin_validation
+            else SubmitterType.EMPLOYEE
+        ),
+        business=business,
+        employee_version=False,
+        activities=activities,
+        days=days,
     )
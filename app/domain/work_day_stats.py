@@ -0,0 +1,288 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import chain
+
+from sqlalchemy import event, func, tuple_
+from sqlalchemy.orm import attributes
+
+from app import app, db
+from app.helpers.time import (
+    FR_TIMEZONE,
+    get_dates_range,
+    to_datetime,
+    to_tz,
+)
+from app.models import Activity, Expenditure, Mission, WorkDayStats
+from app.models.queries import query_work_day_stats, work_day_stats_as_dict
+
+# Changes collected on flush, applied to the stats before the commit
+SESSION_CHANGES_KEY = "work_day_stats_changes"
+
+ACTIVITY_TRACKED_FIELDS = [
+    "start_time",
+    "end_time",
+    "dismissed_at",
+    "type",
+    "user_id",
+    "mission_id",
+]
+
+
+def _query_work_day_stats_values(
+    company_id, start_date, end_date, user_ids, is_requested
+):
+    rows, _ = query_work_day_stats(
+        company_id,
+        start_date=start_date,
+        end_date=end_date,
+        user_ids=user_ids,
+    )
+    values = []
+    for row in rows:
+        stats = work_day_stats_as_dict(row)
+        if not is_requested(stats["user_id"], stats["day"]):
+            continue
+        stats.pop("is_running")
+        values.append(
+            dict(company_id=company_id, creation_time=datetime.now(), **stats)
+        )
+    return values
+
+
+def refresh_work_day_stats(company_id, start_date, end_date, user_ids=None):
+    """
+    Compute again the stored work day stats of the company between two dates (included)
+    """
+    values = _query_work_day_stats_values(
+        company_id,
+        start_date,
+        end_date,
+        user_ids,
+        # Days outside of the range are incomplete
+        lambda user_id, day: start_date <= day <= end_date,
+    )
+
+    delete_query = WorkDayStats.__table__.delete().where(
+        (WorkDayStats.company_id == company_id)
+        & (WorkDayStats.day >= start_date)
+        & (WorkDayStats.day <= end_date)
+    )
+    if user_ids:
+        delete_query = delete_query.where(WorkDayStats.user_id.in_(user_ids))
+    db.session.execute(delete_query)
+    if values:
+        db.session.execute(WorkDayStats.__table__.insert(), values)
+
+
+def _get_consecutive_day_ranges(days):
+    ranges = []
+    for day in sorted(days):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return ranges
+
+
+def refresh_user_work_day_stats(company_id, days_by_user_id):
+    """
+    Compute again the stored work day stats of the company, for the given days
+    of each user only : once per range of consecutive days, for the users with
+    a day in it.
+    """
+    all_days = set(chain.from_iterable(days_by_user_id.values()))
+    for start_date, end_date in _get_consecutive_day_ranges(all_days):
+        user_days = {
+            (user_id, day)
+            for user_id, days in days_by_user_id.items()
+            for day in days
+            if start_date <= day <= end_date
+        }
+        values = _query_work_day_stats_values(
+            company_id,
+            start_date,
+            end_date,
+            sorted(set(user_id for user_id, _ in user_days)),
+            lambda user_id, day: (user_id, day) in user_days,
+        )
+        db.session.execute(
+            WorkDayStats.__table__.delete().where(
+                (WorkDayStats.company_id == company_id)
+                & tuple_(WorkDayStats.user_id, WorkDayStats.day).in_(
+                    sorted(user_days)
+                )
+            )
+        )
+        if values:
+            db.session.execute(WorkDayStats.__table__.insert(), values)
+
+
+def _days_between(start_time, end_time):
+    start_day, end_day = _days_of([start_time, end_time or datetime.now()])
+    return set(get_dates_range(start_day, end_day))
+
+
+def _days_of(times):
+    return [
+        t if type(t) is date else to_tz(t, FR_TIMEZONE).date() for t in times
+    ]
+
+
+def _history_values(obj, field):
+    history = attributes.get_history(obj, field)
+    return [
+        v
+        for v in chain(history.added, history.unchanged, history.deleted)
+        if v is not None
+    ]
+
+
+def _previous_value(obj, field):
+    history = attributes.get_history(obj, field)
+    previous_values = history.deleted or history.unchanged
+    return previous_values[0] if previous_values else None
+
+
+def get_days_touched_by_activity_change(activity):
+    """
+    Days of the period of the activity, before and after its pending change
+    """
+    days = _days_between(activity.start_time, activity.end_time)
+    previous_start_time = _previous_value(activity, "start_time")
+    if previous_start_time:
+        days |= _days_between(
+            previous_start_time, _previous_value(activity, "end_time")
+        )
+    return days
+
+
+def _get_change(obj):
+    # (mission id, user id, days), user id and days are None for the whole mission
+    if isinstance(obj, Activity):
+        days = get_days_touched_by_activity_change(obj)
+        return [
+            (mission_id, user_id, days)
+            for mission_id in _history_values(obj, "mission_id")
+            for user_id in _history_values(obj, "user_id")
+        ]
+    if isinstance(obj, Expenditure):
+        return [
+            (
+                obj.mission_id,
+                obj.user_id,
+                _history_values(obj, "spending_date"),
+            )
+        ]
+    if isinstance(obj, Mission):
+        if attributes.get_history(obj, "name").deleted:
+            return [(obj.id, None, None)]
+    return []
+
+
+def _is_tracked_change(session, obj):
+    if isinstance(obj, Activity):
+        return any(
+            attributes.get_history(obj, field).has_changes()
+            for field in ACTIVITY_TRACKED_FIELDS
+        )
+    return session.is_modified(obj, include_collections=False)
+
+
+@event.listens_for(db.session, "after_flush")
+def collect_work_day_stats_changes(session, flush_context):
+    objects = chain(
+        session.new,
+        [o for o in session.dirty if _is_tracked_change(session, o)],
+        session.deleted,
+    )
+    changes = [change for obj in objects for change in _get_change(obj)]
+    if changes:
+        session.info.setdefault(SESSION_CHANGES_KEY, []).extend(changes)
+
+
+@event.listens_for(db.session, "before_commit")
+def apply_work_day_stats_changes(session):
+    session.flush()
+    changes = session.info.pop(SESSION_CHANGES_KEY, None)
+    if changes:
+        refresh_work_day_stats_for_changes(changes)
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_work_day_stats_changes(session):
+    session.info.pop(SESSION_CHANGES_KEY, None)
+
+
+def refresh_work_day_stats_for_changes(changes):
+    """
+    Compute again the stored stats of the users and days touched by the changes
+    of the transaction
+    """
+    mission_ids = set(mission_id for mission_id, _, _ in changes)
+    company_ids = dict(
+        db.session.query(Mission.id, Mission.company_id).filter(
+            Mission.id.in_(mission_ids)
+        )
+    )
+
+    days_by_company_and_user = defaultdict(lambda: defaultdict(set))
+    whole_mission_ids = set()
+    for mission_id, user_id, days in changes:
+        if mission_id not in company_ids:
+            continue
+        if user_id is None:
+            whole_mission_ids.add(mission_id)
+            continue
+        days_by_company_and_user[company_ids[mission_id]][user_id].update(days)
+
+    if whole_mission_ids:
+        for mission_id, user_id, start_time, end_time in db.session.query(
+            Activity.mission_id,
+            Activity.user_id,
+            Activity.start_time,
+            Activity.end_time,
+        ).filter(
+            Activity.mission_id.in_(whole_mission_ids),
+            ~Activity.is_dismissed,
+        ):
+            days_by_company_and_user[company_ids[mission_id]][user_id].update(
+                _days_between(start_time, end_time)
+            )
+
+    for company_id, days_by_user_id in days_by_company_and_user.items():
+        refresh_user_work_day_stats(company_id, days_by_user_id)
+
+
+def reconcile_work_day_stats(start_date, end_date):
+    """
+    Compute again the stored work day stats of all the companies with activities or stats on the period.
+    Catches up on changes that did not go through the ORM.
+    """
+    start_time = to_datetime(start_date, tz_for_date=FR_TIMEZONE)
+    end_time = to_datetime(
+        end_date, tz_for_date=FR_TIMEZONE, date_as_end_of_day=True
+    )
+    companies_with_activities = (
+        db.session.query(Mission.company_id)
+        .join(Activity, Activity.mission_id == Mission.id)
+        .filter(
+            Activity.start_time <= end_time,
+            func.coalesce(Activity.end_time, func.now()) >= start_time,
+        )
+    )
+    companies_with_stats = db.session.query(WorkDayStats.company_id).filter(
+        WorkDayStats.day >= start_date, WorkDayStats.day <= end_date
+    )
+    company_ids = sorted(
+        company_id
+        for (company_id,) in companies_with_activities.union(
+            companies_with_stats
+        )
+    )
+
+    app.logger.info(
+        f"Reconciling work day stats of {len(company_ids)} companies from {start_date} to {end_date}"
+    )
+    for company_id in company_ids:
+        refresh_work_day_stats(company_id, start_date, end_date)
+        db.session.commit()
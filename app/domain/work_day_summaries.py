@@ -0,0 +1,220 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import attributes
+
+from app import db
+from app.domain.work_day_stats import (
+    ACTIVITY_TRACKED_FIELDS,
+    get_days_touched_by_activity_change,
+)
+from app.helpers.time import get_dates_range, to_tz
+from app.models import Activity, ActivityVersion
+from app.models.regulation_work_day_summary import RegulationWorkDaySummary
+
+
+@dataclass(frozen=True)
+class WorkDaySummary:
+    """What the weekly regulation checks need to know about a work day.
+
+    Exposes the same attribute names as WorkDay so both can be fed to
+    group_user_events_by_week.
+    """
+
+    day: date
+    start_time: datetime
+    end_time: datetime
+    end_of_day: datetime
+    is_first_mission_overlapping_with_previous_day: bool
+    is_last_mission_overlapping_with_next_day: bool
+    total_work_duration: int
+
+    @classmethod
+    def from_work_day(cls, work_day):
+        return cls(
+            day=work_day.day,
+            start_time=work_day.start_time,
+            end_time=work_day.end_time,
+            end_of_day=work_day.end_of_day,
+            is_first_mission_overlapping_with_previous_day=work_day.is_first_mission_overlapping_with_previous_day,
+            is_last_mission_overlapping_with_next_day=work_day.is_last_mission_overlapping_with_next_day,
+            total_work_duration=work_day.total_work_duration,
+        )
+
+    @classmethod
+    def from_dict(cls, day, data):
+        return cls(
+            day=day,
+            start_time=datetime.fromisoformat(data["start_time"]),
+            end_time=(
+                datetime.fromisoformat(data["end_time"])
+                if data["end_time"]
+                else None
+            ),
+            end_of_day=datetime.fromisoformat(data["end_of_day"]),
+            is_first_mission_overlapping_with_previous_day=data[
+                "overlap_previous_day"
+            ],
+            is_last_mission_overlapping_with_next_day=data["overlap_next_day"],
+            total_work_duration=data["work_duration_s"],
+        )
+
+    def to_dict(self):
+        return dict(
+            start_time=self.start_time.isoformat(),
+            end_time=self.end_time.isoformat() if self.end_time else None,
+            end_of_day=self.end_of_day.isoformat(),
+            overlap_previous_day=self.is_first_mission_overlapping_with_previous_day,
+            overlap_next_day=self.is_last_mission_overlapping_with_next_day,
+            work_duration_s=self.total_work_duration,
+        )
+
+
+def get_days_touched_by_activities(activities, tz):
+    """Days (in the user timezone) covered by the given activities, including
+    the periods of their previous versions so that days an activity was moved
+    away from are also recomputed."""
+    periods = [(a.start_time, a.end_time) for a in activities]
+    activity_ids = [a.id for a in activities if a.id is not None]
+    if activity_ids:
+        periods.extend(
+            db.session.query(
+                ActivityVersion.start_time, ActivityVersion.end_time
+            )
+            .filter(ActivityVersion.activity_id.in_(activity_ids))
+            .all()
+        )
+
+    days = set()
+    now = datetime.now()
+    for start_time, end_time in periods:
+        days.update(
+            get_dates_range(
+                to_tz(start_time, tz).date(),
+                to_tz(end_time or now, tz).date(),
+            )
+        )
+    return days
+
+
+def get_work_day_summaries(user_id, submitter_type, employee_version, days):
+    """Cached summaries for the given days.
+
+    Returns a dict day -> WorkDaySummary, or None for a day that was computed
+    and had no work. Days that were never summarized are absent.
+    """
+    if not days:
+        return {}
+    rows = (
+        db.session.query(
+            RegulationWorkDaySummary.day, RegulationWorkDaySummary.summary
+        )
+        .filter(
+            RegulationWorkDaySummary.user_id == user_id,
+            RegulationWorkDaySummary.submitter_type == submitter_type,
+            RegulationWorkDaySummary.employee_version == employee_version,
+            RegulationWorkDaySummary.day.in_(list(days)),
+        )
+        .all()
+    )
+    return {
+        day: WorkDaySummary.from_dict(day, summary) if summary else None
+        for day, summary in rows
+    }
+
+
+def save_work_day_summaries(
+    user_id, submitter_type, employee_version, work_days, from_date, until_date
+):
+    """Store the summary of every day between from_date and until_date, days
+    without work day included."""
+    work_days_by_day = {wd.day: wd for wd in work_days}
+    values = []
+    for day in get_dates_range(from_date, until_date):
+        work_day = work_days_by_day.get(day)
+        values.append(
+            dict(
+                day=day,
+                user_id=user_id,
+                submitter_type=submitter_type,
+                employee_version=employee_version,
+                creation_time=datetime.now(),
+                summary=(
+                    WorkDaySummary.from_work_day(work_day).to_dict()
+                    if work_day
+                    else None
+                ),
+            )
+        )
+    if not values:
+        return
+
+    stmt = insert(RegulationWorkDaySummary).values(values)
+    stmt = stmt.on_conflict_do_update(
+        constraint="one_work_day_summary_per_user_submitter_type_version_and_day",
+        set_=dict(summary=stmt.excluded.summary),
+    )
+    db.session.execute(stmt)
+
+
+def delete_work_day_summaries(user_id, from_date=None):
+    query = db.session.query(RegulationWorkDaySummary).filter(
+        RegulationWorkDaySummary.user_id == user_id
+    )
+    if from_date:
+        query = query.filter(RegulationWorkDaySummary.day >= from_date)
+    query.delete(synchronize_session=False)
+
+
+def _is_activity_write(session, obj):
+    if not isinstance(obj, Activity):
+        return False
+    return obj not in session.dirty or any(
+        attributes.get_history(obj, field).has_changes()
+        for field in ACTIVITY_TRACKED_FIELDS
+    )
+
+
+@event.listens_for(db.session, "after_flush")
+def invalidate_work_day_summaries(session, flush_context):
+    """Delete the summaries of the days touched by the activities written in
+    the flush, whatever the path of the change: a summary which is still
+    stored was computed after the last change of its day."""
+    days_by_user_id = defaultdict(set)
+    for activity in chain(session.new, session.dirty, session.deleted):
+        if not _is_activity_write(session, activity):
+            continue
+        days = get_days_touched_by_activity_change(activity)
+        history = attributes.get_history(activity, "user_id")
+        for user_id in chain(
+            history.added, history.unchanged, history.deleted
+        ):
+            if user_id is not None:
+                days_by_user_id[user_id] |= days
+
+    for user_id, days in days_by_user_id.items():
+        # Days are in the French timezone, the one of the user may differ
+        session.execute(
+            RegulationWorkDaySummary.__table__.delete().where(
+                (RegulationWorkDaySummary.user_id == user_id)
+                & RegulationWorkDaySummary.day.in_(
+                    sorted(get_days_around(days))
+                )
+            )
+        )
+
+
+def get_days_around(days, nb_days_before=1, nb_days_after=1):
+    around = set()
+    for day in days:
+        around.update(
+            get_dates_range(
+                day - timedelta(days=nb_days_before),
+                day + timedelta(days=nb_days_after),
+            )
+        )
+    return around
@@ -21,6 +21,7 @@ from app.models.activity import ActivityType
 from cached_property import cached_property
 from dateutil.tz import gettz
 from sqlalchemy import desc
+from sqlalchemy.orm import selectinload
 
 
 NOT_WORK_ACTIVITIES = [ActivityType.OFF, ActivityType.TRANSFER]
@@ -147,7 +148,8 @@ class WorkDay:
 
         # To be commented locally on init regulation alerts only!
         mission.history = actions_history(
-            mission, self.user,
+            mission,
+            self.user,
             include_dispute_motif=False,
             max_reception_time=self.max_reception_time,
         )
@@ -471,6 +473,53 @@ def group_user_events_by_day_with_limit(
             raise InvalidParamsError("Invalid pagination cursor")
         until_date = min(max_date, until_date) if until_date else max_date
 
+    missions, has_next = query_user_missions_for_work_days(
+        user,
+        consultation_scope=consultation_scope,
+        from_date=from_date,
+        until_date=until_date,
+        tz=tz,
+        include_holidays=include_holidays,
+        only_missions_validated_by_admin=only_missions_validated_by_admin,
+        only_missions_validated_by_user=only_missions_validated_by_user,
+        first=first,
+        max_reception_time=max_reception_time,
+    )
+
+    work_days = group_user_missions_by_day(
+        user,
+        missions,
+        from_date=from_date,
+        until_date=until_date,
+        tz=tz,
+        include_dismissed_or_empty_days=include_dismissed_or_empty_days,
+        max_reception_time=max_reception_time,
+        employee_version=employee_version,
+    )
+    if first and has_next:
+        work_days = work_days[1:]
+    return work_days, has_next
+
+
+def query_user_missions_for_work_days(
+    user,
+    consultation_scope=None,
+    from_date=None,
+    until_date=None,
+    tz=None,
+    include_holidays=True,
+    only_missions_validated_by_admin=False,
+    only_missions_validated_by_user=False,
+    first=None,
+    max_reception_time=None,
+):
+    """
+    Missions of the user on the period with their activities and revisions loaded,
+    ready to be grouped by day with group_user_missions_by_day.
+    """
+    if tz is None:
+        tz = user.timezone
+
     def additional_activity_filters(query):
         query = query.order_by(desc(Activity.start_time), desc(Activity.id))
         if not include_holidays:
@@ -506,20 +555,7 @@ def group_user_events_by_day_with_limit(
             for m in missions
             if m.validation_of(user, max_reception_time=max_reception_time)
         ]
-
-    work_days = group_user_missions_by_day(
-        user,
-        missions,
-        from_date=from_date,
-        until_date=until_date,
-        tz=tz,
-        include_dismissed_or_empty_days=include_dismissed_or_empty_days,
-        max_reception_time=max_reception_time,
-        employee_version=employee_version,
-    )
-    if first and has_next:
-        work_days = work_days[1:]
-    return work_days, has_next
+    return missions, has_next
 
 
 def group_user_events_by_day_with_limit_both_submitter(
@@ -595,6 +631,103 @@ def group_user_events_by_day_with_limit_both_submitter(
     return work_days_admin, work_days_user
 
 
+def group_users_events_by_day(
+    users,
+    consultation_scope=None,
+    from_date=None,
+    until_date=None,
+    include_dismissed_or_empty_days=False,
+):
+    """Work days of several users, as computed one user at a time by
+    group_user_events_by_day_with_limit (without pagination).
+
+    Activities of all the users and the relations of their missions are
+    fetched in one query set, then grouped by user in memory.
+    Returns a dict user id -> list of work days.
+    """
+    from app.models.queries import query_activities, add_mission_relations
+
+    if not users:
+        return {}
+
+    time_ranges = {
+        user.id: (
+            to_datetime(from_date, tz_for_date=user.timezone),
+            to_datetime(
+                until_date, tz_for_date=user.timezone, date_as_end_of_day=True
+            ),
+        )
+        for user in users
+    }
+    restrict_to_company_ids = (
+        (consultation_scope.company_ids or None)
+        if consultation_scope
+        else None
+    )
+
+    # The time range must cover the one of every user timezone
+    activity_query = (
+        query_activities(
+            include_dismissed_activities=True,
+            start_time=(
+                min(r[0] for r in time_ranges.values()) if from_date else None
+            ),
+            end_time=(
+                max(r[1] for r in time_ranges.values()) if until_date else None
+            ),
+        )
+        .filter(Activity.user_id.in_(list(time_ranges.keys())))
+        .options(
+            add_mission_relations(
+                selectinload(Activity.mission), include_revisions=True
+            )
+        )
+        .order_by(desc(Activity.start_time), desc(Activity.id))
+    )
+
+    activities_by_user_id = defaultdict(list)
+    for activity in activity_query.all():
+        start_time, end_time = time_ranges[activity.user_id]
+        if _activity_overlaps(activity, start_time, end_time):
+            activities_by_user_id[activity.user_id].append(activity)
+
+    work_days_by_user_id = {}
+    for user in users:
+        missions = []
+        seen_missions = set()
+        for activity in sorted(
+            activities_by_user_id[user.id],
+            key=lambda a: (a.is_dismissed, a.start_time),
+        ):
+            mission = activity.mission
+            if mission not in seen_missions and (
+                restrict_to_company_ids is None
+                or mission.company_id in restrict_to_company_ids
+            ):
+                missions.append(mission)
+                seen_missions.add(mission)
+        work_days_by_user_id[user.id] = group_user_missions_by_day(
+            user,
+            missions,
+            from_date=from_date,
+            until_date=until_date,
+            include_dismissed_or_empty_days=include_dismissed_or_empty_days,
+        )
+    return work_days_by_user_id
+
+
+def _activity_overlaps(activity, start_time, end_time):
+    # Same rule as the time range filter of query_activities
+    activity_end_time = activity.end_time
+    if activity.is_dismissed and activity_end_time is None:
+        activity_end_time = max(activity.start_time, activity.dismissed_at)
+    if end_time and activity.start_time > end_time:
+        return False
+    if start_time and activity_end_time and activity_end_time < start_time:
+        return False
+    return True
+
+
 def group_user_missions_by_day(
     user,
     missions,
@@ -1,15 +1,31 @@
+import hashlib
+import hmac
+import secrets
 from functools import wraps
+from threading import Lock
 
 from argon2 import PasswordHasher
+from cachetools import TTLCache
 from flask import request
+from sqlalchemy import event
 
 from app import app
 from app.helpers.authentication import CLIENT_ID_HTTP_HEADER_NAME
 from app.helpers.errors import AuthenticationError
-from app.helpers.oauth.models import ThirdPartyClientCompany
+from app.helpers.oauth.models import ThirdPartyApiKey, ThirdPartyClientCompany
 
 API_KEY_HTTP_HEADER_NAME = "X-API-KEY"
 
+# Argon2 is deliberately slow : successful verifications are remembered, keyed
+# by a digest of the client id and the key. The digest secret is generated per
+# process so the cache keys are worthless outside of it.
+_DIGEST_SECRET = secrets.token_bytes(32)
+_verified_api_keys = TTLCache(
+    maxsize=app.config["API_KEY_CACHE_MAX_SIZE"],
+    ttl=app.config["API_KEY_CACHE_TTL_SECONDS"],
+)
+_verified_api_keys_lock = Lock()
+
 
 def request_client_id():
     try:
@@ -28,9 +44,41 @@ def require_api_key_decorator(func):
     return inner
 
 
-def check_api_key():
-    from app.helpers.oauth.models import ThirdPartyApiKey
+def _api_key_digest(client_id, api_key):
+    return hmac.new(
+        _DIGEST_SECRET,
+        f"{client_id}:{api_key}".encode(),
+        hashlib.sha256,
+    ).digest()
+
+
+def clear_verified_api_keys(client_id=None):
+    with _verified_api_keys_lock:
+        if client_id is None:
+            _verified_api_keys.clear()
+            return
+        for digest, (cached_client_id, _, _) in list(
+            _verified_api_keys.items()
+        ):
+            if str(cached_client_id) == str(client_id):
+                _verified_api_keys.pop(digest, None)
+
+
+def _is_cached_api_key_still_valid(cached_api_key):
+    # Keys can be revoked from another process : the row must still exist
+    _, api_key_id, api_key_hash = cached_api_key
+    return (
+        ThirdPartyApiKey.query.filter(
+            ThirdPartyApiKey.id == api_key_id,
+            ThirdPartyApiKey.api_key == api_key_hash,
+        )
+        .with_entities(ThirdPartyApiKey.id)
+        .first()
+        is not None
+    )
 
+
+def check_api_key():
     api_key_parameter = request.headers.get(API_KEY_HTTP_HEADER_NAME)
     client_id = request.headers.get(CLIENT_ID_HTTP_HEADER_NAME)
     if not api_key_parameter or not client_id:
@@ -42,6 +90,15 @@ def check_api_key():
         and api_key
         and client_id
     ):
+        digest = _api_key_digest(client_id, api_key)
+        with _verified_api_keys_lock:
+            cached_api_key = _verified_api_keys.get(digest)
+        if cached_api_key is not None:
+            if _is_cached_api_key_still_valid(cached_api_key):
+                return True
+            with _verified_api_keys_lock:
+                _verified_api_keys.pop(digest, None)
+
         ph = PasswordHasher()
         db_api_keys = ThirdPartyApiKey.query.filter(
             ThirdPartyApiKey.client_id == client_id
@@ -49,6 +106,12 @@ def check_api_key():
         for db_api_key in db_api_keys:
             try:
                 if ph.verify(db_api_key.api_key, api_key):
+                    with _verified_api_keys_lock:
+                        _verified_api_keys[digest] = (
+                            db_api_key.client_id,
+                            db_api_key.id,
+                            db_api_key.api_key,
+                        )
                     return True
             except Exception:
                 continue
@@ -66,3 +129,10 @@ def check_protected_client_id_company_id(company_id):
         ~ThirdPartyClientCompany.is_dismissed,
     ).one_or_none()
     return client_company_link is not None
+
+
+@event.listens_for(ThirdPartyApiKey, "after_insert")
+@event.listens_for(ThirdPartyApiKey, "after_update")
+@event.listens_for(ThirdPartyApiKey, "after_delete")
+def _clear_client_verified_api_keys(mapper, connection, target):
+    clear_verified_api_keys(target.client_id)
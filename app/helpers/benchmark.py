@@ -0,0 +1,231 @@
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from time import perf_counter
+
+from sqlalchemy import event
+
+from app import db
+
+HOT_PATHS = [
+    "group_user_missions_by_day",
+    "compute_regulations",
+    "query_work_day_stats",
+    "get_one_excel_file",
+    "build_activity_file",
+]
+
+# Relative increase of the duration or peak memory per call reported as a regression
+DEFAULT_TOLERANCE = 0.2
+
+# Directory from which the app is imported in a new interpreter
+PROJECT_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def _init_hot_path_stats():
+    return dict(calls=0, duration_ms=0.0, sql_count=0, peak_memory_kb=0.0)
+
+
+@contextmanager
+def measure(stats):
+    """
+    Add the wall time, SQL query count and peak Python memory of the block to stats.
+    Memory is traced with tracemalloc, which slows the code down : durations are
+    only comparable between reports built the same way.
+    """
+    sql_count = [0]
+
+    def count_query(*args):
+        sql_count[0] += 1
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    event.listen(db.engine, "after_cursor_execute", count_query)
+    start_time = perf_counter()
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start_time
+        event.remove(db.engine, "after_cursor_execute", count_query)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        stats["calls"] += 1
+        stats["duration_ms"] += duration * 1000
+        stats["sql_count"] += sql_count[0]
+        stats["peak_memory_kb"] = max(
+            stats["peak_memory_kb"], peak_memory / 1024
+        )
+
+
+def run_hot_path_benchmarks(fleet, nb_days):
+    """
+    Run every hot path over the fleet built by generate_fleet, on the last nb_days days.
+    Work days are grouped by company for the exports and by driver for the other paths.
+    :return: dict hot path name -> accumulated stats
+    """
+    from app.domain.regulation_checks_registry import (
+        get_regulation_checks_registry,
+    )
+    from app.domain.regulations import compute_regulations
+    from app.domain.work_days import (
+        group_user_missions_by_day,
+        group_users_events_by_day,
+        query_user_missions_for_work_days,
+    )
+    from app.helpers.submitter_type import SubmitterType
+    from app.helpers.tachograph import build_activity_file
+    from app.helpers.xls.companies import get_one_excel_file
+    from app.models.queries import query_work_day_stats
+
+    hot_paths = {name: _init_hot_path_stats() for name in HOT_PATHS}
+    end_date = date.today()
+    start_date = end_date - timedelta(days=nb_days)
+    now = datetime.now(timezone.utc)
+    regulation_checks = get_regulation_checks_registry()
+
+    for company, _, drivers in fleet:
+        # Every company starts from an empty identity map
+        db.session.commit()
+        db.session.expire_all()
+
+        with measure(hot_paths["query_work_day_stats"]):
+            query_work_day_stats(
+                company.id, start_date=start_date, end_date=end_date
+            )
+
+        work_days_by_user_id = group_users_events_by_day(
+            drivers, from_date=start_date, until_date=end_date
+        )
+        with measure(hot_paths["get_one_excel_file"]):
+            get_one_excel_file(
+                [
+                    work_day
+                    for work_days in work_days_by_user_id.values()
+                    for work_day in work_days
+                ],
+                [company],
+                start_date,
+                end_date,
+            )
+
+        for driver in drivers:
+            missions, _ = query_user_missions_for_work_days(
+                driver,
+                from_date=start_date,
+                until_date=end_date,
+                tz=timezone.utc,
+            )
+            with measure(hot_paths["group_user_missions_by_day"]):
+                work_days = group_user_missions_by_day(
+                    driver,
+                    missions,
+                    from_date=start_date,
+                    until_date=end_date,
+                    tz=timezone.utc,
+                )
+            with measure(hot_paths["build_activity_file"]):
+                build_activity_file(
+                    work_days,
+                    driver,
+                    start_date,
+                    now,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+            with measure(hot_paths["compute_regulations"]):
+                compute_regulations(
+                    driver,
+                    start_date,
+                    end_date,
+                    SubmitterType.ADMIN,
+                    regulation_checks=regulation_checks,
+                )
+        db.session.commit()
+
+    return hot_paths
+
+
+def build_benchmark_report(hot_paths, nb_companies, nb_drivers, nb_days):
+    return dict(
+        created_at=datetime.now().isoformat(timespec="seconds"),
+        python_version=platform.python_version(),
+        fleet=dict(
+            nb_companies=nb_companies,
+            nb_drivers=nb_drivers,
+            nb_days=nb_days,
+        ),
+        hot_paths=hot_paths,
+    )
+
+
+def compare_benchmark_reports(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    List the regressions of report against baseline, per call of each hot path.
+    SQL query counts do not depend on the machine : any increase is a regression.
+    """
+    if report["fleet"] != baseline["fleet"]:
+        raise ValueError(
+            f"Reports built on different fleets : {report['fleet']} and {baseline['fleet']}"
+        )
+
+    regressions = []
+    for name, stats in report["hot_paths"].items():
+        baseline_stats = baseline["hot_paths"].get(name)
+        if not baseline_stats or not stats["calls"]:
+            continue
+        for key, allowed_increase in [
+            ("duration_ms", tolerance),
+            ("sql_count", 0),
+            ("peak_memory_kb", tolerance),
+        ]:
+            value = stats[key]
+            baseline_value = baseline_stats[key]
+            if key != "peak_memory_kb":
+                value /= stats["calls"]
+                baseline_value /= baseline_stats["calls"]
+            if value > baseline_value * (1 + allowed_increase):
+                regressions.append(
+                    f"{name} {key} : {baseline_value:.1f} -> {value:.1f}"
+                )
+    return regressions
+
+
+def parse_import_time_report(report):
+    """
+    Cumulative import time of each module, in microseconds, read from the report
+    that python -X importtime writes to stderr.
+    """
+    import_times = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, module = line.split("|")
+        # Skip the header line
+        if cumulative_us.strip().isdigit():
+            import_times[module.strip()] = int(cumulative_us)
+    return import_times
+
+
+def measure_import_time(boot_mode):
+    """
+    Import the app in a new interpreter with python -X importtime, in the given boot mode.
+    :return: dict module name -> cumulative import time in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=PROJECT_DIR,
+        env=dict(os.environ, MOBILIC_BOOT_MODE=boot_mode),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_import_time_report(result.stderr)
@@ -1,18 +1,27 @@
+import os
+import tempfile
 import time
+from datetime import date
 
 from celery import Celery
 import sentry_sdk
 
 from app import app, db
+from app.domain.permissions import ConsultationScope
 from app.helpers.s3 import S3Client
-from app.helpers.xls import generate_admin_export_file_from_chunks
 from app.models import User, Export, Company
 from app.models.export import ExportStatus, ExportType
 
 celery = Celery(app.name, broker=app.config["CELERY_BROKER_URL"])
 celery.conf.update(app.config)
 
+# The file writers are imported in their task : PDF and spreadsheet libraries are
+# slow to import and not needed by the app when it does not run the task
+
 DEFAULT_FILE_NAME = "rapport_activités"
+TACHOGRAPH_FILE_NAME = "fichiers_C1B.zip"
+WORK_DAYS_PDF_FILE_NAME = "releves_heures.zip"
+RAW_DATA_FILE_NAME = "donnees_brutes.zip"
 
 
 @celery.task()
@@ -23,6 +32,8 @@ def async_export_excel(
     file_name=DEFAULT_FILE_NAME,
     export_type=ExportType.EXCEL,
 ):
+    from app.helpers.xls import stream_admin_export_file_from_chunks
+
     with app.app_context():
         sentry_sdk.set_tag("feature", "excel_export")
 
@@ -45,9 +56,7 @@ def async_export_excel(
         db.session.add(export)
         db.session.commit()
 
-        try:
-            start_time = time.perf_counter()
-
+        def generate_file(output_dir):
             all_user_ids = set()
             for chunk in chunks:
                 all_user_ids.update(chunk["user_ids"])
@@ -58,13 +67,200 @@ def async_export_excel(
                 .all()
             )
 
-            file_content, content_type, file_name, file_size_bytes = (
-                generate_admin_export_file_from_chunks(
-                    chunks=chunks,
-                    users=users,
-                    companies=companies,
-                    file_name=file_name,
-                )
+            return stream_admin_export_file_from_chunks(
+                chunks=chunks,
+                users=users,
+                companies=companies,
+                file_name=file_name,
+                output_dir=output_dir,
+                nb_workers=app.config["EXPORT_NB_WORKERS"],
+            )
+
+        _generate_and_upload_export(export, generate_file)
+
+
+@celery.task()
+def async_export_tachograph_files(
+    exporter_id,
+    company_ids,
+    user_ids,
+    min_date,
+    max_date,
+    with_signatures=False,
+    employee_version=False,
+):
+    from app.helpers.tachograph import write_tachograph_archive_company
+
+    with app.app_context():
+        sentry_sdk.set_tag("feature", "tachograph_export")
+
+        exporter = User.query.get(exporter_id)
+
+        export = Export(
+            user=exporter,
+            export_type=ExportType.TACHOGRAPH,
+            context={
+                "exporter_id": exporter_id,
+                "company_ids": company_ids,
+                "user_ids": user_ids,
+                "min_date": min_date,
+                "max_date": max_date,
+                "with_signatures": with_signatures,
+                "employee_version": employee_version,
+            },
+        )
+        db.session.add(export)
+        db.session.commit()
+
+        def generate_file(output_dir):
+            users = (
+                User.query.filter(User.id.in_(user_ids))
+                .order_by(User.id)
+                .all()
+            )
+            file_path = os.path.join(output_dir, TACHOGRAPH_FILE_NAME)
+            write_tachograph_archive_company(
+                file_path,
+                users=users,
+                min_date=date.fromisoformat(min_date),
+                max_date=date.fromisoformat(max_date),
+                scope=ConsultationScope(company_ids=company_ids),
+                with_signatures=with_signatures,
+                employee_version=employee_version,
+            )
+            return (
+                file_path,
+                "application/zip",
+                TACHOGRAPH_FILE_NAME,
+                os.path.getsize(file_path),
+            )
+
+        _generate_and_upload_export(export, generate_file)
+
+
+@celery.task()
+def async_export_work_days_pdf(
+    exporter_id,
+    company_ids,
+    user_ids,
+    min_date,
+    max_date,
+):
+    from app.helpers.pdf.work_days import write_work_days_pdfs_archive
+
+    with app.app_context():
+        sentry_sdk.set_tag("feature", "work_days_pdf_export")
+
+        exporter = User.query.get(exporter_id)
+
+        export = Export(
+            user=exporter,
+            export_type=ExportType.WORK_DAYS_PDF,
+            context={
+                "exporter_id": exporter_id,
+                "company_ids": company_ids,
+                "user_ids": user_ids,
+                "min_date": min_date,
+                "max_date": max_date,
+            },
+        )
+        db.session.add(export)
+        db.session.commit()
+
+        def generate_file(output_dir):
+            users = (
+                User.query.filter(User.id.in_(user_ids))
+                .order_by(User.id)
+                .all()
+            )
+            companies = Company.query.filter(Company.id.in_(company_ids)).all()
+            file_path = os.path.join(output_dir, WORK_DAYS_PDF_FILE_NAME)
+            write_work_days_pdfs_archive(
+                file_path,
+                users=users,
+                start_date=date.fromisoformat(min_date),
+                end_date=date.fromisoformat(max_date),
+                consultation_scope=ConsultationScope(company_ids=company_ids),
+                include_support_activity=any(
+                    c.require_support_activity for c in companies
+                ),
+                include_expenditures=any(
+                    c.require_expenditures for c in companies
+                ),
+                include_transfers=any(c.allow_transfers for c in companies),
+                include_other_task=any(c.allow_other_task for c in companies),
+            )
+            return (
+                file_path,
+                "application/zip",
+                WORK_DAYS_PDF_FILE_NAME,
+                os.path.getsize(file_path),
+            )
+
+        _generate_and_upload_export(export, generate_file)
+
+
+@celery.task()
+def async_export_raw_data(
+    exporter_id,
+    company_ids,
+    user_ids,
+    min_date,
+    max_date,
+):
+    from app.helpers.raw_export import write_raw_export_archive
+
+    with app.app_context():
+        sentry_sdk.set_tag("feature", "raw_data_export")
+
+        exporter = User.query.get(exporter_id)
+
+        export = Export(
+            user=exporter,
+            export_type=ExportType.RAW_DATA,
+            context={
+                "exporter_id": exporter_id,
+                "company_ids": company_ids,
+                "user_ids": user_ids,
+                "min_date": min_date,
+                "max_date": max_date,
+            },
+        )
+        db.session.add(export)
+        db.session.commit()
+
+        def generate_file(output_dir):
+            file_path = os.path.join(output_dir, RAW_DATA_FILE_NAME)
+            write_raw_export_archive(
+                file_path,
+                output_dir,
+                company_ids=company_ids,
+                user_ids=user_ids,
+                min_date=date.fromisoformat(min_date),
+                max_date=date.fromisoformat(max_date),
+            )
+            return (
+                file_path,
+                "application/zip",
+                RAW_DATA_FILE_NAME,
+                os.path.getsize(file_path),
+            )
+
+        _generate_and_upload_export(export, generate_file)
+
+
+def _generate_and_upload_export(export, generate_file):
+    """
+    Generate the export file in a temporary directory, upload it to S3 and mark the export as ready.
+    :param generate_file: function of the output directory returning (file path, content type, file name, file size)
+    """
+    exporter_id = export.user_id
+    try:
+        with tempfile.TemporaryDirectory(prefix="export_") as output_dir:
+            start_time = time.perf_counter()
+
+            file_path, content_type, file_name, file_size_bytes = (
+                generate_file(output_dir)
             )
             end_time = time.perf_counter()
             export.file_size = file_size_bytes
@@ -79,26 +275,26 @@ def async_export_excel(
                 return
 
             path = f"exports/{exporter_id}/{export.id}"
-            S3Client.upload_export(file_content, path, content_type)
+            S3Client.upload_export_file(file_path, path, content_type)
 
-            export.status = ExportStatus.READY
-            export.file_s3_path = path
-            export.file_type = content_type
-            export.file_name = file_name
-            db.session.commit()
+        export.status = ExportStatus.READY
+        export.file_s3_path = path
+        export.file_type = content_type
+        export.file_name = file_name
+        db.session.commit()
 
-            app.logger.info(
-                f"Export {export.id} completed: {file_name}, "
-                f"{file_size_bytes / 1024:.1f} KB, {export.duration:.0f}ms"
-            )
+        app.logger.info(
+            f"Export {export.id} completed: {file_name}, "
+            f"{file_size_bytes / 1024:.1f} KB, {export.duration:.0f}ms"
+        )
 
-        except Exception as e:
-            export.status = ExportStatus.FAILED
-            db.session.commit()
+    except Exception as e:
+        export.status = ExportStatus.FAILED
+        db.session.commit()
 
-            app.logger.error(
-                f"Export {export.id} failed for user {exporter_id}",
-                exc_info=True,
-            )
+        app.logger.error(
+            f"Export {export.id} failed for user {exporter_id}",
+            exc_info=True,
+        )
 
-            raise e
+        raise e
@@ -1,117 +1,168 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from flask import g
 from promise import Promise
 from promise.dataloader import DataLoader
+from sqlalchemy import inspect
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.orm.interfaces import MANYTOONE, ONETOMANY
 
 from app import db
-from app.models import Email, Vehicle, ActivityVersion
-
-
-class EmailsInEmploymentLoader(DataLoader):
-    def batch_load_fn(self, employment_ids):
-        emails = Email.query.filter(
-            Email.employment_id.in_(employment_ids)
-        ).all()
-        return Promise.resolve(
-            [
-                [email for email in emails if email.employment_id == id]
-                for id in employment_ids
-            ]
-        )
-
-
-class VehiclesInCompanyLoader(DataLoader):
-    def batch_load_fn(self, company_ids):
-        vehicles = Vehicle.query.filter(
-            Vehicle.company_id.in_(company_ids)
-        ).all()
-        return Promise.resolve(
-            [
-                [vehicle for vehicle in vehicles if vehicle.company_id == id]
-                for id in company_ids
-            ]
-        )
 
 
-class ActivityVersionsInActivityLoader(DataLoader):
-    def batch_load_fn(self, activity_ids):
-        activity_versions = (
-            ActivityVersion.query.filter(
-                ActivityVersion.activity_id.in_(activity_ids)
-            )
-            .order_by(ActivityVersion.version_number.asc())
-            .all()
-        )
-        return Promise.resolve(
-            [
-                [
-                    activity_version
-                    for activity_version in activity_versions
-                    if activity_version.activity_id == id
-                ]
-                for id in activity_ids
-            ]
-        )
+def _get_model_class(class_name):
+    return db.Model._decl_class_registry.get(class_name)
 
 
 def batch_load_simple(class_name, item_ids):
-    model_class = db.Model._decl_class_registry.get(class_name)
+    model_class = _get_model_class(class_name)
     items = model_class.query.filter(model_class.id.in_(item_ids)).all()
     items_dict = {item.id: item for item in items}
     return Promise.resolve([items_dict.get(item_id) for item_id in item_ids])
 
 
-class UserLoader(DataLoader):
-    def batch_load_fn(self, user_ids):
-        return batch_load_simple(class_name="User", item_ids=user_ids)
-
-
-class VehicleLoader(DataLoader):
-    def batch_load_fn(self, vehicle_ids):
-        return batch_load_simple(class_name="Vehicle", item_ids=vehicle_ids)
+def batch_load_by_key(key_attribute, keys, order_by=None):
+    """
+    Lists of the items whose key_attribute is in keys, in the order of keys.
+    Items are grouped by key in one pass over the query results. The key is read from
+    the rows rather than from the items, which may hold stale values after a bulk update.
+    """
+    query = key_attribute.class_.query.filter(key_attribute.in_(keys))
+    if order_by:
+        query = query.order_by(*order_by)
+    items_by_key = defaultdict(list)
+    for item, key in query.add_columns(key_attribute).all():
+        items_by_key[key].append(item)
+    return Promise.resolve([items_by_key.get(key, []) for key in keys])
+
+
+@lru_cache(maxsize=None)
+def _get_relationship(class_name, relationship_name):
+    # Backrefs only exist once all the mappers are configured
+    configure_mappers()
+    mapper = inspect(_get_model_class(class_name))
+    relationship = mapper.relationships[relationship_name]
+    if (
+        relationship.secondary is not None
+        or relationship.direction not in (MANYTOONE, ONETOMANY)
+        or len(relationship.local_remote_pairs) != 1
+    ):
+        raise ValueError(
+            f"No loader for {class_name}.{relationship_name} : only one-to-many and many-to-one relationships on one column are supported"
+        )
+    return relationship
 
 
-def batch_load_in_missions(class_name, mission_ids):
-    model_class = db.Model._decl_class_registry.get(class_name)
-    items = model_class.query.filter(
-        model_class.mission_id.in_(mission_ids),
-    ).all()
-    return Promise.resolve(
-        [
-            [item for item in items if item.mission_id == id]
-            for id in mission_ids
-        ]
+def _get_relationship_key_names(relationship):
+    [(local_column, remote_column)] = relationship.local_remote_pairs
+    return (
+        relationship.parent.get_property_by_column(local_column).key,
+        relationship.mapper.get_property_by_column(remote_column).key,
     )
 
 
-class CommentsInMissionLoader(DataLoader):
-    def batch_load_fn(self, mission_ids):
-        return batch_load_in_missions(
-            class_name="Comment", mission_ids=mission_ids
+@lru_cache(maxsize=None)
+def get_relationship_loader_class(
+    class_name, relationship_name, order_by_name=None
+):
+    """
+    DataLoader class of a one-to-many or many-to-one relationship declared on a model.
+    Its keys are the values of the local column of the relationship : ids of the
+    model for a one-to-many relationship, foreign keys for a many-to-one relationship.
+    """
+    relationship = _get_relationship(class_name, relationship_name)
+    target_class = relationship.mapper.class_
+    _, remote_key_name = _get_relationship_key_names(relationship)
+    remote_attribute = getattr(target_class, remote_key_name)
+
+    if relationship.direction == MANYTOONE:
+
+        def batch_load_fn(self, keys):
+            items = target_class.query.filter(remote_attribute.in_(keys)).all()
+            items_by_key = {
+                getattr(item, remote_key_name): item for item in items
+            }
+            return Promise.resolve([items_by_key.get(key) for key in keys])
+
+    else:
+        order_by = (
+            [getattr(target_class, order_by_name)]
+            if order_by_name
+            else relationship.order_by or None
         )
 
+        def batch_load_fn(self, keys):
+            return batch_load_by_key(remote_attribute, keys, order_by=order_by)
 
-class ValidationsInMissionLoader(DataLoader):
-    def batch_load_fn(self, mission_ids):
-        return batch_load_in_missions(
-            class_name="MissionValidation", mission_ids=mission_ids
-        )
+    return type(
+        f"{class_name}{relationship_name.title().replace('_', '')}Loader",
+        (DataLoader,),
+        dict(batch_load_fn=batch_load_fn),
+    )
 
 
-class ExpendituresInMissionLoader(DataLoader):
-    def batch_load_fn(self, mission_ids):
-        return batch_load_in_missions(
-            class_name="Expenditure", mission_ids=mission_ids
-        )
+class UserLoader(DataLoader):
+    def batch_load_fn(self, user_ids):
+        return batch_load_simple(class_name="User", item_ids=user_ids)
 
 
-class LocationEntriesInMissionLoader(DataLoader):
-    def batch_load_fn(self, mission_ids):
-        return batch_load_in_missions(
-            class_name="LocationEntry", mission_ids=mission_ids
-        )
+class VehicleLoader(DataLoader):
+    def batch_load_fn(self, vehicle_ids):
+        return batch_load_simple(class_name="Vehicle", item_ids=vehicle_ids)
 
 
-class ActivitiesInMissionLoader(DataLoader):
-    def batch_load_fn(self, mission_ids):
-        return batch_load_in_missions(
-            class_name="Activity", mission_ids=mission_ids
+# Loader name -> loader class, or (model, relationship, optional ordering column) for relationship loaders
+LOADERS = {
+    "users": UserLoader,
+    "vehicles": VehicleLoader,
+    "emails_in_employments": ("Employment", "invite_emails"),
+    "vehicles_in_company": ("Company", "vehicles"),
+    "comments_in_missions": ("Mission", "comments"),
+    "validations_in_missions": ("Mission", "validations"),
+    "expenditures_in_missions": ("Mission", "expenditures"),
+    "location_entries_in_missions": ("Mission", "location_entries"),
+    "activities_in_missions": ("Mission", "activities"),
+    "activity_versions_in_activities": (
+        "Activity",
+        "versions",
+        "version_number",
+    ),
+}
+
+
+class RequestDataLoaders(dict):
+    """
+    Loaders of a request, instantiated on first use.
+    Besides the names of LOADERS, "<Model>.<relationship>" gives the loader of any
+    one-to-many or many-to-one relationship, see load_relationship.
+    """
+
+    def __missing__(self, name):
+        loader_class = LOADERS.get(name)
+        if loader_class is None:
+            loader_class = tuple(name.split("."))
+        if not isinstance(loader_class, type):
+            loader_class = get_relationship_loader_class(*loader_class)
+        loader = self[name] = loader_class()
+        return loader
+
+
+def load_relationship(instance, relationship_name):
+    """
+    Promise of a relationship of the instance, loaded in one query with the same
+    relationship of the other instances resolved in the request.
+    A relationship which is already loaded is returned as is.
+    """
+    if relationship_name not in inspect(instance).unloaded:
+        return Promise.resolve(getattr(instance, relationship_name))
+
+    class_name = type(instance).__name__
+    relationship = _get_relationship(class_name, relationship_name)
+    local_key_name, _ = _get_relationship_key_names(relationship)
+    key = getattr(instance, local_key_name)
+    if key is None:
+        return Promise.resolve(
+            None if relationship.direction == MANYTOONE else []
         )
+    return g.dataloaders[f"{class_name}.{relationship_name}"].load(key)
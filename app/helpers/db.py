@@ -3,6 +3,7 @@ from datetime import timezone
 from sqlalchemy.types import TypeDecorator, DateTime
 
 from sqlalchemy import event
+from sqlalchemy.pool.base import reset_none
 
 # from sqlalchemy.engine import Engine
 # from datetime import datetime
@@ -49,6 +50,17 @@ def strong_reference_session(session):
         sess.info["refs"].discard(instance)
 
 
+def dispose_engine_after_fork(engine):
+    """
+    Same as engine.dispose(close=False), which comes with SQLAlchemy 1.4 : in a forked
+    process, the connections inherited from the parent are dropped without being
+    closed nor rolled back, as the parent is still using them.
+    """
+    inherited_pool = engine.pool
+    engine.pool = inherited_pool.recreate()
+    inherited_pool._reset_on_return = reset_none
+
+
 class SQLAlchemyWithStrongRefSession(SQLAlchemy):
     def create_session(self, options):
         sess = super().create_session(options)
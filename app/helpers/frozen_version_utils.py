@@ -4,6 +4,9 @@ def freeze_activities(
     include_dismissed_activities=False,
     include_posteriori_activities=False,
 ):
+    from app.models.activity import load_activity_versions
+
+    load_activity_versions(activities)
     frozen_activities = list(
         map(
             lambda a: a.freeze_activity_at(
@@ -116,6 +116,10 @@ class BaseSQLAlchemyObjectType(SQLAlchemyObjectType):
     def is_type_of(cls, root, info):
         if isinstance(root, LocalProxy):
             return cls.is_type_of(root._get_current_object(), info)
+        # Read-only snapshots (e.g. FrozenActivity) expose their model
+        snapshot_of = getattr(type(root), "snapshot_of", None)
+        if snapshot_of is not None:
+            return cls.is_type_of(root.snapshot_of, info)
         return super().is_type_of(root, info)
 
 
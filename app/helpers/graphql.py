@@ -1,6 +1,9 @@
+import hashlib
 import json
 from functools import partial
+from threading import Lock
 
+from cachetools import LRUCache
 from flask import request, g, Response
 from flask_graphql import GraphQLView
 from graphql import validate, execute
@@ -41,33 +44,82 @@ def _count_fields(node):
     return count
 
 
-def _safe_execute_and_validate(schema, document_ast, *args, **kwargs):
+def _validate(schema, document_ast):
+    if _count_fields(document_ast) > _OVERLAP_CHECK_FIELD_THRESHOLD:
+        rules = _SAFE_RULES
+    else:
+        rules = specified_rules
+    return validate(schema, document_ast, rules=rules)
+
+
+def _safe_execute_and_validate(
+    schema, document_ast, *args, validation_errors=None, **kwargs
+):
     do_validation = kwargs.pop("validate", True)
     if do_validation:
-        if _count_fields(document_ast) > _OVERLAP_CHECK_FIELD_THRESHOLD:
-            rules = _SAFE_RULES
-        else:
-            rules = specified_rules
-        errors = validate(schema, document_ast, rules=rules)
+        errors = (
+            validation_errors
+            if validation_errors is not None
+            else _validate(schema, document_ast)
+        )
         if errors:
-            return ExecutionResult(errors=errors, invalid=True)
+            return ExecutionResult(errors=list(errors), invalid=True)
     return execute(schema, document_ast, *args, **kwargs)
 
 
+def get_query_hash(document_string):
+    return hashlib.sha256(document_string.encode("utf-8")).hexdigest()
+
+
+# Parsing and validation only depend on the schema and the document string,
+# not on the variables nor on the user : clients send the same few documents
+# over and over, so their AST and validation errors are kept per process.
+# Execution does not modify the AST, which can be shared between requests.
+_documents = LRUCache(maxsize=app.config["GRAPHQL_DOCUMENT_CACHE_MAX_SIZE"])
+_documents_lock = Lock()
+
+
+def clear_document_cache():
+    with _documents_lock:
+        _documents.clear()
+
+
+def get_validated_document(schema, document_string):
+    """Parsed AST and validation errors of the document, cached by schema and
+    hash of the document string. Syntax errors are raised and not cached."""
+    key = (schema, get_query_hash(document_string))
+    with _documents_lock:
+        cached = _documents.get(key)
+    if cached is not None:
+        return cached
+
+    document_ast = parse(document_string)
+    cached = (document_ast, tuple(_validate(schema, document_ast)))
+    with _documents_lock:
+        _documents[key] = cached
+    return cached
+
+
 class SafeGraphQLBackend(GraphQLCoreBackend):
     """GraphQL backend that mitigates O(n²) validation DoS.
 
     For queries with more than _OVERLAP_CHECK_FIELD_THRESHOLD fields,
     the OverlappingFieldsCanBeMerged rule is skipped. All other
     validation rules still run normally.
+
+    Documents received as strings are parsed and validated once per
+    process, see get_validated_document.
     """
 
     def document_from_string(self, schema, document_string):
         if isinstance(document_string, gql_ast.Document):
             document_ast = document_string
             document_string = print_ast(document_ast)
+            validation_errors = None
         else:
-            document_ast = parse(document_string)
+            document_ast, validation_errors = get_validated_document(
+                schema, document_string
+            )
         return GraphQLDocument(
             schema=schema,
             document_string=document_string,
@@ -76,19 +128,105 @@ class SafeGraphQLBackend(GraphQLCoreBackend):
                 _safe_execute_and_validate,
                 schema,
                 document_ast,
+                validation_errors=validation_errors,
                 **self.execute_params,
             ),
         )
 
 
-def _make_graphql_error_response(message, status_code=400):
+def _make_graphql_error_response(message, status_code=400, code=None):
+    error = {"message": message}
+    if code:
+        error["extensions"] = {"code": code}
     return Response(
-        json.dumps({"errors": [{"message": message}]}),
+        json.dumps({"errors": [error]}),
         status=status_code,
         content_type="application/json",
     )
 
 
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+
+# Automatic persisted queries, by sha256 hash of the query
+_persisted_queries = LRUCache(
+    maxsize=app.config["GRAPHQL_PERSISTED_QUERIES_MAX_SIZE"]
+)
+_persisted_queries_lock = Lock()
+
+
+class PersistedQueryError(Exception):
+    def __init__(self, message, code, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.status_code = status_code
+
+
+def clear_persisted_queries():
+    with _persisted_queries_lock:
+        _persisted_queries.clear()
+
+
+def _get_persisted_query_hash(request_params):
+    extensions = request_params.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    persisted_query = extensions.get("persistedQuery")
+    if not isinstance(persisted_query, dict):
+        return None
+    if persisted_query.get("version") != 1:
+        raise PersistedQueryError(
+            "Unsupported persisted query version",
+            "PERSISTED_QUERY_VERSION_NOT_SUPPORTED",
+        )
+    return persisted_query.get("sha256Hash")
+
+
+def resolve_persisted_queries(request_data):
+    """
+    Automatic persisted queries, as implemented by Apollo clients : the client first
+    sends only the sha256 hash of the query in extensions.persistedQuery.
+    If the hash is unknown, a PersistedQueryNotFound error is returned and the client
+    sends the query along with its hash, which registers it for the next requests.
+    The queries are kept per process, so a client may have to register a query once per process.
+    """
+    entries = (
+        request_data if isinstance(request_data, list) else [request_data]
+    )
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        query_hash = _get_persisted_query_hash(entry)
+        if not query_hash:
+            continue
+        query = entry.get("query")
+        if query:
+            if get_query_hash(query) != query_hash:
+                raise PersistedQueryError(
+                    "Provided sha256 hash does not match query",
+                    "INVALID_PERSISTED_QUERY_HASH",
+                )
+            with _persisted_queries_lock:
+                _persisted_queries[query_hash] = query
+            continue
+        with _persisted_queries_lock:
+            query = _persisted_queries.get(query_hash)
+        if query is None:
+            # Same response as Apollo Server, which clients expect to retry with the query
+            raise PersistedQueryError(
+                PERSISTED_QUERY_NOT_FOUND,
+                "PERSISTED_QUERY_NOT_FOUND",
+                status_code=200,
+            )
+        entry["query"] = query
+    return request_data
+
+
 def _check_batch_limit(request_data):
     if isinstance(request_data, list):
         if len(request_data) > GRAPHQL_MAX_BATCH_SIZE:
@@ -122,12 +260,26 @@ class CustomGraphQLView(GraphQLView):
     - the graphql query text
     - graphql variables if they exist
     - operation name
+
+    Also resolves automatic persisted queries, see resolve_persisted_queries.
     """
 
+    def parse_body(self):
+        # Called again by GraphQLView.dispatch_request : parse the body once
+        if not hasattr(self, "_request_data"):
+            self._request_data = resolve_persisted_queries(
+                super().parse_body()
+            )
+        return self._request_data
+
     def dispatch_request(self):
         operation_name = "default_operation_name"
         try:
             request_data = self.parse_body()
+        except PersistedQueryError as e:
+            return _make_graphql_error_response(
+                e.message, status_code=e.status_code, code=e.code
+            )
         except:
             request_data = "Invalid body"
 
@@ -0,0 +1,162 @@
+import json
+import random
+from collections import defaultdict
+from time import time
+
+from flask import g, has_request_context
+from graphql.execution.middleware import MiddlewareManager
+
+from app import app
+
+# Number of resolvers kept per operation in the request log line
+NB_RESOLVERS_IN_LOG = 10
+
+
+class GraphQLPerfMiddleware:
+    """
+    Records wall time, SQL query count and SQL time of each resolver, grouped
+    by operation name and field ("Type.field") in g.log_info["graphql_perf"].
+
+    Only the synchronous part of a resolver is measured : when it returns a
+    promise (dataloaders), the batch queries are attributed to the resolver
+    which triggers the batch.
+    """
+
+    def resolve(self, next, root, info, **args):
+        log_info = (
+            getattr(g, "log_info", None) if has_request_context() else None
+        )
+        if log_info is None:
+            return next(root, info, **args)
+
+        sql_count = log_info.get("sql_query_count", 0)
+        sql_time_ms = log_info.get("sql_total_time_ms", 0)
+        start_time = time()
+        try:
+            return next(root, info, **args)
+        finally:
+            _record(
+                log_info,
+                info.operation.name.value if info.operation.name else None,
+                f"{info.parent_type.name}.{info.field_name}",
+                (time() - start_time) * 1000,
+                log_info.get("sql_query_count", 0) - sql_count,
+                log_info.get("sql_total_time_ms", 0) - sql_time_ms,
+            )
+
+
+def graphql_perf_middleware():
+    # Resolvers results must not be wrapped in promises, otherwise the
+    # resolution of the children fields is deferred and resolvers which
+    # mutate shared objects (e.g. regulation checks) return wrong results
+    return MiddlewareManager(GraphQLPerfMiddleware(), wrap_in_promise=False)
+
+
+def _record(log_info, operation_name, field, time_ms, sql_count, sql_time_ms):
+    resolvers = log_info.setdefault("_graphql_resolvers", {}).setdefault(
+        operation_name or "anonymous", defaultdict(lambda: [0, 0.0, 0, 0.0])
+    )
+    stats = resolvers[field]
+    stats[0] += 1
+    stats[1] += time_ms
+    stats[2] += sql_count
+    stats[3] += sql_time_ms
+
+
+def _resolver_stats(field, stats):
+    calls, time_ms, sql_count, sql_time_ms = stats
+    return dict(
+        field=field,
+        calls=calls,
+        time_ms=round(time_ms, 2),
+        sql_count=sql_count,
+        sql_time_ms=round(sql_time_ms, 2),
+    )
+
+
+def summarize_graphql_perf(log_info):
+    """
+    Per operation totals and slowest resolvers of the request, None if no resolver was run.
+    Totals only sum the resolvers directly called by the executor, not the serialization.
+    """
+    resolvers_by_operation = log_info.pop("_graphql_resolvers", None)
+    if not resolvers_by_operation:
+        return None
+    summary = {}
+    for operation_name, resolvers in resolvers_by_operation.items():
+        all_stats = [
+            _resolver_stats(field, stats) for field, stats in resolvers.items()
+        ]
+        all_stats.sort(key=lambda s: s["time_ms"], reverse=True)
+        summary[operation_name] = dict(
+            resolver_calls=sum(s["calls"] for s in all_stats),
+            resolver_time_ms=round(sum(s["time_ms"] for s in all_stats), 2),
+            sql_count=sum(s["sql_count"] for s in all_stats),
+            sql_time_ms=round(sum(s["sql_time_ms"] for s in all_stats), 2),
+            resolvers=all_stats[:NB_RESOLVERS_IN_LOG],
+        )
+    return summary
+
+
+def write_graphql_perf_sample(summary, request_time_ms):
+    """
+    Append the summary to GRAPHQL_PERF_LOG_FILE for a sample of the requests
+    (GRAPHQL_PERF_SAMPLE_RATE). Disabled when no file is configured.
+    """
+    file_path = app.config["GRAPHQL_PERF_LOG_FILE"]
+    if (
+        not file_path
+        or random.random() >= app.config["GRAPHQL_PERF_SAMPLE_RATE"]
+    ):
+        return
+    try:
+        with open(file_path, "a") as f:
+            f.write(
+                json.dumps(
+                    dict(
+                        time=time(),
+                        request_time_ms=request_time_ms,
+                        operations=summary,
+                    )
+                )
+                + "\n"
+            )
+    except OSError as e:
+        app.logger.warning(f"Could not write GraphQL perf sample : {e}")
+
+
+def build_graphql_perf_report(lines, top=20):
+    """
+    Aggregate sampled request summaries, as written by write_graphql_perf_sample.
+    :return: (slowest operations, slowest resolvers), sorted by total time
+    """
+    operations = defaultdict(lambda: defaultdict(float))
+    resolvers = defaultdict(lambda: defaultdict(float))
+    for line in lines:
+        try:
+            sample = json.loads(line)
+        except ValueError:
+            continue
+        for operation_name, summary in sample["operations"].items():
+            operation = operations[operation_name]
+            operation["requests"] += 1
+            operation["request_time_ms"] += sample["request_time_ms"]
+            operation["sql_count"] += summary["sql_count"]
+            operation["sql_time_ms"] += summary["sql_time_ms"]
+            for stats in summary["resolvers"]:
+                resolver = resolvers[(operation_name, stats["field"])]
+                resolver["requests"] += 1
+                for key in ["calls", "time_ms", "sql_count", "sql_time_ms"]:
+                    resolver[key] += stats[key]
+
+    def _sorted(items, key):
+        return sorted(
+            [dict(name=name, **values) for name, values in items.items()],
+            key=lambda item: item[key],
+            reverse=True,
+        )[:top]
+
+    return (
+        _sorted(operations, "request_time_ms"),
+        _sorted(resolvers, "time_ms"),
+    )
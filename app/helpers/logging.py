@@ -18,6 +18,10 @@ from werkzeug.exceptions import HTTPException
 from app import app
 from app.helpers.authentication import current_user, check_auth
 from app.helpers.errors import MobilicError, BadGraphQLRequestError
+from app.helpers.graphql_perf import (
+    summarize_graphql_perf,
+    write_graphql_perf_sample,
+)
 from config import MOBILIC_ENV
 
 root_logger = logging.getLogger()
@@ -177,6 +181,11 @@ def log_request_info(response):
 
         endpoint = _get_request_endpoint()
 
+        graphql_perf = summarize_graphql_perf(g.log_info)
+        if graphql_perf:
+            g.log_info["graphql_perf"] = graphql_perf
+            write_graphql_perf_sample(graphql_perf, request_time)
+
         log_title = None
         log_message = endpoint
         log_info = _strip_unwanted_and_sensitive_fields_from_log_data(
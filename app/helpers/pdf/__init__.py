@@ -1,8 +1,29 @@
+import os
+from threading import Lock
+
+import xhtml2pdf.default
 from xhtml2pdf import pisa
 from flask import render_template
 from io import BytesIO
 from typing import NamedTuple
 from pypdf import PdfReader, PdfWriter
+from reportlab.lib.fonts import addMapping
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from app import app
+
+FONTS_DIR = os.path.join(os.path.dirname(app.root_path), "fonts")
+
+# Font families usable in the PDF templates, by weight (0 normal, 1 bold)
+PDF_FONTS = {
+    "marianne": {0: "Marianne-Regular.ttf", 1: "Marianne-Bold.ttf"},
+    "marianne-medium": {0: "Marianne-Medium.ttf"},
+}
+
+_fonts_lock = Lock()
+_fonts_registered = False
 
 
 class Column(NamedTuple):
@@ -16,6 +37,41 @@ class Column(NamedTuple):
     max_width_px: int = None
 
 
+def register_pdf_fonts():
+    """
+    Parse and register the PDF_FONTS once per process, instead of once per document with @font-face rules.
+    The families are added to the default fonts of xhtml2pdf so the templates can use them directly.
+    """
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    with _fonts_lock:
+        if _fonts_registered:
+            return
+        for family, files in PDF_FONTS.items():
+            for bold, file_name in files.items():
+                full_name = f"{family}_{bold}0"
+                pdfmetrics.registerFont(
+                    TTFont(full_name, os.path.join(FONTS_DIR, file_name))
+                )
+                xhtml2pdf.default.DEFAULT_FONT[full_name] = family
+            for bold in (0, 1):
+                for italic in (0, 1):
+                    addMapping(
+                        family,
+                        bold,
+                        italic,
+                        f"{family}_{bold if bold in files else 0}0",
+                    )
+            xhtml2pdf.default.DEFAULT_FONT[family] = family
+        _fonts_registered = True
+
+
+def _render_pdf(html, output):
+    register_pdf_fonts()
+    pisa.CreatePDF(html, output)
+
+
 def generate_pdf_from_template(template_name, **kwargs):
     html = render_template(
         template_name,
@@ -23,12 +79,24 @@ def generate_pdf_from_template(template_name, **kwargs):
     )
 
     output = BytesIO()
-    pisa.CreatePDF(html, output)
+    _render_pdf(html, output)
     output.seek(0)
 
     return output
 
 
+def write_pdfs_archive(archive, documents):
+    """
+    Render the documents one after the other into a zip archive (a path or a file object).
+    :param documents: iterable of (file name, template name, template kwargs), consumed lazily
+    """
+    with ZipFile(archive, "w", compression=ZIP_DEFLATED) as f:
+        for file_name, template_name, kwargs in documents:
+            html = render_template(template_name, **kwargs)
+            with f.open(file_name, "w") as pdf_file:
+                _render_pdf(html, pdf_file)
+
+
 def generate_pdf_from_list(pdf_files):
     writer = PdfWriter()
     for pdf in pdf_files:
@@ -41,4 +109,4 @@ def generate_pdf_from_list(pdf_files):
     writer.write(output)
     output.seek(0)
 
-    return output
\ No newline at end of file
+    return output
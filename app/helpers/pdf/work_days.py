@@ -1,15 +1,25 @@
 from datetime import timedelta, datetime
-from dateutil.relativedelta import relativedelta
-from app.helpers.time import is_sunday_or_bank_holiday
+from app.helpers.time import (
+    get_first_day_of_month,
+    get_first_day_of_week,
+    get_month_buckets,
+    get_week_buckets,
+    is_sunday_or_bank_holiday,
+)
 
 from app.domain.work_days import group_user_events_by_day_with_limit
-from app.helpers.pdf import generate_pdf_from_template, Column
+from app.helpers.pdf import (
+    generate_pdf_from_template,
+    write_pdfs_archive,
+    Column,
+)
 from app.models.activity import ActivityType
 from app.models.expenditure import ExpenditureType
 from app.models.mission import UserMissionModificationStatus
 from app.templates.filters import (
     format_seconds_duration,
     format_time,
+    full_format_day,
 )
 
 COLOR_OFF = "#9BC0D1"
@@ -280,29 +290,51 @@ def _generate_work_days_pdf(
     include_expenditures=False,
     include_transfers=False,
     include_other_task=False,
+):
+    return generate_pdf_from_template(
+        "work_days_pdf.html",
+        **_get_work_days_pdf_template_kwargs(
+            user,
+            work_days,
+            start_date,
+            end_date,
+            include_support_activity=include_support_activity,
+            include_expenditures=include_expenditures,
+            include_transfers=include_transfers,
+            include_other_task=include_other_task,
+        ),
+    )
+
+
+def _get_work_days_pdf_template_kwargs(
+    user,
+    work_days,
+    start_date,
+    end_date,
+    include_support_activity=False,
+    include_expenditures=False,
+    include_transfers=False,
+    include_other_task=False,
 ):
     user_timezone = user.timezone
-    months = []
-    weeks = []
-
-    current_month = start_date.replace(day=1)
-    last_month = end_date.replace(day=1)
-    while current_month <= last_month:
-        tpm_month = get_accumulator_base()
-        tpm_month["date"] = current_month
-        months.append(tpm_month)
-        current_month += relativedelta(months=1)
-
-    current_week = start_date - timedelta(days=start_date.weekday())
-    last_week = end_date - timedelta(days=end_date.weekday())
-    while current_week <= last_week:
-        tmp_week = get_accumulator_base()
-        tmp_week["start"] = current_week
-        tmp_week["end"] = current_week + timedelta(days=6)
-        tmp_week["night_hours"] = 0
-        tmp_week["days"] = []
-        weeks.append(tmp_week)
-        current_week += timedelta(days=7)
+    months_by_start = get_month_buckets(
+        start_date,
+        end_date,
+        lambda month_start: {**get_accumulator_base(), "date": month_start},
+    )
+    weeks_by_start = get_week_buckets(
+        start_date,
+        end_date,
+        lambda week_start: {
+            **get_accumulator_base(),
+            "start": week_start,
+            "end": week_start + timedelta(days=6),
+            "night_hours": 0,
+            "days": [],
+        },
+    )
+    months = list(months_by_start.values())
+    weeks = list(weeks_by_start.values())
 
     total = get_accumulator_base()
 
@@ -314,12 +346,8 @@ def _generate_work_days_pdf(
             if is_day_off
             else ""
         )
-        month = [m for m in months if m["date"] == wd.day.replace(day=1)][0]
-        week = [
-            w
-            for w in weeks
-            if w["start"] == wd.day - timedelta(days=wd.day.weekday())
-        ][0]
+        month = months_by_start[get_first_day_of_month(wd.day)]
+        week = weeks_by_start[get_first_day_of_week(wd.day)]
 
         for accumulator in [month, week, total]:
             if is_day_worked:
@@ -423,7 +451,7 @@ def _generate_work_days_pdf(
                 ),
             }
         )
-        days_with_works = [d["date"] for d in week["days"]]
+        days_with_works = {d["date"] for d in week["days"]}
         current_day = week["start"]
         while current_day <= week["end"]:
             if (
@@ -484,8 +512,7 @@ def _generate_work_days_pdf(
         include_other_task=_include_other_task,
     )
 
-    return generate_pdf_from_template(
-        "work_days_pdf.html",
+    return dict(
         user_name=user.display_name,
         start_date=start_date,
         end_date=end_date,
@@ -515,9 +542,13 @@ def generate_work_days_pdf_for(
     include_expenditures=False,
     include_transfers=False,
     include_other_task=False,
+    consultation_scope=None,
 ):
     work_days, _ = group_user_events_by_day_with_limit(
-        user, from_date=start_date, until_date=end_date
+        user,
+        from_date=start_date,
+        until_date=end_date,
+        consultation_scope=consultation_scope,
     )
     return _generate_work_days_pdf(
         user,
@@ -529,3 +560,49 @@ def generate_work_days_pdf_for(
         include_transfers=include_transfers,
         include_other_task=include_other_task,
     )
+
+
+def get_work_days_pdf_file_name(user, start_date, end_date):
+    return f"Relevé d'heures de {user.display_name} - {full_format_day(start_date)} au {full_format_day(end_date)} ({user.id}).pdf"
+
+
+def write_work_days_pdfs_archive(
+    archive,
+    users,
+    start_date,
+    end_date,
+    consultation_scope,
+    include_support_activity=False,
+    include_expenditures=False,
+    include_transfers=False,
+    include_other_task=False,
+):
+    """
+    Write the work days PDF of each user in a zip archive, as generate_work_days_pdf_for would render it.
+    The work days of a user are loaded right before their PDF is rendered.
+    """
+
+    def documents():
+        for user in users:
+            work_days, _ = group_user_events_by_day_with_limit(
+                user,
+                from_date=start_date,
+                until_date=end_date,
+                consultation_scope=consultation_scope,
+            )
+            yield (
+                get_work_days_pdf_file_name(user, start_date, end_date),
+                "work_days_pdf.html",
+                _get_work_days_pdf_template_kwargs(
+                    user,
+                    work_days,
+                    start_date,
+                    end_date,
+                    include_support_activity=include_support_activity,
+                    include_expenditures=include_expenditures,
+                    include_transfers=include_transfers,
+                    include_other_task=include_other_task,
+                ),
+            )
+
+    write_pdfs_archive(archive, documents())
@@ -0,0 +1,164 @@
+import csv
+import os
+import zipfile
+from enum import Enum
+from itertools import islice
+
+from app.helpers.time import FR_TIMEZONE, to_datetime
+from app.models import Activity, Expenditure, Mission, User
+from app.models.queries import query_activities
+
+# Rows fetched from the server-side cursor and written at a time
+RAW_EXPORT_BATCH_SIZE = 10000
+
+# Times are exported in UTC
+ACTIVITY_COLUMNS = [
+    "activity_id",
+    "mission_id",
+    "mission_name",
+    "company_id",
+    "user_id",
+    "user_first_name",
+    "user_last_name",
+    "type",
+    "start_time",
+    "end_time",
+    "reception_time",
+    "last_update_time",
+    "dismissed_at",
+]
+
+EXPENDITURE_COLUMNS = [
+    "expenditure_id",
+    "mission_id",
+    "mission_name",
+    "company_id",
+    "user_id",
+    "type",
+    "spending_date",
+    "reception_time",
+    "dismissed_at",
+]
+
+
+def query_raw_activity_rows(company_ids, user_ids, min_date, max_date):
+    # Column tuples instead of models : the session keeps a strong reference
+    # to every loaded model, which would grow with the size of the export
+    return (
+        query_activities(
+            include_dismissed_activities=True,
+            start_time=to_datetime(min_date, tz_for_date=FR_TIMEZONE),
+            end_time=to_datetime(
+                max_date, tz_for_date=FR_TIMEZONE, date_as_end_of_day=True
+            ),
+            company_ids=company_ids,
+        )
+        .join(User, User.id == Activity.user_id)
+        .filter(Activity.user_id.in_(user_ids))
+        .with_entities(
+            Activity.id,
+            Activity.mission_id,
+            Mission.name,
+            Mission.company_id,
+            Activity.user_id,
+            User.first_name,
+            User.last_name,
+            Activity.type,
+            Activity.start_time,
+            Activity.end_time,
+            Activity.reception_time,
+            Activity.last_update_time,
+            Activity.dismissed_at,
+        )
+        .order_by(Activity.id)
+        .yield_per(RAW_EXPORT_BATCH_SIZE)
+    )
+
+
+def query_raw_expenditure_rows(company_ids, user_ids, min_date, max_date):
+    return (
+        Expenditure.query.join(Expenditure.mission)
+        .filter(
+            Mission.company_id.in_(company_ids),
+            Expenditure.user_id.in_(user_ids),
+            Expenditure.spending_date >= min_date,
+            Expenditure.spending_date <= max_date,
+        )
+        .with_entities(
+            Expenditure.id,
+            Expenditure.mission_id,
+            Mission.name,
+            Mission.company_id,
+            Expenditure.user_id,
+            Expenditure.type,
+            Expenditure.spending_date,
+            Expenditure.reception_time,
+            Expenditure.dismissed_at,
+        )
+        .order_by(Expenditure.id)
+        .yield_per(RAW_EXPORT_BATCH_SIZE)
+    )
+
+
+def _to_value(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = [
+            tuple(_to_value(v) for v in row)
+            for row in islice(rows, batch_size)
+        ]
+        if not batch:
+            return
+        yield batch
+
+
+def _write_csv(file_path, columns, batches):
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+
+
+def write_raw_export_archive(
+    file_path,
+    output_dir,
+    company_ids,
+    user_ids,
+    min_date,
+    max_date,
+    batch_size=RAW_EXPORT_BATCH_SIZE,
+):
+    """
+    Write a ZIP archive with one file of activities and one of expenditures, in CSV.
+    Rows are read from a server-side cursor and written batch by batch, so memory does not
+    depend on the number of rows.
+    """
+    with zipfile.ZipFile(
+        file_path, "w", compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        for name, columns, rows in [
+            (
+                "activites",
+                ACTIVITY_COLUMNS,
+                query_raw_activity_rows(
+                    company_ids, user_ids, min_date, max_date
+                ),
+            ),
+            (
+                "frais",
+                EXPENDITURE_COLUMNS,
+                query_raw_expenditure_rows(
+                    company_ids, user_ids, min_date, max_date
+                ),
+            ),
+        ]:
+            file_name = f"{name}.csv"
+            part_path = os.path.join(output_dir, file_name)
+            _write_csv(part_path, columns, _iter_batches(rows, batch_size))
+            archive.write(part_path, file_name)
+            os.remove(part_path)
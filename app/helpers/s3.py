@@ -1,4 +1,5 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
 
 from app import app
 from config import MOBILIC_ENV
@@ -14,6 +15,13 @@ BUCKET_NAME = f"mobilic-{MOBILIC_ENV}"
 PRESIGNED_URLS_EXPIRY_UPLOAD_S = 60
 PRESIGNED_URLS_EXPIRY_READ_S = 60
 
+# Files above the threshold are sent in parts, read from disk one at a time
+EXPORT_UPLOAD_CONFIG = TransferConfig(
+    multipart_threshold=16 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=2,
+)
+
 
 S3 = boto3.client(
     "s3",
@@ -98,6 +106,18 @@ class S3Client:
             ContentType=content_type,
         )
 
+    @staticmethod
+    def upload_export_file(file_path, path, content_type):
+        # Scaleway Object Storage does not support AWS ExpectedBucketOwner.
+        # This Sonar rule (S6257) is not applicable.
+        S3.upload_file(  # NOSONAR
+            file_path,
+            BUCKET_NAME,
+            path,
+            ExtraArgs={"ContentType": content_type},
+            Config=EXPORT_UPLOAD_CONFIG,
+        )
+
     @staticmethod
     def generate_presigned_urls_exports(exports):
         presigned_urls = {}
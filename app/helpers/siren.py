@@ -1,5 +1,8 @@
+import time
 import requests
-from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Iterable, NamedTuple
 from datetime import date
 
 from app.helpers.errors import MobilicError
@@ -40,6 +43,8 @@ class NoSirenAPICredentialsError(MobilicError):
 
 SIREN_API_SIREN_INFO_ENDPOINT = "https://api.insee.fr/api-sirene/3.11/siret"
 SIREN_API_PAGE_SIZE = 100
+SIREN_API_MAX_ATTEMPTS = 3
+SIREN_API_DEFAULT_RETRY_AFTER_SECONDS = 5
 
 
 ADDRESS_STREET_TYPE_TO_LABEL = {
@@ -121,9 +126,51 @@ def has_ceased_activity_from_siren_info(siren_info):
     return siren_info["uniteLegale"]["etatAdministratifUniteLegale"] == "C"
 
 
+class RateLimiter:
+    """
+    Spaces out the requests of all the threads of the process to stay under a number
+    of requests per minute. No limit if max_requests_per_minute is not set.
+    """
+
+    def __init__(self, max_requests_per_minute=None):
+        self.interval = (
+            60 / max_requests_per_minute if max_requests_per_minute else 0
+        )
+        self._next_request_time = 0
+        self._lock = Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_time)
+            self._next_request_time = request_time + self.interval
+        if request_time > now:
+            time.sleep(request_time - now)
+
+    def delay(self, seconds):
+        with self._lock:
+            self._next_request_time = max(
+                self._next_request_time, time.monotonic() + seconds
+            )
+
+
+def _retry_after_seconds(response):
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return SIREN_API_DEFAULT_RETRY_AFTER_SECONDS
+
+
 class SirenAPIClient:
-    def __init__(self, api_key):
+    def __init__(
+        self,
+        api_key,
+        endpoint=SIREN_API_SIREN_INFO_ENDPOINT,
+        max_requests_per_minute=None,
+    ):
         self._api_key = api_key
+        self.endpoint = endpoint
+        self.rate_limiter = RateLimiter(max_requests_per_minute)
 
     @property
     def api_key(self):
@@ -138,11 +185,21 @@ class SirenAPIClient:
         # - API Portal: https://api-apimanager.insee.fr/portal/environments/DEFAULT/apis/2ba0e549-5587-3ef1-9082-99cd865de66f/pages/6548510e-c3e1-3099-be96-6edf02870699/content
         # - Variables: https://www.sirene.fr/static-resources/documentation/v_sommaire_311.htm
         # - Features: https://www.sirene.fr/static-resources/documentation/sommaire_311.html
-        siren_response = requests.get(
-            f"{SIREN_API_SIREN_INFO_ENDPOINT}?q=siren:{siren}&nombre={SIREN_API_PAGE_SIZE}&date={date.today()}",
-            headers={"X-INSEE-Api-Key-Integration": self.api_key},
-            timeout=10,
-        )
+        for _ in range(SIREN_API_MAX_ATTEMPTS):
+            self.rate_limiter.wait()
+            siren_response = requests.get(
+                f"{self.endpoint}?q=siren:{siren}&nombre={SIREN_API_PAGE_SIZE}&date={date.today()}",
+                headers={"X-INSEE-Api-Key-Integration": self.api_key},
+                timeout=10,
+            )
+            if siren_response.status_code != 429:
+                break
+            # Too many requests : all the threads wait before the next attempt
+            self.rate_limiter.delay(_retry_after_seconds(siren_response))
+        else:
+            raise UnavailableSirenAPIError(
+                f"Request to get info of SIREN {siren} failed : rate limit exceeded"
+            )
         if siren_response.status_code == 200:
             return siren_response
         if siren_response.status_code == 404:
@@ -311,14 +368,23 @@ class SirenAPIClient:
         siren_response = self._request_siren_info(siren)
         return self._raw_siren_info_with_clean_addresses(siren_response.json())
 
-    def has_company_ceased_activity(self, siren):
-        from app import app
-
+    def _get_siren_info_or_error(self, siren):
         try:
-            siren_info = self.get_siren_info(siren)
-            return (
-                has_ceased_activity_from_siren_info(siren_info)
-            ), siren_info
-        except InaccessibleSirenError:
-            app.logger.error(f"Inaccessible siren {siren}")
-            return False, None
+            return self.get_siren_info(siren)
+        except Exception as e:
+            return e
+
+    def get_sirens_info(
+        self, sirens: Iterable[str], max_workers: int = 1
+    ) -> Dict[str, object]:
+        """
+        Info of several SIRENs, requested by at most max_workers threads at the same time.
+        The rate limit of the client applies to all the threads.
+
+        Returns:
+            dict: SIREN -> its info, or the error raised by its request
+        """
+        sirens = list(dict.fromkeys(sirens))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self._get_siren_info_or_error, sirens)
+            return dict(zip(sirens, results))
@@ -4,12 +4,18 @@ from io import BytesIO
 from typing import NamedTuple, Optional
 from zipfile import ZIP_DEFLATED, ZipFile
 
-from app.domain.work_days import WorkDay, group_user_events_by_day_with_limit
+from app.domain.work_days import (
+    WorkDay,
+    group_user_events_by_day_with_limit,
+    group_user_missions_by_day,
+    query_user_missions_for_work_days,
+)
 from app.helpers.tachograph.rsa_keys import C1BSigningKey, MOBILIC_ROOT_KEY
 from app.helpers.tachograph.signature import (
     verify_signature,
     verify_signatures,
     sign_file,
+    sign_files,
 )
 from app.helpers.time import to_datetime
 from app.models.activity import ActivityType
@@ -725,13 +731,9 @@ def generate_tachograph_parts(
     employee_version=False,
 ):
     now = datetime.now(timezone.utc)
-    first_user_activity = user.first_activity_after(min_reception_datetime)
-    if not first_user_activity:
-        first_user_activity_date = start_date
-    else:
-        first_user_activity_date = first_user_activity.start_time.astimezone(
-            timezone.utc
-        ).date()
+    first_user_activity_date = _first_user_activity_date(
+        user, start_date, min_reception_datetime
+    )
 
     work_days, _ = group_user_events_by_day_with_limit(
         user,
@@ -749,6 +751,96 @@ def generate_tachograph_parts(
     if not work_days and do_not_generate_if_empty:
         return None
 
+    return _build_tachograph_files(
+        user,
+        work_days,
+        first_user_activity_date,
+        now,
+        start_date=start_date,
+        end_date=end_date,
+        with_signatures=with_signatures,
+        employee_version=employee_version,
+    )
+
+
+def generate_tachograph_parts_both_versions(
+    user,
+    start_date=None,
+    end_date=None,
+    consultation_scope=None,
+    only_activities_validated_by_admin=False,
+    with_signatures=True,
+    max_reception_time=None,
+    min_reception_datetime=None,
+    include_dismissed_or_empty_days=False,
+):
+    """
+    Manager and employee versions of the tachograph files of the user, as generate_tachograph_parts would return them.
+    The missions are loaded once and both versions are grouped by day from them.
+    The employee version always includes dismissed or empty days.
+    :return: (manager version files, employee version files)
+    """
+    now = datetime.now(timezone.utc)
+    first_user_activity_date = _first_user_activity_date(
+        user, start_date, min_reception_datetime
+    )
+
+    missions, _ = query_user_missions_for_work_days(
+        user,
+        from_date=start_date,
+        until_date=end_date,
+        tz=timezone.utc,
+        max_reception_time=max_reception_time,
+        only_missions_validated_by_admin=only_activities_validated_by_admin,
+        consultation_scope=consultation_scope,
+        include_holidays=False,
+    )
+
+    versions = []
+    for employee_version in [False, True]:
+        work_days = group_user_missions_by_day(
+            user,
+            missions,
+            from_date=start_date,
+            until_date=end_date,
+            tz=timezone.utc,
+            include_dismissed_or_empty_days=include_dismissed_or_empty_days
+            or employee_version,
+            max_reception_time=max_reception_time,
+            employee_version=employee_version,
+        )
+        versions.append(
+            _build_tachograph_files(
+                user,
+                work_days,
+                first_user_activity_date,
+                now,
+                start_date=start_date,
+                end_date=end_date,
+                with_signatures=with_signatures,
+                employee_version=employee_version,
+            )
+        )
+    return tuple(versions)
+
+
+def _first_user_activity_date(user, start_date, min_reception_datetime):
+    first_user_activity = user.first_activity_after(min_reception_datetime)
+    if not first_user_activity:
+        return start_date
+    return first_user_activity.start_time.astimezone(timezone.utc).date()
+
+
+def _build_tachograph_files(
+    user,
+    work_days,
+    first_user_activity_date,
+    now,
+    start_date,
+    end_date,
+    with_signatures,
+    employee_version,
+):
     activity_file, actual_start_date = build_activity_file(
         work_days,
         user,
@@ -803,8 +895,8 @@ def generate_tachograph_parts(
 
     for file in files:
         file.adjust_content()
-        if with_signatures and file.spec.signable:
-            file.sign(current_card_key)
+    if with_signatures:
+        sign_files([f for f in files if f.spec.signable], current_card_key)
 
     return files
 
@@ -884,19 +976,27 @@ def get_tachograph_archive_controller(controls, with_signatures):
 def get_tachograph_archive_control(control, with_signatures, employee_version):
     archive = BytesIO()
     with ZipFile(archive, "w", compression=ZIP_DEFLATED) as f:
-        control_max_date = control.history_end_date
-        control_min_date = control.history_start_date
-        tachograph_data = generate_tachograph_parts(
-            control.user,
-            start_date=control_min_date,
-            end_date=control_max_date,
+        options = dict(
+            start_date=control.history_start_date,
+            end_date=control.history_end_date,
             only_activities_validated_by_admin=False,
-            do_not_generate_if_empty=False,
             max_reception_time=control.qr_code_generation_time,
-            min_reception_datetime=datetime.combine(control_min_date, time()),
+            min_reception_datetime=datetime.combine(
+                control.history_start_date, time()
+            ),
             with_signatures=with_signatures,
             include_dismissed_or_empty_days=True,
         )
+        if employee_version:
+            tachograph_data, employee_tachograph_data = (
+                generate_tachograph_parts_both_versions(
+                    control.user, **options
+                )
+            )
+        else:
+            tachograph_data = generate_tachograph_parts(
+                control.user, do_not_generate_if_empty=False, **options
+            )
         f.writestr(
             generate_tachograph_file_name(
                 control.user,
@@ -905,23 +1005,9 @@ def get_tachograph_archive_control(control, with_signatures, employee_version):
             write_tachograph_archive(tachograph_data),
         )
         if employee_version:
-            tachograph_data = generate_tachograph_parts(
-                control.user,
-                start_date=control_min_date,
-                end_date=control_max_date,
-                only_activities_validated_by_admin=False,
-                do_not_generate_if_empty=False,
-                max_reception_time=control.qr_code_generation_time,
-                min_reception_datetime=datetime.combine(
-                    control_min_date, time()
-                ),
-                with_signatures=with_signatures,
-                include_dismissed_or_empty_days=True,
-                employee_version=True,
-            )
             f.writestr(
                 generate_tachograph_file_name(control.user, "-VersionSalarie"),
-                write_tachograph_archive(tachograph_data),
+                write_tachograph_archive(employee_tachograph_data),
             )
     archive.seek(0)
     return archive
@@ -931,17 +1017,49 @@ def get_tachograph_archive_company(
     users, min_date, max_date, scope, with_signatures, employee_version
 ):
     archive = BytesIO()
+    write_tachograph_archive_company(
+        archive,
+        users=users,
+        min_date=min_date,
+        max_date=max_date,
+        scope=scope,
+        with_signatures=with_signatures,
+        employee_version=employee_version,
+    )
+    archive.seek(0)
+    return archive
+
+
+def write_tachograph_archive_company(
+    archive,
+    users,
+    min_date,
+    max_date,
+    scope,
+    with_signatures,
+    employee_version,
+):
+    """
+    Write the C1B files of the users in the zip archive (a path or a file object).
+    Each file is written as soon as generated, so only one user is held in memory at a time.
+    """
     with ZipFile(archive, "w", compression=ZIP_DEFLATED) as f:
         for user in users:
-            tachograph_data = generate_tachograph_parts(
-                user,
+            options = dict(
                 start_date=min_date,
                 end_date=max_date,
                 consultation_scope=scope,
                 only_activities_validated_by_admin=False,
                 with_signatures=with_signatures,
-                do_not_generate_if_empty=False,
             )
+            if employee_version:
+                tachograph_data, employee_tachograph_data = (
+                    generate_tachograph_parts_both_versions(user, **options)
+                )
+            else:
+                tachograph_data = generate_tachograph_parts(
+                    user, do_not_generate_if_empty=False, **options
+                )
             f.writestr(
                 generate_tachograph_file_name(
                     user, "-VersionGestionnaire" if employee_version else ""
@@ -949,20 +1067,7 @@ def get_tachograph_archive_company(
                 write_tachograph_archive(tachograph_data),
             )
             if employee_version:
-                tachograph_data = generate_tachograph_parts(
-                    user,
-                    start_date=min_date,
-                    end_date=max_date,
-                    consultation_scope=scope,
-                    only_activities_validated_by_admin=False,
-                    with_signatures=with_signatures,
-                    do_not_generate_if_empty=False,
-                    include_dismissed_or_empty_days=True,
-                    employee_version=True,
-                )
                 f.writestr(
                     generate_tachograph_file_name(user, "-VersionSalarie"),
-                    write_tachograph_archive(tachograph_data),
+                    write_tachograph_archive(employee_tachograph_data),
                 )
-    archive.seek(0)
-    return archive
@@ -23,16 +23,25 @@ class FileSignatureErrors(Enum):
 
 
 # cf. https://eur-lex.europa.eu/legal-content/FR/TXT/PDF/?uri=CELEX:02016R0799-20200226&from=EN#page=378
-def sign_file(file, sk):
+def _file_message_to_sign(file):
     file_hash = sha1(file.content).digest()
-    to_sign = (
+    return (
         b"\x00\x01"
         + b"\xff" * 90
         + b"\x00"
         + b"\x30\x21\x30\x09\x06\x05\x2B\x0E\x03\x02\x1A\x05\x00\x04\x14"
         + file_hash
     )
-    file.signature = sk.sign(to_sign)
+
+
+def sign_file(file, sk):
+    file.signature = sk.sign(_file_message_to_sign(file))
+
+
+def sign_files(files, sk):
+    signatures = sk.sign_many([_file_message_to_sign(file) for file in files])
+    for file, signature in zip(files, signatures):
+        file.signature = signature
 
 
 # This is well detailed here : https://eur-lex.europa.eu/legal-content/FR/TXT/PDF/?uri=CELEX:02016R0799-20200226&from=EN#page=371
@@ -166,6 +166,38 @@ def get_last_day_of_week(day):
     return day + datetime.timedelta(days=SUNDAY_WEEKDAY - day_of_week)
 
 
+def get_first_day_of_month(day):
+    return day.replace(day=1)
+
+
+def get_week_buckets(start_date, end_date, make_bucket):
+    """
+    One bucket per week overlapping [start_date, end_date], built with make_bucket(first day of the week).
+    The buckets are keyed by the first day of their week, in chronological order:
+    the bucket of a day is found with buckets[get_first_day_of_week(day)].
+    """
+    buckets = {}
+    current_week = get_first_day_of_week(start_date)
+    while current_week <= end_date:
+        buckets[current_week] = make_bucket(current_week)
+        current_week += datetime.timedelta(days=7)
+    return buckets
+
+
+def get_month_buckets(start_date, end_date, make_bucket):
+    """
+    One bucket per month overlapping [start_date, end_date], built with make_bucket(first day of the month).
+    The buckets are keyed by the first day of their month, in chronological order:
+    the bucket of a day is found with buckets[get_first_day_of_month(day)].
+    """
+    buckets = {}
+    current_month = get_first_day_of_month(start_date)
+    while current_month <= end_date:
+        buckets[current_month] = make_bucket(current_month)
+        current_month += relativedelta(months=1)
+    return buckets
+
+
 # array_datetime: a list of datetime [d1, d2, d3, ..., dn]
 # return: [[s_0, e_0], [s_1, e_1], ..., [s_n, e_n]] a list of date ranges covering the input dates
 def get_uninterrupted_datetime_ranges(array_datetime):
@@ -1,4 +1,7 @@
-from app import app
+from billiard import get_context
+
+from app import app, db
+from app.helpers.db import dispose_engine_after_fork
 from app.helpers.xls.signature import retrieve_and_verify_signature
 
 from .companies import get_one_excel_file, get_archive_excel_file
@@ -7,10 +10,13 @@ from .export_helpers import (
     load_work_days_cache,
     get_work_days_for_users,
     generate_excel_files_from_batch,
+    write_excel_files_from_batch,
     build_final_export,
+    build_final_export_file,
 )
 from app.domain.permissions import ConsultationScope
-from app.helpers.export_chunking import ExportChunkingStrategy
+from app.models import Company, User
+from app.helpers import export_chunking
 from datetime import date
 
 
@@ -20,19 +26,8 @@ def _parse_date(date_value):
     return date_value
 
 
-def generate_admin_export_file_from_chunks(
-    chunks, users, companies, file_name
-):
-    strategy = chunks[0].get("strategy") if chunks else None
-    company_ids = [c.id for c in companies]
-    scope = ConsultationScope(company_ids=company_ids)
-    user_map = {u.id: u for u in users}
-
-    cache = {}
-    if strategy == ExportChunkingStrategy.OVER_31_DAYS.value:
-        cache = load_work_days_cache(users, chunks, scope, _parse_date)
-
-    chunks = sorted(
+def _sort_export_chunks(chunks):
+    return sorted(
         chunks,
         key=lambda c: (
             _parse_date(c["min_date"]),
@@ -41,18 +36,29 @@ def generate_admin_export_file_from_chunks(
         ),
     )
 
-    files_data = []
-    for chunk in chunks:
+
+def _iter_export_chunks(chunks, users, companies):
+    strategy = chunks[0].get("strategy") if chunks else None
+    company_ids = [c.id for c in companies]
+    scope = ConsultationScope(company_ids=company_ids)
+    user_map = {u.id: u for u in users}
+
+    cache = {}
+    if strategy == export_chunking.ExportChunkingStrategy.OVER_31_DAYS.value:
+        cache = load_work_days_cache(users, chunks, scope, _parse_date)
+
+    for chunk in _sort_export_chunks(chunks):
         chunk_min_date = _parse_date(chunk["min_date"])
         chunk_max_date = _parse_date(chunk["max_date"])
         chunk_user_ids = chunk["user_ids"]
-        chunk_suffix = chunk["file_suffix"]
 
-        users = [user_map[uid] for uid in chunk_user_ids if uid in user_map]
+        chunk_users = [
+            user_map[uid] for uid in chunk_user_ids if uid in user_map
+        ]
         one_file_by_employee = len(chunk_user_ids) == 1
 
         user_wdays_batches = get_work_days_for_users(
-            users,
+            chunk_users,
             cache,
             scope,
             chunk_min_date,
@@ -60,6 +66,26 @@ def generate_admin_export_file_from_chunks(
             one_file_by_employee,
         )
 
+        yield (
+            user_wdays_batches,
+            chunk_users,
+            chunk_min_date,
+            chunk_max_date,
+            chunk["file_suffix"],
+        )
+
+
+def generate_admin_export_file_from_chunks(
+    chunks, users, companies, file_name
+):
+    files_data = []
+    for (
+        user_wdays_batches,
+        chunk_users,
+        chunk_min_date,
+        chunk_max_date,
+        chunk_suffix,
+    ) in _iter_export_chunks(chunks, users, companies):
         chunk_files = generate_excel_files_from_batch(
             user_wdays_batches,
             companies,
@@ -67,7 +93,7 @@ def generate_admin_export_file_from_chunks(
             chunk_max_date,
             file_name,
             chunk_suffix,
-            all_users=users,
+            all_users=chunk_users,
         )
         files_data.extend(chunk_files)
 
@@ -75,3 +101,104 @@ def generate_admin_export_file_from_chunks(
         raise ValueError("Aucune donnée à exporter.")
 
     return build_final_export(files_data, file_name)
+
+
+def stream_admin_export_file_from_chunks(
+    chunks, users, companies, file_name, output_dir, nb_workers=1
+):
+    """Streaming mode of generate_admin_export_file_from_chunks.
+
+    Each workbook is written and signed in a file of output_dir as soon as
+    its chunk is computed, then streamed into the final archive: memory does
+    not grow with the number of files. Returns the path of the final file
+    instead of its content.
+
+    With nb_workers > 1, chunks are rendered in parallel by a pool of
+    processes, each one loading the work days of its own chunk.
+    """
+    if nb_workers > 1 and len(chunks) > 1:
+        files = _write_excel_files_in_parallel(
+            chunks, companies, file_name, output_dir, nb_workers
+        )
+        if not files:
+            raise ValueError("Aucune donnée à exporter.")
+        return build_final_export_file(files, file_name, output_dir)
+
+    files = []
+    for (
+        user_wdays_batches,
+        chunk_users,
+        chunk_min_date,
+        chunk_max_date,
+        chunk_suffix,
+    ) in _iter_export_chunks(chunks, users, companies):
+        chunk_files = write_excel_files_from_batch(
+            user_wdays_batches,
+            companies,
+            chunk_min_date,
+            chunk_max_date,
+            file_name,
+            chunk_suffix,
+            output_dir,
+            all_users=chunk_users,
+        )
+        files.extend(chunk_files)
+
+    if not files:
+        raise ValueError("Aucune donnée à exporter.")
+
+    return build_final_export_file(files, file_name, output_dir)
+
+
+def _write_excel_files_in_parallel(
+    chunks, companies, file_name, output_dir, nb_workers
+):
+    company_ids = [c.id for c in companies]
+    args = [
+        (chunk, company_ids, file_name, output_dir)
+        for chunk in _sort_export_chunks(chunks)
+    ]
+
+    # billiard processes can be started from a daemonic celery worker
+    with get_context("fork").Pool(
+        min(nb_workers, len(args)), initializer=_init_export_worker
+    ) as pool:
+        chunk_files = pool.map(_write_excel_files_for_chunk, args)
+
+    return [file for files in chunk_files for file in files]
+
+
+def _init_export_worker():
+    dispose_engine_after_fork(db.engine)
+    db.session.remove()
+
+
+def _write_excel_files_for_chunk(args):
+    chunk, company_ids, file_name, output_dir = args
+    with app.app_context():
+        try:
+            companies = Company.query.filter(Company.id.in_(company_ids)).all()
+            users = User.query.filter(User.id.in_(chunk["user_ids"])).all()
+            files = []
+            for (
+                user_wdays_batches,
+                chunk_users,
+                chunk_min_date,
+                chunk_max_date,
+                chunk_suffix,
+            ) in _iter_export_chunks([chunk], users, companies):
+                files.extend(
+                    write_excel_files_from_batch(
+                        user_wdays_batches,
+                        companies,
+                        chunk_min_date,
+                        chunk_max_date,
+                        file_name,
+                        chunk_suffix,
+                        output_dir,
+                        all_users=chunk_users,
+                    )
+                )
+            return files
+        finally:
+            db.session.remove()
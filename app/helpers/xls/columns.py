@@ -13,7 +13,7 @@ from app.helpers.xls.common import (
     very_light_red_hex,
     blue_hex,
 )
-from app.models.activity import ActivityType, Activity
+from app.models.activity import ActivityType, Activity, FrozenActivity
 from app.templates.filters import format_activity_type
 
 ExcelColumn = namedtuple(
@@ -362,7 +362,7 @@ COLUMN_EVENT_DESC = ExcelColumn(
 
 def get_executed_activities(event):
     if (
-        type(event.resource) is Activity
+        isinstance(event.resource, (Activity, FrozenActivity))
         and event.type == LogActionType.CREATE
         and not event.resource.dismissed_at
     ):
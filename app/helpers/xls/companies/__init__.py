@@ -1,3 +1,4 @@
+import os
 import zipfile
 from collections import defaultdict
 from io import BytesIO
@@ -7,7 +8,11 @@ from xlsxwriter import Workbook
 from app.helpers.xls.common import clean_string, is_export_empty
 from app.helpers.xls.companies.tab_activities import write_work_days_sheet
 from app.helpers.xls.companies.tab_details import write_day_details_sheet
-from app.helpers.xls.signature import HMAC_PROP_NAME, add_signature
+from app.helpers.xls.signature import (
+    HMAC_PROP_NAME,
+    add_signature,
+    add_signature_to_file,
+)
 
 
 def get_archive_excel_file(batches, companies, min_date, max_date):
@@ -38,6 +43,41 @@ def get_archive_excel_file(batches, companies, min_date, max_date):
 
 def get_one_excel_file(
     wdays_data, companies, min_date, max_date, all_users=None
+):
+    output = BytesIO()
+    wb = Workbook(output)
+    _write_one_excel_workbook(
+        wb, wdays_data, companies, min_date, max_date, all_users=all_users
+    )
+    wb.close()
+
+    output.seek(0)
+    output = add_signature(output)
+    output.seek(0)
+    return output
+
+
+def write_one_excel_file(
+    file_path, wdays_data, companies, min_date, max_date, all_users=None
+):
+    """Same workbook as get_one_excel_file, built and signed on disk so that
+    its content is never held in memory."""
+    unsigned_file_path = f"{file_path}.unsigned"
+    wb = Workbook(
+        unsigned_file_path, {"tmpdir": os.path.dirname(file_path) or None}
+    )
+    _write_one_excel_workbook(
+        wb, wdays_data, companies, min_date, max_date, all_users=all_users
+    )
+    wb.close()
+
+    add_signature_to_file(unsigned_file_path, file_path)
+    os.remove(unsigned_file_path)
+    return file_path
+
+
+def _write_one_excel_workbook(
+    wb, wdays_data, companies, min_date, max_date, all_users=None
 ):
     complete_work_days = [wd for wd in wdays_data if wd.is_complete]
     wdays_by_user = defaultdict(list)
@@ -54,8 +94,6 @@ def get_one_excel_file(
     require_kilometer_data = any([c.require_kilometer_data for c in companies])
     allow_transfers = any([c.allow_transfers for c in companies])
 
-    output = BytesIO()
-    wb = Workbook(output)
     wb.set_custom_property(HMAC_PROP_NAME, "a")
 
     write_work_days_sheet(
@@ -87,9 +125,3 @@ def get_one_excel_file(
         max_date=max_date,
         deleted_missions=True,
     )
-    wb.close()
-
-    output.seek(0)
-    output = add_signature(output)
-    output.seek(0)
-    return output
@@ -1,84 +1,60 @@
 from io import BytesIO
+import os
 import zipfile
+from uuid import uuid4
 
-from app.domain.work_days import group_user_events_by_day_with_limit
-from .companies import get_one_excel_file
-from .common import clean_string, is_export_empty
+from app.domain.work_days import group_users_events_by_day
+from .companies import get_one_excel_file, write_one_excel_file
+from .common import EXCEL_MIMETYPE, clean_string, is_export_empty
 
 
 def load_work_days_cache(all_users, chunks, scope, parse_date_fn):
     global_min_date = min(parse_date_fn(chunk["min_date"]) for chunk in chunks)
     global_max_date = max(parse_date_fn(chunk["max_date"]) for chunk in chunks)
 
-    cache = {}
-    for user in all_users:
-        work_days, _ = group_user_events_by_day_with_limit(
-            user,
-            consultation_scope=scope,
-            from_date=global_min_date,
-            until_date=global_max_date,
-            include_dismissed_or_empty_days=True,
-        )
-        cache[user.id] = work_days
-    return cache
+    return group_users_events_by_day(
+        all_users,
+        consultation_scope=scope,
+        from_date=global_min_date,
+        until_date=global_max_date,
+        include_dismissed_or_empty_days=True,
+    )
 
 
 def get_work_days_for_users(
     users, cache, scope, min_date, max_date, one_file_by_employee
 ):
-    if one_file_by_employee:
-        user_wdays_batches = []
-        for user in users:
-            if cache:
-                cached_work_days = cache.get(user.id, [])
-                wdays = [
-                    wd
-                    for wd in cached_work_days
-                    if min_date <= wd.day <= max_date
-                ]
-            else:
-                wdays = group_user_events_by_day_with_limit(
-                    user,
-                    consultation_scope=scope,
-                    from_date=min_date,
-                    until_date=max_date,
-                    include_dismissed_or_empty_days=True,
-                )[0]
-            user_wdays_batches.append((user, wdays))
+    if cache:
+        work_days_by_user_id = {
+            user.id: [
+                wd
+                for wd in cache.get(user.id, [])
+                if min_date <= wd.day <= max_date
+            ]
+            for user in users
+        }
     else:
-        all_work_days = []
-        for user in users:
-            if cache:
-                cached_work_days = cache.get(user.id, [])
-                wdays = [
-                    wd
-                    for wd in cached_work_days
-                    if min_date <= wd.day <= max_date
-                ]
-            else:
-                wdays = group_user_events_by_day_with_limit(
-                    user,
-                    consultation_scope=scope,
-                    from_date=min_date,
-                    until_date=max_date,
-                    include_dismissed_or_empty_days=True,
-                )[0]
-            all_work_days += wdays
-        user_wdays_batches = [(None, all_work_days)]
-
-    return user_wdays_batches
+        work_days_by_user_id = group_users_events_by_day(
+            users,
+            consultation_scope=scope,
+            from_date=min_date,
+            until_date=max_date,
+            include_dismissed_or_empty_days=True,
+        )
 
+    if one_file_by_employee:
+        return [(user, work_days_by_user_id[user.id]) for user in users]
 
-def generate_excel_files_from_batch(
-    user_wdays_batches,
-    companies,
-    min_date,
-    max_date,
-    file_name,
-    chunk_suffix,
-    all_users=None,
+    all_work_days = []
+    for user in users:
+        all_work_days += work_days_by_user_id[user.id]
+    return [(None, all_work_days)]
+
+
+def _get_excel_files_to_generate(
+    user_wdays_batches, file_name, chunk_suffix, all_users=None
 ):
-    files_data = []
+    files_to_generate = []
 
     if len(user_wdays_batches) == 1:
         wdays = user_wdays_batches[0][1]
@@ -87,35 +63,66 @@ def generate_excel_files_from_batch(
             chunk_file_name = f"{file_name}_{chunk_suffix}"
         if is_export_empty(wdays):
             chunk_file_name = f"{chunk_file_name}_vide"
-
-        excel_file = get_one_excel_file(
-            wdays, companies, min_date, max_date, all_users=all_users
-        )
-        excel_file.seek(0)
-        files_data.append(
-            {"name": f"{chunk_file_name}.xlsx", "content": excel_file.read()}
-        )
+        files_to_generate.append((f"{chunk_file_name}.xlsx", wdays, all_users))
     else:
         for user, wdays in user_wdays_batches:
             user_name = f"{clean_string(user.last_name)}_{clean_string(user.first_name)}"
             chunk_file_name = f"{file_name}_{user_name}"
             if is_export_empty(wdays):
                 chunk_file_name = f"{chunk_file_name}_vide"
-
-            excel_file = get_one_excel_file(
-                wdays, companies, min_date, max_date, all_users=[user]
-            )
-            excel_file.seek(0)
-            files_data.append(
-                {
-                    "name": f"{chunk_file_name}.xlsx",
-                    "content": excel_file.read(),
-                }
+            files_to_generate.append(
+                (f"{chunk_file_name}.xlsx", wdays, [user])
             )
 
+    return files_to_generate
+
+
+def generate_excel_files_from_batch(
+    user_wdays_batches,
+    companies,
+    min_date,
+    max_date,
+    file_name,
+    chunk_suffix,
+    all_users=None,
+):
+    files_data = []
+    for name, wdays, users in _get_excel_files_to_generate(
+        user_wdays_batches, file_name, chunk_suffix, all_users=all_users
+    ):
+        excel_file = get_one_excel_file(
+            wdays, companies, min_date, max_date, all_users=users
+        )
+        excel_file.seek(0)
+        files_data.append({"name": name, "content": excel_file.read()})
+
     return files_data
 
 
+def write_excel_files_from_batch(
+    user_wdays_batches,
+    companies,
+    min_date,
+    max_date,
+    file_name,
+    chunk_suffix,
+    output_dir,
+    all_users=None,
+):
+    files = []
+    for name, wdays, users in _get_excel_files_to_generate(
+        user_wdays_batches, file_name, chunk_suffix, all_users=all_users
+    ):
+        # Unique on-disk name, several chunks may produce the same file name
+        file_path = os.path.join(output_dir, f"{uuid4().hex}.xlsx")
+        write_one_excel_file(
+            file_path, wdays, companies, min_date, max_date, all_users=users
+        )
+        files.append({"name": name, "path": file_path})
+
+    return files
+
+
 def build_final_export(files_data, file_name):
     if len(files_data) == 1:
         file_content = files_data[0]["content"]
@@ -139,3 +146,32 @@ def build_final_export(files_data, file_name):
     final_file_name = f"{file_name}.zip"
     file_size_bytes = len(file_content)
     return file_content, content_type, final_file_name, file_size_bytes
+
+
+def build_final_export_file(files, file_name, output_dir):
+    """On-disk counterpart of build_final_export: the workbooks are streamed
+    into the archive one by one and removed once added."""
+    if len(files) == 1:
+        file_path = files[0]["path"]
+        return (
+            file_path,
+            EXCEL_MIMETYPE,
+            files[0]["name"],
+            os.path.getsize(file_path),
+        )
+
+    final_file_name = f"{file_name}.zip"
+    archive_path = os.path.join(output_dir, f"{uuid4().hex}.zip")
+    with zipfile.ZipFile(
+        archive_path, "w", compression=zipfile.ZIP_DEFLATED
+    ) as zip_file:
+        for file in files:
+            zip_file.write(file["path"], arcname=file["name"])
+            os.remove(file["path"])
+
+    return (
+        archive_path,
+        "application/zip",
+        final_file_name,
+        os.path.getsize(archive_path),
+    )
@@ -1,5 +1,6 @@
 import hashlib
 import hmac
+import shutil
 from io import BytesIO
 from zipfile import ZipFile, ZIP_DEFLATED
 
@@ -21,6 +22,7 @@ HMAC_KEY = (
 )
 HMAC_PROP_NAME = "Mobilic HMAC"
 HMAC_BLOCK_SIZE = 1024
+COPY_BLOCK_SIZE = 1024 * 1024
 WORKSHEETS_TO_INCLUDE_IN_HMAC = [
     "xl/worksheets/sheet1.xml",
     "xl/worksheets/sheet2.xml",
@@ -54,6 +56,57 @@ def add_signature(fp):
     return new_archive_fp
 
 
+def add_signature_to_file(src_path, dst_path):
+    """Streaming counterpart of add_signature, from one file to another.
+
+    Archive members are copied block by block and the HMAC is updated while
+    the signed worksheets are copied, so that neither the archive nor its
+    members are loaded in memory.
+    """
+    if not HMAC_KEY:
+        shutil.copyfile(src_path, dst_path)
+        return
+
+    with ZipFile(dst_path, "w", compression=ZIP_DEFLATED) as new_archive:
+        with ZipFile(src_path, "r") as archive:
+            hmac_signature = hmac.new(HMAC_KEY, digestmod=hashlib.sha256)
+            worksheets_to_sign = list(WORKSHEETS_TO_INCLUDE_IN_HMAC)
+            signed_in_order = True
+            for file_name in archive.namelist():
+                if file_name == "docProps/custom.xml":
+                    continue
+                to_sign = file_name in worksheets_to_sign
+                if to_sign:
+                    signed_in_order = (
+                        signed_in_order and worksheets_to_sign[0] == file_name
+                    )
+                    worksheets_to_sign.remove(file_name)
+                with archive.open(file_name, "r") as f, new_archive.open(
+                    file_name, "w"
+                ) as new_f:
+                    while True:
+                        block = f.read(COPY_BLOCK_SIZE)
+                        if not block:
+                            break
+                        if to_sign:
+                            hmac_signature.update(block)
+                        new_f.write(block)
+
+            if signed_in_order and not worksheets_to_sign:
+                signature = hmac_signature.hexdigest()
+            else:
+                signature = compute_hmac(archive, HMAC_KEY)
+
+            with archive.open("docProps/custom.xml", "r") as f:
+                xml = parse(f)
+                hmac_prop_value = extract_signature_node_from_xml(xml)
+                if hmac_prop_value is not None:
+                    hmac_prop_value.text = signature
+
+        with new_archive.open("docProps/custom.xml", "w") as f:
+            xml.write(f, xml_declaration=True, encoding="UTF-8")
+
+
 def compute_hmac(archive, key):
     hmac_signature = hmac.new(key, digestmod=hashlib.sha256)
     for file_name in WORKSHEETS_TO_INCLUDE_IN_HMAC:
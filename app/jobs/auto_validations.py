@@ -1,11 +1,18 @@
+from collections import defaultdict
 from datetime import datetime, timedelta
+from functools import partial
+from time import perf_counter
 
 import sentry_sdk
 from jours_feries_france import JoursFeries
 from sqlalchemy.orm import selectinload
 
 from app import app, db
-from app.domain.validation import validate_mission
+from app.domain.validation import (
+    compute_regulations_after_validations,
+    get_validation_business,
+    validate_mission,
+)
 from app.jobs import log_execution
 from app.models import MissionAutoValidation
 from app.helpers.errors import (
@@ -16,6 +23,7 @@ from app.helpers.errors import (
 ADMIN_THRESHOLD_DAYS = 2
 EMPLOYEE_THRESHOLD_DAYS = 1
 AUTO_VALIDATION_BATCH_SIZE = 400
+AUTO_VALIDATION_MAX_BATCHES = 10
 
 
 def _get_threshold_time(now, days_to_remove):
@@ -29,19 +37,26 @@ def _get_threshold_time(now, days_to_remove):
     return threshold_time
 
 
-def _get_auto_validations(threshold_time, is_admin):
-    return (
-        MissionAutoValidation.query.options(
-            selectinload(MissionAutoValidation.user),
-            selectinload(MissionAutoValidation.mission),
-        )
-        .filter(
-            MissionAutoValidation.reception_time < threshold_time,
-            MissionAutoValidation.is_admin == is_admin,
+def _get_auto_validations(
+    threshold_time, is_admin, limit=None, excluded_ids=None
+):
+    query = MissionAutoValidation.query.options(
+        selectinload(MissionAutoValidation.user),
+        selectinload(MissionAutoValidation.mission),
+    ).filter(
+        MissionAutoValidation.reception_time < threshold_time,
+        MissionAutoValidation.is_admin == is_admin,
+    )
+    if excluded_ids:
+        query = query.filter(
+            MissionAutoValidation.id.notin_(list(excluded_ids))
         )
-        .order_by(MissionAutoValidation.reception_time)
-        .all()
+    query = query.order_by(
+        MissionAutoValidation.reception_time, MissionAutoValidation.id
     )
+    if limit:
+        query = query.limit(limit)
+    return query.all()
 
 
 def get_employee_auto_validations(now):
@@ -71,93 +86,209 @@ def get_admin_auto_validations(now):
     return auto_validations
 
 
-@log_execution
-def job_process_auto_validations():
-    from app import atomic_transaction
+def _capture_auto_validation_error(e, auto_validation, is_admin):
+    with sentry_sdk.new_scope() as scope:
+        scope.fingerprint = [
+            "auto-validation-failure",
+            type(e).__name__,
+        ]
+        scope.set_tag("job", "process_auto_validations")
+        scope.set_tag("is_admin", str(is_admin))
+        scope.set_context(
+            "auto_validation",
+            {
+                "mission_id": auto_validation.mission_id,
+                "user_id": auto_validation.user_id,
+                "user_email": (
+                    auto_validation.user.email
+                    if auto_validation.user
+                    else None
+                ),
+                "reception_time": str(auto_validation.reception_time),
+            },
+        )
+        sentry_sdk.capture_exception(e)
 
-    now = datetime.now()
 
-    def _process_auto_validations(auto_validations, is_admin):
+def _process_user_auto_validations(
+    user, auto_validations, is_admin, now, stats
+):
+    """
+    Validate the missions of the user in a single transaction, then compute the regulations once
+    over all the validated missions, grouped by business.
+    A mission that cannot be validated is removed from the queue without affecting the other ones.
+    """
+    activities_by_business = defaultdict(list)
+    businesses = {}
+    validated = 0
+    removed = 0
+    for auto_validation in auto_validations:
+        mission = auto_validation.mission
+        app.logger.info(
+            f"Processing auto-validation for mission {mission.id}, user {user.id}, reception_time {auto_validation.reception_time}"
+        )
+        savepoint = db.session.begin_nested()
+        try:
+            validate_mission(
+                mission=mission,
+                submitter=None,
+                for_user=user,
+                creation_time=now,
+                is_auto_validation=True,
+                is_admin_validation=is_admin,
+                with_regulations_computation=False,
+            )
+            savepoint.commit()
+        except (
+            NoActivitiesToValidateError,
+            MissionAlreadyAutoValidatedError,
+        ) as e:
+            savepoint.rollback()
+            app.logger.warning(
+                f"Could not auto validate mission <{mission.id}>: {e} (removing from queue)"
+            )
+            db.session.delete(auto_validation)
+            removed += 1
+            continue
+
+        validated += 1
+        if not mission.is_holiday():
+            business = get_validation_business(mission, user)
+            business_id = business.id if business else None
+            businesses[business_id] = business
+            activities_by_business[business_id].append(
+                mission.activities_for(user)
+            )
+
+    for business_id, activities_by_mission in activities_by_business.items():
+        compute_regulations_after_validations(
+            activities_by_mission=activities_by_mission,
+            is_admin_validation=is_admin,
+            user=user,
+            business=businesses[business_id],
+        )
+        stats["regulation_computations"] += 1
+
+    db.session.commit()
+    stats["validated"] += validated
+    stats["removed"] += removed
+
+
+def _process_auto_validations(
+    get_auto_validations,
+    is_admin,
+    now,
+    batch_size,
+    max_batches,
+):
+    """
+    Process the due auto-validations by batches of at most batch_size, each user in its own transaction.
+    Processed auto-validations leave the queue in the transaction of their validation,
+    so an interrupted run is resumed by the next one.
+    The ones that failed are kept in the queue for the next run, and are not picked again by the following batches.
+    """
+    stats = defaultdict(int)
+    processed_ids = set()
+    start_time = perf_counter()
+    for batch_index in range(max_batches):
+        auto_validations = get_auto_validations(
+            limit=batch_size, excluded_ids=processed_ids
+        )
+        if not auto_validations:
+            break
+        processed_ids.update(av.id for av in auto_validations)
+
+        auto_validations_by_user_id = defaultdict(list)
         for auto_validation in auto_validations:
-            for_user = auto_validation.user
-            mission = auto_validation.mission
+            auto_validations_by_user_id[auto_validation.user_id].append(
+                auto_validation
+            )
 
-            if not for_user:
+        for user_auto_validations in auto_validations_by_user_id.values():
+            user = user_auto_validations[0].user
+            if not user:
                 app.logger.warning(
-                    f"Skipping auto-validation for mission {mission.id}: user not found (deleted?)"
+                    f"Skipping auto-validations for missions {[av.mission_id for av in user_auto_validations]}: user not found (deleted?)"
                 )
-                db.session.delete(auto_validation)
+                for auto_validation in user_auto_validations:
+                    db.session.delete(auto_validation)
                 db.session.commit()
+                stats["removed"] += len(user_auto_validations)
                 continue
 
-            app.logger.info(
-                f"Processing auto-validation for mission {mission.id}, user {for_user.id}, reception_time {auto_validation.reception_time}"
-            )
-
+            stats["users"] += 1
             try:
-                with atomic_transaction(commit_at_end=True):
-                    validation = validate_mission(
-                        mission=mission,
-                        submitter=None,
-                        for_user=for_user,
-                        creation_time=now,
-                        is_auto_validation=True,
-                        is_admin_validation=is_admin,
-                    )
-                    db.session.add(validation)
-            except (
-                NoActivitiesToValidateError,
-                MissionAlreadyAutoValidatedError,
-            ) as e:
-                app.logger.warning(
-                    f"Could not auto validate mission <{mission.id}>: {e} (removing from queue)"
+                _process_user_auto_validations(
+                    user=user,
+                    auto_validations=user_auto_validations,
+                    is_admin=is_admin,
+                    now=now,
+                    stats=stats,
                 )
-                db.session.delete(auto_validation)
-                db.session.commit()
-                continue
             except Exception as e:
-                with sentry_sdk.new_scope() as scope:
-                    scope.fingerprint = [
-                        "auto-validation-failure",
-                        type(e).__name__,
-                    ]
-                    scope.set_tag("job", "process_auto_validations")
-                    scope.set_tag("is_admin", str(is_admin))
-                    scope.set_context(
-                        "auto_validation",
-                        {
-                            "mission_id": mission.id,
-                            "user_id": for_user.id,
-                            "user_email": for_user.email,
-                            "reception_time": str(
-                                auto_validation.reception_time
-                            ),
-                        },
+                db.session.rollback()
+                stats["failed"] += len(user_auto_validations)
+                for auto_validation in user_auto_validations:
+                    _capture_auto_validation_error(
+                        e, auto_validation, is_admin
                     )
-                    sentry_sdk.capture_exception(e)
                 app.logger.error(
-                    f"Could not auto validate mission <{mission.id}>: {e} (keeping in queue for retry)"
+                    f"Could not auto validate missions {[av.mission_id for av in user_auto_validations]} of user <{user.id}>: {e} (keeping in queue for retry)"
                 )
-                continue
 
-    employee_auto_validations = get_employee_auto_validations(now=now)[
-        :AUTO_VALIDATION_BATCH_SIZE
-    ]
+        app.logger.info(
+            f"{'Admin' if is_admin else 'Employee'} auto validations batch #{batch_index + 1}: "
+            f"{stats['validated']} validated, {stats['removed']} removed, {stats['failed']} failed "
+            f"for {stats['users']} users, {stats['regulation_computations']} regulation computations "
+            f"in {perf_counter() - start_time:.1f}s"
+        )
+        if len(auto_validations) < batch_size:
+            break
+
+    return dict(stats)
+
+
+@log_execution
+def job_process_auto_validations(
+    batch_size=AUTO_VALIDATION_BATCH_SIZE,
+    max_batches=AUTO_VALIDATION_MAX_BATCHES,
+):
+    now = datetime.now()
+
+    employee_threshold_time = _get_threshold_time(
+        now=now, days_to_remove=EMPLOYEE_THRESHOLD_DAYS
+    )
     app.logger.info(
-        f"Found #{len(employee_auto_validations)} employee auto validations"
+        f"Employee auto-validation threshold: {employee_threshold_time} (current time: {now})"
     )
-
-    _process_auto_validations(
-        auto_validations=employee_auto_validations, is_admin=False
+    employee_stats = _process_auto_validations(
+        get_auto_validations=partial(
+            _get_auto_validations,
+            threshold_time=employee_threshold_time,
+            is_admin=False,
+        ),
+        is_admin=False,
+        now=now,
+        batch_size=batch_size,
+        max_batches=max_batches,
     )
 
-    admin_auto_validations = get_admin_auto_validations(now=now)[
-        :AUTO_VALIDATION_BATCH_SIZE
-    ]
+    admin_threshold_time = _get_threshold_time(
+        now=now, days_to_remove=ADMIN_THRESHOLD_DAYS
+    )
     app.logger.info(
-        f"Found #{len(admin_auto_validations)} admin auto validations"
+        f"Admin auto-validation threshold: {admin_threshold_time} (current time: {now})"
     )
-
-    _process_auto_validations(
-        auto_validations=admin_auto_validations, is_admin=True
+    admin_stats = _process_auto_validations(
+        get_auto_validations=partial(
+            _get_auto_validations,
+            threshold_time=admin_threshold_time,
+            is_admin=True,
+        ),
+        is_admin=True,
+        now=now,
+        batch_size=batch_size,
+        max_batches=max_batches,
     )
+
+    return dict(employee=employee_stats, admin=admin_stats)
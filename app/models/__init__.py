@@ -26,6 +26,9 @@ from .naf_code import NafCode
 from .regulation_check import RegulationCheck
 from .regulatory_alert import RegulatoryAlert
 from .regulation_computation import RegulationComputation
+from .regulation_work_day_summary import RegulationWorkDaySummary
+from .work_day_stats import WorkDayStats
+from .regulation_backfill_task import RegulationBackfillTask
 from .team import Team
 from .company_certification import CompanyCertification
 from .scenario_testing import ScenarioTesting
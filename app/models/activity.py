@@ -1,8 +1,9 @@
 from enum import Enum
 from datetime import datetime, timedelta
 
-from sqlalchemy import event
+from sqlalchemy import event, inspect
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.helpers.authentication import current_user
 from sqlalchemy.orm import backref
@@ -139,28 +140,14 @@ class Activity(UserEventBaseModel, Dismissable, Period):
         include_dismissed_activities=False,
         include_posteriori_activities=False,
     ):
-        if self.dismissed_at and self.dismissed_at > at_time:
-            self.dismissed_at = None
-            self.dismiss_author_id = None
         frozen_version = self.version_at(
             at_time,
             include_dismissed_activities,
             include_posteriori_activities,
         )
         if frozen_version:
-            self.start_time = frozen_version.start_time
-            if frozen_version.end_time:
-                self.end_time = frozen_version.end_time
-            else:
-                # 1mn added to comply with "activity_start_time_before_end_time" constraint
-                # last_update_time updated to comply with "activity_end_time_before_update_time" constraint
-                self.last_update_time = self.end_time = at_time + timedelta(
-                    minutes=1
-                )
-                # these changes will not be commited see app/controllers/controller.py
-            return self
-        else:
-            return None
+            return FrozenActivity(self, at_time, frozen_version)
+        return None
 
     def latest_modification_time_by(self, user):
         if self.dismiss_author_id == user.id:
@@ -268,6 +255,118 @@ class Activity(UserEventBaseModel, Dismissable, Period):
             return self.versions
 
 
+class FrozenActivity:
+    """
+    Read-only view of an activity as it was at a given time, built from its
+    versions. The underlying activity is never modified, so several frozen
+    views of the same mission can coexist in a session.
+
+    Attributes which do not depend on time are read from the activity.
+    """
+
+    __slots__ = (
+        "snapshot_of",
+        "frozen_at",
+        "start_time",
+        "end_time",
+        "last_update_time",
+        "dismissed_at",
+        "dismiss_author_id",
+    )
+
+    def __init__(self, activity, frozen_at, version):
+        is_dismissed_at_time = (
+            activity.dismissed_at is not None
+            and activity.dismissed_at <= frozen_at
+        )
+        if version.end_time:
+            end_time = version.end_time
+            last_update_time = activity.last_update_time
+        else:
+            # 1mn added to comply with "activity_start_time_before_end_time" constraint
+            end_time = last_update_time = frozen_at + timedelta(minutes=1)
+        for name, value in (
+            ("snapshot_of", activity),
+            ("frozen_at", frozen_at),
+            ("start_time", version.start_time),
+            ("end_time", end_time),
+            ("last_update_time", last_update_time),
+            (
+                "dismissed_at",
+                activity.dismissed_at if is_dismissed_at_time else None,
+            ),
+            (
+                "dismiss_author_id",
+                activity.dismiss_author_id if is_dismissed_at_time else None,
+            ),
+        ):
+            object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        if name in FrozenActivity.__slots__:
+            raise AttributeError(name)
+        return getattr(self.snapshot_of, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self!r} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self!r} is read-only")
+
+    def __repr__(self):
+        return f"<FrozenActivity [{self.snapshot_of.id}] : {self.snapshot_of.type.value} at {self.frozen_at}>"
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenActivity):
+            return NotImplemented
+        return (
+            self.snapshot_of is other.snapshot_of
+            and self.frozen_at == other.frozen_at
+        )
+
+    def __hash__(self):
+        return hash((id(self.snapshot_of), self.frozen_at))
+
+    @property
+    def is_dismissed(self):
+        return self.dismissed_at is not None
+
+    @property
+    def dismiss_author(self):
+        return self.snapshot_of.dismiss_author if self.is_dismissed else None
+
+    @property
+    def dismiss_context(self):
+        return self.snapshot_of.dismiss_context if self.is_dismissed else None
+
+    @property
+    def duration(self):
+        return Period.duration.fget(self)
+
+    def duration_over(self, start_time, end_time):
+        return Period.duration_over(self, start_time, end_time)
+
+
+def load_activity_versions(activities):
+    """Load in one query the versions of the activities not loaded yet."""
+    activities_to_load = [
+        a
+        for a in activities
+        if inspect(a).persistent and "versions" in inspect(a).unloaded
+    ]
+    if not activities_to_load:
+        return
+    versions_by_activity_id = {a.id: [] for a in activities_to_load}
+    for version in ActivityVersion.query.filter(
+        ActivityVersion.activity_id.in_(versions_by_activity_id.keys())
+    ).order_by(ActivityVersion.activity_id, ActivityVersion.version_number):
+        versions_by_activity_id[version.activity_id].append(version)
+    for activity in activities_to_load:
+        set_committed_value(
+            activity, "versions", versions_by_activity_id[activity.id]
+        )
+
+
 @event.listens_for(Activity, "after_insert")
 @event.listens_for(Activity, "after_update")
 def set_last_submitter_id(mapper, connect, target):
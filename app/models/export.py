@@ -11,6 +11,9 @@ from app.models.utils import enum_column
 class ExportType(str, Enum):
     EXCEL = "excel"
     REFUSED_CGU = "refused_cgu"
+    TACHOGRAPH = "tachograph"
+    WORK_DAYS_PDF = "pdf"
+    RAW_DATA = "raw_data"
 
 
 class ExportStatus(str, Enum):
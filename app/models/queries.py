@@ -20,7 +20,7 @@ from functools import reduce
 from app import db
 from app.domain.work_days import NOT_WORK_ACTIVITIES
 from app.helpers.pagination import parse_datetime_plus_id_cursor, to_connection
-from app.helpers.time import to_datetime, to_tz
+from app.helpers.time import FR_TIMEZONE, to_datetime, to_tz
 from app.models import (
     User,
     Activity,
@@ -30,6 +30,7 @@ from app.models import (
     Expenditure,
     MissionValidation,
     MissionEnd,
+    WorkDayStats,
 )
 from app.models.activity import ActivityType
 from app.models.controller_control import ControllerControl
@@ -405,6 +406,9 @@ def query_work_day_stats(
                     query.c.day == func.current_date(),
                 )
             ).label("is_running"),
+            func.bool_or(query.c.end_time.is_(None)).label(
+                "has_running_activity"
+            ),
             *[
                 func.sum(
                     case(
@@ -490,6 +494,9 @@ def query_work_day_stats(
             ),
             func.max(query.c.end_time).label("end_time"),
             func.bool_or(query.c.is_running).label("is_running"),
+            func.bool_or(query.c.has_running_activity).label(
+                "has_running_activity"
+            ),
             *[
                 func.sum(
                     getattr(query.c, f"{a_type.value}_duration")
@@ -548,6 +555,163 @@ def query_work_day_stats(
     return results, has_next_page
 
 
+def work_day_stats_as_dict(row):
+    """Work day stats of a query_work_day_stats row, as stored in WorkDayStats"""
+    return dict(
+        user_id=row.user_id,
+        day=row.day.date(),
+        # Times are naive UTC, some are computed from the current time with a timezone
+        start_time=to_tz(row.start_time, timezone.utc),
+        last_activity_start_time=to_tz(
+            row.last_activity_start_time, timezone.utc
+        ),
+        end_time=to_tz(row.end_time, timezone.utc),
+        is_running=row.is_running,
+        has_running_activity=row.has_running_activity,
+        service_duration=int(row.service_duration),
+        total_work_duration=row.total_work_duration,
+        activity_durations={
+            a_type.value: getattr(row, f"{a_type.value}_duration")
+            for a_type in ActivityType
+        },
+        expenditures={
+            e_type.value: getattr(row, f"n_{e_type.value}_expenditures")
+            for e_type in ExpenditureType
+        },
+        mission_names={mn[0]: mn[1] for mn in row.mission_names},
+    )
+
+
+def _query_running_activity_start_days(company_id, user_ids=None):
+    """
+    :return: dict user id -> day of the oldest running activity of the user
+    """
+    query = (
+        db.session.query(Activity.user_id, func.min(Activity.start_time))
+        .join(Mission, Activity.mission_id == Mission.id)
+        .filter(
+            Mission.company_id == company_id,
+            Activity.end_time.is_(None),
+            ~Activity.is_dismissed,
+        )
+        .group_by(Activity.user_id)
+    )
+    if user_ids:
+        query = query.filter(Activity.user_id.in_(user_ids))
+    return {
+        user_id: to_tz(start_time, FR_TIMEZONE).date()
+        for user_id, start_time in query
+    }
+
+
+def query_stored_work_day_stats(
+    company_id,
+    start_date=None,
+    end_date=None,
+    first=None,
+    after=None,
+    user_ids=None,
+):
+    """
+    Same as query_work_day_stats, read from the pre-aggregated WorkDayStats table.
+    The days of a user from the start of a running activity are computed again,
+    through the current date : their durations depend on the current time and
+    the stored stats may not have them yet.
+    :return: (list of work day stats dicts, has_next_page)
+    """
+    cursor = None
+    if after:
+        max_time, user_id_ = parse_datetime_plus_id_cursor(after)
+        cursor = (max_time.date(), user_id_)
+
+    def _is_in_scope(day, user_id):
+        return (
+            (not start_date or day >= start_date)
+            and (not end_date or day <= end_date)
+            and (not cursor or (day, user_id) < cursor)
+        )
+
+    running_start_days = _query_running_activity_start_days(
+        company_id, user_ids=user_ids
+    )
+
+    query = WorkDayStats.query.filter(WorkDayStats.company_id == company_id)
+    if start_date:
+        query = query.filter(WorkDayStats.day >= start_date)
+    if end_date:
+        query = query.filter(WorkDayStats.day <= end_date)
+    if user_ids:
+        query = query.filter(WorkDayStats.user_id.in_(user_ids))
+    if cursor:
+        query = query.filter(
+            or_(
+                WorkDayStats.day < cursor[0],
+                and_(
+                    WorkDayStats.day == cursor[0],
+                    WorkDayStats.user_id < cursor[1],
+                ),
+            )
+        )
+    if running_start_days:
+        query = query.filter(
+            ~or_(
+                *[
+                    and_(
+                        WorkDayStats.user_id == user_id,
+                        WorkDayStats.day >= day,
+                    )
+                    for user_id, day in running_start_days.items()
+                ]
+            )
+        )
+
+    query = query.order_by(desc(WorkDayStats.day), desc(WorkDayStats.user_id))
+    if first:
+        query = query.limit(first + 1)
+
+    results = [
+        dict(
+            user_id=wds.user_id,
+            day=wds.day,
+            start_time=wds.start_time,
+            last_activity_start_time=wds.last_activity_start_time,
+            end_time=wds.end_time,
+            is_running=False,
+            has_running_activity=wds.has_running_activity,
+            service_duration=wds.service_duration,
+            total_work_duration=wds.total_work_duration,
+            activity_durations=wds.activity_durations,
+            expenditures=wds.expenditures,
+            mission_names=wds.mission_names,
+        )
+        for wds in query
+    ]
+
+    if running_start_days:
+        live_start_date = min(running_start_days.values())
+        if start_date:
+            live_start_date = max(live_start_date, start_date)
+        live_rows, _ = query_work_day_stats(
+            company_id,
+            start_date=live_start_date,
+            end_date=end_date,
+            user_ids=list(running_start_days),
+        )
+        for live in map(work_day_stats_as_dict, live_rows):
+            if live["day"] >= running_start_days[
+                live["user_id"]
+            ] and _is_in_scope(live["day"], live["user_id"]):
+                results.append(live)
+        results.sort(key=lambda r: (r["day"], r["user_id"]), reverse=True)
+
+    has_next_page = False
+    if first and len(results) > first:
+        results = results[:first]
+        has_next_page = True
+
+    return results, has_next_page
+
+
 def query_controls(
     controller_user_id,
     start_time=None,
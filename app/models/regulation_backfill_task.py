@@ -0,0 +1,50 @@
+from enum import Enum
+
+from app import db
+from app.helpers.db import DateTimeStoredAsUTC
+from app.models.base import BaseModel
+from app.models.utils import enum_column
+
+
+class RegulationBackfillTaskStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class RegulationBackfillTask(BaseModel):
+    backref_base_name = "regulation_backfill_tasks"
+
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, unique=True
+    )
+    status = enum_column(
+        RegulationBackfillTaskStatus,
+        nullable=False,
+        default=RegulationBackfillTaskStatus.PENDING,
+        server_default=RegulationBackfillTaskStatus.PENDING.value,
+    )
+    # Alerts are recomputed from this day, or over the whole history when NULL
+    from_date = db.Column(db.Date, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(255), nullable=True)
+    start_time = db.Column(DateTimeStoredAsUTC, nullable=True)
+    end_time = db.Column(DateTimeStoredAsUTC, nullable=True)
+    # Duration of the last attempt, in seconds
+    duration = db.Column(db.Float, nullable=True)
+    error = db.Column(db.String, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_regulation_backfill_task_status", "status", "id"),
+    )
+
+    def __repr__(self):
+        return (
+            "<RegulationBackfillTask [{}] : user {}, {}, {} attempts>".format(
+                self.id,
+                self.user_id,
+                self.status,
+                self.attempts,
+            )
+        )
@@ -0,0 +1,39 @@
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app import db
+from app.helpers.submitter_type import SubmitterType
+from app.models.base import BaseModel
+from app.models.utils import enum_column
+
+
+class RegulationWorkDaySummary(BaseModel):
+    backref_base_name = "regulation_work_day_summaries"
+
+    day = db.Column(db.Date, nullable=False)
+    submitter_type = enum_column(SubmitterType, nullable=False)
+    # Whether the work days are computed from the versions of the employee
+    employee_version = db.Column(db.Boolean, nullable=False)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), index=False, nullable=False
+    )
+    # NULL means the day was computed and has no work
+    summary = db.Column(JSONB(none_as_null=True), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "user_id",
+            "submitter_type",
+            "employee_version",
+            "day",
+            name="one_work_day_summary_per_user_submitter_type_version_and_day",
+        ),
+    )
+
+    def __repr__(self):
+        return "<RegulationWorkDaySummary [{}] : {}, {}, {}, {}>".format(
+            self.id,
+            self.user_id,
+            self.day,
+            self.submitter_type,
+            self.employee_version,
+        )
@@ -0,0 +1,47 @@
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app import db
+from app.models.base import BaseModel
+
+
+class WorkDayStats(BaseModel):
+    backref_base_name = "work_day_stats"
+
+    company_id = db.Column(
+        db.Integer, db.ForeignKey("company.id"), index=False, nullable=False
+    )
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), index=True, nullable=False
+    )
+    # Day in the Europe/Paris timezone, times are UTC as in the activity table
+    day = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    last_activity_start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    # Durations of a day with a running activity depend on the current time
+    has_running_activity = db.Column(db.Boolean, nullable=False, default=False)
+    service_duration = db.Column(db.Integer, nullable=False)
+    total_work_duration = db.Column(db.Integer, nullable=False)
+    # Durations in seconds by activity type
+    activity_durations = db.Column(JSONB(none_as_null=True), nullable=False)
+    # Number of expenditures by expenditure type
+    expenditures = db.Column(JSONB(none_as_null=True), nullable=False)
+    # Mission names by mission id
+    mission_names = db.Column(JSONB(none_as_null=True), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "company_id",
+            "day",
+            "user_id",
+            name="only_one_work_day_stats_per_company_day_and_user",
+        ),
+    )
+
+    def __repr__(self):
+        return "<WorkDayStats [{}] : {}, {}, {}>".format(
+            self.id,
+            self.company_id,
+            self.user_id,
+            self.day,
+        )
@@ -0,0 +1,155 @@
+from app import db
+from app.models import (
+    Activity,
+    ActivityVersion,
+    Mission,
+    MissionEnd,
+    MissionValidation,
+)
+from app.models.activity import ActivityType
+from app.seed.factories import CompanyFactory, UserFactory, VehicleFactory
+from app.seed.helpers import get_time
+
+# Work periods of a driver day: (type, start hour, end hour)
+DAY_ACTIVITIES = [
+    (ActivityType.DRIVE, 6, 10),
+    (ActivityType.WORK, 10, 12),
+    (ActivityType.DRIVE, 13, 17),
+]
+
+
+def _log_driver_day(
+    company,
+    driver,
+    admin,
+    vehicle,
+    how_many_days_ago,
+    with_revision,
+    with_dismissal,
+):
+    reception_time = get_time(how_many_days_ago=how_many_days_ago, hour=18)
+    mission = Mission(
+        name=f"Tournée J-{how_many_days_ago}",
+        company=company,
+        reception_time=reception_time,
+        creation_time=reception_time,
+        submitter=driver,
+        vehicle=vehicle,
+    )
+    db.session.add(mission)
+
+    periods = list(DAY_ACTIVITIES)
+    if with_dismissal:
+        periods.append((ActivityType.SUPPORT, 17, 18))
+    for type, start_hour, end_hour in periods:
+        start_time = get_time(
+            how_many_days_ago=how_many_days_ago, hour=start_hour
+        )
+        end_time = get_time(how_many_days_ago=how_many_days_ago, hour=end_hour)
+        activity = Activity(
+            type=type,
+            reception_time=reception_time,
+            last_update_time=reception_time,
+            mission=mission,
+            start_time=start_time,
+            end_time=end_time,
+            user=driver,
+            submitter=driver,
+        )
+        db.session.add(activity)
+        db.session.add(
+            ActivityVersion(
+                activity=activity,
+                reception_time=reception_time,
+                start_time=start_time,
+                end_time=end_time,
+                version_number=1,
+                submitter=driver,
+            )
+        )
+
+        if with_revision and type == ActivityType.WORK:
+            # The driver ended the activity half an hour earlier
+            revision_time = get_time(
+                how_many_days_ago=how_many_days_ago, hour=18, minute=30
+            )
+            activity.end_time = get_time(
+                how_many_days_ago=how_many_days_ago,
+                hour=end_hour - 1,
+                minute=30,
+            )
+            activity.last_update_time = revision_time
+            db.session.add(
+                ActivityVersion(
+                    activity=activity,
+                    reception_time=revision_time,
+                    start_time=start_time,
+                    end_time=activity.end_time,
+                    version_number=2,
+                    submitter=driver,
+                )
+            )
+        if type == ActivityType.SUPPORT:
+            dismiss_time = get_time(
+                how_many_days_ago=how_many_days_ago, hour=19
+            )
+            activity.dismissed_at = dismiss_time
+            activity.dismiss_author = admin
+            activity.last_update_time = dismiss_time
+
+    db.session.add(
+        MissionEnd(
+            submitter=driver,
+            reception_time=reception_time,
+            user=driver,
+            mission=mission,
+        )
+    )
+    for submitter, is_admin in [(driver, False), (admin, True)]:
+        db.session.add(
+            MissionValidation(
+                submitter=submitter,
+                reception_time=get_time(
+                    how_many_days_ago=how_many_days_ago, hour=20
+                ),
+                mission=mission,
+                user=driver,
+                is_admin=is_admin,
+            )
+        )
+
+
+def generate_fleet(
+    nb_companies, nb_drivers, nb_days, revision_every=3, dismissal_every=5
+):
+    """
+    Create nb_companies companies of nb_drivers drivers, each with one validated mission a day over the last nb_days days.
+    One day out of revision_every has a revised activity and one out of dismissal_every a dismissed activity.
+    :return: list of (company, admin, drivers)
+    """
+    fleet = []
+    for _ in range(nb_companies):
+        company = CompanyFactory.create()
+        admin = UserFactory.create(
+            post__company=company, post__has_admin_rights=True
+        )
+        vehicle = VehicleFactory.create(
+            company=company, registration_number=f"BENCH-{company.id}"
+        )
+        drivers = []
+        for _ in range(nb_drivers):
+            driver = UserFactory.create(post__company=company)
+            for how_many_days_ago in range(nb_days, 0, -1):
+                _log_driver_day(
+                    company,
+                    driver,
+                    admin,
+                    vehicle,
+                    how_many_days_ago,
+                    with_revision=how_many_days_ago % revision_every == 0,
+                    with_dismissal=how_many_days_ago % dismissal_every == 0,
+                )
+            db.session.commit()
+            drivers.append(driver)
+        fleet.append((company, admin, drivers))
+    return fleet
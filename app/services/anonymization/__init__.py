@@ -17,6 +17,7 @@ from app.services.anonymization.common import AnonymizationManager
 from app.services.anonymization.standalone import (
     DataFinder,
     AnonymizationExecutor,
+    SetBasedAnonymizationExecutor,
     anonymize_expired_data,
 )
 from app.services.anonymization.user_related import (
@@ -29,6 +30,7 @@ __all__ = [
     "AnonymizationManager",
     "DataFinder",
     "AnonymizationExecutor",
+    "SetBasedAnonymizationExecutor",
     "UserClassifier",
     "UserAnonymizer",
     "anonymize_expired_data",
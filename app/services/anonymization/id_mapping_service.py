@@ -1,5 +1,6 @@
 from app import db
-from typing import Optional, Set, Dict
+from sqlalchemy import text
+from typing import Iterable, Optional, Set, Dict
 from app.models.anonymized.id_mapping import IdMapping
 import logging
 
@@ -189,6 +190,82 @@ class IdMappingService:
         mapping.deletion_target = True
         db.session.flush()
 
+    @staticmethod
+    def map_selected_ids(
+        entity_type: str, select_ids: str, params: Dict = None
+    ) -> None:
+        """
+        Create in one statement the mappings of the IDs returned by a SELECT.
+
+        Set-based counterpart of get_user_negative_id and
+        get_entity_positive_id, using the same sequences : IDs which are
+        already mapped keep their mapping. It maps a whole batch of entities
+        before they are copied.
+
+        Args:
+            entity_type: Entity type (e.g., "user", "mission")
+            select_ids: SQL query selecting the original IDs in its first
+                column
+            params: Parameters of the query
+        """
+        sequence = (
+            "negative_user_id_seq"
+            if entity_type == "user"
+            else "anonymized_id_seq"
+        )
+        db.session.execute(
+            text(
+                f"""
+                INSERT INTO temp_id_mapping
+                (entity_type, original_id, anonymized_id, deletion_target)
+                SELECT
+                    :entity_type, ids.original_id, nextval('{sequence}'), false
+                FROM (
+                    SELECT DISTINCT selected.original_id
+                    FROM ({select_ids}) AS selected (original_id)
+                    WHERE selected.original_id IS NOT NULL
+                    AND selected.original_id != 0
+                ) AS ids
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM temp_id_mapping m
+                    WHERE m.entity_type = :entity_type
+                    AND m.original_id = ids.original_id
+                )
+                ON CONFLICT (entity_type, original_id) DO NOTHING
+                """
+            ),
+            dict(params or {}, entity_type=entity_type),
+        )
+
+    @staticmethod
+    def mark_ids_for_deletion(
+        entity_type: str, original_ids: Iterable[int]
+    ) -> None:
+        """
+        Set-based counterpart of mark_for_deletion, for a batch of entities.
+
+        Args:
+            entity_type: Entity type (e.g., "mission", "company")
+            original_ids: Original entity IDs
+        """
+        params = {"original_ids": list(original_ids)}
+        IdMappingService.map_selected_ids(
+            entity_type,
+            "SELECT unnest(CAST(:original_ids AS integer[]))",
+            params,
+        )
+        db.session.execute(
+            text(
+                """
+                UPDATE temp_id_mapping SET deletion_target = true
+                WHERE entity_type = :entity_type
+                AND original_id = ANY(CAST(:original_ids AS integer[]))
+                AND NOT deletion_target
+                """
+            ),
+            dict(params, entity_type=entity_type),
+        )
+
     @staticmethod
     def clean_mappings() -> int:
         """
@@ -1,5 +1,11 @@
 from .data_finder import DataFinder
 from .anonymization_executor import AnonymizationExecutor
+from .set_based_executor import SetBasedAnonymizationExecutor
 from .data_anonymization_manager import anonymize_expired_data
 
-__all__ = ["DataFinder", "AnonymizationExecutor", "anonymize_expired_data"]
+__all__ = [
+    "DataFinder",
+    "AnonymizationExecutor",
+    "SetBasedAnonymizationExecutor",
+    "anonymize_expired_data",
+]
@@ -21,6 +21,9 @@ from app.models import (
     UserSurveyActions,
     RegulatoryAlert,
     RegulationComputation,
+    RegulationWorkDaySummary,
+    RegulationBackfillTask,
+    WorkDayStats,
     ControllerControl,
     ControllerUser,
     ControllerRefreshToken,
@@ -514,6 +517,7 @@ class AnonymizationExecutor:
         self.delete_company_stats(company_ids)
         self.delete_company_vehicles(company_ids)
         self.delete_company_known_addresses(company_ids)
+        self.delete_company_work_day_stats(company_ids)
         self.delete_companies(company_ids)
 
     def anonymize_companies(self, company_ids: Set[int]) -> None:
@@ -645,6 +649,16 @@ class AnonymizationExecutor:
 
         self.log_deletion(deleted, "company known address")
 
+    def delete_company_work_day_stats(self, company_ids: Set[int]) -> None:
+        if not company_ids:
+            return
+
+        deleted = WorkDayStats.query.filter(
+            WorkDayStats.company_id.in_(company_ids)
+        ).delete(synchronize_session=False)
+
+        self.log_deletion(deleted, "work day stats")
+
     def anonymize_user_dependencies(self, user_ids: Set[int]) -> None:
         """
         Anonymize only user dependencies, not the users themselves.
@@ -699,6 +713,9 @@ class AnonymizationExecutor:
         self.delete_emails(user_ids=user_ids)
         self.delete_regulatory_alerts(user_ids)
         self.delete_regulation_computations(user_ids)
+        self.delete_regulation_work_day_summaries(user_ids)
+        self.delete_work_day_stats(user_ids)
+        self.delete_regulation_backfill_tasks(user_ids)
         self.delete_user_agreements(user_ids)
 
         self.update_anonymized_users_with_negative_ids(user_ids)
@@ -829,6 +846,36 @@ class AnonymizationExecutor:
 
         self.log_deletion(deleted, "regulation computation")
 
+    def delete_regulation_work_day_summaries(self, user_ids: Set[int]) -> None:
+        if not user_ids:
+            return
+
+        deleted = RegulationWorkDaySummary.query.filter(
+            RegulationWorkDaySummary.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+
+        self.log_deletion(deleted, "regulation work day summary")
+
+    def delete_work_day_stats(self, user_ids: Set[int]) -> None:
+        if not user_ids:
+            return
+
+        deleted = WorkDayStats.query.filter(
+            WorkDayStats.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+
+        self.log_deletion(deleted, "work day stats")
+
+    def delete_regulation_backfill_tasks(self, user_ids: Set[int]) -> None:
+        if not user_ids:
+            return
+
+        deleted = RegulationBackfillTask.query.filter(
+            RegulationBackfillTask.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+
+        self.log_deletion(deleted, "regulation backfill task")
+
     def anonymize_user_agreements(self, user_ids: Set[int]) -> None:
         if not user_ids:
             return
@@ -7,10 +7,15 @@ with data protection regulations.
 """
 
 import logging
+from typing import Optional
 from app import db
 
+from app.models.anonymized import IdMapping
 from app.services.anonymization.common import AnonymizationManager
 from app.services.anonymization.standalone.data_finder import DataFinder
+from app.services.anonymization.standalone.set_based_executor import (
+    SetBasedAnonymizationExecutor,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +41,8 @@ class StandaloneDataAnonymizationManager(AnonymizationManager):
         delete_only: bool = False,
         test_mode: bool = False,
         force_clean: bool = False,
+        batch_size: Optional[int] = None,
+        resume: bool = False,
     ):
         """
         Initialize the standalone data anonymization manager.
@@ -46,6 +53,9 @@ class StandaloneDataAnonymizationManager(AnonymizationManager):
             delete_only: Only delete already anonymized data
             test_mode: Run in test mode (roll back changes at the end)
             force_clean: Force cleaning of mapping tables
+            batch_size: Move missions by committed batches of this size (set-based executor)
+            resume: Keep the existing mappings to resume an interrupted batched run,
+                which a batched run does on its own when mappings are marked for deletion
         """
         super().__init__(
             operation_type="standalone",
@@ -55,6 +65,8 @@ class StandaloneDataAnonymizationManager(AnonymizationManager):
             force_clean=force_clean,
         )
         self.delete_only = delete_only
+        self.batch_size = batch_size
+        self.resume = resume
 
         # In delete-only mode, we need to disable dry-run to allow deletions
         if delete_only:
@@ -88,8 +100,39 @@ class StandaloneDataAnonymizationManager(AnonymizationManager):
             )
             return False
 
+        if self.batch_size and self.test_mode:
+            logger.error(
+                "Invalid configuration: batch_size commits each batch and cannot be used in test mode"
+            )
+            return False
+
+        if self.resume and (
+            not self.batch_size or self.delete_only or self.force_clean
+        ):
+            logger.error(
+                "Invalid configuration: resume only applies to a batched anonymization, "
+                "without delete_only nor force_clean"
+            )
+            return False
+
         return True
 
+    def has_interrupted_batched_run(self) -> bool:
+        """
+        Whether a previous batched anonymization left mappings marked for
+        deletion, in which case a new batched anonymization resumes it.
+
+        Returns:
+            bool: Whether the batched anonymization should resume
+        """
+        if not self.batch_size or self.delete_only or self.force_clean:
+            return False
+
+        return (
+            IdMapping.query.filter(IdMapping.deletion_target).first()
+            is not None
+        )
+
     def process_standalone_data(self, cutoff_date) -> None:
         """
         Coordinate standalone data processing based on operation mode.
@@ -103,7 +146,12 @@ class StandaloneDataAnonymizationManager(AnonymizationManager):
         operation_type = "Deleting" if self.delete_only else "Processing"
         logger.info(f"{operation_type} standalone data")
 
-        data_finder = DataFinder(db.session, dry_run=self.dry_run)
+        if self.batch_size:
+            data_finder = SetBasedAnonymizationExecutor(
+                db.session, dry_run=self.dry_run, batch_size=self.batch_size
+            )
+        else:
+            data_finder = DataFinder(db.session, dry_run=self.dry_run)
 
         if self.delete_only:
             logger.info("Using delete-only mode for standalone data")
@@ -137,7 +185,11 @@ class StandaloneDataAnonymizationManager(AnonymizationManager):
             )
             self.log_operation_start(cutoff_date, operation_name)
 
-            if not self.handle_tables_cleaning(
+            if self.resume or self.has_interrupted_batched_run():
+                logger.info(
+                    f"Resuming from the {IdMapping.query.count()} existing mappings"
+                )
+            elif not self.handle_tables_cleaning(
                 should_have_mappings=self.delete_only
             ):
                 return
@@ -176,6 +228,8 @@ def anonymize_expired_data(
     delete_only: bool = False,
     test_mode: bool = False,
     force_clean: bool = False,
+    batch_size: Optional[int] = None,
+    resume: bool = False,
 ) -> None:
     """
     Main function for migrating and anonymizing expired standalone data.
@@ -190,6 +244,8 @@ def anonymize_expired_data(
         delete_only: Delete-only mode - delete already anonymized data
         test_mode: Test mode - roll back all changes at the end
         force_clean: Clean mapping table before starting
+        batch_size: Move missions by committed batches of this size
+        resume: Resume an interrupted batched run from the existing mappings
 
     Workflow for delete-only mode:
     1. Run with dry_run=True to anonymize data and create mappings
@@ -207,6 +263,8 @@ def anonymize_expired_data(
         delete_only=delete_only,
         test_mode=test_mode,
         force_clean=force_clean,
+        batch_size=batch_size,
+        resume=resume,
     )
 
     manager.execute()
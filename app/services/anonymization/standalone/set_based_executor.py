@@ -0,0 +1,385 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+from datetime import datetime
+from sqlalchemy import text
+from app.models import Activity
+from app.services.anonymization.standalone.data_finder import DataFinder
+from app.services.anonymization.id_mapping_service import IdMappingService
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def truncate_to_month(column: str) -> str:
+    return f"date_trunc('month', {column})"
+
+
+def keep_duration(start_column: str, end_column: str) -> str:
+    # same as the Anon* models : the end keeps its distance to the truncated
+    # start
+    return (
+        f"{truncate_to_month(start_column)} + ({end_column} - {start_column})"
+    )
+
+
+@dataclass
+class AnonTableCopy:
+    """
+    Copy of the rows of a table to its anonymized table, in one
+    INSERT ... SELECT.
+
+    Mirrors the anonymize method of the Anon* model : the ID of the row and
+    the references to other entities are replaced by their mappings, the
+    other columns are computed by SQL expressions on the original row
+    (aliased "t").
+    """
+
+    entity_type: str
+    table: str
+    anon_table: str
+    where: str
+    references: Dict[str, str] = field(default_factory=dict)
+    columns: Dict[str, str] = field(default_factory=dict)
+
+    def select_ids(self, column: str) -> str:
+        return f"SELECT t.{column} FROM {self.table} t WHERE {self.where}"
+
+    def insert_select(self) -> str:
+        anon_columns = ["id", *self.references, *self.columns]
+        values = [
+            "id_mapping.anonymized_id",
+            *[f"{column}_mapping.anonymized_id" for column in self.references],
+            *self.columns.values(),
+        ]
+        joins = [
+            f"LEFT JOIN temp_id_mapping {column}_mapping "
+            f"ON {column}_mapping.entity_type = '{entity_type}' "
+            f"AND {column}_mapping.original_id = t.{column}"
+            for column, entity_type in self.references.items()
+        ]
+        return f"""
+            INSERT INTO {self.anon_table} ({", ".join(anon_columns)})
+            SELECT {", ".join(values)}
+            FROM {self.table} t
+            JOIN temp_id_mapping id_mapping
+            ON id_mapping.entity_type = '{self.entity_type}'
+            AND id_mapping.original_id = t.id
+            {" ".join(joins)}
+            WHERE {self.where}
+            ON CONFLICT (id) DO NOTHING
+        """
+
+
+BATCH_MISSIONS = "t.mission_id = ANY(CAST(:mission_ids AS integer[]))"
+BATCH_USERS = "t.user_id = ANY(CAST(:user_ids AS integer[]))"
+
+MISSION_TREE_COPIES = [
+    AnonTableCopy(
+        entity_type="activity",
+        table="activity",
+        anon_table="anon_activity",
+        where=BATCH_MISSIONS,
+        references={
+            "user_id": "user",
+            "submitter_id": "user",
+            "mission_id": "mission",
+        },
+        columns={
+            "type": "t.type",
+            "creation_time": truncate_to_month("t.creation_time"),
+            "start_time": truncate_to_month("t.start_time"),
+            "end_time": keep_duration("t.start_time", "t.end_time"),
+            "last_update_time": truncate_to_month("t.last_update_time"),
+        },
+    ),
+    AnonTableCopy(
+        entity_type="activity_version",
+        table="activity_version",
+        anon_table="anon_activity_version",
+        where=(
+            "t.activity_id IN (SELECT id FROM activity "
+            "WHERE mission_id = ANY(CAST(:mission_ids AS integer[])))"
+        ),
+        references={"activity_id": "activity", "submitter_id": "user"},
+        columns={
+            "version_number": "t.version_number",
+            "creation_time": truncate_to_month("t.creation_time"),
+            "start_time": truncate_to_month("t.start_time"),
+            "end_time": keep_duration("t.start_time", "t.end_time"),
+        },
+    ),
+    AnonTableCopy(
+        entity_type="mission_end",
+        table="mission_end",
+        anon_table="anon_mission_end",
+        where=BATCH_MISSIONS,
+        references={
+            "mission_id": "mission",
+            "user_id": "user",
+            "submitter_id": "user",
+        },
+        columns={"creation_time": truncate_to_month("t.creation_time")},
+    ),
+    AnonTableCopy(
+        entity_type="mission_validation",
+        table="mission_validation",
+        anon_table="anon_mission_validation",
+        where=BATCH_MISSIONS,
+        references={
+            "mission_id": "mission",
+            "submitter_id": "user",
+            "user_id": "user",
+        },
+        columns={
+            "is_admin": "t.is_admin",
+            "creation_time": truncate_to_month("t.creation_time"),
+        },
+    ),
+    AnonTableCopy(
+        entity_type="location_entry",
+        table="location_entry",
+        anon_table="anon_location_entry",
+        where=BATCH_MISSIONS,
+        references={
+            "submitter_id": "user",
+            "mission_id": "mission",
+            "address_id": "address",
+            "company_known_address_id": "company_known_address",
+        },
+        columns={
+            "type": "t.type",
+            "creation_time": truncate_to_month("t.creation_time"),
+        },
+    ),
+    AnonTableCopy(
+        entity_type="mission",
+        table="mission",
+        anon_table="anon_mission",
+        where="t.id = ANY(CAST(:mission_ids AS integer[]))",
+        references={"submitter_id": "user", "company_id": "company"},
+        columns={"creation_time": truncate_to_month("t.creation_time")},
+    ),
+]
+
+REGULATORY_ALERT_COPY = AnonTableCopy(
+    entity_type="regulatory_alert",
+    table="regulatory_alert",
+    anon_table="anon_regulatory_alert",
+    where=BATCH_USERS,
+    references={"user_id": "user"},
+    columns={
+        "creation_time": truncate_to_month("t.creation_time"),
+        "day": f"CAST({truncate_to_month('t.day')} AS date)",
+        "extra": "CAST(t.extra AS json)",
+        "submitter_type": "t.submitter_type",
+        "regulation_check_id": "t.regulation_check_id",
+    },
+)
+
+REGULATION_COMPUTATION_COPY = AnonTableCopy(
+    entity_type="regulation_computation",
+    table="regulation_computation",
+    anon_table="anon_regulation_computation",
+    where=BATCH_USERS,
+    references={"user_id": "user"},
+    columns={
+        "creation_time": truncate_to_month("t.creation_time"),
+        "day": "t.day",
+        "submitter_type": "t.submitter_type",
+    },
+)
+
+
+class SetBasedAnonymizationExecutor(DataFinder):
+    """
+    Standalone data anonymization moving missions and their dependencies by
+    batches.
+
+    Each batch of missions is mapped and copied to the anonymized tables with
+    a few INSERT ... SELECT statements, then deleted if not in dry run, and
+    committed on its own. Missions already marked as deletion targets in the
+    IdMapping table belong to a committed batch : they are skipped, so that
+    an interrupted run can be resumed as long as the mappings are kept.
+
+    The other entities are anonymized in one transaction, as with DataFinder.
+    """
+
+    def __init__(
+        self, db_session, dry_run=True, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        super().__init__(db_session, dry_run=dry_run)
+        self.batch_size = batch_size
+        self.commit_batches = False
+
+    def anonymize_standalone_data(
+        self, cutoff_date: datetime, test_mode: bool = False
+    ):
+        if test_mode:
+            raise ValueError(
+                "Set-based anonymization commits each batch "
+                "and can not run in test mode"
+            )
+
+        (
+            _,
+            _,
+            company_mission_ids,
+        ) = self.find_inactive_companies_and_dependencies(cutoff_date)
+        mission_ids = set(company_mission_ids).union(
+            self.find_missions_before_cutoff(cutoff_date)
+        )
+        self.run_committed_batches(
+            self.anonymize_mission_and_dependencies, mission_ids
+        )
+
+        super().anonymize_standalone_data(cutoff_date)
+
+    def delete_anonymized_data(
+        self, cutoff_date: datetime, test_mode: bool = False
+    ):
+        if test_mode:
+            raise ValueError(
+                "Set-based anonymization commits each batch "
+                "and can not run in test mode"
+            )
+
+        self.run_committed_batches(
+            self.delete_mission_and_dependencies,
+            IdMappingService.get_deletion_target_ids("mission"),
+        )
+
+        super().delete_anonymized_data(cutoff_date)
+
+    def run_committed_batches(self, method, ids: Set[int]) -> None:
+        self.commit_batches = True
+        try:
+            method(ids)
+        finally:
+            self.commit_batches = False
+
+    def split_in_batches(self, ids: Set[int]) -> List[List[int]]:
+        ids = sorted(ids)
+        return [
+            ids[start : start + self.batch_size]
+            for start in range(0, len(ids), self.batch_size)
+        ]
+
+    def end_batch(self, index: int, count: int, description: str) -> None:
+        if self.commit_batches:
+            self.db.commit()
+        logger.info(f"Batch {index}/{count}: {description}")
+
+    def copy_to_anonymized_table(
+        self, copy: AnonTableCopy, params: Dict
+    ) -> int:
+        """
+        Map the rows selected by the copy and their references, then copy them.
+
+        Returns:
+            int: Number of rows inserted in the anonymized table
+        """
+        IdMappingService.map_selected_ids(
+            copy.entity_type, copy.select_ids("id"), params
+        )
+        for column, entity_type in copy.references.items():
+            IdMappingService.map_selected_ids(
+                entity_type, copy.select_ids(column), params
+            )
+        return self.db.execute(text(copy.insert_select()), params).rowcount
+
+    def find_missions_to_move(self, mission_ids: Set[int]) -> Set[int]:
+        result = self.db.execute(
+            text(
+                """
+                SELECT batch.mission_id
+                FROM unnest(CAST(:mission_ids AS integer[]))
+                AS batch (mission_id)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM temp_id_mapping m
+                    WHERE m.entity_type = 'mission'
+                    AND m.original_id = batch.mission_id
+                    AND m.deletion_target
+                )
+                """
+            ),
+            {"mission_ids": list(mission_ids)},
+        )
+        return {row[0] for row in result}
+
+    def find_existing_missions(self, mission_ids: Set[int]) -> Set[int]:
+        result = self.db.execute(
+            text(
+                "SELECT id FROM mission "
+                "WHERE id = ANY(CAST(:mission_ids AS integer[]))"
+            ),
+            {"mission_ids": list(mission_ids)},
+        )
+        return {row[0] for row in result}
+
+    def anonymize_mission_and_dependencies(self, mission_ids: Set[int]):
+        if not mission_ids:
+            return
+
+        batches = self.split_in_batches(
+            self.find_missions_to_move(mission_ids)
+        )
+        for index, batch in enumerate(batches, start=1):
+            params = {"mission_ids": batch}
+            IdMappingService.mark_ids_for_deletion("mission", batch)
+            for copy in MISSION_TREE_COPIES:
+                count = self.copy_to_anonymized_table(copy, params)
+                self.log_anonymization(
+                    count, copy.entity_type.replace("_", " ")
+                )
+
+            if not self.dry_run:
+                super().delete_mission_and_dependencies(batch)
+
+            self.end_batch(index, len(batches), f"moved {len(batch)} missions")
+
+    def delete_mission_and_dependencies(self, mission_ids: Set[int]):
+        if not mission_ids or self.dry_run:
+            return
+
+        batches = self.split_in_batches(
+            self.find_existing_missions(mission_ids)
+        )
+        for index, batch in enumerate(batches, start=1):
+            super().delete_mission_and_dependencies(batch)
+            self.end_batch(
+                index, len(batches), f"deleted {len(batch)} missions"
+            )
+
+    def delete_activities(self, mission_ids: Set[int]) -> None:
+        if not mission_ids:
+            return
+
+        activity_ids = self.db.query(Activity.id).filter(
+            Activity.mission_id.in_(mission_ids)
+        )
+        self.delete_activity_versions(activity_ids)
+
+        deleted = Activity.query.filter(
+            Activity.mission_id.in_(mission_ids)
+        ).delete(synchronize_session=False)
+        self.log_deletion(deleted, "activity")
+
+    def anonymize_regulatory_alerts(self, user_ids: Set[int]) -> None:
+        if not user_ids:
+            return
+
+        count = self.copy_to_anonymized_table(
+            REGULATORY_ALERT_COPY, {"user_ids": list(user_ids)}
+        )
+        self.log_anonymization(count, "regulatory alert")
+
+    def anonymize_regulation_computations(self, user_ids: Set[int]) -> None:
+        if not user_ids:
+            return
+
+        count = self.copy_to_anonymized_table(
+            REGULATION_COMPUTATION_COPY, {"user_ids": list(user_ids)}
+        )
+        self.log_anonymization(count, "regulation computation")
@@ -1,5 +1,11 @@
 from datetime import date, timedelta
-from app.helpers.celery import async_export_excel, DEFAULT_FILE_NAME
+from app.helpers.celery import (
+    async_export_excel,
+    async_export_raw_data,
+    async_export_tachograph_files,
+    async_export_work_days_pdf,
+    DEFAULT_FILE_NAME,
+)
 from app.helpers.export_chunking import get_export_chunks
 
 
@@ -54,3 +60,43 @@ def export_activity_report(
         file_name=file_name if file_name is not None else DEFAULT_FILE_NAME,
         export_type=export_type,
     )
+
+
+def export_tachograph_files(
+    exporter,
+    company_ids,
+    users,
+    min_date,
+    max_date,
+    with_signatures=False,
+    employee_version=False,
+):
+    async_export_tachograph_files.delay(
+        exporter_id=exporter.id,
+        company_ids=company_ids,
+        user_ids=sorted(user.id for user in users),
+        min_date=min_date.isoformat(),
+        max_date=max_date.isoformat(),
+        with_signatures=with_signatures,
+        employee_version=employee_version,
+    )
+
+
+def export_work_days_pdf(exporter, company_ids, users, min_date, max_date):
+    async_export_work_days_pdf.delay(
+        exporter_id=exporter.id,
+        company_ids=company_ids,
+        user_ids=sorted(user.id for user in users),
+        min_date=min_date.isoformat(),
+        max_date=max_date.isoformat(),
+    )
+
+
+def export_raw_data(exporter, company_ids, users, min_date, max_date):
+    async_export_raw_data.delay(
+        exporter_id=exporter.id,
+        company_ids=company_ids,
+        user_ids=sorted(user.id for user in users),
+        min_date=min_date.isoformat(),
+        max_date=max_date.isoformat(),
+    )
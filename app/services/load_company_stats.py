@@ -1,4 +1,9 @@
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+
 from app import db
+from app.helpers.db import DateTimeStoredAsUTC
 from app.models.company import Company
 from app.models.company_certification import CompanyCertification
 from app.models.company_stats import CompanyStats
@@ -8,6 +13,149 @@ from app.models.mission import Mission
 
 
 def load_company_stats():
+    """
+    Same result as load_company_stats_per_company, for all the companies at once:
+    the milestone dates are computed with one grouped query each, and the stats are upserted in a single statement.
+    """
+    existing_stats = db.aliased(CompanyStats)
+    # Steps already filled are not computed again
+    filled_stats = db.aliased(CompanyStats)
+    companies_with_stats = db.session.query(filled_stats.company_id)
+
+    first_employee_invitations = (
+        db.session.query(
+            Employment.company_id.label("company_id"),
+            db.cast(db.func.min(Employment.creation_time), db.Date).label(
+                "date"
+            ),
+        )
+        .filter(~Employment.has_admin_rights)
+        .filter(
+            Employment.company_id.notin_(
+                companies_with_stats.filter(
+                    filled_stats.first_employee_invitation_date.isnot(None)
+                )
+            )
+        )
+        .group_by(Employment.company_id)
+        .subquery()
+    )
+    first_mission_validations_by_admin = (
+        db.session.query(
+            Mission.company_id.label("company_id"),
+            db.cast(
+                db.func.min(MissionValidation.creation_time), db.Date
+            ).label("date"),
+        )
+        .join(MissionValidation.mission)
+        .filter(
+            MissionValidation.is_admin,
+            MissionValidation.user_id != MissionValidation.submitter_id,
+        )
+        .filter(
+            Mission.company_id.notin_(
+                companies_with_stats.filter(
+                    filled_stats.first_mission_validation_by_admin_date.isnot(
+                        None
+                    )
+                )
+            )
+        )
+        .group_by(Mission.company_id)
+        .subquery()
+    )
+    first_certifications = (
+        db.session.query(
+            CompanyCertification.company_id.label("company_id"),
+            db.func.min(CompanyCertification.attribution_date).label("date"),
+        )
+        .filter(CompanyCertification.certification_level_int > 0)
+        .filter(
+            CompanyCertification.company_id.notin_(
+                companies_with_stats.filter(
+                    filled_stats.first_certification_date.isnot(None)
+                )
+            )
+        )
+        .group_by(CompanyCertification.company_id)
+        .subquery()
+    )
+
+    # A step is only filled once the previous ones are, as in STEPS
+    employee_invitation_date = db.func.coalesce(
+        existing_stats.first_employee_invitation_date,
+        first_employee_invitations.c.date,
+    )
+    mission_validation_by_admin_date = db.func.coalesce(
+        existing_stats.first_mission_validation_by_admin_date,
+        db.case(
+            [
+                (
+                    employee_invitation_date.isnot(None),
+                    first_mission_validations_by_admin.c.date,
+                )
+            ]
+        ),
+    )
+    certification_date = db.func.coalesce(
+        existing_stats.first_certification_date,
+        db.case(
+            [
+                (
+                    db.and_(
+                        employee_invitation_date.isnot(None),
+                        mission_validation_by_admin_date.isnot(None),
+                    ),
+                    first_certifications.c.date,
+                )
+            ]
+        ),
+    )
+
+    companies_stats = (
+        db.session.query(
+            db.literal(datetime.now(), DateTimeStoredAsUTC),
+            Company.id,
+            db.cast(Company.creation_time, db.Date),
+            employee_invitation_date,
+            mission_validation_by_admin_date,
+            certification_date,
+        )
+        .outerjoin(existing_stats, existing_stats.company_id == Company.id)
+        .outerjoin(
+            first_employee_invitations,
+            first_employee_invitations.c.company_id == Company.id,
+        )
+        .outerjoin(
+            first_mission_validations_by_admin,
+            first_mission_validations_by_admin.c.company_id == Company.id,
+        )
+        .outerjoin(
+            first_certifications,
+            first_certifications.c.company_id == Company.id,
+        )
+    )
+
+    fields = list(STEPS.keys())
+    stmt = insert(CompanyStats).from_select(
+        ["creation_time", "company_id", "company_creation_date", *fields],
+        companies_stats,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["company_id"],
+        set_={field: getattr(stmt.excluded, field) for field in fields},
+        # Rows whose steps did not change are left untouched
+        where=db.tuple_(
+            *[getattr(CompanyStats, field) for field in fields]
+        ).is_distinct_from(
+            db.tuple_(*[getattr(stmt.excluded, field) for field in fields])
+        ),
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+
+
+def load_company_stats_per_company():
     companies = Company.query.all()
     for company in companies:
         company_stats = get_or_init_company_stats(company)
@@ -0,0 +1,179 @@
+from datetime import date, datetime
+from unittest.mock import patch
+
+from flask.ctx import AppContext
+from freezegun import freeze_time
+
+from app import app, db
+from app.domain import validation
+from app.helpers.submitter_type import SubmitterType
+from app.jobs.auto_validations import job_process_auto_validations
+from app.models import (
+    MissionAutoValidation,
+    MissionValidation,
+)
+from app.models.regulation_computation import RegulationComputation
+from app.seed import CompanyFactory, UserFactory
+from app.seed.helpers import get_time
+from app.tests import BaseTest
+from app.tests.helpers import (
+    _log_activities_in_mission,
+    WorkPeriod,
+    init_regulation_checks_data,
+    init_businesses_data,
+)
+
+# Logged on a wednesday, auto-validated on the friday
+LOG_TIME = datetime(2025, 5, 7, 18, 0)
+JOB_TIME = datetime(2025, 5, 9, 19, 0)
+
+
+class TestBatchedAutoValidation(BaseTest):
+    def setUp(self):
+        super().setUp()
+
+        init_regulation_checks_data()
+        init_businesses_data()
+
+        self.company = CompanyFactory.create()
+        self.employees = [
+            UserFactory.create(post__company=self.company) for _ in range(3)
+        ]
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _log_missions(self, employee, days_ago=(2, 1, 0)):
+        with freeze_time(LOG_TIME):
+            return [
+                _log_activities_in_mission(
+                    submitter=employee,
+                    company=self.company,
+                    user=employee,
+                    work_periods=[
+                        WorkPeriod(
+                            start_time=get_time(day, 5),
+                            end_time=get_time(day, 17),
+                        ),
+                    ],
+                )
+                for day in days_ago
+            ]
+
+    def test_missions_of_a_week_are_computed_once(self):
+        employee = self.employees[0]
+        mission_ids = self._log_missions(employee)
+
+        with freeze_time(JOB_TIME), patch(
+            "app.domain.validation.compute_regulations_incrementally",
+            wraps=validation.compute_regulations_incrementally,
+        ) as mock_compute:
+            stats = job_process_auto_validations()
+
+        mock_compute.assert_called_once()
+        self.assertEqual(stats["employee"]["validated"], 3)
+        self.assertEqual(stats["employee"]["regulation_computations"], 1)
+        self.assertEqual(
+            sorted(v.mission_id for v in MissionValidation.query.all()),
+            sorted(mission_ids),
+        )
+        self.assertTrue(
+            all(av.is_admin for av in MissionAutoValidation.query.all())
+        )
+
+        # The regulations were computed over the days of the three missions
+        computed_days = {
+            c.day
+            for c in RegulationComputation.query.filter(
+                RegulationComputation.user_id == employee.id,
+                RegulationComputation.submitter_type == SubmitterType.EMPLOYEE,
+            ).all()
+        }
+        self.assertTrue(
+            {date(2025, 5, 5), date(2025, 5, 6), date(2025, 5, 7)}
+            <= computed_days
+        )
+
+    def test_invalid_auto_validation_does_not_block_the_others(self):
+        employee = self.employees[0]
+        mission_ids = self._log_missions(employee, days_ago=(1, 0))
+        other_mission_id = self._log_missions(
+            self.employees[1], days_ago=(0,)
+        )[0]
+        db.session.add(
+            MissionAutoValidation(
+                mission_id=other_mission_id,
+                user_id=employee.id,
+                is_admin=False,
+                reception_time=LOG_TIME,
+            )
+        )
+        db.session.commit()
+
+        with freeze_time(JOB_TIME):
+            stats = job_process_auto_validations(batch_size=2)
+
+        self.assertEqual(stats["employee"]["validated"], 3)
+        self.assertEqual(stats["employee"]["removed"], 1)
+        self.assertEqual(
+            sorted(
+                v.mission_id
+                for v in MissionValidation.query.filter(
+                    MissionValidation.user_id == employee.id
+                ).all()
+            ),
+            sorted(mission_ids),
+        )
+        self.assertEqual(
+            MissionAutoValidation.query.filter(
+                MissionAutoValidation.is_admin == False
+            ).count(),
+            0,
+        )
+
+    def test_interrupted_run_is_resumed(self):
+        for employee in self.employees:
+            self._log_missions(employee, days_ago=(0,))
+
+        with freeze_time(JOB_TIME):
+            stats = job_process_auto_validations(batch_size=1, max_batches=2)
+        self.assertEqual(stats["employee"]["validated"], 2)
+        self.assertEqual(
+            MissionAutoValidation.query.filter(
+                MissionAutoValidation.is_admin == False
+            ).count(),
+            1,
+        )
+
+        with freeze_time(JOB_TIME):
+            stats = job_process_auto_validations(batch_size=1, max_batches=2)
+        self.assertEqual(stats["employee"]["validated"], 1)
+        self.assertEqual(MissionValidation.query.count(), 3)
+
+    def test_failed_user_is_kept_in_queue(self):
+        for employee in self.employees[:2]:
+            self._log_missions(employee, days_ago=(0,))
+        failing_user_id = self.employees[0].id
+        validate_mission = validation.validate_mission
+
+        def failing_validate_mission(for_user, **kwargs):
+            if for_user.id == failing_user_id:
+                raise ValueError("boom")
+            return validate_mission(for_user=for_user, **kwargs)
+
+        with freeze_time(JOB_TIME), patch(
+            "app.jobs.auto_validations.validate_mission",
+            side_effect=failing_validate_mission,
+        ):
+            stats = job_process_auto_validations()
+
+        self.assertEqual(stats["employee"]["failed"], 1)
+        self.assertEqual(stats["employee"]["validated"], 1)
+        remaining = MissionAutoValidation.query.filter(
+            MissionAutoValidation.is_admin == False
+        ).all()
+        self.assertEqual([av.user_id for av in remaining], [failing_user_id])
@@ -4,13 +4,12 @@ from flask.ctx import AppContext
 
 from app import app, db
 from app.domain.certificate_criteria import (
-    compute_admin_changes,
+    compute_certification_criteria,
 )
 from app.domain.log_activities import log_activity
 from app.helpers.time import previous_month_period
 from app.models import Mission
-from app.models.activity import ActivityType, Activity
-from app.models.queries import query_activities
+from app.models.activity import ActivityType
 from app.seed import (
     CompanyFactory,
     UserFactory,
@@ -38,20 +37,9 @@ class TestCertificateAdminChanges(BaseTest):
         super().tearDown()
 
     def _compute_admin_changes(self):
-        query = (
-            query_activities(
-                include_dismissed_activities=False,
-                start_time=self.start,
-                end_time=self.end,
-                company_ids=[self.company.id],
-            )
-            .filter(Activity.type != ActivityType.OFF)
-            .with_entities(Activity.id)
-        )
-        activity_ids = [a[0] for a in query.all()]
-        return compute_admin_changes(
-            self.company, self.start, self.end, activity_ids
-        )
+        return compute_certification_criteria(
+            [self.company.id], self.start, self.end
+        )[self.company.id]["admin_changes"]
 
     def test_too_many_changes_ok_no_activities(self):
         self.assertEqual(self._compute_admin_changes(), 0.0)
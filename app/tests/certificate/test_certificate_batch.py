@@ -0,0 +1,201 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from flask.ctx import AppContext
+
+from app import app, db
+from app.domain import certificate_criteria
+from app.domain.certificate_criteria import (
+    MIN_NB_MISSIONS_IN_MONTH,
+    compute_certification_criteria,
+    compute_company_certifications,
+    get_eligible_company_ids,
+)
+from app.domain.log_activities import log_activity
+from app.helpers.time import previous_month_period
+from app.models import Mission
+from app.models.activity import ActivityType
+from app.models.company_certification import CompanyCertification
+from app.seed import (
+    AuthenticatedUserContext,
+    CompanyFactory,
+    UserFactory,
+)
+from app.tests import BaseTest
+
+TODAY = date(2023, 3, 28)
+
+
+class TestCertificateBatch(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.companies = [CompanyFactory.create() for _ in range(3)]
+        self.admins = [
+            UserFactory.create(post__company=c, post__has_admin_rights=True)
+            for c in self.companies
+        ]
+        self.workers = [
+            UserFactory.create(post__company=c) for c in self.companies
+        ]
+        self.start, self.end = previous_month_period(TODAY)
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _log_missions(self, index, nb_missions, reception_delay_minutes=35):
+        company, worker = self.companies[index], self.workers[index]
+        activities = []
+        with AuthenticatedUserContext(user=worker):
+            for day in range(1, nb_missions + 1):
+                mission = Mission.create(
+                    submitter=worker,
+                    company=company,
+                    reception_time=datetime(2023, 2, day),
+                    creation_time=datetime(2023, 2, day),
+                )
+                activities.append(
+                    log_activity(
+                        submitter=worker,
+                        user=worker,
+                        mission=mission,
+                        type=ActivityType.WORK,
+                        switch_mode=True,
+                        reception_time=datetime(2023, 2, day, 10)
+                        + timedelta(minutes=reception_delay_minutes),
+                        start_time=datetime(2023, 2, day, 10),
+                        end_time=datetime(2023, 2, day, 10, 30),
+                    )
+                )
+            db.session.commit()
+        return activities
+
+    def test_only_companies_with_enough_missions_are_eligible(self):
+        self._log_missions(0, MIN_NB_MISSIONS_IN_MONTH)
+        self._log_missions(1, MIN_NB_MISSIONS_IN_MONTH - 1)
+
+        self.assertEqual(
+            get_eligible_company_ids(self.start, self.end),
+            [self.companies[0].id],
+        )
+
+    def test_grouped_criteria_match_single_company_criteria(self):
+        activities = self._log_missions(0, MIN_NB_MISSIONS_IN_MONTH)
+        self._log_missions(1, MIN_NB_MISSIONS_IN_MONTH, 90)
+        with AuthenticatedUserContext(user=self.admins[0]):
+            activities[0].revise(
+                revision_time=datetime(2023, 2, 15, 18),
+                start_time=datetime(2023, 2, 1, 11),
+                end_time=datetime(2023, 2, 1, 11, 30),
+            )
+
+        company_ids = [c.id for c in self.companies]
+        criteria = compute_certification_criteria(
+            company_ids, self.start, self.end
+        )
+        for company_id in company_ids:
+            self.assertEqual(
+                criteria[company_id],
+                compute_certification_criteria(
+                    [company_id], self.start, self.end
+                )[company_id],
+            )
+
+        self.assertAlmostEqual(
+            criteria[self.companies[0].id]["admin_changes"],
+            1 / MIN_NB_MISSIONS_IN_MONTH,
+        )
+        self.assertEqual(
+            criteria[self.companies[0].id]["log_in_real_time"], 1.0
+        )
+        self.assertEqual(
+            criteria[self.companies[1].id]["log_in_real_time"], 0.0
+        )
+        self.assertEqual(criteria[self.companies[0].id]["compliancy"], 6)
+
+    def test_certifications_are_inserted_for_eligible_companies(self):
+        self._log_missions(0, MIN_NB_MISSIONS_IN_MONTH)
+        self._log_missions(1, MIN_NB_MISSIONS_IN_MONTH)
+
+        compute_company_certifications(TODAY)
+        # Computing again replaces the certifications of the day
+        compute_company_certifications(TODAY)
+
+        certifications = CompanyCertification.query.filter(
+            CompanyCertification.attribution_date == TODAY
+        ).all()
+        self.assertEqual(
+            sorted(c.company_id for c in certifications),
+            sorted(c.id for c in self.companies[:2]),
+        )
+        for certification in certifications:
+            self.assertEqual(
+                certification.certification_level,
+                certification.get_certification_level(),
+            )
+
+    def _certified_company_ids(self):
+        return sorted(
+            c.company_id
+            for c in CompanyCertification.query.filter(
+                CompanyCertification.attribution_date == TODAY
+            ).all()
+        )
+
+    def test_company_failing_to_build_does_not_block_the_batch(self):
+        for index in range(3):
+            self._log_missions(index, MIN_NB_MISSIONS_IN_MONTH)
+        failing_company_id = self.companies[1].id
+        build_company_certification = (
+            certificate_criteria._build_company_certification
+        )
+
+        def build_or_fail(company_id, today, company_criteria):
+            if company_id == failing_company_id:
+                raise ValueError("boom")
+            return build_company_certification(
+                company_id, today, company_criteria
+            )
+
+        with patch.object(
+            certificate_criteria,
+            "_build_company_certification",
+            side_effect=build_or_fail,
+        ):
+            compute_company_certifications(TODAY)
+
+        self.assertEqual(
+            self._certified_company_ids(),
+            sorted([self.companies[0].id, self.companies[2].id]),
+        )
+
+    def test_company_failing_to_save_does_not_block_the_batch(self):
+        for index in range(3):
+            self._log_missions(index, MIN_NB_MISSIONS_IN_MONTH)
+        failing_company_id = self.companies[1].id
+        build_company_certification = (
+            certificate_criteria._build_company_certification
+        )
+
+        def build_invalid(company_id, today, company_criteria):
+            certification = build_company_certification(
+                company_id, today, company_criteria
+            )
+            if company_id == failing_company_id:
+                certification.expiration_date = None
+            return certification
+
+        with patch.object(
+            certificate_criteria,
+            "_build_company_certification",
+            side_effect=build_invalid,
+        ):
+            compute_company_certifications(TODAY)
+
+        self.assertEqual(
+            self._certified_company_ids(),
+            sorted([self.companies[0].id, self.companies[2].id]),
+        )
@@ -5,13 +5,12 @@ from flask.ctx import AppContext
 from app import app, db
 from app.controllers.activity import edit_activity
 from app.domain.certificate_criteria import (
-    compute_log_in_real_time,
+    compute_certification_criteria,
 )
 from app.domain.log_activities import log_activity
 from app.helpers.time import previous_month_period
 from app.models import Mission
-from app.models.activity import ActivityType, Activity
-from app.models.queries import query_activities
+from app.models.activity import ActivityType
 from app.seed import (
     CompanyFactory,
     UserFactory,
@@ -39,18 +38,9 @@ class TestCertificateRealTime(BaseTest):
         super().tearDown()
 
     def _compute_log_in_real_time(self):
-        query = (
-            query_activities(
-                include_dismissed_activities=False,
-                start_time=self.start,
-                end_time=self.end,
-                company_ids=[self.company.id],
-            )
-            .filter(Activity.type != ActivityType.OFF)
-            .with_entities(Activity.id)
-        )
-        activity_ids = [a[0] for a in query.all()]
-        return compute_log_in_real_time(activity_ids)
+        return compute_certification_criteria(
+            [self.company.id], self.start, self.end
+        )[self.company.id]["log_in_real_time"]
 
     def test_company_real_time_ok_no_activities(self):
         self.assertEqual(self._compute_log_in_real_time(), 1.0)
@@ -0,0 +1,171 @@
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.domain.regulations import (
+    compute_regulation_for_user,
+    compute_regulations_incrementally,
+)
+from app.helpers.submitter_type import SubmitterType
+from app.models import (
+    RegulationCheck,
+    RegulationWorkDaySummary,
+    RegulatoryAlert,
+)
+from app.models.regulation_check import RegulationCheckType
+from app.seed import AuthenticatedUserContext
+from app.seed.helpers import get_datetime_tz
+from app.tests.regulations import RegulationsTest
+
+MONDAY = date(2024, 8, 5)
+
+
+def _summary_days_of(user, **filters):
+    return sorted(
+        summary.day
+        for summary in RegulationWorkDaySummary.query.filter_by(
+            user_id=user.id, **filters
+        ).all()
+    )
+
+
+def _alerts_of(user):
+    return sorted(
+        [
+            (alert.day, alert.regulation_check.type, alert.submitter_type)
+            for alert in RegulatoryAlert.query.filter(
+                RegulatoryAlert.user_id == user.id
+            ).all()
+        ]
+    )
+
+
+class TestIncrementalComputation(RegulationsTest):
+    def _log_and_validate_day(self, day, start_hour, end_hour):
+        return self._log_and_validate_mission(
+            mission_name=f"mission {day.isoformat()}",
+            submitter=self.employee,
+            work_periods=[
+                [
+                    get_datetime_tz(day.year, day.month, day.day, start_hour),
+                    get_datetime_tz(day.year, day.month, day.day, end_hour),
+                ]
+            ],
+        )
+
+    def test_work_day_summaries_are_stored_for_computed_weeks(self):
+        self._log_and_validate_day(MONDAY + timedelta(days=2), 8, 18)
+
+        summaries = RegulationWorkDaySummary.query.filter(
+            RegulationWorkDaySummary.user_id == self.employee.id,
+            RegulationWorkDaySummary.submitter_type == SubmitterType.EMPLOYEE,
+        ).all()
+        summaries_by_day = {s.day: s.summary for s in summaries}
+
+        for i in range(7):
+            self.assertIn(MONDAY + timedelta(days=i), summaries_by_day)
+        self.assertIsNone(summaries_by_day[MONDAY])
+        self.assertEqual(
+            summaries_by_day[MONDAY + timedelta(days=2)]["work_duration_s"],
+            10 * 3600,
+        )
+
+    def test_weekly_rules_use_cached_summaries(self):
+        # 5 x 10h = 50h, over the 48h weekly limit
+        for i in range(5):
+            self._log_and_validate_day(MONDAY + timedelta(days=i), 7, 17)
+
+        weekly_alert = RegulatoryAlert.query.filter(
+            RegulatoryAlert.user_id == self.employee.id,
+            RegulatoryAlert.regulation_check.has(
+                RegulationCheck.type
+                == RegulationCheckType.MAXIMUM_WORK_IN_CALENDAR_WEEK
+            ),
+        ).one_or_none()
+        self.assertIsNotNone(weekly_alert)
+        self.assertEqual(weekly_alert.day, MONDAY)
+        self.assertEqual(
+            weekly_alert.extra["work_duration_in_seconds"], 50 * 3600
+        )
+
+    def test_same_alerts_as_full_computation(self):
+        self._log_and_validate_day(MONDAY, 5, 19)
+        self._log_and_validate_day(MONDAY + timedelta(days=1), 4, 16)
+        self._log_and_validate_day(MONDAY + timedelta(days=3), 6, 20)
+        self._log_and_validate_day(MONDAY + timedelta(days=8), 8, 12)
+        incremental_alerts = _alerts_of(self.employee)
+        self.assertGreater(len(incremental_alerts), 0)
+
+        compute_regulation_for_user(self.employee)
+        db.session.commit()
+
+        self.assertEqual(incremental_alerts, _alerts_of(self.employee))
+
+    def test_unchanged_alerts_are_kept(self):
+        # 14h of work on monday
+        self._log_and_validate_day(MONDAY, 5, 19)
+        alert = RegulatoryAlert.query.filter(
+            RegulatoryAlert.user_id == self.employee.id,
+            RegulatoryAlert.day == MONDAY,
+            RegulatoryAlert.regulation_check.has(
+                RegulationCheck.type
+                == RegulationCheckType.MAXIMUM_WORK_DAY_TIME
+            ),
+        ).one()
+
+        # Monday is recomputed as the day before this mission
+        self._log_and_validate_day(MONDAY + timedelta(days=1), 9, 12)
+
+        alert_after = RegulatoryAlert.query.filter(
+            RegulatoryAlert.user_id == self.employee.id,
+            RegulatoryAlert.day == MONDAY,
+            RegulatoryAlert.regulation_check.has(
+                RegulationCheck.type
+                == RegulationCheckType.MAXIMUM_WORK_DAY_TIME
+            ),
+        ).one()
+        self.assertEqual(alert.id, alert_after.id)
+
+    def test_summaries_are_invalidated_by_activity_changes(self):
+        mission = self._log_and_validate_day(MONDAY + timedelta(days=2), 8, 18)
+        week_days = [MONDAY + timedelta(days=i) for i in range(7)]
+        self.assertEqual(_summary_days_of(self.employee), week_days)
+
+        # A change which does not compute the regulations again
+        with AuthenticatedUserContext(user=self.employee):
+            mission.activities[0].revise(
+                revision_time=datetime.now(),
+                bypass_auth_check=True,
+                start_time=get_datetime_tz(2024, 8, 8, 8),
+                end_time=get_datetime_tz(2024, 8, 8, 12),
+            )
+            db.session.commit()
+
+        # The days of the activity, before and after the change, and around
+        self.assertEqual(
+            _summary_days_of(self.employee),
+            [MONDAY, MONDAY + timedelta(days=5), MONDAY + timedelta(days=6)],
+        )
+
+    def test_summaries_are_stored_per_employee_version(self):
+        wednesday = MONDAY + timedelta(days=2)
+        # Validations compute the regulations without the employee versions
+        self._log_and_validate_day(wednesday, 8, 18)
+        compute_regulations_incrementally(
+            self.employee,
+            wednesday,
+            wednesday,
+            SubmitterType.EMPLOYEE,
+            employee_version=True,
+        )
+        db.session.commit()
+
+        week_days = [MONDAY + timedelta(days=i) for i in range(7)]
+        for employee_version in [True, False]:
+            self.assertEqual(
+                _summary_days_of(
+                    self.employee,
+                    submitter_type=SubmitterType.EMPLOYEE,
+                    employee_version=employee_version,
+                ),
+                week_days,
+            )
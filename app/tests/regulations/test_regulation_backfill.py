@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app import db
+from app.domain.regulation_backfill import (
+    claim_regulation_backfill_tasks,
+    enqueue_regulation_backfill,
+    get_regulation_backfill_progress,
+    run_regulation_backfill_worker,
+)
+from app.models import RegulationBackfillTask, RegulatoryAlert
+from app.models.regulation_backfill_task import RegulationBackfillTaskStatus
+from app.models.user import User
+from app.seed.helpers import get_date, get_time
+from app.services.anonymization.standalone.anonymization_executor import (
+    AnonymizationExecutor,
+)
+from app.tests.regulations import RegulationsTest
+
+
+def _alerts_of(user):
+    return sorted(
+        [
+            (alert.day, alert.regulation_check_id, alert.submitter_type)
+            for alert in RegulatoryAlert.query.filter(
+                RegulatoryAlert.user_id == user.id
+            ).all()
+        ]
+    )
+
+
+class TestRegulationBackfill(RegulationsTest):
+    def setUp(self):
+        super().setUp()
+        for days_ago in [40, 3]:
+            self._log_and_validate_mission(
+                mission_name=f"long day {days_ago} days ago",
+                submitter=self.employee,
+                work_periods=[
+                    [
+                        get_time(how_many_days_ago=days_ago, hour=4),
+                        get_time(how_many_days_ago=days_ago, hour=20),
+                    ],
+                ],
+            )
+        self.alerts = _alerts_of(self.employee)
+
+    def _tasks(self):
+        return RegulationBackfillTask.query.order_by(
+            RegulationBackfillTask.id
+        ).all()
+
+    def test_backfill_recomputes_alerts_of_all_users(self):
+        RegulatoryAlert.query.delete()
+        db.session.commit()
+
+        self.assertEqual(enqueue_regulation_backfill(), 2)
+        stats = run_regulation_backfill_worker(worker="test", batch_size=1)
+
+        self.assertEqual(stats["done"], 2)
+        self.assertEqual(stats["failed"], 0)
+        self.assertTrue(self.alerts)
+        self.assertEqual(_alerts_of(self.employee), self.alerts)
+        for task in self._tasks():
+            self.assertEqual(task.status, RegulationBackfillTaskStatus.DONE)
+            self.assertEqual(task.attempts, 1)
+            self.assertEqual(task.worker, "test")
+            self.assertIsNotNone(task.duration)
+        progress = get_regulation_backfill_progress()
+        self.assertEqual(progress["done"], 2)
+        self.assertEqual(progress["pending"], 0)
+
+    def test_date_window_only_recomputes_recent_alerts(self):
+        RegulatoryAlert.query.delete()
+        db.session.commit()
+
+        enqueue_regulation_backfill(from_date=get_date(10))
+        run_regulation_backfill_worker(worker="test")
+
+        recent_alerts = [a for a in self.alerts if a[0] >= get_date(10)]
+        self.assertTrue(recent_alerts)
+        self.assertNotEqual(recent_alerts, self.alerts)
+        self.assertEqual(_alerts_of(self.employee), recent_alerts)
+
+    def test_locked_tasks_are_skipped(self):
+        enqueue_regulation_backfill()
+        first_task_id = self._tasks()[0].id
+        db.session.commit()
+
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        try:
+            connection.execute(
+                "SELECT id FROM regulation_backfill_task WHERE id = %s FOR UPDATE",
+                first_task_id,
+            )
+            tasks = claim_regulation_backfill_tasks("test", batch_size=10)
+        finally:
+            transaction.rollback()
+            connection.close()
+
+        self.assertEqual(len(tasks), 1)
+        self.assertNotEqual(tasks[0].id, first_task_id)
+
+    def test_tasks_of_a_crashed_worker_are_resumed(self):
+        enqueue_regulation_backfill()
+        claim_regulation_backfill_tasks("crashed", batch_size=10)
+        self.assertEqual(
+            claim_regulation_backfill_tasks("test", batch_size=10), []
+        )
+
+        stale_task, running_task = self._tasks()
+        stale_task.start_time = datetime.now() - timedelta(hours=2)
+        db.session.commit()
+
+        tasks = claim_regulation_backfill_tasks("test", batch_size=10)
+        self.assertEqual([t.id for t in tasks], [stale_task.id])
+        self.assertEqual(tasks[0].attempts, 2)
+        self.assertEqual(tasks[0].worker, "test")
+
+    def test_stale_tasks_without_attempts_left_are_failed(self):
+        enqueue_regulation_backfill()
+        claim_regulation_backfill_tasks("crashed", batch_size=10)
+        for task in self._tasks():
+            task.start_time = datetime.now() - timedelta(hours=2)
+        self._tasks()[0].attempts = 3
+        db.session.commit()
+
+        tasks = claim_regulation_backfill_tasks("test", batch_size=10)
+
+        db.session.expire_all()
+        stale_task, resumed_task = self._tasks()
+        self.assertEqual([t.id for t in tasks], [resumed_task.id])
+        self.assertEqual(
+            stale_task.status, RegulationBackfillTaskStatus.FAILED
+        )
+        self.assertIsNotNone(stale_task.error)
+        progress = get_regulation_backfill_progress()
+        self.assertEqual(progress["failed"], 1)
+        self.assertEqual(progress["running"], 1)
+
+    def test_tasks_are_deleted_with_anonymized_user_dependencies(self):
+        enqueue_regulation_backfill()
+        run_regulation_backfill_worker(worker="test")
+        user_id = self.admin.id
+
+        AnonymizationExecutor(
+            db.session, dry_run=False
+        ).delete_user_dependencies({user_id})
+        db.session.commit()
+
+        self.assertEqual(User.query.filter(User.id == user_id).count(), 0)
+        self.assertEqual(
+            [task.user_id for task in self._tasks()], [self.employee.id]
+        )
+
+    def test_failed_tasks_are_retried_until_max_attempts(self):
+        enqueue_regulation_backfill()
+
+        with patch(
+            "app.domain.regulation_backfill.compute_regulation_for_user",
+            side_effect=ValueError("boom"),
+        ):
+            stats = run_regulation_backfill_worker(
+                worker="test", max_attempts=2
+            )
+
+        self.assertEqual(stats["done"], 0)
+        self.assertEqual(stats["failed"], 4)
+        for task in self._tasks():
+            self.assertEqual(task.status, RegulationBackfillTaskStatus.FAILED)
+            self.assertEqual(task.attempts, 2)
+            self.assertEqual(task.error, "ValueError: boom")
+        # Alerts were left untouched
+        self.assertEqual(_alerts_of(self.employee), self.alerts)
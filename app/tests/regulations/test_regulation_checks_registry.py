@@ -0,0 +1,75 @@
+from datetime import date
+
+from app import db
+from app.domain.regulation_checks_registry import (
+    get_regulation_checks_registry,
+)
+from app.helpers.regulations_utils import insert_regulation_check
+from app.models import Business, RegulationCheck
+from app.models.regulation_check import RegulationCheckType
+from app.services.get_regulation_checks import get_regulation_checks
+from app.tests.regulations import RegulationsTest
+
+
+def _get_check_data(type):
+    return next(rc for rc in get_regulation_checks() if rc.type == type)
+
+
+class TestRegulationChecksRegistry(RegulationsTest):
+    def test_registry_is_reused_until_checks_change(self):
+        registry = get_regulation_checks_registry()
+        self.assertIs(registry, get_regulation_checks_registry())
+
+        check = RegulationCheck.query.filter(
+            RegulationCheck.type == RegulationCheckType.MINIMUM_DAILY_REST
+        ).one()
+        check.variables = {
+            **check.variables,
+            "MINIMUM_DAILY_REST_IN_HOURS": 12,
+        }
+        db.session.commit()
+
+        new_registry = get_regulation_checks_registry()
+        self.assertIsNot(registry, new_registry)
+        self.assertEqual(
+            new_registry.get_latest(
+                RegulationCheckType.MINIMUM_DAILY_REST
+            ).variables["MINIMUM_DAILY_REST_IN_HOURS"],
+            12,
+        )
+
+    def test_check_valid_on_the_day_is_used(self):
+        check_data = _get_check_data(RegulationCheckType.MAXIMUM_WORK_DAY_TIME)
+        old_check = RegulationCheck.query.filter(
+            RegulationCheck.type == RegulationCheckType.MAXIMUM_WORK_DAY_TIME
+        ).one()
+        old_check.date_application_end = date(2024, 1, 1)
+        insert_regulation_check(
+            session=db.session,
+            regulation_check_data=check_data,
+            start_timestamp="2024-01-01",
+        )
+        db.session.commit()
+
+        registry = get_regulation_checks_registry()
+        type = RegulationCheckType.MAXIMUM_WORK_DAY_TIME
+        self.assertEqual(
+            registry.get(type, date(2023, 12, 31)).id, old_check.id
+        )
+        new_check = registry.get(type, date(2024, 1, 1))
+        self.assertNotEqual(new_check.id, old_check.id)
+        self.assertIs(registry.get_latest(type), new_check)
+        # Before any check was applicable, the latest one is used
+        self.assertIs(registry.get(type, date(2019, 1, 1)), new_check)
+
+    def test_resolved_variables_are_memoized(self):
+        registry = get_regulation_checks_registry()
+        check = registry.get_latest(RegulationCheckType.MAXIMUM_WORK_DAY_TIME)
+        business = Business.query.first()
+
+        resolved = check.resolve_variables(business)
+        self.assertIs(resolved, check.resolve_variables(business))
+        self.assertEqual(
+            dict(resolved),
+            RegulationCheck.query.get(check.id).resolve_variables(business),
+        )
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from argon2 import PasswordHasher
+
+from app import app, db
+from app.helpers.api_key_authentication import (
+    check_api_key,
+    clear_verified_api_keys,
+)
+from app.helpers.oauth.models import OAuth2Client, ThirdPartyApiKey
+from app.seed.factories import ThirdPartyApiKeyFactory
+from app.tests import BaseTest
+
+API_KEY = "012345678901234567890123456789012345678901234567890123456789"
+
+
+class TestApiKeyCache(BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_verified_api_keys()
+        oauth2_client = OAuth2Client.create_client(
+            name="test", redirect_uris="http://localhost:3000"
+        )
+        self.client_id = oauth2_client.get_client_id()
+        self.db_api_key = ThirdPartyApiKeyFactory.create(
+            client=oauth2_client, api_key=PasswordHasher().hash(API_KEY)
+        )
+
+    def _check_api_key(self, api_key=API_KEY):
+        with app.test_request_context(
+            headers={
+                "X-CLIENT-ID": str(self.client_id),
+                "X-API-KEY": app.config["API_KEY_PREFIX"] + api_key,
+            }
+        ):
+            return check_api_key()
+
+    def test_verification_is_done_once_per_key(self):
+        with patch.object(
+            PasswordHasher, "verify", wraps=PasswordHasher().verify
+        ) as verify:
+            self.assertTrue(self._check_api_key())
+            self.assertTrue(self._check_api_key())
+            self.assertTrue(self._check_api_key())
+            self.assertEqual(verify.call_count, 1)
+
+            self.assertFalse(self._check_api_key("wrong"))
+            self.assertFalse(self._check_api_key("wrong"))
+            self.assertEqual(verify.call_count, 3)
+
+    def test_revoked_key_is_rejected(self):
+        self.assertTrue(self._check_api_key())
+
+        ThirdPartyApiKey.query.filter(
+            ThirdPartyApiKey.id == self.db_api_key.id
+        ).delete()
+        db.session.commit()
+
+        self.assertFalse(self._check_api_key())
+
+    def test_cache_is_cleared_when_a_key_is_created(self):
+        self.assertTrue(self._check_api_key())
+
+        with patch.object(
+            PasswordHasher, "verify", wraps=PasswordHasher().verify
+        ) as verify:
+            ThirdPartyApiKeyFactory.create(
+                client_id=self.client_id,
+                api_key=PasswordHasher().hash("other"),
+            )
+            self.assertTrue(self._check_api_key())
+            self.assertGreaterEqual(verify.call_count, 1)
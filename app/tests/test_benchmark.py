@@ -0,0 +1,97 @@
+from copy import deepcopy
+
+from flask.ctx import AppContext
+
+from app import app
+from app.helpers.benchmark import (
+    HOT_PATHS,
+    build_benchmark_report,
+    compare_benchmark_reports,
+    run_hot_path_benchmarks,
+)
+from app.models import Activity, ActivityVersion, Mission
+from app.seed.scenarios.synthetic_fleet import generate_fleet
+from app.tests import BaseTest
+from app.tests.helpers import init_businesses_data, init_regulation_checks_data
+
+NB_COMPANIES = 1
+NB_DRIVERS = 2
+NB_DAYS = 6
+
+
+class TestBenchmark(BaseTest):
+    def setUp(self):
+        super().setUp()
+        init_regulation_checks_data()
+        init_businesses_data()
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+        self.fleet = generate_fleet(NB_COMPANIES, NB_DRIVERS, NB_DAYS)
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def test_fleet_has_revisions_and_dismissals(self):
+        nb_driver_days = NB_COMPANIES * NB_DRIVERS * NB_DAYS
+        self.assertEqual(Mission.query.count(), nb_driver_days)
+        # Days 3 and 6 have a revision, day 5 a dismissed activity
+        self.assertEqual(
+            Activity.query.count(), 3 * nb_driver_days + NB_DRIVERS
+        )
+        self.assertEqual(
+            Activity.query.filter(Activity.dismissed_at.isnot(None)).count(),
+            NB_DRIVERS,
+        )
+        self.assertEqual(
+            ActivityVersion.query.filter(
+                ActivityVersion.version_number == 2
+            ).count(),
+            2 * NB_DRIVERS,
+        )
+
+    def test_report_covers_every_hot_path(self):
+        hot_paths = run_hot_path_benchmarks(self.fleet, NB_DAYS)
+        report = build_benchmark_report(
+            hot_paths, NB_COMPANIES, NB_DRIVERS, NB_DAYS
+        )
+
+        self.assertEqual(set(report["hot_paths"]), set(HOT_PATHS))
+        for name in ["query_work_day_stats", "get_one_excel_file"]:
+            self.assertEqual(report["hot_paths"][name]["calls"], NB_COMPANIES)
+        for name in [
+            "group_user_missions_by_day",
+            "compute_regulations",
+            "build_activity_file",
+        ]:
+            self.assertEqual(report["hot_paths"][name]["calls"], NB_DRIVERS)
+        for stats in report["hot_paths"].values():
+            self.assertGreater(stats["duration_ms"], 0)
+            self.assertGreater(stats["peak_memory_kb"], 0)
+        self.assertGreater(
+            report["hot_paths"]["query_work_day_stats"]["sql_count"], 0
+        )
+        self.assertEqual(compare_benchmark_reports(report, report), [])
+
+    def test_compare_reports_finds_regressions(self):
+        stats = dict(
+            calls=2, duration_ms=100.0, sql_count=10, peak_memory_kb=500.0
+        )
+        baseline = build_benchmark_report(
+            {"compute_regulations": stats}, NB_COMPANIES, NB_DRIVERS, NB_DAYS
+        )
+
+        report = deepcopy(baseline)
+        report["hot_paths"]["compute_regulations"].update(
+            duration_ms=110.0, sql_count=12, peak_memory_kb=700.0
+        )
+        regressions = compare_benchmark_reports(
+            baseline=baseline, report=report
+        )
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("compute_regulations sql"))
+        self.assertTrue(regressions[1].startswith("compute_regulations peak"))
+
+        report["fleet"]["nb_days"] += 1
+        with self.assertRaises(ValueError):
+            compare_benchmark_reports(report, baseline)
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from app.helpers.benchmark import (
+    PROJECT_DIR,
+    measure_import_time,
+    parse_import_time_report,
+)
+
+WEB_ONLY_MODULES = [
+    "app.controllers.schema",
+    "flask_compress",
+    "xhtml2pdf",
+    "app.helpers.mail",
+    "sentry_sdk.integrations.flask",
+    "sentry_sdk.integrations.sqlalchemy",
+]
+
+FIRST_REQUEST_SCRIPT = """
+from app import app
+
+rules = {rule.rule for rule in app.url_map.iter_rules()}
+print("/graphql" in rules)
+response = app.test_client().post("/graphql", json={"query": "{ __typename }"})
+print(response.get_json()["data"]["__typename"])
+"""
+
+
+class TestBootMode(TestCase):
+    def test_parse_import_time_report(self):
+        report = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       120 |        120 |   json.decoder",
+                "import time:       300 |        420 | json",
+                "a line which is not from the report",
+            ]
+        )
+        self.assertEqual(
+            parse_import_time_report(report),
+            {"json.decoder": 120, "json": 420},
+        )
+
+    def test_light_boot_skips_web_subsystems(self):
+        web_import_times = measure_import_time("web")
+        light_import_times = measure_import_time("light")
+
+        for module in WEB_ONLY_MODULES:
+            self.assertIn(module, web_import_times)
+            self.assertNotIn(module, light_import_times)
+        for module in ["app.commands", "app.helpers.celery"]:
+            self.assertIn(module, light_import_times)
+        # Tolerant bound: the light boot is about a third faster on a dev machine
+        self.assertLess(light_import_times["app"], web_import_times["app"])
+
+    def test_web_subsystems_are_registered_before_first_request(self):
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_REQUEST_SCRIPT],
+            cwd=PROJECT_DIR,
+            env=dict(os.environ, MOBILIC_BOOT_MODE="light"),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.split(), ["False", "Queries"])
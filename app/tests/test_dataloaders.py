@@ -0,0 +1,125 @@
+from collections import defaultdict
+
+from flask import g
+from promise import Promise
+
+from app import app, db
+from app.helpers.benchmark import measure
+from app.helpers.dataloaders import (
+    RequestDataLoaders,
+    batch_load_by_key,
+    get_relationship_loader_class,
+    load_relationship,
+)
+from app.models import Employment, Team
+from app.seed import CompanyFactory, UserFactory
+from app.seed.factories import TeamFactory
+from app.tests import BaseTest
+
+
+class TestDataLoaders(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.teams = [
+            TeamFactory.create(company=self.company) for _ in range(2)
+        ]
+        self.users = [
+            UserFactory.create(post__company=self.company, post__team=team)
+            for team in self.teams + [self.teams[0]]
+        ]
+        self.team_ids = [team.id for team in self.teams]
+        self._request_context = app.test_request_context()
+        self._request_context.__enter__()
+        g.dataloaders = RequestDataLoaders()
+        db.session.expire_all()
+
+    def tearDown(self):
+        self._request_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _load_all(self, instances, relationship_name):
+        # Loads are batched when they are issued from a promise callback, as in
+        # the GraphQL executor
+        return (
+            Promise.resolve(None)
+            .then(
+                lambda _: Promise.all(
+                    [
+                        load_relationship(instance, relationship_name)
+                        for instance in instances
+                    ]
+                )
+            )
+            .get()
+        )
+
+    def _user_ids_by_team(self, employments_by_team):
+        return [
+            sorted(employment.user_id for employment in employments)
+            for employments in employments_by_team
+        ]
+
+    def test_batch_load_by_key_groups_items_in_order_of_keys(self):
+        unknown_team_id = -1
+        employments_by_team = batch_load_by_key(
+            Employment.team_id,
+            [self.team_ids[1], unknown_team_id, self.team_ids[0]],
+        ).get()
+        self.assertEqual(
+            self._user_ids_by_team(employments_by_team),
+            [
+                [self.users[1].id],
+                [],
+                sorted([self.users[0].id, self.users[2].id]),
+            ],
+        )
+
+    def test_loaders_are_instantiated_on_first_use(self):
+        self.assertEqual(len(g.dataloaders), 0)
+        loader = g.dataloaders["Team.employments"]
+        self.assertIs(g.dataloaders["Team.employments"], loader)
+        self.assertIsInstance(
+            loader, get_relationship_loader_class("Team", "employments")
+        )
+        self.assertIsNot(g.dataloaders["users"], g.dataloaders["vehicles"])
+        self.assertEqual(len(g.dataloaders), 3)
+
+    def test_one_to_many_relationship_is_loaded_in_one_query(self):
+        teams = Team.query.filter(Team.id.in_(self.team_ids)).all()
+        stats = defaultdict(int)
+        with measure(stats):
+            employments_by_team = self._load_all(teams, "employments")
+        self.assertEqual(stats["sql_count"], 1)
+        self.assertEqual(
+            self._user_ids_by_team(employments_by_team),
+            self._user_ids_by_team([team.employments for team in teams]),
+        )
+
+    def test_many_to_one_relationship_is_loaded_in_one_query(self):
+        employments = Employment.query.filter(
+            Employment.company_id == self.company.id
+        ).all()
+        stats = defaultdict(int)
+        with measure(stats):
+            teams = self._load_all(employments, "team")
+        self.assertEqual(stats["sql_count"], 1)
+        self.assertEqual(
+            [team.id if team else None for team in teams],
+            [e.team_id for e in employments],
+        )
+
+    def test_loaded_relationship_is_not_queried_again(self):
+        team = Team.query.get(self.team_ids[0])
+        employments = team.employments
+        stats = defaultdict(int)
+        with measure(stats):
+            self.assertIs(
+                load_relationship(team, "employments").get(), employments
+            )
+        self.assertEqual(stats["sql_count"], 0)
+        self.assertEqual(len(g.dataloaders), 0)
+
+    def test_unsupported_relationship(self):
+        with self.assertRaises(ValueError):
+            get_relationship_loader_class("Team", "vehicles")
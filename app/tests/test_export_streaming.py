@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import tempfile
+from datetime import date
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+from zipfile import ZipFile
+
+import billiard
+from defusedxml.ElementTree import parse
+from flask.ctx import AppContext
+
+from app import app, db
+from app.helpers.export_chunking import get_export_chunks
+from app.helpers.xls import stream_admin_export_file_from_chunks
+from app.helpers.xls.companies import get_one_excel_file, write_one_excel_file
+from app.helpers.xls.export_helpers import build_final_export_file
+from app.helpers.xls.signature import (
+    extract_signature_node_from_xml,
+    retrieve_and_verify_signature,
+)
+from app.models import Company
+from app.seed import CompanyFactory, EmploymentFactory, UserFactory
+from app.tests import BaseTest
+
+COMPANY = SimpleNamespace(
+    name="Company Name",
+    require_expenditures=False,
+    require_mission_name=True,
+    require_kilometer_data=False,
+    allow_transfers=False,
+)
+MIN_DATE = date(2024, 1, 1)
+MAX_DATE = date(2024, 1, 31)
+
+
+def _get_signature(fp):
+    with ZipFile(fp, "r") as archive:
+        with archive.open("docProps/custom.xml", "r") as f:
+            return extract_signature_node_from_xml(parse(f)).text
+
+
+@patch("app.helpers.xls.signature.HMAC_KEY", b"secret")
+class TestExportStreaming(TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write_file(self, name):
+        return write_one_excel_file(
+            os.path.join(self.output_dir, name),
+            [],
+            [COMPANY],
+            MIN_DATE,
+            MAX_DATE,
+        )
+
+    def test_file_written_on_disk_is_signed(self):
+        file_path = self._write_file("export.xlsx")
+
+        self.assertFalse(os.path.exists(f"{file_path}.unsigned"))
+        with open(file_path, "rb") as f:
+            retrieve_and_verify_signature(f)
+
+        in_memory_file = get_one_excel_file([], [COMPANY], MIN_DATE, MAX_DATE)
+        with open(file_path, "rb") as f:
+            self.assertEqual(_get_signature(f), _get_signature(in_memory_file))
+
+    def test_single_file_is_returned_as_is(self):
+        file_path = self._write_file("export.xlsx")
+
+        path, content_type, file_name, size = build_final_export_file(
+            [{"name": "rapport.xlsx", "path": file_path}],
+            "rapport",
+            self.output_dir,
+        )
+
+        self.assertEqual(path, file_path)
+        self.assertEqual(file_name, "rapport.xlsx")
+        self.assertEqual(size, os.path.getsize(file_path))
+        self.assertIn("spreadsheetml", content_type)
+
+    def test_files_are_streamed_into_archive(self):
+        files = [
+            {"name": f"rapport_{i}.xlsx", "path": self._write_file(f"{i}")}
+            for i in range(3)
+        ]
+
+        path, content_type, file_name, size = build_final_export_file(
+            files, "rapport", self.output_dir
+        )
+
+        self.assertEqual(content_type, "application/zip")
+        self.assertEqual(file_name, "rapport.zip")
+        self.assertEqual(size, os.path.getsize(path))
+        for file in files:
+            self.assertFalse(os.path.exists(file["path"]))
+        with ZipFile(path, "r") as archive:
+            self.assertEqual(archive.namelist(), [f["name"] for f in files])
+            for name in archive.namelist():
+                with archive.open(name, "r") as f:
+                    retrieve_and_verify_signature(f)
+
+
+class TestParallelExport(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.users = []
+        for i in range(3):
+            user = UserFactory.create(first_name=f"Prenom{i}", last_name="Nom")
+            EmploymentFactory.create(
+                company=self.company, submitter=user, user=user
+            )
+            self.users.append(user)
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _export(self, nb_workers):
+        chunking_result = get_export_chunks(
+            [u.id for u in self.users],
+            date(2024, 1, 1),
+            date(2024, 3, 31),
+        )
+        chunks = [
+            {
+                "user_ids": chunk.user_ids,
+                "min_date": chunk.min_date.isoformat(),
+                "max_date": chunk.max_date.isoformat(),
+                "file_suffix": chunk.file_suffix,
+                "strategy": chunking_result.strategy.value,
+            }
+            for chunk in chunking_result.chunks
+        ]
+        output_dir = os.path.join(self._tmp_dir.name, str(nb_workers))
+        os.mkdir(output_dir)
+        path, _, file_name, _ = stream_admin_export_file_from_chunks(
+            chunks,
+            self.users,
+            [self.company],
+            "rapport",
+            output_dir,
+            nb_workers=nb_workers,
+        )
+        with ZipFile(path, "r") as archive:
+            return file_name, archive.namelist()
+
+    def test_parallel_export_has_same_files_as_sequential_export(self):
+        sequential_export = self._export(nb_workers=1)
+        self.assertEqual(len(sequential_export[1]), 3)
+        self.assertEqual(sequential_export, self._export(nb_workers=2))
+
+    def test_parallel_export_from_daemonic_worker(self):
+        # Celery prefork workers are daemonic processes
+        nb_companies = Company.query.count()
+        with patch.dict(
+            multiprocessing.current_process()._config, {"daemon": True}
+        ), patch.dict(billiard.current_process()._config, {"daemon": True}):
+            db.session.add(
+                Company(
+                    usual_name="Pending",
+                    siren_api_info_last_update=date.today(),
+                )
+            )
+            file_name, files = self._export(nb_workers=3)
+
+        self.assertEqual(len(files), 3)
+        # The transaction of the task is neither committed nor rolled back
+        self.assertEqual(Company.query.count(), nb_companies + 1)
+        db.session.rollback()
+        self.assertEqual(Company.query.count(), nb_companies)
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+from flask.ctx import AppContext
+
+from app import app, db
+from app.domain.log_activities import log_activity
+from app.models import Mission
+from app.models.activity import ActivityType
+from app.seed import AuthenticatedUserContext, CompanyFactory, UserFactory
+from app.tests import BaseTest
+
+START_TIME = datetime(2024, 3, 4, 8)
+END_TIME = datetime(2024, 3, 4, 12)
+REVISION_TIME = datetime(2024, 3, 4, 18)
+DISMISS_TIME = datetime(2024, 3, 5, 9)
+
+
+class TestFrozenActivities(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.worker = UserFactory.create(post__company=self.company)
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+        with AuthenticatedUserContext(user=self.worker):
+            self.mission = Mission.create(
+                submitter=self.worker,
+                company=self.company,
+                reception_time=START_TIME,
+            )
+            self.activity = log_activity(
+                submitter=self.worker,
+                user=self.worker,
+                mission=self.mission,
+                type=ActivityType.DRIVE,
+                switch_mode=True,
+                reception_time=START_TIME,
+                start_time=START_TIME,
+            )
+            db.session.commit()
+            self.activity.revise(
+                revision_time=END_TIME,
+                end_time=END_TIME,
+            )
+            db.session.commit()
+            self.activity.revise(
+                revision_time=REVISION_TIME,
+                start_time=START_TIME + timedelta(hours=1),
+            )
+            db.session.commit()
+            self.activity.dismiss(DISMISS_TIME)
+            db.session.commit()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _activities_at(self, at_time):
+        return self.mission.activities_for(
+            self.worker,
+            include_dismissed_activities=True,
+            max_reception_time=at_time,
+        )
+
+    def test_frozen_views_do_not_modify_the_activity(self):
+        [running] = self._activities_at(START_TIME + timedelta(hours=1))
+        [ended] = self._activities_at(END_TIME + timedelta(hours=1))
+        [revised] = self._activities_at(REVISION_TIME)
+        [dismissed] = self._activities_at(DISMISS_TIME)
+
+        self.assertEqual(running.start_time, START_TIME)
+        self.assertEqual(
+            running.end_time, START_TIME + timedelta(hours=1, minutes=1)
+        )
+        self.assertFalse(running.is_dismissed)
+        self.assertIsNone(running.dismiss_author)
+        self.assertEqual(ended.end_time, END_TIME)
+        self.assertEqual(revised.start_time, START_TIME + timedelta(hours=1))
+        self.assertFalse(revised.is_dismissed)
+        self.assertTrue(dismissed.is_dismissed)
+        self.assertEqual(running.id, self.activity.id)
+        self.assertIs(running.mission, self.mission)
+
+        self.assertEqual(
+            self.activity.start_time, START_TIME + timedelta(hours=1)
+        )
+        self.assertEqual(self.activity.end_time, END_TIME)
+        self.assertEqual(self.activity.dismissed_at, DISMISS_TIME)
+        self.assertFalse(db.session.dirty)
+
+    def test_frozen_view_is_read_only(self):
+        [frozen] = self._activities_at(END_TIME + timedelta(hours=1))
+        with self.assertRaises(AttributeError):
+            frozen.start_time = START_TIME
+
+    def test_dismissed_activity_is_hidden_after_dismissal(self):
+        self.assertEqual(
+            self.mission.activities_for(
+                self.worker, max_reception_time=DISMISS_TIME
+            ),
+            [],
+        )
+        self.assertEqual(
+            len(
+                self.mission.activities_for(
+                    self.worker, max_reception_time=REVISION_TIME
+                )
+            ),
+            1,
+        )
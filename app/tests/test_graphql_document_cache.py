@@ -0,0 +1,119 @@
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from app import app, graphql_api_path
+from app.helpers import graphql
+from app.helpers.graphql import (
+    PERSISTED_QUERY_NOT_FOUND,
+    clear_document_cache,
+    clear_persisted_queries,
+    get_query_hash,
+)
+
+QUERY = "{ __typename }"
+
+
+def _persisted_query(query_hash):
+    return {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+
+
+class TestGraphQLDocumentCache(TestCase):
+    def setUp(self):
+        app.testing = True
+        clear_document_cache()
+        clear_persisted_queries()
+
+    def _post_graphql(self, data):
+        with app.test_client() as c, app.app_context():
+            return c.post(
+                graphql_api_path,
+                data=json.dumps(data),
+                content_type="application/json",
+            )
+
+    def test_document_is_parsed_and_validated_once(self):
+        with patch.object(
+            graphql, "parse", wraps=graphql.parse
+        ) as parse, patch.object(
+            graphql, "validate", wraps=graphql.validate
+        ) as validate:
+            for _ in range(3):
+                response = self._post_graphql({"query": QUERY})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.get_json()["data"], {"__typename": "Queries"}
+                )
+            self.assertEqual(parse.call_count, 1)
+            self.assertEqual(validate.call_count, 1)
+
+    def test_validation_errors_are_cached(self):
+        with patch.object(
+            graphql, "validate", wraps=graphql.validate
+        ) as validate:
+            for _ in range(2):
+                response = self._post_graphql({"query": "{ unknownField }"})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(
+                    "Cannot query field",
+                    response.get_json()["errors"][0]["message"],
+                )
+            self.assertEqual(validate.call_count, 1)
+
+    def test_syntax_errors_are_not_cached(self):
+        for _ in range(2):
+            response = self._post_graphql({"query": "{ __typename"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(
+                "Syntax Error", response.get_json()["errors"][0]["message"]
+            )
+
+    def test_persisted_query_is_registered_then_sent_by_hash(self):
+        query_hash = get_query_hash(QUERY)
+
+        response = self._post_graphql(
+            {"extensions": _persisted_query(query_hash)}
+        )
+        self.assertEqual(response.status_code, 200)
+        error = response.get_json()["errors"][0]
+        self.assertEqual(error["message"], PERSISTED_QUERY_NOT_FOUND)
+        self.assertEqual(
+            error["extensions"]["code"], "PERSISTED_QUERY_NOT_FOUND"
+        )
+
+        response = self._post_graphql(
+            {"query": QUERY, "extensions": _persisted_query(query_hash)}
+        )
+        self.assertEqual(
+            response.get_json()["data"], {"__typename": "Queries"}
+        )
+
+        response = self._post_graphql(
+            [{"extensions": _persisted_query(query_hash)}] * 2
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["data"] for r in response.get_json()],
+            [{"__typename": "Queries"}] * 2,
+        )
+
+    def test_persisted_query_with_wrong_hash_is_rejected(self):
+        response = self._post_graphql(
+            {
+                "query": QUERY,
+                "extensions": _persisted_query(get_query_hash("{ other }")),
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.get_json()["errors"][0]["extensions"]["code"],
+            "INVALID_PERSISTED_QUERY_HASH",
+        )
+
+        response = self._post_graphql(
+            {"extensions": _persisted_query(get_query_hash("{ other }"))}
+        )
+        self.assertEqual(
+            response.get_json()["errors"][0]["message"],
+            PERSISTED_QUERY_NOT_FOUND,
+        )
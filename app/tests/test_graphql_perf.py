@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from app import app
+from app.helpers.graphql_perf import build_graphql_perf_report
+from app.seed import CompanyFactory, UserFactory
+from app.tests import BaseTest, test_post_graphql as post_graphql
+
+USER_QUERY = """
+    query getUser($id: Int!){
+        user (id: $id) {
+            firstName
+            id
+        }
+    }
+"""
+
+
+class TestGraphQLPerf(BaseTest):
+    def setUp(self):
+        super().setUp()
+        company = CompanyFactory.create()
+        self.user = UserFactory.create(post__company=company)
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self._tmp_dir.name, "perf.jsonl")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+        super().tearDown()
+
+    def _query_user(self):
+        response = post_graphql(
+            USER_QUERY,
+            mock_authentication_with_user=self.user,
+            variables=dict(id=self.user.id),
+        )
+        self.assertIsNone(response.json.get("errors"))
+
+    def test_resolvers_are_recorded_per_operation(self):
+        with patch.dict(
+            app.config,
+            GRAPHQL_PERF_LOG_FILE=self.file_path,
+            GRAPHQL_PERF_SAMPLE_RATE=1,
+        ):
+            self._query_user()
+            self._query_user()
+
+        with open(self.file_path) as f:
+            samples = [json.loads(line) for line in f]
+        self.assertEqual(len(samples), 2)
+
+        summary = samples[0]["operations"]["getUser"]
+        fields = {r["field"]: r for r in summary["resolvers"]}
+        self.assertEqual(fields["Queries.user"]["calls"], 1)
+        self.assertEqual(fields["User.firstName"]["calls"], 1)
+        self.assertEqual(summary["resolver_calls"], 3)
+        self.assertEqual(
+            summary["sql_count"], sum(r["sql_count"] for r in fields.values())
+        )
+
+        with open(self.file_path) as f:
+            operations, resolvers = build_graphql_perf_report(f, top=3)
+        self.assertEqual(operations[0]["name"], "getUser")
+        self.assertEqual(operations[0]["requests"], 2)
+        self.assertEqual(len(resolvers), 3)
+        self.assertTrue(
+            all(
+                r["name"][0] == "getUser" and r["requests"] == 2
+                for r in resolvers
+            )
+        )
+
+    def test_no_sample_without_file(self):
+        with patch.dict(app.config, GRAPHQL_PERF_SAMPLE_RATE=1):
+            self._query_user()
+        self.assertFalse(os.path.exists(self.file_path))
@@ -5,6 +5,8 @@ from app.helpers.time import (
     get_uninterrupted_datetime_ranges,
     previous_month_period,
     get_daily_periods,
+    get_month_buckets,
+    get_week_buckets,
 )
 
 
@@ -99,3 +101,44 @@ class TestHelper(TestCase):
         self.assertEqual(periods[-1][1].hour, 8)
         self.assertEqual(periods[-1][0].day, 2)
         self.assertEqual(periods[-1][1].day, 3)
+
+    def test_week_buckets(self):
+        buckets = get_week_buckets(
+            date(2020, 12, 30), date(2021, 1, 11), lambda start: [start]
+        )
+        self.assertEqual(
+            list(buckets.keys()),
+            [date(2020, 12, 28), date(2021, 1, 4), date(2021, 1, 11)],
+        )
+        self.assertEqual(buckets[date(2021, 1, 4)], [date(2021, 1, 4)])
+
+    def test_week_buckets_are_not_shared(self):
+        buckets = get_week_buckets(
+            date(2023, 2, 1), date(2023, 2, 28), lambda start: []
+        )
+        buckets[date(2023, 1, 30)].append(1)
+        self.assertEqual(
+            [len(bucket) for bucket in buckets.values()], [1, 0, 0, 0, 0]
+        )
+
+    def test_month_buckets(self):
+        buckets = get_month_buckets(
+            date(2022, 11, 30), date(2023, 2, 1), lambda start: start
+        )
+        self.assertEqual(
+            list(buckets.keys()),
+            [
+                date(2022, 11, 1),
+                date(2022, 12, 1),
+                date(2023, 1, 1),
+                date(2023, 2, 1),
+            ],
+        )
+        self.assertEqual(
+            list(
+                get_month_buckets(
+                    date(2023, 2, 10), date(2023, 2, 12), lambda start: start
+                ).values()
+            ),
+            [date(2023, 2, 1)],
+        )
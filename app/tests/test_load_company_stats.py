@@ -1,9 +1,41 @@
+from datetime import date, datetime
+
 from app import db
+from app.models.company_certification import (
+    CERTIFICATION_ADMIN_CHANGES_BRONZE,
+    CERTIFICATION_ADMIN_CHANGES_SILVER,
+    CERTIFICATION_COMPLIANCY_SILVER,
+    CERTIFICATION_REAL_TIME_BRONZE,
+    CERTIFICATION_REAL_TIME_SILVER,
+)
 from app.models.company_stats import CompanyStats
-from app.seed import CompanyFactory
-from app.services.load_company_stats import load_company_stats
+from app.models.mission_validation import MissionValidation
+from app.seed import CompanyFactory, UserFactory
+from app.seed.factories import CompanyCertificationFactory, MissionFactory
+from app.services.load_company_stats import (
+    load_company_stats,
+    load_company_stats_per_company,
+)
 from app.tests import BaseTest
 
+CERTIFICATION_ARGS_BY_LEVEL = {
+    0: dict(
+        log_in_real_time=CERTIFICATION_REAL_TIME_BRONZE - 0.1,
+        admin_changes=CERTIFICATION_ADMIN_CHANGES_SILVER,
+        compliancy=CERTIFICATION_COMPLIANCY_SILVER,
+    ),
+    1: dict(
+        log_in_real_time=CERTIFICATION_REAL_TIME_BRONZE,
+        admin_changes=CERTIFICATION_ADMIN_CHANGES_BRONZE,
+        compliancy=0,
+    ),
+    2: dict(
+        log_in_real_time=CERTIFICATION_REAL_TIME_SILVER,
+        admin_changes=CERTIFICATION_ADMIN_CHANGES_SILVER,
+        compliancy=CERTIFICATION_COMPLIANCY_SILVER,
+    ),
+}
+
 
 class TestLoadCompanyStats(BaseTest):
     def get_stats_for_company(self, company_id):
@@ -42,3 +74,141 @@ class TestLoadCompanyStats(BaseTest):
 
         company_stats = self.get_stats_for_company(existing_company.id)
         self.assertIsNotNone(company_stats)
+
+    def _add_admin_validation(self, company, admin, employee, creation_time):
+        mission = MissionFactory.create(
+            company_id=company.id,
+            submitter_id=employee.id,
+            reception_time=creation_time,
+        )
+        db.session.add(
+            MissionValidation(
+                mission_id=mission.id,
+                submitter_id=admin.id,
+                user_id=employee.id,
+                is_admin=True,
+                reception_time=creation_time,
+                creation_time=creation_time,
+            )
+        )
+        db.session.commit()
+
+    def _add_certification(self, company, attribution_date, level):
+        CompanyCertificationFactory.create(
+            company_id=company.id,
+            attribution_date=attribution_date,
+            expiration_date=date(2030, 1, 1),
+            **CERTIFICATION_ARGS_BY_LEVEL[level],
+        )
+
+    def _snapshot(self):
+        db.session.expire_all()
+        return sorted(
+            (
+                s.company_id,
+                s.company_creation_date,
+                s.first_employee_invitation_date,
+                s.first_mission_validation_by_admin_date,
+                s.first_certification_date,
+            )
+            for s in CompanyStats.query.all()
+        )
+
+    def _init_existing_stats(self, company, **kwargs):
+        db.session.add(
+            CompanyStats(
+                company_id=company.id,
+                company_creation_date=date(2020, 1, 1),
+                **kwargs,
+            )
+        )
+        db.session.commit()
+
+    def test_bulk_load_matches_per_company_load(self):
+        # No employee
+        CompanyFactory.create()
+
+        # All steps reached, with admin and certification noise
+        complete = CompanyFactory.create()
+        admin = UserFactory.create(
+            post__company=complete, post__has_admin_rights=True
+        )
+        employee = UserFactory.create(post__company=complete)
+        self._add_admin_validation(
+            complete, admin, employee, datetime(2023, 3, 2, 23, 30)
+        )
+        self._add_admin_validation(
+            complete, admin, employee, datetime(2023, 5, 1)
+        )
+        self._add_certification(complete, date(2023, 9, 1), level=0)
+        self._add_certification(complete, date(2023, 10, 1), level=2)
+        self._add_certification(complete, date(2024, 1, 1), level=1)
+
+        # Certified without employees: steps stop at the first one
+        certified = CompanyFactory.create()
+        self._add_certification(certified, date(2023, 6, 1), level=2)
+
+        # Invitation already known without employees: next steps are computed
+        known_invitation = CompanyFactory.create()
+        known_admin = UserFactory.create(
+            post__company=known_invitation, post__has_admin_rights=True
+        )
+        self._add_admin_validation(
+            known_invitation, known_admin, known_admin, datetime(2023, 1, 1)
+        )
+        other_employee = UserFactory.create(post__company=complete)
+        self._add_admin_validation(
+            known_invitation, known_admin, other_employee, datetime(2023, 2, 1)
+        )
+        self._add_certification(known_invitation, date(2023, 4, 1), level=1)
+
+        # Steps already known are kept
+        known_steps = CompanyFactory.create()
+        UserFactory.create(post__company=known_steps)
+        self._add_certification(known_steps, date(2023, 4, 1), level=1)
+
+        def init_existing_stats():
+            self._init_existing_stats(
+                known_invitation,
+                first_employee_invitation_date=date(2022, 1, 1),
+            )
+            self._init_existing_stats(
+                known_steps,
+                first_employee_invitation_date=date(2021, 1, 1),
+                first_mission_validation_by_admin_date=date(2021, 2, 1),
+            )
+
+        init_existing_stats()
+        load_company_stats_per_company()
+        expected = self._snapshot()
+
+        CompanyStats.query.delete()
+        db.session.commit()
+        init_existing_stats()
+        load_company_stats()
+        self.assertEqual(self._snapshot(), expected)
+
+        # Nothing changes when run again
+        load_company_stats()
+        self.assertEqual(self._snapshot(), expected)
+
+        stats_by_company_id = {s[0]: s for s in expected}
+        self.assertEqual(
+            stats_by_company_id[complete.id][2:],
+            (
+                employee.employments[0].creation_time.date(),
+                date(2023, 3, 2),
+                date(2023, 10, 1),
+            ),
+        )
+        self.assertEqual(
+            stats_by_company_id[certified.id][2:], (None, None, None)
+        )
+        self.assertEqual(
+            stats_by_company_id[known_invitation.id][2:],
+            (date(2022, 1, 1), date(2023, 2, 1), date(2023, 4, 1)),
+        )
+        self.assertEqual(
+            stats_by_company_id[known_steps.id][2:],
+            (date(2021, 1, 1), date(2021, 2, 1), date(2023, 4, 1)),
+        )
@@ -0,0 +1,186 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from unittest.mock import patch
+from zipfile import ZipFile
+
+from flask.ctx import AppContext
+
+from app import app, db
+from app.domain.expenditure import log_expenditure
+from app.domain.log_activities import log_activity
+from app.helpers.celery import async_export_raw_data
+from app.helpers.raw_export import write_raw_export_archive
+from app.models import Export, Mission
+from app.models.activity import ActivityType
+from app.models.expenditure import ExpenditureType
+from app.models.export import ExportStatus, ExportType
+from app.seed import (
+    AuthenticatedUserContext,
+    CompanyFactory,
+    EmploymentFactory,
+    UserFactory,
+)
+from app.seed.helpers import get_datetime_tz
+from app.tests import BaseTest
+
+MIN_DATE = date(2024, 3, 1)
+MAX_DATE = date(2024, 3, 31)
+
+
+def post_rest_authenticated(url, json, user):
+    with app.test_client(
+        mock_authentication_with_user=user
+    ) as c, app.app_context():
+        return c.post(url, json=json)
+
+
+def _read_csv(archive, name):
+    return list(csv.DictReader(io.StringIO(archive.read(name).decode())))
+
+
+class TestRawDataExport(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.other_company = CompanyFactory.create()
+        self.admin = UserFactory.create(
+            post__company=self.company, post__has_admin_rights=True
+        )
+        self.worker = UserFactory.create(post__company=self.company)
+        EmploymentFactory.create(
+            company=self.other_company, user=self.worker, submitter=self.worker
+        )
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+        with AuthenticatedUserContext(user=self.worker):
+            for company, day in [(self.company, 4), (self.other_company, 5)]:
+                mission = Mission.create(
+                    submitter=self.worker,
+                    company=company,
+                    reception_time=datetime(2024, 3, day),
+                )
+                for type, start_hour, end_hour in [
+                    (ActivityType.DRIVE, 8, 12),
+                    (ActivityType.WORK, 13, 15),
+                ]:
+                    activity = log_activity(
+                        submitter=self.worker,
+                        user=self.worker,
+                        mission=mission,
+                        type=type,
+                        switch_mode=False,
+                        reception_time=datetime(2024, 3, 31),
+                        start_time=get_datetime_tz(2024, 3, day, start_hour),
+                        end_time=get_datetime_tz(2024, 3, day, end_hour),
+                    )
+                log_expenditure(
+                    submitter=self.worker,
+                    user=self.worker,
+                    mission=mission,
+                    type=ExpenditureType.DAY_MEAL,
+                    reception_time=datetime(2024, 3, 31),
+                    spending_date=date(2024, 3, day),
+                )
+                if company == self.company:
+                    self.dismissed_activity = activity
+            self.dismissed_activity.dismiss(datetime(2024, 3, 31, 12))
+            db.session.commit()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    @patch("app.services.exports.async_export_raw_data.delay")
+    def test_export_is_enqueued(self, mock_celery_delay):
+        response = post_rest_authenticated(
+            "/companies/generate_raw_data_export",
+            json={
+                "company_ids": [self.company.id],
+                "min_date": MIN_DATE.isoformat(),
+                "max_date": MAX_DATE.isoformat(),
+            },
+            user=self.admin,
+        )
+
+        self.assertEqual(response.status_code, 202)
+        call_kwargs = mock_celery_delay.call_args[1]
+        self.assertEqual(
+            call_kwargs["user_ids"], sorted([self.admin.id, self.worker.id])
+        )
+
+    def test_export_forbidden_to_employees(self):
+        response = post_rest_authenticated(
+            "/companies/generate_raw_data_export",
+            json={
+                "company_ids": [self.company.id],
+                "min_date": MIN_DATE.isoformat(),
+                "max_date": MAX_DATE.isoformat(),
+            },
+            user=self.worker,
+        )
+        self.assertNotEqual(response.status_code, 202)
+
+    def test_csv_archive_contains_rows_of_the_companies(self):
+        uploaded = {}
+
+        def upload_export_file(file_path, path, content_type):
+            with open(file_path, "rb") as f:
+                uploaded["content"] = f.read()
+
+        with patch(
+            "app.helpers.celery.S3Client.upload_export_file",
+            side_effect=upload_export_file,
+        ):
+            async_export_raw_data(
+                exporter_id=self.admin.id,
+                company_ids=[self.company.id],
+                user_ids=[self.worker.id],
+                min_date=MIN_DATE.isoformat(),
+                max_date=MAX_DATE.isoformat(),
+            )
+
+        export = Export.query.one()
+        self.assertEqual(export.export_type, ExportType.RAW_DATA)
+        self.assertEqual(export.status, ExportStatus.READY)
+
+        with ZipFile(io.BytesIO(uploaded["content"])) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()), ["activites.csv", "frais.csv"]
+            )
+            activities = _read_csv(archive, "activites.csv")
+            expenditures = _read_csv(archive, "frais.csv")
+
+        self.assertEqual([a["type"] for a in activities], ["drive", "work"])
+        self.assertEqual(
+            {a["company_id"] for a in activities}, {str(self.company.id)}
+        )
+        # Dismissed activities are exported with their dismissal time
+        self.assertEqual(activities[0]["dismissed_at"], "")
+        self.assertEqual(activities[1]["dismissed_at"], "2024-03-31 12:00:00")
+        self.assertEqual(activities[0]["user_last_name"], "Lick")
+        self.assertEqual(
+            [(e["type"], e["spending_date"]) for e in expenditures],
+            [("day_meal", "2024-03-04")],
+        )
+
+    def test_rows_are_written_by_batch(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_path = os.path.join(output_dir, "export.zip")
+            write_raw_export_archive(
+                file_path,
+                output_dir,
+                company_ids=[self.company.id, self.other_company.id],
+                user_ids=[self.worker.id],
+                min_date=MIN_DATE,
+                max_date=MAX_DATE,
+                batch_size=1,
+            )
+            with ZipFile(file_path) as archive:
+                self.assertEqual(len(_read_csv(archive, "activites.csv")), 4)
+                self.assertEqual(len(_read_csv(archive, "frais.csv")), 2)
+            self.assertEqual(os.listdir(output_dir), ["export.zip"])
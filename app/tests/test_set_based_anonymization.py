@@ -0,0 +1,219 @@
+from datetime import date, datetime
+from unittest.mock import patch
+
+from flask.ctx import AppContext
+
+from app import app, db
+from app.domain.log_activities import log_activity
+from app.helpers.submitter_type import SubmitterType
+from app.models import (
+    Activity,
+    ActivityVersion,
+    Mission,
+    MissionEnd,
+    RegulationComputation,
+)
+from app.models.activity import ActivityType
+from app.models.anonymized import (
+    AnonActivity,
+    AnonActivityVersion,
+    AnonMission,
+    AnonMissionEnd,
+    AnonRegulationComputation,
+    IdMapping,
+)
+from app.seed import AuthenticatedUserContext, CompanyFactory, UserFactory
+from app.seed.helpers import get_datetime_tz
+from app.services.anonymization.standalone.anonymization_executor import (
+    AnonymizationExecutor,
+)
+from app.services.anonymization.standalone.set_based_executor import (
+    SetBasedAnonymizationExecutor,
+)
+from app.services.anonymization.id_mapping_service import IdMappingService
+from app.services.anonymization.standalone.data_anonymization_manager import (
+    StandaloneDataAnonymizationManager,
+)
+from app.tests import BaseTest
+
+ANON_MODELS = [AnonActivity, AnonActivityVersion, AnonMissionEnd, AnonMission]
+
+
+def _anon_rows(anon_model):
+    return sorted(
+        (
+            {
+                column.name: getattr(row, column.name)
+                for column in anon_model.__table__.columns
+            }
+            for row in anon_model.query.all()
+        ),
+        key=lambda row: row["id"],
+    )
+
+
+class TestSetBasedAnonymization(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.user = UserFactory.create(post__company=self.company)
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+        with AuthenticatedUserContext(user=self.user):
+            for day in [4, 5, 6]:
+                mission = Mission.create(
+                    submitter=self.user,
+                    company=self.company,
+                    reception_time=datetime(2024, 3, day),
+                )
+                log_activity(
+                    submitter=self.user,
+                    user=self.user,
+                    mission=mission,
+                    type=ActivityType.DRIVE,
+                    switch_mode=False,
+                    reception_time=datetime(2024, 3, 31),
+                    start_time=get_datetime_tz(2024, 3, day, 8),
+                    end_time=get_datetime_tz(2024, 3, day, 11, 30),
+                )
+                db.session.add(
+                    MissionEnd(
+                        submitter=self.user,
+                        user=self.user,
+                        mission=mission,
+                        reception_time=datetime(2024, 3, 31),
+                    )
+                )
+            db.session.add(
+                RegulationComputation(
+                    user=self.user,
+                    day=date(2024, 3, 5),
+                    submitter_type=SubmitterType.EMPLOYEE,
+                )
+            )
+            db.session.commit()
+
+        self.mission_ids = {m.id for m in Mission.query.all()}
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def test_anonymized_rows_are_the_same_as_with_the_orm_executor(self):
+        AnonymizationExecutor(db.session).anonymize_mission_and_dependencies(
+            self.mission_ids
+        )
+        db.session.commit()
+        expected_rows = {model: _anon_rows(model) for model in ANON_MODELS}
+        self.assertEqual(len(expected_rows[AnonActivity]), 3)
+
+        # The set-based executor reuses the mappings, so it gives the same IDs
+        for model in ANON_MODELS:
+            model.query.delete()
+        IdMapping.query.update({"deletion_target": False})
+        db.session.commit()
+
+        SetBasedAnonymizationExecutor(
+            db.session, batch_size=2
+        ).anonymize_mission_and_dependencies(self.mission_ids)
+        db.session.commit()
+
+        for model in ANON_MODELS:
+            self.assertEqual(_anon_rows(model), expected_rows[model])
+        self.assertEqual(
+            IdMappingService.get_deletion_target_ids("mission"),
+            self.mission_ids,
+        )
+        activity = AnonActivity.query.first()
+        self.assertEqual(activity.start_time, datetime(2024, 3, 1))
+        self.assertEqual(activity.end_time, datetime(2024, 3, 1, 3, 30))
+        self.assertLess(activity.user_id, 0)
+
+    def test_regulation_computations_are_copied(self):
+        SetBasedAnonymizationExecutor(
+            db.session
+        ).anonymize_regulation_computations({self.user.id})
+
+        computation = AnonRegulationComputation.query.one()
+        self.assertEqual(computation.day, date(2024, 3, 5))
+        self.assertEqual(
+            computation.user_id,
+            IdMappingService.get_user_negative_id(self.user.id),
+        )
+
+    def test_batches_are_committed_and_deleted(self):
+        executor = SetBasedAnonymizationExecutor(
+            db.session, dry_run=False, batch_size=2
+        )
+        with patch.object(db.session, "commit") as commit:
+            executor.run_committed_batches(
+                executor.anonymize_mission_and_dependencies, self.mission_ids
+            )
+        self.assertEqual(commit.call_count, 2)
+
+        self.assertEqual(AnonMission.query.count(), 3)
+        self.assertEqual(AnonActivityVersion.query.count(), 3)
+        for model in [Mission, Activity, ActivityVersion, MissionEnd]:
+            self.assertEqual(model.query.count(), 0)
+
+    def test_committed_batches_are_skipped_when_resuming(self):
+        executor = SetBasedAnonymizationExecutor(db.session, batch_size=2)
+        first_mission_id = min(self.mission_ids)
+        executor.anonymize_mission_and_dependencies({first_mission_id})
+        db.session.commit()
+
+        with patch.object(
+            executor,
+            "copy_to_anonymized_table",
+            wraps=executor.copy_to_anonymized_table,
+        ) as copy_to_anonymized_table:
+            executor.anonymize_mission_and_dependencies(self.mission_ids)
+
+        batch_mission_ids = {
+            mission_id
+            for call in copy_to_anonymized_table.call_args_list
+            for mission_id in call.args[1]["mission_ids"]
+        }
+        self.assertEqual(
+            batch_mission_ids, self.mission_ids - {first_mission_id}
+        )
+        self.assertEqual(AnonMission.query.count(), 3)
+
+    def test_delete_only_mode_deletes_by_batch(self):
+        SetBasedAnonymizationExecutor(
+            db.session, batch_size=2
+        ).anonymize_mission_and_dependencies(self.mission_ids)
+        db.session.commit()
+        self.assertEqual(Mission.query.count(), 3)
+
+        SetBasedAnonymizationExecutor(
+            db.session, dry_run=False, batch_size=2
+        ).delete_anonymized_data(datetime.now())
+
+        self.assertEqual(Mission.query.count(), 0)
+        self.assertEqual(Activity.query.count(), 0)
+        self.assertEqual(AnonMission.query.count(), 3)
+
+    def test_interrupted_batched_run_is_resumed(self):
+        executor = SetBasedAnonymizationExecutor(db.session, batch_size=2)
+        executor.anonymize_mission_and_dependencies({min(self.mission_ids)})
+        db.session.commit()
+
+        manager = StandaloneDataAnonymizationManager(batch_size=2)
+        with patch.object(
+            manager, "calculate_cutoff_date", return_value=datetime.now()
+        ):
+            manager.execute()
+
+        self.assertEqual(AnonMission.query.count(), 3)
+        self.assertEqual(
+            IdMappingService.get_deletion_target_ids("mission"),
+            self.mission_ids,
+        )
+
+        # Without a batch size, existing mappings still have to be cleaned
+        self.assertFalse(
+            StandaloneDataAnonymizationManager().has_interrupted_batched_run()
+        )
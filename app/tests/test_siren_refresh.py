@@ -0,0 +1,256 @@
+import datetime
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from unittest import TestCase
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from flask.ctx import AppContext
+
+from app import app, db
+from app.domain import company as company_domain
+from app.domain.company import (
+    clear_siren_info_cache,
+    get_siren_info,
+    job_update_ceased_activity_status,
+)
+from app.helpers.siren import (
+    InaccessibleSirenError,
+    SirenAPIClient,
+    UnavailableSirenAPIError,
+)
+from app.models import Company, Employment
+from app.seed import CompanyFactory, UserFactory
+from app.tests import BaseTest
+
+ACTIVE_SIREN = "111111111"
+CEASED_SIREN = "222222222"
+UNKNOWN_SIREN = "333333333"
+RATE_LIMITED_SIREN = "444444444"
+UNAVAILABLE_SIREN = "666666666"
+
+ADDRESS = {
+    f"{field}{flag}Etablissement": None
+    for flag in ["", "2"]
+    for field in [
+        "numeroVoie",
+        "indiceRepetition",
+        "typeVoie",
+        "libelleVoie",
+        "codePostal",
+        "libelleCommune",
+        "libelleCommuneEtranger",
+        "codePaysEtranger",
+    ]
+}
+
+
+def _siren_response(siren, legal_unit_status):
+    return {
+        "etablissements": [
+            {
+                "siren": siren,
+                "siret": f"{siren}00012",
+                "uniteLegale": {
+                    "etatAdministratifUniteLegale": legal_unit_status,
+                    "denominationUniteLegale": f"Company {siren}",
+                },
+                "adresseEtablissement": ADDRESS,
+                "adresse2Etablissement": ADDRESS,
+                "periodesEtablissement": [
+                    {"etatAdministratifEtablissement": legal_unit_status}
+                ],
+            }
+        ]
+    }
+
+
+class StubSirenAPI(BaseHTTPRequestHandler):
+    """Local stand-in for the SIREN API, which records the requested SIRENs."""
+
+    requested_sirens = []
+    rate_limited_once = set()
+    lock = Lock()
+
+    def do_GET(self):
+        siren = parse_qs(urlparse(self.path).query)["q"][0].split(":")[1]
+        with self.lock:
+            self.requested_sirens.append(siren)
+            rate_limited = siren not in self.rate_limited_once
+            self.rate_limited_once.add(siren)
+
+        if siren == RATE_LIMITED_SIREN and rate_limited:
+            self._respond(429, {}, {"Retry-After": "0"})
+        elif siren == UNKNOWN_SIREN:
+            self._respond(404, {"message": "Aucun élément trouvé"})
+        elif siren == UNAVAILABLE_SIREN:
+            self._respond(503, {"message": "Service indisponible"})
+        else:
+            self._respond(
+                200,
+                _siren_response(siren, "C" if siren == CEASED_SIREN else "A"),
+            )
+
+    def _respond(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubSirenAPIMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubSirenAPI)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.endpoint = f"http://127.0.0.1:{cls.server.server_port}/siret"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        StubSirenAPI.requested_sirens.clear()
+        StubSirenAPI.rate_limited_once.clear()
+        self.client = SirenAPIClient("api-key", endpoint=self.endpoint)
+
+
+class TestSirenAPIClient(StubSirenAPIMixin, TestCase):
+    def test_sirens_info_are_requested_concurrently(self):
+        sirens_info = self.client.get_sirens_info(
+            [ACTIVE_SIREN, CEASED_SIREN, UNKNOWN_SIREN, ACTIVE_SIREN],
+            max_workers=3,
+        )
+
+        self.assertEqual(
+            list(sirens_info), [ACTIVE_SIREN, CEASED_SIREN, UNKNOWN_SIREN]
+        )
+        self.assertEqual(
+            sirens_info[CEASED_SIREN]["uniteLegale"]["siren"], CEASED_SIREN
+        )
+        self.assertIsInstance(
+            sirens_info[UNKNOWN_SIREN], InaccessibleSirenError
+        )
+        self.assertEqual(len(StubSirenAPI.requested_sirens), 3)
+
+    def test_rate_limited_request_is_retried(self):
+        siren_info = self.client.get_siren_info(RATE_LIMITED_SIREN)
+
+        self.assertEqual(
+            siren_info["uniteLegale"]["siren"], RATE_LIMITED_SIREN
+        )
+        self.assertEqual(
+            StubSirenAPI.requested_sirens, [RATE_LIMITED_SIREN] * 2
+        )
+
+    def test_requests_are_spaced_out_by_the_rate_limit(self):
+        client = SirenAPIClient(
+            "api-key", endpoint=self.endpoint, max_requests_per_minute=600
+        )
+        start = time.monotonic()
+        client.get_sirens_info(
+            [f"99999999{i}" for i in range(4)], max_workers=4
+        )
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+    def test_unavailable_api(self):
+        with self.assertRaises(UnavailableSirenAPIError):
+            self.client.get_siren_info(UNAVAILABLE_SIREN)
+
+
+class TestSirenInfoRefresh(StubSirenAPIMixin, BaseTest):
+    def setUp(self):
+        super().setUp()
+        clear_siren_info_cache()
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+        self._client_patch = patch.object(
+            company_domain, "siren_api_client", self.client
+        )
+        self._client_patch.start()
+
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        self.companies = {
+            siren: CompanyFactory.create(siren=siren)
+            for siren in [ACTIVE_SIREN, CEASED_SIREN, UNKNOWN_SIREN]
+        }
+        self.employee = UserFactory.create(
+            post__company=self.companies[CEASED_SIREN]
+        )
+        Company.query.update({"siren_api_info_last_update": yesterday})
+        db.session.commit()
+
+    def tearDown(self):
+        self._client_patch.stop()
+        self._app_context.__exit__(None, None, None)
+        clear_siren_info_cache()
+        super().tearDown()
+
+    def test_job_refreshes_all_companies_by_batch(self):
+        job_update_ceased_activity_status(batch_size=2)
+
+        self.assertEqual(
+            sorted(StubSirenAPI.requested_sirens),
+            [ACTIVE_SIREN, CEASED_SIREN, UNKNOWN_SIREN],
+        )
+        active, ceased, unknown = (
+            Company.query.get(self.companies[siren].id)
+            for siren in [ACTIVE_SIREN, CEASED_SIREN, UNKNOWN_SIREN]
+        )
+        self.assertFalse(active.has_ceased_activity)
+        self.assertTrue(ceased.has_ceased_activity)
+        self.assertIsNone(unknown.siren_api_info)
+        self.assertEqual(
+            ceased.siren_api_info["uniteLegale"]["siren"], CEASED_SIREN
+        )
+        employment = Employment.query.filter(
+            Employment.user_id == self.employee.id
+        ).one()
+        self.assertEqual(
+            employment.end_date,
+            datetime.date.today() - datetime.timedelta(days=1),
+        )
+
+        # Companies refreshed today are not requested again
+        StubSirenAPI.requested_sirens.clear()
+        job_update_ceased_activity_status()
+        self.assertEqual(StubSirenAPI.requested_sirens, [])
+
+    def test_siren_info_is_read_from_recent_company_info(self):
+        job_update_ceased_activity_status()
+        StubSirenAPI.requested_sirens.clear()
+
+        siren_info = get_siren_info(ACTIVE_SIREN)
+
+        self.assertEqual(siren_info["uniteLegale"]["siren"], ACTIVE_SIREN)
+        self.assertEqual(StubSirenAPI.requested_sirens, [])
+
+    def test_siren_info_is_requested_once_then_cached(self):
+        new_siren = "555555555"
+        for _ in range(2):
+            siren_info = get_siren_info(new_siren)
+            self.assertEqual(siren_info["uniteLegale"]["siren"], new_siren)
+        self.assertEqual(StubSirenAPI.requested_sirens, [new_siren])
+
+        # Outdated company info is requested again
+        Company.query.update(
+            {
+                "siren_api_info": _siren_response(ACTIVE_SIREN, "A"),
+                "siren_api_info_last_update": datetime.date(2020, 1, 1),
+            }
+        )
+        get_siren_info(ACTIVE_SIREN)
+        self.assertEqual(
+            StubSirenAPI.requested_sirens, [new_siren, ACTIVE_SIREN]
+        )
@@ -0,0 +1,194 @@
+from datetime import date, datetime
+from io import BytesIO
+from unittest.mock import patch
+from zipfile import ZipFile
+
+from flask.ctx import AppContext
+from freezegun import freeze_time
+
+from app import app, db
+from app.domain.log_activities import log_activity
+from app.domain.permissions import ConsultationScope
+from app.helpers.celery import async_export_tachograph_files
+from app.helpers.tachograph import (
+    generate_tachograph_parts,
+    generate_tachograph_parts_both_versions,
+    get_tachograph_archive_company,
+    write_tachograph_archive,
+)
+from app.models import Export, Mission
+from app.models.activity import ActivityType
+from app.models.export import ExportStatus, ExportType
+from app.seed import AuthenticatedUserContext, CompanyFactory, UserFactory
+from app.seed.helpers import get_datetime_tz
+from app.tests import BaseTest
+
+MIN_DATE = date(2024, 3, 1)
+MAX_DATE = date(2024, 3, 31)
+
+
+def post_rest_authenticated(url, json, user):
+    with app.test_client(
+        mock_authentication_with_user=user
+    ) as c, app.app_context():
+        return c.post(url, json=json)
+
+
+class TestTachographExport(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.admin = UserFactory.create(
+            post__company=self.company, post__has_admin_rights=True
+        )
+        self.workers = [
+            UserFactory.create(post__company=self.company) for _ in range(2)
+        ]
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+        self.activities = []
+        for worker in self.workers:
+            with AuthenticatedUserContext(user=worker):
+                mission = Mission.create(
+                    submitter=worker,
+                    company=self.company,
+                    reception_time=datetime(2024, 3, 4),
+                )
+                activity = log_activity(
+                    submitter=worker,
+                    user=worker,
+                    mission=mission,
+                    type=ActivityType.DRIVE,
+                    switch_mode=False,
+                    reception_time=datetime(2024, 3, 5),
+                    start_time=get_datetime_tz(2024, 3, 4, 8),
+                    end_time=get_datetime_tz(2024, 3, 4, 12),
+                )
+                db.session.commit()
+                self.activities.append(activity)
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    @patch("app.services.exports.async_export_tachograph_files.delay")
+    def test_async_export_is_enqueued(self, mock_celery_delay):
+        response = post_rest_authenticated(
+            "/companies/generate_tachograph_files",
+            json={
+                "company_ids": [self.company.id],
+                "min_date": MIN_DATE.isoformat(),
+                "max_date": MAX_DATE.isoformat(),
+                "employee_version": True,
+                "async_export": True,
+            },
+            user=self.admin,
+        )
+
+        self.assertEqual(response.status_code, 202)
+        mock_celery_delay.assert_called_once()
+        call_kwargs = mock_celery_delay.call_args[1]
+        self.assertEqual(call_kwargs["exporter_id"], self.admin.id)
+        self.assertEqual(
+            call_kwargs["user_ids"],
+            sorted(u.id for u in [self.admin, *self.workers]),
+        )
+        self.assertEqual(call_kwargs["min_date"], MIN_DATE.isoformat())
+        self.assertTrue(call_kwargs["employee_version"])
+
+    def test_async_export_uploads_same_files_as_sync_export(self):
+        uploaded = {}
+
+        def upload_export_file(file_path, path, content_type):
+            with open(file_path, "rb") as f:
+                uploaded["content"] = f.read()
+            uploaded["path"] = path
+            uploaded["content_type"] = content_type
+
+        user_ids = [w.id for w in self.workers]
+        with patch(
+            "app.helpers.celery.S3Client.upload_export_file",
+            side_effect=upload_export_file,
+        ):
+            async_export_tachograph_files(
+                exporter_id=self.admin.id,
+                company_ids=[self.company.id],
+                user_ids=user_ids,
+                min_date=MIN_DATE.isoformat(),
+                max_date=MAX_DATE.isoformat(),
+                employee_version=True,
+            )
+
+        export = Export.query.one()
+        self.assertEqual(export.export_type, ExportType.TACHOGRAPH)
+        self.assertEqual(export.status, ExportStatus.READY)
+        self.assertEqual(
+            uploaded["path"], f"exports/{self.admin.id}/{export.id}"
+        )
+        self.assertEqual(uploaded["content_type"], "application/zip")
+        self.assertEqual(export.file_size, len(uploaded["content"]))
+
+        sync_archive = get_tachograph_archive_company(
+            users=sorted(self.workers, key=lambda u: u.id),
+            min_date=MIN_DATE,
+            max_date=MAX_DATE,
+            scope=ConsultationScope(company_ids=[self.company.id]),
+            with_signatures=False,
+            employee_version=True,
+        )
+        with ZipFile(BytesIO(uploaded["content"])) as async_zip, ZipFile(
+            sync_archive
+        ) as sync_zip:
+            async_members = async_zip.infolist()
+            self.assertEqual(len(async_members), 4)
+            self.assertEqual(
+                [len(async_zip.read(m)) for m in async_members],
+                [len(sync_zip.read(m)) for m in sync_zip.infolist()],
+            )
+
+    def test_both_versions_match_separate_generations(self):
+        with AuthenticatedUserContext(user=self.admin):
+            self.activities[0].revise(
+                revision_time=datetime(2024, 3, 6),
+                end_time=get_datetime_tz(2024, 3, 4, 14),
+                submitter=self.admin,
+            )
+            db.session.commit()
+
+        worker = self.workers[0]
+        options = dict(
+            start_date=MIN_DATE,
+            end_date=MAX_DATE,
+            consultation_scope=ConsultationScope(
+                company_ids=[self.company.id]
+            ),
+            with_signatures=False,
+        )
+        with freeze_time(datetime(2024, 4, 1)):
+            manager_files, employee_files = (
+                generate_tachograph_parts_both_versions(worker, **options)
+            )
+            expected_manager_files = generate_tachograph_parts(
+                worker, **options
+            )
+            expected_employee_files = generate_tachograph_parts(
+                worker,
+                include_dismissed_or_empty_days=True,
+                employee_version=True,
+                **options,
+            )
+
+        self.assertEqual(
+            write_tachograph_archive(manager_files),
+            write_tachograph_archive(expected_manager_files),
+        )
+        self.assertEqual(
+            write_tachograph_archive(employee_files),
+            write_tachograph_archive(expected_employee_files),
+        )
+        self.assertNotEqual(
+            write_tachograph_archive(manager_files),
+            write_tachograph_archive(employee_files),
+        )
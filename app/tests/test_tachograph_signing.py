@@ -0,0 +1,80 @@
+import secrets
+from unittest import TestCase
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.helpers.tachograph import File, FileSpecs
+from app.helpers.tachograph.rsa_keys import RSAKey
+from app.helpers.tachograph.signature import (
+    FileSignatureErrors,
+    sign_file,
+    sign_files,
+    verify_signature,
+)
+
+MODULUS_LENGTH = 128
+
+
+class TestTachographSigning(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        numbers = rsa.generate_private_key(
+            public_exponent=65537, key_size=MODULUS_LENGTH * 8
+        ).private_numbers()
+        cls.key = RSAKey(
+            modulus=numbers.public_numbers.n,
+            modulus_length=MODULUS_LENGTH,
+            public_exponent=numbers.public_numbers.e,
+            private_exponent=numbers.d,
+        )
+        cls.key_without_public_exponent = RSAKey(
+            modulus=numbers.public_numbers.n,
+            modulus_length=MODULUS_LENGTH,
+            private_exponent=numbers.d,
+        )
+
+    def test_crt_signatures_are_identical_to_full_exponent_ones(self):
+        messages = [
+            b"",
+            b"\x00" * MODULUS_LENGTH,
+            b"\x01",
+            b"\xff" * MODULUS_LENGTH,
+        ] + [secrets.token_bytes(MODULUS_LENGTH) for _ in range(20)]
+        expected = [
+            pow(
+                int.from_bytes(m, "big"),
+                self.key.private_exponent,
+                self.key.modulus,
+            ).to_bytes(MODULUS_LENGTH, "big")
+            for m in messages
+        ]
+
+        self.assertEqual(self.key.sign_many(messages), expected)
+        self.assertEqual([self.key.sign(m) for m in messages], expected)
+        self.assertEqual(
+            self.key_without_public_exponent.sign_many(messages), expected
+        )
+
+    def test_message_too_long_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.key.sign_many([b"\x01" * (MODULUS_LENGTH + 1)])
+
+    def test_batch_file_signatures_match_single_file_ones(self):
+        files = [
+            File(spec=FileSpecs.CARD_ICC_IDENTIFICATION),
+            File(spec=FileSpecs.APPLICATION_IDENTIFICATION),
+            File(spec=FileSpecs.EVENTS_DATA),
+        ]
+        for file in files:
+            file.adjust_content()
+
+        sign_files(files, self.key)
+
+        for file in files:
+            signature = file.signature
+            sign_file(file, self.key_without_public_exponent)
+            self.assertEqual(signature, file.signature)
+            self.assertNotIsInstance(
+                verify_signature(file.content, signature, self.key),
+                FileSignatureErrors,
+            )
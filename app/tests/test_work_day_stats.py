@@ -0,0 +1,324 @@
+from base64 import b64encode
+from datetime import date, datetime, time, timedelta
+
+from flask.ctx import AppContext
+from freezegun import freeze_time
+
+from app import app, db
+from app.domain.log_activities import log_activity
+from app.domain.work_day_stats import reconcile_work_day_stats
+from app.helpers.time import to_fr_tz
+from app.models import Employment, Mission, User, WorkDayStats
+from app.models.activity import ActivityType
+from app.models.queries import (
+    query_stored_work_day_stats,
+    query_work_day_stats,
+    work_day_stats_as_dict,
+)
+from app.seed import AuthenticatedUserContext, CompanyFactory, UserFactory
+from app.seed.helpers import get_datetime_tz
+from app.services.anonymization.standalone.anonymization_executor import (
+    AnonymizationExecutor,
+)
+from app.tests import BaseTest
+
+START_DATE = date(2024, 3, 1)
+END_DATE = date(2024, 3, 31)
+
+
+class TestWorkDayStats(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.workers = [
+            UserFactory.create(post__company=self.company) for _ in range(2)
+        ]
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _log_mission(self, worker, periods, name="mission"):
+        with AuthenticatedUserContext(user=worker):
+            mission = Mission.create(
+                submitter=worker,
+                company=self.company,
+                reception_time=datetime(2024, 3, 1),
+                name=name,
+            )
+            activities = [
+                log_activity(
+                    submitter=worker,
+                    user=worker,
+                    mission=mission,
+                    type=type,
+                    switch_mode=False,
+                    reception_time=datetime(2024, 4, 1),
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+                for type, start_time, end_time in periods
+            ]
+            db.session.commit()
+        return mission, activities
+
+    def _assert_stored_stats_are_up_to_date(self):
+        rows, _ = query_work_day_stats(
+            self.company.id, start_date=START_DATE, end_date=END_DATE
+        )
+        stored_stats, has_next_page = query_stored_work_day_stats(
+            self.company.id, start_date=START_DATE, end_date=END_DATE
+        )
+        self.assertFalse(has_next_page)
+        self.assertEqual(
+            stored_stats, [work_day_stats_as_dict(row) for row in rows]
+        )
+        return stored_stats
+
+    def test_stats_are_stored_on_write(self):
+        self._log_mission(
+            self.workers[0],
+            [
+                (
+                    ActivityType.DRIVE,
+                    get_datetime_tz(2024, 3, 4, 8),
+                    get_datetime_tz(2024, 3, 4, 12),
+                ),
+                (
+                    ActivityType.WORK,
+                    get_datetime_tz(2024, 3, 4, 13),
+                    get_datetime_tz(2024, 3, 4, 15),
+                ),
+            ],
+        )
+        # Night shift over two days
+        self._log_mission(
+            self.workers[1],
+            [
+                (
+                    ActivityType.DRIVE,
+                    get_datetime_tz(2024, 3, 5, 22),
+                    get_datetime_tz(2024, 3, 6, 3),
+                ),
+            ],
+        )
+
+        stats = self._assert_stored_stats_are_up_to_date()
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats[-1]["total_work_duration"], 6 * 3600)
+        self.assertEqual(
+            stats[-1]["activity_durations"][ActivityType.DRIVE.value],
+            4 * 3600,
+        )
+
+    def test_stats_follow_activity_and_mission_changes(self):
+        mission, activities = self._log_mission(
+            self.workers[0],
+            [
+                (
+                    ActivityType.DRIVE,
+                    get_datetime_tz(2024, 3, 4, 8),
+                    get_datetime_tz(2024, 3, 4, 12),
+                ),
+            ],
+        )
+        with AuthenticatedUserContext(user=self.workers[0]):
+            activities[0].revise(
+                revision_time=datetime(2024, 4, 2),
+                start_time=get_datetime_tz(2024, 3, 3, 8),
+                end_time=get_datetime_tz(2024, 3, 3, 10),
+            )
+            db.session.commit()
+        stats = self._assert_stored_stats_are_up_to_date()
+        self.assertEqual([s["day"] for s in stats], [date(2024, 3, 3)])
+
+        mission.name = "nouveau nom"
+        db.session.commit()
+        stats = self._assert_stored_stats_are_up_to_date()
+        self.assertEqual(
+            stats[0]["mission_names"], {str(mission.id): "nouveau nom"}
+        )
+
+        with AuthenticatedUserContext(user=self.workers[0]):
+            activities[0].dismiss(datetime(2024, 4, 3))
+            db.session.commit()
+        self.assertEqual(self._assert_stored_stats_are_up_to_date(), [])
+
+    def test_reconciliation_catches_up_on_missed_changes(self):
+        self._log_mission(
+            self.workers[0],
+            [
+                (
+                    ActivityType.WORK,
+                    get_datetime_tz(2024, 3, 4, 8),
+                    get_datetime_tz(2024, 3, 4, 12),
+                ),
+            ],
+        )
+        WorkDayStats.query.delete()
+        db.session.commit()
+
+        reconcile_work_day_stats(START_DATE, END_DATE)
+
+        self.assertEqual(len(self._assert_stored_stats_are_up_to_date()), 1)
+
+    def test_stored_stats_pagination(self):
+        for day in range(4, 9):
+            self._log_mission(
+                self.workers[day % 2],
+                [
+                    (
+                        ActivityType.WORK,
+                        get_datetime_tz(2024, 3, day, 8),
+                        get_datetime_tz(2024, 3, day, 12),
+                    ),
+                ],
+            )
+        stats = self._assert_stored_stats_are_up_to_date()
+
+        first_page, has_next_page = query_stored_work_day_stats(
+            self.company.id, first=3
+        )
+        self.assertTrue(has_next_page)
+        self.assertEqual(first_page, stats[:3])
+        last = first_page[-1]
+        second_page, has_next_page = query_stored_work_day_stats(
+            self.company.id,
+            first=3,
+            after=b64encode(
+                f"{datetime.combine(last['day'], time())},{last['user_id']}".encode()
+            ).decode(),
+        )
+        self.assertFalse(has_next_page)
+        self.assertEqual(second_page, stats[3:])
+
+    def test_stats_of_unchanged_days_are_not_computed_again(self):
+        _, activities = self._log_mission(
+            self.workers[0],
+            [
+                (
+                    ActivityType.WORK,
+                    get_datetime_tz(2024, 3, 4, 8),
+                    get_datetime_tz(2024, 3, 4, 12),
+                ),
+            ],
+        )
+        self._log_mission(
+            self.workers[0],
+            [
+                (
+                    ActivityType.WORK,
+                    get_datetime_tz(2024, 3, 6, 8),
+                    get_datetime_tz(2024, 3, 6, 12),
+                ),
+            ],
+        )
+        unchanged_day_creation_time = (
+            WorkDayStats.query.filter(WorkDayStats.day == date(2024, 3, 6))
+            .one()
+            .creation_time
+        )
+
+        with AuthenticatedUserContext(user=self.workers[0]):
+            activities[0].revise(
+                revision_time=datetime(2024, 4, 2),
+                start_time=get_datetime_tz(2024, 3, 8, 8),
+                end_time=get_datetime_tz(2024, 3, 8, 10),
+            )
+            db.session.commit()
+
+        stats = self._assert_stored_stats_are_up_to_date()
+        self.assertEqual(
+            [s["day"] for s in stats], [date(2024, 3, 8), date(2024, 3, 6)]
+        )
+        self.assertEqual(
+            WorkDayStats.query.filter(WorkDayStats.day == date(2024, 3, 6))
+            .one()
+            .creation_time,
+            unchanged_day_creation_time,
+        )
+
+    def test_running_activity_started_on_a_previous_day(self):
+        worker = self.workers[0]
+        now = datetime.now()
+        yesterday = now - timedelta(days=1)
+        today, previous_day = [to_fr_tz(t).date() for t in (now, yesterday)]
+        # Logged yesterday, no stats have been stored since
+        with freeze_time(yesterday), AuthenticatedUserContext(user=worker):
+            mission = Mission.create(
+                submitter=worker,
+                company=self.company,
+                reception_time=yesterday,
+                name="mission",
+            )
+            log_activity(
+                submitter=worker,
+                user=worker,
+                mission=mission,
+                type=ActivityType.DRIVE,
+                switch_mode=False,
+                reception_time=yesterday,
+                start_time=yesterday - timedelta(minutes=1),
+            )
+            db.session.commit()
+        self.assertEqual(
+            [s.day for s in WorkDayStats.query.all()], [previous_day]
+        )
+
+        stats, has_next_page = query_stored_work_day_stats(self.company.id)
+
+        self.assertFalse(has_next_page)
+        self.assertEqual([s["day"] for s in stats], [today, previous_day])
+        self.assertTrue(stats[0]["is_running"])
+        self.assertFalse(stats[1]["is_running"])
+
+        first_page, has_next_page = query_stored_work_day_stats(
+            self.company.id, first=1
+        )
+        self.assertTrue(has_next_page)
+        self.assertEqual(first_page, stats[:1])
+
+    def _log_missions_then_delete_them(self):
+        missions = [
+            self._log_mission(
+                worker,
+                [
+                    (
+                        ActivityType.WORK,
+                        get_datetime_tz(2024, 3, 4, 8),
+                        get_datetime_tz(2024, 3, 4, 12),
+                    ),
+                ],
+            )[0]
+            for worker in self.workers
+        ]
+        executor = AnonymizationExecutor(db.session, dry_run=False)
+        executor.delete_mission_and_dependencies({m.id for m in missions})
+        db.session.commit()
+        self.assertEqual(WorkDayStats.query.count(), 2)
+        return executor
+
+    def test_stats_are_deleted_with_anonymized_user_dependencies(self):
+        executor = self._log_missions_then_delete_them()
+        user_id = self.workers[0].id
+
+        executor.delete_user_dependencies({user_id})
+        db.session.commit()
+
+        self.assertEqual(User.query.filter(User.id == user_id).count(), 0)
+        self.assertEqual(
+            [s.user_id for s in WorkDayStats.query.all()],
+            [self.workers[1].id],
+        )
+
+    def test_stats_are_deleted_with_anonymized_company(self):
+        executor = self._log_missions_then_delete_them()
+        Employment.query.delete()
+
+        executor.delete_company_and_dependencies({self.company.id})
+        db.session.commit()
+
+        self.assertEqual(WorkDayStats.query.count(), 0)
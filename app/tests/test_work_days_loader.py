@@ -0,0 +1,174 @@
+from datetime import date, datetime
+
+from flask.ctx import AppContext
+
+from app import app, db
+from app.domain.log_activities import log_activity
+from app.domain.permissions import ConsultationScope
+from app.domain.work_days import (
+    group_user_events_by_day_with_limit,
+    group_users_events_by_day,
+)
+from app.models import Mission
+from app.models.activity import ActivityType
+from app.seed import (
+    AuthenticatedUserContext,
+    CompanyFactory,
+    EmploymentFactory,
+    UserFactory,
+)
+from app.seed.helpers import get_datetime_tz
+from app.tests import BaseTest
+
+FROM_DATE = date(2024, 3, 1)
+UNTIL_DATE = date(2024, 3, 31)
+
+
+def _describe(work_days):
+    return [
+        (
+            wd.day,
+            wd.start_time,
+            wd.end_time,
+            wd.total_work_duration if wd.activities else None,
+            sorted(m.id for m in wd.missions),
+            sorted(a.id for a in wd._all_activities),
+        )
+        for wd in work_days
+    ]
+
+
+class TestGroupUsersEventsByDay(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.other_company = CompanyFactory.create()
+        self.users = [UserFactory.create() for _ in range(3)]
+        for user in self.users:
+            for company in [self.company, self.other_company]:
+                EmploymentFactory.create(
+                    company=company, submitter=user, user=user
+                )
+        admin = UserFactory.create()
+        EmploymentFactory.create(
+            company=self.company,
+            submitter=admin,
+            user=admin,
+            has_admin_rights=True,
+        )
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+        shared_mission = self._create_mission(self.company, admin)
+        for user in self.users[:2]:
+            self._log(user, shared_mission, 1, 8, 1, 12, submitter=admin)
+            self._log(user, shared_mission, 1, 13, 1, 17, submitter=admin)
+
+        # Across the end of the period
+        self._log(
+            self.users[0],
+            self._create_mission(self.company, self.users[0]),
+            31,
+            22,
+            31,
+            23,
+        )
+        self._log(
+            self.users[1],
+            self._create_mission(self.company, self.users[1]),
+            5,
+            8,
+            5,
+            10,
+            dismiss=True,
+        )
+
+        self._log(
+            self.users[2],
+            self._create_mission(self.other_company, self.users[2]),
+            10,
+            6,
+            10,
+            14,
+        )
+        # Start the tests with a clean identity map
+        db.session.expire_all()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    def _create_mission(self, company, submitter):
+        mission = Mission(
+            company=company,
+            reception_time=datetime.now(),
+            submitter=submitter,
+        )
+        db.session.add(mission)
+        db.session.commit()
+        return mission
+
+    def _log(
+        self,
+        user,
+        mission,
+        start_day,
+        start_hour,
+        end_day,
+        end_hour,
+        submitter=None,
+        dismiss=False,
+    ):
+        submitter = submitter or user
+        with AuthenticatedUserContext(user=submitter):
+            activity = log_activity(
+                submitter=submitter,
+                user=user,
+                mission=mission,
+                type=ActivityType.DRIVE,
+                switch_mode=False,
+                reception_time=datetime.now(),
+                start_time=get_datetime_tz(2024, 3, start_day, start_hour),
+                end_time=get_datetime_tz(2024, 3, end_day, end_hour),
+            )
+            if dismiss:
+                activity.dismiss()
+            db.session.commit()
+
+    def _assert_same_work_days_as_per_user_loading(self, scope):
+        work_days_by_user_id = group_users_events_by_day(
+            self.users,
+            consultation_scope=scope,
+            from_date=FROM_DATE,
+            until_date=UNTIL_DATE,
+            include_dismissed_or_empty_days=True,
+        )
+
+        for user in self.users:
+            work_days, _ = group_user_events_by_day_with_limit(
+                user,
+                consultation_scope=scope,
+                from_date=FROM_DATE,
+                until_date=UNTIL_DATE,
+                include_dismissed_or_empty_days=True,
+            )
+            self.assertEqual(
+                _describe(work_days),
+                _describe(work_days_by_user_id[user.id]),
+            )
+        return work_days_by_user_id
+
+    def test_same_work_days_as_per_user_loading(self):
+        work_days_by_user_id = self._assert_same_work_days_as_per_user_loading(
+            ConsultationScope(
+                company_ids=[self.company.id, self.other_company.id]
+            )
+        )
+        self.assertEqual(len(work_days_by_user_id[self.users[0].id]), 2)
+        self.assertEqual(len(work_days_by_user_id[self.users[2].id]), 1)
+
+    def test_same_work_days_as_per_user_loading_with_company_scope(self):
+        work_days_by_user_id = self._assert_same_work_days_as_per_user_loading(
+            ConsultationScope(company_ids=[self.company.id])
+        )
+        self.assertEqual(work_days_by_user_id[self.users[2].id], [])
@@ -0,0 +1,152 @@
+from datetime import date, datetime
+from io import BytesIO
+from unittest.mock import patch
+from zipfile import ZipFile
+
+from flask.ctx import AppContext
+from pypdf import PdfReader
+
+from app import app, db
+from app.domain.log_activities import log_activity
+from app.domain.permissions import ConsultationScope
+from app.helpers.celery import async_export_work_days_pdf
+from app.helpers.pdf.work_days import (
+    generate_work_days_pdf_for,
+    get_work_days_pdf_file_name,
+)
+from app.models import Export, Mission
+from app.models.activity import ActivityType
+from app.models.export import ExportStatus, ExportType
+from app.seed import AuthenticatedUserContext, CompanyFactory, UserFactory
+from app.seed.helpers import get_datetime_tz
+from app.tests import BaseTest
+
+MIN_DATE = date(2024, 3, 1)
+MAX_DATE = date(2024, 3, 31)
+
+
+def post_rest_authenticated(url, json, user):
+    with app.test_client(
+        mock_authentication_with_user=user
+    ) as c, app.app_context():
+        return c.post(url, json=json)
+
+
+class TestWorkDaysPdfExport(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.company = CompanyFactory.create()
+        self.admin = UserFactory.create(
+            post__company=self.company, post__has_admin_rights=True
+        )
+        self.workers = [
+            UserFactory.create(post__company=self.company) for _ in range(2)
+        ]
+
+        self._app_context = AppContext(app)
+        self._app_context.__enter__()
+
+        for index, worker in enumerate(self.workers):
+            with AuthenticatedUserContext(user=worker):
+                mission = Mission.create(
+                    submitter=worker,
+                    company=self.company,
+                    reception_time=datetime(2024, 3, 4),
+                )
+                for day in range(4, 6 + index * 10):
+                    log_activity(
+                        submitter=worker,
+                        user=worker,
+                        mission=mission,
+                        type=ActivityType.DRIVE,
+                        switch_mode=False,
+                        reception_time=datetime(2024, 3, 31),
+                        start_time=get_datetime_tz(2024, 3, day, 8),
+                        end_time=get_datetime_tz(2024, 3, day, 12),
+                    )
+                db.session.commit()
+
+    def tearDown(self):
+        self._app_context.__exit__(None, None, None)
+        super().tearDown()
+
+    @patch("app.services.exports.async_export_work_days_pdf.delay")
+    def test_export_is_enqueued(self, mock_celery_delay):
+        response = post_rest_authenticated(
+            "/companies/generate_pdf_export",
+            json={
+                "company_ids": [self.company.id],
+                "user_ids": [w.id for w in self.workers],
+                "min_date": MIN_DATE.isoformat(),
+                "max_date": MAX_DATE.isoformat(),
+            },
+            user=self.admin,
+        )
+
+        self.assertEqual(response.status_code, 202)
+        mock_celery_delay.assert_called_once()
+        call_kwargs = mock_celery_delay.call_args[1]
+        self.assertEqual(
+            call_kwargs["user_ids"], sorted(w.id for w in self.workers)
+        )
+        self.assertEqual(call_kwargs["max_date"], MAX_DATE.isoformat())
+
+    def test_export_forbidden_to_employees(self):
+        response = post_rest_authenticated(
+            "/companies/generate_pdf_export",
+            json={
+                "company_ids": [self.company.id],
+                "min_date": MIN_DATE.isoformat(),
+                "max_date": MAX_DATE.isoformat(),
+            },
+            user=self.workers[0],
+        )
+        self.assertNotEqual(response.status_code, 202)
+
+    def test_archive_contains_one_pdf_per_user(self):
+        uploaded = {}
+
+        def upload_export_file(file_path, path, content_type):
+            with open(file_path, "rb") as f:
+                uploaded["content"] = f.read()
+
+        with patch(
+            "app.helpers.celery.S3Client.upload_export_file",
+            side_effect=upload_export_file,
+        ):
+            async_export_work_days_pdf(
+                exporter_id=self.admin.id,
+                company_ids=[self.company.id],
+                user_ids=[w.id for w in self.workers],
+                min_date=MIN_DATE.isoformat(),
+                max_date=MAX_DATE.isoformat(),
+            )
+
+        export = Export.query.one()
+        self.assertEqual(export.export_type, ExportType.WORK_DAYS_PDF)
+        self.assertEqual(export.status, ExportStatus.READY)
+
+        with ZipFile(BytesIO(uploaded["content"])) as archive:
+            self.assertEqual(len(archive.namelist()), len(self.workers))
+            for worker in self.workers:
+                pdf = PdfReader(
+                    BytesIO(
+                        archive.read(
+                            get_work_days_pdf_file_name(
+                                worker, MIN_DATE, MAX_DATE
+                            )
+                        )
+                    )
+                )
+                expected_pdf = PdfReader(
+                    generate_work_days_pdf_for(
+                        worker,
+                        MIN_DATE,
+                        MAX_DATE,
+                        consultation_scope=ConsultationScope(
+                            company_ids=[self.company.id]
+                        ),
+                    )
+                )
+                self.assertEqual(len(pdf.pages), len(expected_pdf.pages))
+                self.assertIn(worker.display_name, pdf.pages[0].extract_text())
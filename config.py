@@ -10,6 +10,10 @@ if os.environ.get("DOTENV_FILE", False):
 
 MOBILIC_ENV = os.environ.get("MOBILIC_ENV", "dev")
 
+# "light" skips the web-only subsystems (GraphQL schemas, controllers, API docs) at boot,
+# for the CLI commands and the workers. They are then registered before the first request.
+MOBILIC_BOOT_MODE = os.environ.get("MOBILIC_BOOT_MODE", "web")
+
 CGU_INITIAL_RELASE_DATE = datetime(2022, 1, 1)
 CGU_INITIAL_VERSION = "v1.0"
 
@@ -29,6 +33,21 @@ class Config:
     OVH_LDP_TOKEN = os.environ.get("OVH_LDP_TOKEN")
     MAXIMUM_TIME_AHEAD_FOR_EVENT = timedelta(minutes=5)
     SIREN_API_KEY = os.environ.get("SIREN_API_KEY")
+    SIREN_API_URL = os.environ.get(
+        "SIREN_API_URL", "https://api.insee.fr/api-sirene/3.11/siret"
+    )
+    SIREN_API_MAX_REQUESTS_PER_MINUTE = int(
+        os.environ.get("SIREN_API_MAX_REQUESTS_PER_MINUTE", 30)
+    )
+    SIREN_API_MAX_WORKERS = int(os.environ.get("SIREN_API_MAX_WORKERS", 4))
+    # SIREN info older than this is requested again from the API
+    SIREN_INFO_MAX_AGE_DAYS = int(os.environ.get("SIREN_INFO_MAX_AGE_DAYS", 7))
+    SIREN_INFO_CACHE_TTL_SECONDS = int(
+        os.environ.get("SIREN_INFO_CACHE_TTL_SECONDS", 3600)
+    )
+    SIREN_INFO_CACHE_MAX_SIZE = int(
+        os.environ.get("SIREN_INFO_CACHE_MAX_SIZE", 1000)
+    )
     FRONTEND_URL = os.environ.get("FRONTEND_URL")
     MAILJET_API_KEY = os.environ.get("MAILJET_API_KEY")
     MAILJET_API_SECRET = os.environ.get("MAILJET_API_SECRET")
@@ -115,6 +134,13 @@ class Config:
     CONTROL_SIGNING_KEY = os.environ.get("CONTROL_SIGNING_KEY")
     CERTIFICATION_API_KEY = os.environ.get("CERTIFICATION_API_KEY")
     API_KEY_PREFIX = os.environ.get("API_KEY_PREFIX", "mobilic_live_")
+    # Successful API key verifications are cached per process
+    API_KEY_CACHE_TTL_SECONDS = int(
+        os.environ.get("API_KEY_CACHE_TTL_SECONDS", 300)
+    )
+    API_KEY_CACHE_MAX_SIZE = int(
+        os.environ.get("API_KEY_CACHE_MAX_SIZE", 1000)
+    )
     NB_BAD_PASSWORD_TRIES_BEFORE_BLOCKING = 10
     COMPANY_EXCLUDE_ONBOARDING_EMAILS = json.loads(
         os.environ.get("COMPANY_EXCLUDE_ONBOARDING_EMAILS", "[]")
@@ -138,6 +164,21 @@ class Config:
         "CELERY_BROKER_URL", "redis://localhost:6379/0"
     )
     EXPORT_MAX = int(os.environ.get("EXPORT_MAX", 1000))
+    # Opt-in file of sampled GraphQL resolver timings, see flask graphql_perf_report
+    GRAPHQL_PERF_LOG_FILE = os.environ.get("GRAPHQL_PERF_LOG_FILE")
+    GRAPHQL_PERF_SAMPLE_RATE = float(
+        os.environ.get("GRAPHQL_PERF_SAMPLE_RATE", 0.01)
+    )
+    # Parsed and validated GraphQL documents are cached per process
+    GRAPHQL_DOCUMENT_CACHE_MAX_SIZE = int(
+        os.environ.get("GRAPHQL_DOCUMENT_CACHE_MAX_SIZE", 500)
+    )
+    # Queries registered by clients with automatic persisted queries, per process
+    GRAPHQL_PERSISTED_QUERIES_MAX_SIZE = int(
+        os.environ.get("GRAPHQL_PERSISTED_QUERIES_MAX_SIZE", 1000)
+    )
+    # Number of processes rendering the chunks of a multi-file export
+    EXPORT_NB_WORKERS = int(os.environ.get("EXPORT_NB_WORKERS", 1))
     CGU_VERSION = os.environ.get("CGU_VERSION", "v1.0")
     CGU_RELEASE_DATE = (
         datetime.strptime(
@@ -0,0 +1,62 @@
+"""add regulation_work_day_summary table
+
+Per-day work summaries used by the incremental regulation computation to
+evaluate weekly rules without reloading the missions of untouched days.
+
+Revision ID: 3b9d6e1f4a27
+Revises: c8f1a2b3d4e5
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "3b9d6e1f4a27"
+down_revision = "c8f1a2b3d4e5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "regulation_work_day_summary",
+        sa.Column(
+            "creation_time",
+            sa.DateTime(),
+            nullable=False,
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "submitter_type",
+            sa.Enum(
+                "employee", "admin", name="submittertype", native_enum=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "summary",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "user_id",
+            "submitter_type",
+            "day",
+            name="only_one_work_day_summary_per_user_submitter_type_and_day",
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("regulation_work_day_summary")
@@ -0,0 +1,49 @@
+"""add work days pdf export type
+
+Revision ID: 4e8a1c3f5b72
+Revises: 9d4b2f7e6a13
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4e8a1c3f5b72"
+down_revision = "9d4b2f7e6a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE export DROP CONSTRAINT IF EXISTS exporttype")
+    op.alter_column(
+        "export",
+        "export_type",
+        type_=sa.Enum(
+            "excel",
+            "refused_cgu",
+            "tachograph",
+            "pdf",
+            name="exporttype",
+            native_enum=False,
+        ),
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM export WHERE export_type = 'pdf'")
+    op.execute("ALTER TABLE export DROP CONSTRAINT IF EXISTS exporttype")
+    op.alter_column(
+        "export",
+        "export_type",
+        type_=sa.Enum(
+            "excel",
+            "refused_cgu",
+            "tachograph",
+            name="exporttype",
+            native_enum=False,
+        ),
+    )
@@ -0,0 +1,69 @@
+"""add regulation_backfill_task table
+
+One row per user to recompute, claimed by the regulation alerts backfill
+workers.
+
+Revision ID: 5f1d8b2c7e94
+Revises: 4e8a1c3f5b72
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5f1d8b2c7e94"
+down_revision = "4e8a1c3f5b72"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "regulation_backfill_task",
+        sa.Column("creation_time", sa.DateTime(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "pending",
+                "running",
+                "done",
+                "failed",
+                name="regulationbackfilltaskstatus",
+                native_enum=False,
+            ),
+            server_default="pending",
+            nullable=False,
+        ),
+        sa.Column("from_date", sa.Date(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("worker", sa.String(length=255), nullable=True),
+        sa.Column("start_time", sa.DateTime(), nullable=True),
+        sa.Column("end_time", sa.DateTime(), nullable=True),
+        sa.Column("duration", sa.Float(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_index(
+        "ix_regulation_backfill_task_status",
+        "regulation_backfill_task",
+        ["status", "id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_regulation_backfill_task_status",
+        table_name="regulation_backfill_task",
+    )
+    op.drop_table("regulation_backfill_task")
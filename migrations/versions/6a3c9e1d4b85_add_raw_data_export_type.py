@@ -0,0 +1,51 @@
+"""add raw data export type
+
+Revision ID: 6a3c9e1d4b85
+Revises: 5f1d8b2c7e94
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6a3c9e1d4b85"
+down_revision = "5f1d8b2c7e94"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE export DROP CONSTRAINT IF EXISTS exporttype")
+    op.alter_column(
+        "export",
+        "export_type",
+        type_=sa.Enum(
+            "excel",
+            "refused_cgu",
+            "tachograph",
+            "pdf",
+            "raw_data",
+            name="exporttype",
+            native_enum=False,
+        ),
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM export WHERE export_type = 'raw_data'")
+    op.execute("ALTER TABLE export DROP CONSTRAINT IF EXISTS exporttype")
+    op.alter_column(
+        "export",
+        "export_type",
+        type_=sa.Enum(
+            "excel",
+            "refused_cgu",
+            "tachograph",
+            "pdf",
+            name="exporttype",
+            native_enum=False,
+        ),
+    )
@@ -0,0 +1,85 @@
+"""add work_day_stats table
+
+Daily work statistics per user and company, maintained on write and read by
+the workDays query of the company.
+
+Revision ID: 7c2e5a9d1b36
+Revises: 3b9d6e1f4a27
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "7c2e5a9d1b36"
+down_revision = "3b9d6e1f4a27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "work_day_stats",
+        sa.Column(
+            "creation_time",
+            sa.DateTime(),
+            nullable=False,
+        ),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("last_activity_start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.Column("has_running_activity", sa.Boolean(), nullable=False),
+        sa.Column("service_duration", sa.Integer(), nullable=False),
+        sa.Column("total_work_duration", sa.Integer(), nullable=False),
+        sa.Column(
+            "activity_durations",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column(
+            "expenditures",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column(
+            "mission_names",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["company_id"],
+            ["company.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "company_id",
+            "day",
+            "user_id",
+            name="only_one_work_day_stats_per_company_day_and_user",
+        ),
+    )
+    op.create_index(
+        op.f("ix_work_day_stats_user_id"),
+        "work_day_stats",
+        ["user_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_work_day_stats_user_id"), table_name="work_day_stats"
+    )
+    op.drop_table("work_day_stats")
@@ -0,0 +1,44 @@
+"""add tachograph export type
+
+Revision ID: 9d4b2f7e6a13
+Revises: 7c2e5a9d1b36
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9d4b2f7e6a13"
+down_revision = "7c2e5a9d1b36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE export DROP CONSTRAINT IF EXISTS exporttype")
+    op.alter_column(
+        "export",
+        "export_type",
+        type_=sa.Enum(
+            "excel",
+            "refused_cgu",
+            "tachograph",
+            name="exporttype",
+            native_enum=False,
+        ),
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM export WHERE export_type = 'tachograph'")
+    op.execute("ALTER TABLE export DROP CONSTRAINT IF EXISTS exporttype")
+    op.alter_column(
+        "export",
+        "export_type",
+        type_=sa.Enum(
+            "excel", "refused_cgu", name="exporttype", native_enum=False
+        ),
+    )
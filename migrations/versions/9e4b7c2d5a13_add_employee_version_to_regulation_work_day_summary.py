@@ -0,0 +1,54 @@
+"""add employee_version to regulation_work_day_summary
+
+The summaries of a same user, submitter type and day differ whether the work
+days are computed from the versions of the employee or not.
+
+Revision ID: 9e4b7c2d5a13
+Revises: 6a3c9e1d4b85
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9e4b7c2d5a13"
+down_revision = "6a3c9e1d4b85"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Summaries are a cache, the existing ones cannot tell their version
+    op.execute("DELETE FROM regulation_work_day_summary")
+    op.add_column(
+        "regulation_work_day_summary",
+        sa.Column("employee_version", sa.Boolean(), nullable=False),
+    )
+    op.drop_constraint(
+        "only_one_work_day_summary_per_user_submitter_type_and_day",
+        "regulation_work_day_summary",
+        type_="unique",
+    )
+    op.create_unique_constraint(
+        "one_work_day_summary_per_user_submitter_type_version_and_day",
+        "regulation_work_day_summary",
+        ["user_id", "submitter_type", "employee_version", "day"],
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM regulation_work_day_summary")
+    op.drop_constraint(
+        "one_work_day_summary_per_user_submitter_type_version_and_day",
+        "regulation_work_day_summary",
+        type_="unique",
+    )
+    op.create_unique_constraint(
+        "only_one_work_day_summary_per_user_submitter_type_and_day",
+        "regulation_work_day_summary",
+        ["user_id", "submitter_type", "day"],
+    )
+    op.drop_column("regulation_work_day_summary", "employee_version")